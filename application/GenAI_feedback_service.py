@@ -1,17 +1,19 @@
 import os
 import re
-from typing import Optional
+from typing import List, Optional
 
 from openai import OpenAI
 
 from domain.student import StudentRepository
-from domain.summary_repositories import GradingLogRepository
+from domain.summary_repositories import GradingLogRepository, SummaryFeedback
+from infrastructure.mysql_unit_of_work import external_io
 
 
 class OpenAIClient:
     def __init__(self, api_key: str):
         self.client = OpenAI(api_key=api_key)
 
+    @external_io
     def generate_content(self, prompt: str, system_role: str, feedback_type: str) -> Optional[str]:
         """
         Generate content based on a prompt and system role.
@@ -43,6 +45,10 @@ class OpenAIClient:
             print(f"Error calling OpenAI API: {e}")
             return None
 
+    def close(self):
+        """關閉底層 HTTP 連線池（行程結束時由 container 呼叫）"""
+        self.client.close()
+
 
 class GenAIFeedbackService:
     def __init__(self, openai_client: OpenAIClient, student_repo: StudentRepository, grading_logs_repo: GradingLogRepository):
@@ -51,29 +57,58 @@ class GenAIFeedbackService:
         self.grading_logs_repo = grading_logs_repo
 
     def generate_feedback_for_summary(self, stdID: str, contents_name: str, example_summary: str, student_summary: str, summary_grading_log_id: int, basic_feedback: str) -> str:
+        try:
+            feedback = self.compose_summary_feedback(
+                stdID, contents_name, example_summary, student_summary, summary_grading_log_id, basic_feedback)
+            if feedback is None:
+                return "Error generating feedback from GPT."
+            # Store feedback in database
+            return self.grading_logs_repo.write_summary_GPT_feedback_to_verify_db_with_check_repeat(
+                feedback.student_id, feedback.topic_id, feedback.gpt_feedback, feedback.context_title,
+                feedback.student_summary, feedback.summary_gradding_log_id, feedback.basic_feedback, feedback.line_id
+            )
+        except Exception as e:
+            print(f"Error in generating feedback for summary: {e}")
+            return "Error in processing feedback."
+
+    def generate_feedbacks_for_summaries(self, requests: List[dict]) -> int:
+        """
+        批次評分用：每位學生各自叫 GPT，全部產生完再一次寫入 verify DB（一個交易）。
+        requests 的每一筆是 generate_feedback_for_summary 的參數（dict）；
+        GPT 失敗的學生略過，回傳寫入筆數。
+        """
+        feedbacks = []
+        for request in requests:
+            try:
+                feedback = self.compose_summary_feedback(**request)
+            except Exception as e:
+                print(f"Error in generating feedback for summary: {e}")
+                continue
+            if feedback is not None:
+                feedbacks.append(feedback)
+        return self.grading_logs_repo.write_summary_GPT_feedbacks_to_verify_db(feedbacks)
+
+    def compose_summary_feedback(self, stdID: str, contents_name: str, example_summary: str, student_summary: str, summary_grading_log_id: int, basic_feedback: str) -> Optional[SummaryFeedback]:
+        """叫 GPT 產生回饋並整理成要寫進 SummarySubmissions 的一筆；GPT 沒回應時回傳 None"""
         user_prompt = self.create_summary_prompt(
             example_summary, student_summary)
 
         feedback = self.openai_client.generate_content(
             user_prompt, "", feedback_type="summary")
         if feedback is None:
-            return "Error generating feedback from GPT."
+            return None
 
         suggestions = re.findall(
             r'<suggestion>(.*?)</suggestion>', feedback, re.DOTALL)
         GPT_Feedback = "".join([suggestion.strip()
                                for suggestion in suggestions])
 
-        try:
-            student = self.student_repo.find_by_student_id(stdID)
-            # Store feedback in database
-            return_message = self.grading_logs_repo.write_summary_GPT_feedback_to_verify_db_with_check_repeat(
-                stdID, contents_name, GPT_Feedback, student.context_title, student_summary, summary_grading_log_id, basic_feedback, student.line_user_id
-            )
-            return return_message
-        except Exception as e:
-            print(f"Error in generating feedback for summary: {e}")
-            return "Error in processing feedback."
+        student = self.student_repo.find_by_student_id(stdID)
+        return SummaryFeedback(
+            student_id=stdID, topic_id=contents_name, gpt_feedback=GPT_Feedback,
+            context_title=student.context_title, student_summary=student_summary,
+            summary_gradding_log_id=summary_grading_log_id, basic_feedback=basic_feedback,
+            line_id=student.line_user_id)
 
     def create_summary_prompt(self, example_summary: str, student_summary: str) -> str:
         try:
@@ -19,7 +19,9 @@ class AskTAService:
             reply_token=reply_token, text="請同學留下問題~助教會盡快回覆!")
 
     def submit_question(self, student: Student, message_log_id: int):
-        self.user_state_accessor.set_state(
-            student.line_user_id, UserStateEnum.IDLE)
+        # 同一位學生連送兩則訊息時只有一則會被記成提問
+        if not self.user_state_accessor.transition(
+                student.line_user_id, UserStateEnum.IDLE, expected_state=UserStateEnum.AWAITING_TA_QUESTION):
+            return
         self.chatbot_logger.log_event(student_id=student.student_id, event_type=EventEnum.ASK_TA_QUESTION,
                                       message_log_id=message_log_id, problem_id=None, hw_id=None, context_title=student.context_title)
@@ -0,0 +1,250 @@
+# application/buffered_log_writer.py
+"""
+message_logs / event_logs 的非同步批次寫入。
+
+原本 ChatbotLogger 每則訊息、每個事件都在使用者的事件流程裡同步 INSERT 一次。
+這裡改成先放進行程內的有界緩衝區，背景執行緒累積到 batch_size 筆或等了 flush_interval 秒
+就用 executemany 一次寫一批（同一批裡先寫 message 再寫 event）。
+
+- 緩衝區滿了依 overflow_policy 處理："drop" 直接丟掉新的這筆；
+  "block" 最多等 block_timeout 秒讓出空間，還是滿的才丟
+- 寫入失敗整批放回緩衝區前端，下個週期重試，連續失敗 max_retries 次才放棄；
+  log_id 撞號（DuplicateLogIdError）重試也沒用，記 error 後直接放棄這批
+- close() 時把剩下的全部寫完（container.shutdown_resources() / gunicorn worker_exit 會呼叫）
+
+注意: 這是「盡量記錄」：行程被 kill -9 時緩衝區裡的會遺失；event 沒有客戶端 id，重試時可能重複一筆。
+注意: message 的 log_id 是 64-bit（log_id_generator），資料庫要先套用 migrations/linebot/0006（bigint）才能用這個模式。
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from domain.event_log import EventLog, EventLogRepository
+from domain.message_log import (DuplicateLogIdError, MessageLog,
+                                MessageLogRepository)
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop", "block")
+
+
+class BufferedLogWriter:
+    def __init__(self, message_repo: MessageLogRepository, event_repo: EventLogRepository,
+                 max_buffer: int = 10000, batch_size: int = 200, flush_interval: float = 1.0,
+                 overflow_policy: str = "drop", block_timeout: float = 1.0, max_retries: int = 3):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy must be one of {OVERFLOW_POLICIES}")
+        self.message_repo = message_repo
+        self.event_repo = event_repo
+        self.max_buffer = int(max_buffer)
+        self.batch_size = int(batch_size)
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.max_retries = int(max_retries)
+
+        self._cond = threading.Condition()
+        # ("message" | "event", 資料列)，維持寫入順序
+        self._buffer: deque[tuple[str, object]] = deque()
+        self._in_flight = 0
+        self._oldest_at: Optional[float] = None
+        self._attempts = 0
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._enqueued = 0
+        self._written_messages = 0
+        self._written_events = 0
+        self._dropped = 0
+        self._flushes = 0
+        self._write_errors = 0
+        self._last_flush_ms: Optional[float] = None
+
+    # ---------- producer ----------
+
+    def submit_message(self, message_log: MessageLog) -> bool:
+        if message_log.log_id is None:
+            raise ValueError("buffered message logs need a client-generated log_id")
+        return self._submit("message", message_log)
+
+    def submit_event(self, event_log: EventLog) -> bool:
+        return self._submit("event", event_log)
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        with self._cond:
+            self._start_locked()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """要求馬上寫出並等到緩衝區清空，回傳是否在 timeout 內完成"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._start_locked()
+            self._flush_requested = bool(self._buffer)
+            self._cond.notify_all()
+            while self._buffer or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=30)
+            self._thread = None
+        # 從沒啟動過（或背景執行緒沒收完）就在這裡同步寫掉剩下的
+        self._drain_remaining()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "overflow_policy": self.overflow_policy,
+                "max_buffer": self.max_buffer,
+                "batch_size": self.batch_size,
+                "flush_interval": self.flush_interval,
+                "running": self._thread is not None,
+                "pending": len(self._buffer) + self._in_flight,
+                "enqueued": self._enqueued,
+                "written_messages": self._written_messages,
+                "written_events": self._written_events,
+                "dropped": self._dropped,
+                "flushes": self._flushes,
+                "write_errors": self._write_errors,
+                "last_flush_ms": self._last_flush_ms,
+            }
+
+    # ---------- internals ----------
+
+    def _submit(self, kind: str, row) -> bool:
+        with self._cond:
+            if self._closed:
+                # 關閉後才進來的（例如還在收尾的 webhook thread）直接同步寫
+                return self._write_now(kind, row)
+            self._start_locked()
+            if len(self._buffer) + self._in_flight >= self.max_buffer:
+                if self.overflow_policy == "block":
+                    self._cond.wait_for(
+                        lambda: len(self._buffer) + self._in_flight < self.max_buffer or self._closed,
+                        timeout=self.block_timeout)
+                if self._closed or len(self._buffer) + self._in_flight >= self.max_buffer:
+                    self._dropped += 1
+                    if self._dropped == 1 or self._dropped % 1000 == 0:
+                        logger.warning("log buffer full (%d rows), %d rows dropped so far",
+                                       self.max_buffer, self._dropped)
+                    return False
+            self._buffer.append((kind, row))
+            self._enqueued += 1
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def _start_locked(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(
+                target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    timeout = None if self._oldest_at is None else \
+                        max(self._oldest_at + self.flush_interval - time.monotonic(), 0)
+                    self._cond.wait(timeout)
+                if self._closed and not self._buffer:
+                    return
+                batch = self._take_batch()
+            self._write_batch(batch)
+            if self._write_errors and self._attempts:
+                # 寫入失敗：稍等再試，避免 DB 掛掉時空轉
+                with self._cond:
+                    if not self._closed:
+                        self._cond.wait(min(self.flush_interval, 1.0))
+
+    def _due(self) -> bool:
+        if not self._buffer:
+            return False
+        return self._flush_requested or len(self._buffer) >= self.batch_size or \
+            time.monotonic() - self._oldest_at >= self.flush_interval
+
+    def _take_batch(self) -> list:
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        self._in_flight = len(batch)
+        self._oldest_at = time.monotonic() if self._buffer else None
+        return batch
+
+    def _write_batch(self, batch: list):
+        messages = [row for kind, row in batch if kind == "message"]
+        events = [row for kind, row in batch if kind == "event"]
+        started = time.perf_counter()
+        try:
+            # 先寫 message，event 的 message_log_id 才指得到已存在的列
+            self.message_repo.save_message_logs(messages)
+            self.event_repo.save_event_logs(events)
+        except Exception as e:
+            retryable = not isinstance(e, DuplicateLogIdError)
+            logger.log(logging.WARNING if retryable else logging.ERROR,
+                       "log batch write failed (%d messages, %d events)",
+                       len(messages), len(events), exc_info=True)
+            with self._cond:
+                self._write_errors += 1
+                self._attempts += 1
+                self._in_flight = 0
+                if retryable and self._attempts < self.max_retries and not self._closed:
+                    # message 以 log_id 去重，重送安全
+                    self._buffer.extendleft(reversed(batch))
+                    self._oldest_at = time.monotonic()
+                else:
+                    self._dropped += len(batch)
+                    self._attempts = 0
+                if not self._buffer:
+                    self._flush_requested = False
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            self._attempts = 0
+            self._in_flight = 0
+            if not self._buffer:
+                self._flush_requested = False
+            self._flushes += 1
+            self._written_messages += len(messages)
+            self._written_events += len(events)
+            self._last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+            self._cond.notify_all()
+
+    def _drain_remaining(self):
+        with self._cond:
+            batch = list(self._buffer)
+            self._buffer.clear()
+            self._in_flight = len(batch)
+            self._oldest_at = None
+        if batch:
+            self._write_batch(batch)
+
+    def _write_now(self, kind: str, row) -> bool:
+        try:
+            if kind == "message":
+                self.message_repo.save_message_logs([row])
+            else:
+                self.event_repo.save_event_logs([row])
+        except Exception:
+            logger.warning("log write after close failed", exc_info=True)
+            self._dropped += 1
+            return False
+        if kind == "message":
+            self._written_messages += 1
+        else:
+            self._written_events += 1
+        return True
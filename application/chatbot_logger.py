@@ -1,14 +1,26 @@
 # application/chatbot_logger.py
 from datetime import datetime
 
+from application.buffered_log_writer import BufferedLogWriter
+from application.log_id_generator import TimeOrderedIdGenerator
 from domain.event_log import EventEnum, EventLog, EventLogRepository
 from domain.message_log import MessageLog, MessageLogRepository
 
 
 class ChatbotLogger:
-    def __init__(self, message_repo: MessageLogRepository, event_repo: EventLogRepository):
+    def __init__(self, message_repo: MessageLogRepository, event_repo: EventLogRepository,
+                 writer: BufferedLogWriter = None, id_generator: TimeOrderedIdGenerator = None):
+        """
+        writer: 有給就改成非同步批次寫入（message 的 log_id 由 id_generator 在本地產生，
+        同一行程必須共用同一個產生器，container 裡是單例）；
+        沒給就維持原本的同步 INSERT，log_id 取 AUTO_INCREMENT。
+        """
+        if writer is not None and id_generator is None:
+            raise ValueError("buffered logging needs an id_generator (LOG_WORKER_ID)")
         self.message_repo = message_repo
         self.event_repo = event_repo
+        self.writer = writer
+        self.id_generator = id_generator
 
     def log_message(self, student_id: str, message: str, context_title: str = None) -> int:
         msg_log = MessageLog(
@@ -17,7 +29,13 @@ class ChatbotLogger:
             message=message,
             context_title=context_title
         )
-        return self.message_repo.save_message_log(msg_log)
+        if self.writer is None:
+            return self.message_repo.save_message_log(msg_log)
+
+        # 還沒寫進 DB 就先有 id，後面的 log_event 可以直接引用
+        msg_log.log_id = self.id_generator.next_id()
+        self.writer.submit_message(msg_log)
+        return msg_log.log_id
 
     def log_event(self, student_id: str, event_type: EventEnum, message_log_id: int = None,
                   problem_id=None, hw_id=None, context_title=None):
@@ -30,4 +48,7 @@ class ChatbotLogger:
             hw_id=hw_id,
             context_title=context_title
         )
-        self.event_repo.save_event_log(event_log)
+        if self.writer is None:
+            self.event_repo.save_event_log(event_log)
+            return
+        self.writer.submit_event(event_log)
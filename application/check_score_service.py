@@ -1,6 +1,6 @@
 from application.chatbot_logger import ChatbotLogger
 from application.user_state_accessor import UserStateAccessor
-from domain.course import CourseRepository
+from domain.course import Course, CourseRepository
 from domain.event_log import EventEnum
 from domain.score import ScoreAggregator, ScoreReport, ScoreAggregationFailed
 from domain.student import Student
@@ -21,8 +21,9 @@ class CheckScoreService:
         self.line_service = line_service
         self.chatbot_logger = chatbot_logger
 
-    def check_publish_contents(self, student: Student, reply_token: str):
-        course = self.course_repo.get_course_shell(student.context_title)
+    def check_publish_contents(self, student: Student, reply_token: str, course: Course = None):
+        # course: 呼叫端已經讀好的課程 shell（populate_units 會改它，請給複本），沒給才查
+        course = course or self.course_repo.get_course_shell(student.context_title)
         course = self.course_repo.populate_units(course)
 
         if course.units == []:
@@ -41,8 +42,8 @@ class CheckScoreService:
         self.user_state_accessor.set_state(
             student.line_user_id, UserStateEnum.AWAITING_CONTENTS_NAME)
 
-    def check_score(self, student: Student, reply_token: str, target_content: str, mistake_review_sheet_url: str, message_log_id: int):
-        course = self.course_repo.get_course_shell(student.context_title)
+    def check_score(self, student: Student, reply_token: str, target_content: str, mistake_review_sheet_url: str, message_log_id: int, course: Course = None):
+        course = course or self.course_repo.get_course_shell(student.context_title)
         course = self.course_repo.populate_units(course)
 
         unit_names = [unit.name for unit in course.units]
@@ -0,0 +1,186 @@
+# application/connection_prewarmer.py
+"""
+依課表預熱 Moodle / OJ 連線。
+
+註冊與查分的尖峰很好預測：就在 course_info.day_of_week 那天上課時段。
+原本第一個進來的學生要自己付 SSH tunnel + DB 連線的冷啟動成本，這裡在
+上課前 lead_minutes 分鐘先把連線池打開，整個上課時段每 interval 秒 warm_up() 一次
+（interval 要小於連線池的 idle_timeout），時段結束就不管了，交給原本的閒置自動關閉。
+
+每個時段結束時記錄一次預熱命中率：時段內學生的借用中，有多少不必自己建 tunnel。
+注意: gunicorn 每個 worker 各有一份連線池，也各自跑一個 prewarmer。
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from domain.course import CourseRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _WarmWindow:
+    start: datetime
+    end: datetime
+    courses: set[str]
+    # target 名稱 -> 時段開始時的 (checkouts, tunnel_starts)
+    baseline: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # target 名稱 -> [預熱借用次數, 預熱時自己建起來的 tunnel 數]
+    own: dict[str, list[int]] = field(default_factory=dict)
+
+
+class ConnectionPrewarmer:
+    def __init__(self, course_repo: CourseRepository, targets: dict,
+                 lead_minutes: float = 15, session_minutes: float = 180,
+                 class_start_hour: int = 9, interval: float = 30,
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        targets: 名稱 -> 連線池，需提供 warm_up() 與 stats()（checkouts / tunnel_starts），
+        例如 TunneledPostgreSQLPool、LazyMoodleConnectionManager。
+        """
+        self.course_repo = course_repo
+        self.targets = dict(targets)
+        self.lead = timedelta(minutes=lead_minutes)
+        self.session = timedelta(minutes=session_minutes)
+        self.class_start_hour = int(class_start_hour)
+        self.interval = interval
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._windows: dict[datetime, _WarmWindow] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._ticks = 0
+        self._warmups = 0
+        self._warmup_errors = 0
+        self._windows_completed = 0
+        self._last_hit_rate: dict[str, Optional[float]] = {}
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="connection-prewarmer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def tick(self, now: Optional[datetime] = None) -> bool:
+        """檢查一次課表；在任一上課時段內就預熱所有 target，回傳這次是否有預熱"""
+        now = now or self.clock()
+        with self._lock:
+            self._ticks += 1
+
+        active = self._active_windows(now)
+        with self._lock:
+            for key, window in active.items():
+                if key not in self._windows:
+                    window.baseline = {name: self._counters(target)
+                                       for name, target in self.targets.items()}
+                    window.own = {name: [0, 0] for name in self.targets}
+                    self._windows[key] = window
+                    logger.info("prewarm window %s-%s opened for %s",
+                                window.start, window.end, sorted(window.courses))
+            ended = [self._windows.pop(key) for key in list(self._windows)
+                     if key not in active]
+            running = list(self._windows.values())
+
+        for window in ended:
+            self._finish(window)
+
+        if not running:
+            return False
+
+        for name, target in self.targets.items():
+            starts_before = self._counters(target)[1]
+            try:
+                target.warm_up()
+            except Exception:
+                logger.warning("prewarm of %s failed", name, exc_info=True)
+                with self._lock:
+                    self._warmup_errors += 1
+                continue
+            started = self._counters(target)[1] - starts_before
+            with self._lock:
+                self._warmups += 1
+                for window in running:
+                    window.own[name][0] += 1
+                    window.own[name][1] += started
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "lead_minutes": self.lead.total_seconds() / 60,
+                "session_minutes": self.session.total_seconds() / 60,
+                "class_start_hour": self.class_start_hour,
+                "running": self._thread is not None,
+                "active_windows": [
+                    {"start": w.start.isoformat(), "end": w.end.isoformat(),
+                     "courses": sorted(w.courses)}
+                    for w in self._windows.values()],
+                "ticks": self._ticks,
+                "warmups": self._warmups,
+                "warmup_errors": self._warmup_errors,
+                "windows_completed": self._windows_completed,
+                "last_hit_rate": dict(self._last_hit_rate),
+            }
+
+    # ---------- internals ----------
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:
+                # 查課表失敗（例如 DB 暫時連不上）不能讓排程執行緒死掉
+                logger.warning("prewarm tick failed", exc_info=True)
+            self._stop.wait(self.interval)
+
+    def _active_windows(self, now: datetime) -> dict[datetime, _WarmWindow]:
+        windows: dict[datetime, _WarmWindow] = {}
+        for course in self.course_repo.get_in_progress_courses():
+            # 今天與昨天的課都要看，時段可能跨過午夜
+            for days_ago in (0, 1):
+                day = (now - timedelta(days=days_ago)).date()
+                if day.weekday() != course.day_of_week:
+                    continue
+                class_start = datetime.combine(day, datetime.min.time()) + \
+                    timedelta(hours=self.class_start_hour)
+                start, end = class_start - self.lead, class_start + self.session
+                if start <= now < end:
+                    window = windows.setdefault(
+                        class_start, _WarmWindow(start=start, end=end, courses=set()))
+                    window.courses.add(course.context_title)
+        return windows
+
+    def _finish(self, window: _WarmWindow):
+        """時段結束：扣掉預熱自己的借用與 tunnel 建立，算學生借用的命中率"""
+        rates = {}
+        for name, target in self.targets.items():
+            checkouts, starts = self._counters(target)
+            base_checkouts, base_starts = window.baseline.get(name, (checkouts, starts))
+            own_checkouts, own_starts = window.own.get(name, [0, 0])
+            user_checkouts = max(checkouts - base_checkouts - own_checkouts, 0)
+            cold = min(max(starts - base_starts - own_starts, 0), user_checkouts)
+            rates[name] = round((user_checkouts - cold) / user_checkouts, 4) \
+                if user_checkouts else None
+            logger.info("prewarm window %s-%s %s: %d checkouts, %d cold starts, hit rate %s",
+                        window.start, window.end, name, user_checkouts, cold, rates[name])
+        with self._lock:
+            self._windows_completed += 1
+            self._last_hit_rate = rates
+
+    @staticmethod
+    def _counters(target) -> tuple[int, int]:
+        stats = target.stats()
+        return stats.get("checkouts", 0), stats.get("tunnel_starts", 0)
@@ -12,12 +12,13 @@ from application.mail_carrier import MailCarrier, ManualRegradeSummaryContent
 from application.message_builders.summary_builders import \
     ManualGradeConfirmationBuilder
 from application.user_state_accessor import UserStateAccessor
-from domain.course import CourseRepository
+from domain.course import Course, CourseRepository
 from domain.event_log import EventEnum
 from domain.student import Student
 from domain.summary_repositories import GradingLogRepository, SuggestionQueryRepository
 from domain.user_state import UserStateEnum
 from infrastructure.gateways.line_api_service import LineApiService
+from infrastructure.mysql_unit_of_work import external_io
 
 Status = Literal['graded', 'repeat', 'no_summary', 'error']
 
@@ -31,8 +32,11 @@ class _GradeSingleResponseModel(BaseModel):
 class GraderClient:  # ← 這個類別現在也符合 GradingPort
     def __init__(self, base_url: str, api_key: str, line_service: LineApiService, course_repo: CourseRepository,
                  grading_logs_repo: GradingLogRepository, suggestion_repo: SuggestionQueryRepository, feedbacker, mail_carrier: MailCarrier, chatbot_logger: ChatbotLogger, user_state_accessor: UserStateAccessor,
-                 timeout: float = 8.0, retries: int = 2, backoff: float = 0.5):
+                 timeout: float = 8.0, retries: int = 2, backoff: float = 0.5,
+                 session: Optional[requests.Session] = None):
         self.base_url = base_url.rstrip("/")
+        # 行程內共用的 HTTP session（keep-alive）；沒給就每次直接用 requests.post
+        self.http = session or requests
         self.api_key = api_key
         self.timeout = timeout
         self.retries = retries
@@ -47,13 +51,14 @@ class GraderClient:  # ← 這個類別現在也符合 GradingPort
         self.user_state_accessor = user_state_accessor
         self.chatbot_logger = chatbot_logger
 
+    @external_io
     def _post(self, path: str, json: Dict[str, Any]) -> Dict[str, Any]:
         url = f"{self.base_url}{path}"
         headers = {"Content-Type": "application/json",
                    "X-API-Key": self.api_key}
         for attempt in range(self.retries + 1):
             try:
-                r = requests.post(
+                r = self.http.post(
                     url, json=json, headers=headers, timeout=self.timeout)
                 if r.status_code == 200:
                     return r.json()
@@ -100,9 +105,9 @@ class GraderClient:  # ← 這個類別現在也符合 GradingPort
             self.line_service.reply_message(
                 reply_token=reply_token, messages=[message_to_send])
 
-    def ask_manual_regrade_reason(self, student: Student, contents_name: str, reply_token: str, message_log_id: str):
-        ta_emails = self.course_repo.get_course_shell(
-            student.context_title).ta_emails
+    def ask_manual_regrade_reason(self, student: Student, contents_name: str, reply_token: str, message_log_id: str, course: Course = None):
+        course = course or self.course_repo.get_course_shell(student.context_title)
+        ta_emails = course.ta_emails
         self.mail_carrier.send_email(
             to=ta_emails,
             content=ManualRegradeSummaryContent(
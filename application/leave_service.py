@@ -3,7 +3,7 @@ from application.mail_carrier import LeaveEmailContent, MailCarrier
 from application.message_builders.leave_builders import \
     LeaveConfirmationBuilder
 from application.user_state_accessor import UserStateAccessor
-from domain.course import CourseRepository
+from domain.course import Course, CourseRepository
 from domain.event_log import EventEnum
 from domain.leave_request import LeaveRequest, LeaveRequestRepository
 from domain.student import Student
@@ -25,8 +25,9 @@ class LeaveService:
         self.chatbot_logger = chatbot_logger
         self.mail_carrier = mail_carrier
 
-    def apply_for_leave(self, student: Student, reply_token: str):
-        course = self.course_repo.get_course_shell(student.context_title)
+    def apply_for_leave(self, student: Student, reply_token: str, course: Course = None):
+        # course: 呼叫端（webhook 的 SessionSnapshot）已經讀好的課程 shell，沒給才查
+        course = course or self.course_repo.get_course_shell(student.context_title)
         next_course_date = course.get_next_course_date()
 
         message_builder = LeaveConfirmationBuilder(
@@ -45,11 +46,13 @@ class LeaveService:
         self.line_service.reply_text_message(
             reply_token=reply_token, text=f"{student.name}，你好，收到你的請假要求了，想請問請假的原因是甚麼呢?(請在一條訊息中進行說明)")
 
-    def submit_leave_reason(self, student: Student, reason: str, reply_token: str):
-        self.user_state_accessor.set_state(
-            student.line_user_id, UserStateEnum.IDLE)
+    def submit_leave_reason(self, student: Student, reason: str, reply_token: str, course: Course = None):
+        # 同一位學生連送兩則訊息時只有一則會被當成請假原因
+        if not self.user_state_accessor.transition(
+                student.line_user_id, UserStateEnum.IDLE, expected_state=UserStateEnum.AWAITING_LEAVE_REASON):
+            return
 
-        course = self.course_repo.get_course_shell(student.context_title)
+        course = course or self.course_repo.get_course_shell(student.context_title)
         next_course_date = course.get_next_course_date()
 
         leave_request = LeaveRequest(
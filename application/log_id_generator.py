@@ -0,0 +1,77 @@
+# application/log_id_generator.py
+"""
+message_logs.log_id 的客戶端產生器（時間有序的 64-bit 整數）。
+
+非同步寫 log 時，log_event 要在 message 還沒寫進 DB 前就引用它的 log_id，
+所以不能再等 AUTO_INCREMENT 的 lastrowid。格式與 Snowflake 相同：
+
+    41 bits 毫秒時間戳（自 EPOCH_MS 起） | 10 bits worker id | 12 bits 序號
+
+- 同一毫秒內最多 4096 個，用完就借下一毫秒，保證單一行程內嚴格遞增
+- 時鐘倒退時沿用上一次的時間戳繼續遞增，不會產生重複
+- worker id 必須由設定給（LOG_WORKER_ID + gunicorn worker 槽位，見 config/settings.py），
+  每個行程都不能相同：不能用 pid 推算，容器裡每個 replica 的 worker pid 幾乎都一樣（7, 8, 9…），
+  同一台上相差 1024 的 pid 也會撞
+- 產生器要在 fork 之後建（create_app() 在每個 worker 各自執行）；
+  在別的行程建好的產生器被 fork 出去會有同一個 worker id，直接報錯
+- 產生的值遠大於舊的 AUTO_INCREMENT 範圍，兩種 id 可以共存在同一張表
+"""
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+# 2024-01-01 00:00:00 UTC
+EPOCH_MS = 1704067200000
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+class TimeOrderedIdGenerator:
+    def __init__(self, worker_id: Optional[int],
+                 clock: Callable[[], float] = time.time):
+        if worker_id is None:
+            raise ValueError("worker_id is required (set LOG_WORKER_ID, unique per replica)")
+        if not 0 <= int(worker_id) <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}, got {worker_id}")
+        self._worker_id = int(worker_id)
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._last_ms = -1
+        self._sequence = 0
+
+    @property
+    def worker_id(self) -> int:
+        return self._worker_id
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._check_fork()
+            now_ms = int(self.clock() * 1000) - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # 同一毫秒或時鐘倒退：在上一次的時間戳上遞增，序號用完就借下一毫秒
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | \
+                (self._worker_id << SEQUENCE_BITS) | self._sequence
+
+    @staticmethod
+    def timestamp_ms(log_id: int) -> int:
+        """從 id 取回產生時的 epoch 毫秒（除錯用）"""
+        return (log_id >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+
+    def _check_fork(self):
+        if os.getpid() != self._pid:
+            raise RuntimeError(
+                f"id generator for worker {self._worker_id} was created in process {self._pid}; "
+                "create it after fork so every process gets its own worker id")
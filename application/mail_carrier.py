@@ -7,6 +7,7 @@ from pathlib import Path
 from abc import ABC, abstractmethod
 
 from domain.leave_request import LeaveRequest
+from infrastructure.mysql_unit_of_work import external_io
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -131,6 +132,7 @@ class GmailSMTPMailCarrier(MailCarrier):
         self.send_from = send_from
         self.password = password
 
+    @external_io
     def send_email(self, to: list[str], content: EmailContent):
         msg = MIMEMultipart()
         msg["subject"] = content.subject()
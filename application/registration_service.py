@@ -3,7 +3,7 @@ from application.chatbot_logger import ChatbotLogger
 from domain.student import Student, StudentRepository, StudentIdAlreadyBoundError
 from domain.moodle_enrollment import MoodleRepository
 from domain.course import CourseRepository
-from domain.user_state import UserState, UserStateRepository
+from domain.user_state import UserStateEnum, UserStateRepository
 from domain.event_log import EventEnum
 from infrastructure.gateways.line_api_service import LineApiService
 
@@ -98,7 +98,7 @@ class RegistrationService:
             return
 
         # 6. 為該學生在資料表中創建欄位
-        self.state_repo.save(UserState(line_user_id=line_user_id))
+        self.state_repo.transition(line_user_id, UserStateEnum.IDLE)
 
         # 7. 在資料庫中記錄註冊事件
         self.chatbot_logger.log_event(student_id=new_student.student_id, event_type=EventEnum.REGISTER,
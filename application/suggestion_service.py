@@ -17,10 +17,19 @@ class SuggestionService:
         last = self.suggestion_repo.get_suggestion_info(
             stdID, context_title, contents_name)
         if not last:
-            return "目前找不到你的評分紀錄，請稍後再嘗試或聯絡助教。"
+            return self.compose(contents_name, last, [], [])
         try:
             kws, questions = self.suggestion_repo.get_questions(
                 context_title, contents_name)
+        except Exception as e:
+            return "發生了一些問題，可能是因為網路問題或是系統繁忙，請稍後再嘗試。"
+        return self.compose(contents_name, last, kws, questions)
+
+    def compose(self, contents_name, last, kws: List[str], questions: List[str]):
+        """用已經查好的 get_suggestion_info 結果與 (keywords, questions) 組建議訊息，不再查 DB"""
+        if not last:
+            return "目前找不到你的評分紀錄，請稍後再嘗試或聯絡助教。"
+        try:
             kw2q = {k: q for k, q in zip(kws, questions)}
 
             summary = last.get("summary")
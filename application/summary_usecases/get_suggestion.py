@@ -22,15 +22,16 @@ class GetSuggestionUseCase:
 
     def exec(self, student: Student, contents_name: str, reply_token: str, message_log_id: str) -> dict:
         try:
-            log_id = self.grading_logs_repo.get_latest_log_id(
+            # 最新 log、審核狀態、助教回饋、建議素材一次查回，之後只在記憶體裡分支
+            status = self.suggestion_repo.get_summary_status(
                 student.student_id, student.context_title, contents_name)
-            if log_id and self.suggestion_repo.check_summary_in_SummarySubmissions(log_id):
+            if status.log_id and status.in_submissions:
                 text = "最新提交評分中，之後批改完會傳至聊天室並開放查詢，請稍候!" \
-                    if self.suggestion_repo.is_log_under_review(log_id) \
-                    else (self.suggestion_repo.use_summary_grading_log_id_get_GenAI_feedback(log_id) or "查無回饋內容，請稍後再試。")
+                    if status.under_review \
+                    else (status.teacher_feedback or "查無回饋內容，請稍後再試。")
             else:
-                text = self.suggestion_service.produce(
-                    student.student_id, student.context_title, contents_name)
+                text = self.suggestion_service.compose(
+                    contents_name, status.suggestion_info, status.keywords, status.questions)
         except Exception as e:
             text = "系統忙碌或發生錯誤，請稍後再試。"
 
@@ -1,5 +1,20 @@
 # application/summary_usecases/grade_batch.py
+"""
+/send_menu：整班 summary 評分 → GenAI 回饋 → 推送課堂總結表單。
 
+162 每位學生要好幾秒（timeout 8 秒、最多重試 2 次），原本逐一呼叫，一班要跑好幾分鐘。
+這裡改成管線：
+- 評分：最多 concurrency 個學生同時打 162
+- 評完的學生每 wave_interval 秒（或湊滿 wave_size 位）成一批，交給後續執行緒：
+  整批查最新評分紀錄 → GenAI 回饋整批寫入 → 推送菜單；
+  最多 follow_up_concurrency 批同時進行，和還在評分的學生重疊
+- 推送紀錄最後一次寫入；各階段的筆數、耗時與吞吐量放在回傳的 timing
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 
 from application.chatbot_logger import ChatbotLogger
 from application.message_builders.summary_builders import SummaryMenuBuilder
@@ -11,6 +26,53 @@ from domain.summary_repositories import (FeedbackPushRepository,
                                          SuggestionQueryRepository)
 from infrastructure.gateways.line_api_service import LineApiService
 
+logger = logging.getLogger(__name__)
+
+
+class _BatchProgress:
+    """多個執行緒共用的計數（stats）、已推送名單與各階段耗時"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {"graded": 0, "repeat": 0, "no_summary": 0,
+                      "error": 0, "genai": 0, "pushed": 0, "push_error": 0}
+        self.pushed: list[str] = []
+        # 階段 -> [筆數, 各任務耗時加總, 最早開始, 最晚結束]
+        self._stages: dict[str, list] = {}
+
+    def add(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def mark_pushed(self, sid: str):
+        with self._lock:
+            self.pushed.append(sid)
+            self.stats["pushed"] += 1
+
+    @contextmanager
+    def stage(self, name: str, items: int = 1):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            with self._lock:
+                stage = self._stages.setdefault(name, [0, 0.0, started, ended])
+                stage[0] += items
+                stage[1] += ended - started
+                stage[2] = min(stage[2], started)
+                stage[3] = max(stage[3], ended)
+
+    def timing(self) -> dict:
+        """busy_s 是各任務耗時加總，wall_s 是該階段第一個任務開始到最後一個結束"""
+        with self._lock:
+            report = {}
+            for name, (items, busy, first, last) in self._stages.items():
+                wall = last - first
+                report[name] = {"items": items, "busy_s": round(busy, 3), "wall_s": round(wall, 3),
+                                "per_s": round(items / wall, 2) if wall > 0 else None}
+            return report
+
 
 class GradeBatchUseCase:
     def __init__(self, grading_port: GradingPort,
@@ -20,7 +82,14 @@ class GradeBatchUseCase:
                  line_service: LineApiService,
                  feedbacker,
                  suggestion_service: SuggestionService,
-                 chatbot_logger: ChatbotLogger):
+                 chatbot_logger: ChatbotLogger,
+                 concurrency: int = 4,
+                 follow_up_concurrency: int = 4,
+                 wave_size: int = 20,
+                 wave_interval: float = 2.0,
+                 genai_enabled: bool = False):
+        if int(concurrency) < 1 or int(follow_up_concurrency) < 1:
+            raise ValueError("concurrency must be at least 1")
         self.grading_port = grading_port
         self.suggestion_repo = suggestion_repo
         self.pushes_repo = pushes_repo
@@ -29,45 +98,115 @@ class GradeBatchUseCase:
         self.feedbacker = feedbacker
         self.suggestion_service = suggestion_service
         self.chatbot_logger = chatbot_logger
+        self.concurrency = int(concurrency)
+        self.follow_up_concurrency = int(follow_up_concurrency)
+        self.wave_size = max(int(wave_size), 1)
+        self.wave_interval = wave_interval
+        # 關閉時不呼叫 OpenAI（SUMMARY_GENAI_FEEDBACK_ENABLED），只評分與推送
+        self.genai_enabled = genai_enabled
 
     def exec(self, context_title: str, contents_name: str) -> dict:
+        started = time.perf_counter()
         example = self.suggestion_repo.get_example_summary(
             context_title, contents_name)
+        kws, questions = self.suggestion_repo.get_questions(
+            context_title, contents_name)
         roster = [(s.student_id, s.line_user_id)
                   for s in self.student_repo.get_all_students(context_title)]
-        stats = {"graded": 0, "repeat": 0, "no_summary": 0,
-                 "error": 0, "genai": 0, "pushed": 0}
-
-        # 1) 逐一評分
-        for sid, _ in roster:
-            outcome = self.grading_port.grade_single(
-                sid, context_title, contents_name)  # 呼叫 162
-            s = outcome.get("status", "error")
-            stats[s] = stats.get(s, 0) + 1
-
-            if s == "graded":
-                latest = self.suggestion_repo.get_suggestion_info(
-                    sid, context_title, contents_name)
-                if needs_genai(latest):
-                    try:
-                        basic = self.suggestion_service.produce(
-                            sid, context_title, contents_name)
-                        self.feedbacker.get_gpt_response_for_summary(
-                            sid, contents_name, latest.get("result"),
-                            context_title, example, latest.get(
-                                "summary"), latest.get("log_id"), basic
-                        )
-                        stats["genai"] += 1
-                    except Exception as e:
-                        pass
-
-        # 2) 推送菜單 + 記錄
-        for sid, line_id in roster:
-            if self.pushes_repo.check_summary_feedback_push(sid, context_title, contents_name):
-                self.line_service.push_message(user_id=line_id, messages=[
-                                               SummaryMenuBuilder(contents_name).build()])
-                self.pushes_repo.write_summary_feedback_push(
-                    sid, context_title, contents_name)
-                stats["pushed"] += 1
-
-        return {"status": "ok", "stats": stats}
+        # 已推送過的整班一次查
+        pushed_before = self.pushes_repo.get_pushed_student_ids(
+            [sid for sid, _ in roster], context_title, contents_name)
+        progress = _BatchProgress()
+
+        def follow_up(wave):
+            self._follow_up(progress, wave, context_title, contents_name,
+                            example, kws, questions, pushed_before)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="grade-batch") as grade_pool, \
+                    ThreadPoolExecutor(max_workers=self.follow_up_concurrency,
+                                       thread_name_prefix="grade-batch-follow-up") as follow_up_pool:
+                # 1) 評分（呼叫 162），同時最多 concurrency 位
+                grading = {grade_pool.submit(self._grade, progress, sid, context_title, contents_name): (sid, line_id)
+                           for sid, line_id in roster}
+                # 2) 評完的學生湊成一批交給後續執行緒（GenAI 回饋 + 推送）
+                follow_ups, wave, wave_started = [], [], None
+                pending = set(grading)
+                while pending:
+                    done, pending = wait(pending, timeout=self.wave_interval,
+                                         return_when=FIRST_COMPLETED)
+                    if done and not wave:
+                        wave_started = time.monotonic()
+                    wave.extend((*grading[f], f.result()) for f in done)
+                    if wave and (not pending or len(wave) >= self.wave_size
+                                 or time.monotonic() - wave_started >= self.wave_interval):
+                        follow_ups.append(follow_up_pool.submit(follow_up, wave))
+                        wave = []
+                for f in follow_ups:
+                    f.result()
+        finally:
+            # 3) 推送紀錄一次寫入；中途出錯，已經送出的也要記下來，避免下次重複推送
+            self.pushes_repo.write_summary_feedback_pushes(
+                progress.pushed, context_title, contents_name)
+
+        timing = {"elapsed_s": round(time.perf_counter() - started, 3),
+                  "stages": progress.timing()}
+        logger.info("grade batch %s %s: %s, %s", context_title, contents_name, progress.stats, timing)
+        return {"status": "ok", "stats": dict(progress.stats), "timing": timing}
+
+    def _grade(self, progress: _BatchProgress, sid: str, context_title: str, contents_name: str) -> str:
+        with progress.stage("grade"):
+            try:
+                outcome = self.grading_port.grade_single(
+                    sid, context_title, contents_name)  # 呼叫 162
+            except Exception:
+                logger.warning("grading %s failed", sid, exc_info=True)
+                outcome = {}
+        status = outcome.get("status", "error")
+        progress.add(status)
+        return status
+
+    def _follow_up(self, progress: _BatchProgress, wave: list, context_title: str, contents_name: str,
+                   example, kws, questions, pushed_before: set):
+        """一批評完的學生：整批查最新評分紀錄，需要的產生 GenAI 回饋並整批寫入，再推送菜單"""
+        graded = [sid for sid, _, status in wave if status == "graded"] if self.genai_enabled else []
+        pending_genai = []
+        if graded:
+            try:
+                with progress.stage("lookup", len(graded)):
+                    infos = self.suggestion_repo.get_suggestion_info_many(
+                        graded, context_title, contents_name)
+                for sid in graded:
+                    latest = infos.get(sid)
+                    if needs_genai(latest):
+                        basic = self.suggestion_service.compose(
+                            contents_name, latest, kws, questions)
+                        pending_genai.append(dict(
+                            stdID=sid, contents_name=contents_name, example_summary=example,
+                            student_summary=latest.get("summary"),
+                            summary_grading_log_id=latest.get("log_id"), basic_feedback=basic))
+            except Exception:
+                logger.warning("suggestion lookup for %d students failed", len(graded), exc_info=True)
+
+        # GenAI 回饋整批寫進 verify DB（一個交易），寫完才推送，學生點開就看得到
+        if pending_genai:
+            try:
+                with progress.stage("genai", len(pending_genai)):
+                    written = self.feedbacker.generate_feedbacks_for_summaries(
+                        pending_genai)
+                progress.add("genai", written)
+            except Exception:
+                logger.warning("GenAI feedback for %d students failed", len(pending_genai), exc_info=True)
+
+        for sid, line_id, _ in wave:
+            if sid in pushed_before:
+                continue
+            try:
+                with progress.stage("push"):
+                    self.line_service.push_message(user_id=line_id, messages=[
+                                                   SummaryMenuBuilder(contents_name).build()])
+            except Exception:
+                logger.warning("pushing summary menu to %s failed", sid, exc_info=True)
+                progress.add("push_error")
+                continue
+            progress.mark_pushed(sid)
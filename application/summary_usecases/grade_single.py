@@ -21,7 +21,8 @@ class GradeSingleUseCase:
                  mail_carrier: MailCarrier,
                  feedbacker,  # 你現有的 GenAI 回饋服務
                  suggestion_service: SuggestionService,
-                 chatbot_logger: ChatbotLogger):
+                 chatbot_logger: ChatbotLogger,
+                 genai_enabled: bool = False):
         self.grading_port = grading_port
         self.suggestion_repo = suggestion_repo
         self.course_repo = course_repo
@@ -30,6 +31,8 @@ class GradeSingleUseCase:
         self.feedbacker = feedbacker
         self.suggestion_service = suggestion_service
         self.chatbot_logger = chatbot_logger
+        # 關閉時不呼叫 OpenAI（SUMMARY_GENAI_FEEDBACK_ENABLED）
+        self.genai_enabled = genai_enabled
 
     def exec(self, student: Student, contents_name: str, reply_token: str, message_log_id: str) -> Dict[str, Any]:
         # 通知 TA
@@ -57,20 +60,19 @@ class GradeSingleUseCase:
             latest = self.suggestion_repo.get_suggestion_info(
                 student.student_id, student.context_title, contents_name)
             if needs_genai(latest):
-                # 送去產生回饋（非同步完成）
-                try:
-                    example = self.suggestion_repo.get_example_summary(
-                        student.context_title, contents_name)  # 若你把它留在 summary_repo，就改那邊
-                    basic = self.suggestion_service.produce(
-                        student.student_id, student.context_title, contents_name)
-                    self.feedbacker.get_gpt_response_for_summary(
-                        student.student_id, contents_name, latest.get(
-                            "result"),
-                        student.context_title, example, latest.get("summary"),
-                        latest.get("log_id"), basic
-                    )
-                except Exception as e:
-                    pass
+                # 送去產生回饋（非同步完成）；GenAI 回饋關閉時只回覆評分中
+                if self.genai_enabled:
+                    try:
+                        example = self.suggestion_repo.get_example_summary(
+                            student.context_title, contents_name)  # 若你把它留在 summary_repo，就改那邊
+                        basic = self.suggestion_service.produce(
+                            student.student_id, student.context_title, contents_name)
+                        self.feedbacker.generate_feedback_for_summary(
+                            student.student_id, contents_name, example,
+                            latest.get("summary"), latest.get("log_id"), basic
+                        )
+                    except Exception as e:
+                        pass
                 text = f"{contents_name} 總結評分中，等評分完成會發送至聊天室!"
             else:
                 text = self.suggestion_service.produce(
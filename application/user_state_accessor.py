@@ -1,4 +1,6 @@
-from domain.user_state import UserState, UserStateEnum, UserStateRepository
+from typing import Optional
+
+from domain.user_state import UserStateEnum, UserStateRepository
 
 
 class UserStateAccessor:
@@ -11,9 +13,16 @@ class UserStateAccessor:
         return state.status if state else UserStateEnum.IDLE
 
     def set_state(self, user_id: str, new_status: UserStateEnum):
-        state = self.user_state_repo.get(user_id) or UserState(user_id)
-        state.status = new_status
-        self.user_state_repo.save(state)
+        # 單一 upsert，不再先 get 再 save（兩條連線 + read-modify-write race）
+        self.user_state_repo.transition(user_id, new_status)
+
+    def transition(self, user_id: str, new_status: UserStateEnum,
+                   expected_state: Optional[UserStateEnum] = None) -> bool:
+        """
+        compare-and-set：目前狀態是 expected_state 才改成 new_status。
+        同一位使用者的兩個事件同時在不同 thread 處理時，只有一個會成功（回傳 True）。
+        """
+        return self.user_state_repo.transition(user_id, new_status, expected_state)
 
     def reset_state(self, user_id: str):
         # 邏輯:
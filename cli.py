@@ -1,3 +1,4 @@
+import argparse
 import os
 
 import ngrok
@@ -10,6 +11,12 @@ from main import create_app
 
 DEV_PORT = int(os.getenv("DEV_PORT", "8095"))
 
+# migrations/<資料夾> 對應到設定裡的哪個資料庫
+MIGRATION_TARGETS = {
+    "linebot": "LINEBOT_DB_CONFIG",
+    "verify": "VERIFY_DB_CONFIG",
+}
+
 
 def set_webhook(token: str, endpoint: str):
     configuration = Configuration(access_token=token)
@@ -41,5 +48,50 @@ def dev():
     app.run(port=DEV_PORT, debug=True)
 
 
+def migrate(databases: list[str], target: int = None, dry_run: bool = False, status: bool = False):
+    from config.settings import CONFIG_BY_NAME
+    from infrastructure.mysql_migrator import MIGRATIONS_ROOT, MySQLMigrator
+
+    env = os.getenv("FLASK_ENV", "production")
+    if env != "production":
+        load_dotenv()
+    cfg = CONFIG_BY_NAME[env]()
+
+    for name in databases:
+        migrator = MySQLMigrator(getattr(cfg, MIGRATION_TARGETS[name]),
+                                 os.path.join(MIGRATIONS_ROOT, name))
+        if status:
+            for s in migrator.status():
+                mark = s.applied_at.strftime("%Y-%m-%d %H:%M:%S") if s.applied_at else "pending"
+                print(f"[{name}] {s.migration.filename}: {mark}")
+            continue
+
+        applied = migrator.migrate(target=target, dry_run=dry_run)
+        verb = "將套用" if dry_run else "已套用"
+        if not applied:
+            print(f"[{name}] 已是最新版本")
+        for m in applied:
+            print(f"✅ [{name}] {verb} {m.filename}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cli.py")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("dev", help="本機開發伺服器 + ngrok（預設）")
+
+    p_migrate = sub.add_parser("migrate", help="套用 migrations/ 底下的 schema 變更")
+    p_migrate.add_argument("--db", choices=[*MIGRATION_TARGETS, "all"], default="all")
+    p_migrate.add_argument("--target", type=int, default=None, help="只套用到這個版本（含）")
+    p_migrate.add_argument("--dry-run", action="store_true", help="只列出會套用的檔案")
+    p_migrate.add_argument("--status", action="store_true", help="列出各版本套用狀態")
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        databases = list(MIGRATION_TARGETS) if args.db == "all" else [args.db]
+        migrate(databases, target=args.target, dry_run=args.dry_run, status=args.status)
+    else:
+        dev()
+
+
 if __name__ == "__main__":
-    dev()
+    main()
@@ -1,5 +1,6 @@
 # config/settings.py
 import os
+from typing import Optional
 
 
 class BaseConfig:
@@ -14,10 +15,179 @@ class BaseConfig:
     def GRADER_API_KEY(self) -> str:
         return os.getenv("GRADER_API_KEY", "dev-162-key")
 
+    # /send_menu 整班評分：同時打 162 的請求數上限、同時處理 GenAI 回饋與推送的批次數
+    @property
+    def GRADE_BATCH_CONCURRENCY(self) -> int:
+        return int(os.getenv("GRADE_BATCH_CONCURRENCY", 4))
+
+    @property
+    def GRADE_BATCH_FOLLOW_UP_CONCURRENCY(self) -> int:
+        return int(os.getenv("GRADE_BATCH_FOLLOW_UP_CONCURRENCY", 4))
+
+    # 總結的 GenAI 回饋（OpenAI 付費呼叫），預設關閉
+    @property
+    def SUMMARY_GENAI_FEEDBACK_ENABLED(self) -> bool:
+        return os.getenv("SUMMARY_GENAI_FEEDBACK_ENABLED", "false").lower() == "true"
+
     @property
     def SUMMARY_OPENAI_KEY(self) -> str:
         return os.getenv("SUMMARY_API_KEY", "")
 
+    # MySQL 連線池（linebot / verify / review_system 各一個，每個 worker 行程獨立）
+    @property
+    def MYSQL_POOL_SIZE(self) -> int:
+        return int(os.getenv("MYSQL_POOL_SIZE", 5))
+
+    @property
+    def MYSQL_POOL_MAX_OVERFLOW(self) -> int:
+        return int(os.getenv("MYSQL_POOL_MAX_OVERFLOW", 5))
+
+    @property
+    def MYSQL_POOL_TIMEOUT(self) -> float:
+        return float(os.getenv("MYSQL_POOL_TIMEOUT", 10))
+
+    @property
+    def MYSQL_POOL_RECYCLE(self) -> float:
+        return float(os.getenv("MYSQL_POOL_RECYCLE", 3600))
+
+    @property
+    def MYSQL_POOL_IDLE_TIMEOUT(self) -> float:
+        return float(os.getenv("MYSQL_POOL_IDLE_TIMEOUT", 300))
+
+    @property
+    def OJ_POOL_SIZE(self) -> int:
+        return int(os.getenv("OJ_POOL_SIZE", 4))
+
+    @property
+    def OJ_POOL_IDLE_TIMEOUT(self) -> float:
+        return float(os.getenv("OJ_POOL_IDLE_TIMEOUT", 60))
+
+    # OJ 每個查詢的上限（秒），不超過查分時等 OJ 的 5 秒，逾時的查詢在伺服器端取消
+    @property
+    def OJ_STATEMENT_TIMEOUT(self) -> float:
+        return float(os.getenv("OJ_STATEMENT_TIMEOUT", 5))
+
+    # Moodle：註冊尖峰時多條連線共用一條 SSH tunnel
+    @property
+    def MOODLE_POOL_SIZE(self) -> int:
+        return int(os.getenv("MOODLE_POOL_SIZE", 4))
+
+    @property
+    def MOODLE_POOL_IDLE_TIMEOUT(self) -> float:
+        return float(os.getenv("MOODLE_POOL_IDLE_TIMEOUT", 60))
+
+    @property
+    def MOODLE_POOL_LIVENESS_CHECK_AFTER(self) -> float:
+        return float(os.getenv("MOODLE_POOL_LIVENESS_CHECK_AFTER", 30))
+
+    # find_by_line_id 身分快取（查無此人只快取 IDENTITY_CACHE_NEGATIVE_TTL 秒）
+    @property
+    def IDENTITY_CACHE_TTL(self) -> float:
+        return float(os.getenv("IDENTITY_CACHE_TTL", 300))
+
+    @property
+    def IDENTITY_CACHE_NEGATIVE_TTL(self) -> float:
+        return float(os.getenv("IDENTITY_CACHE_NEGATIVE_TTL", 10))
+
+    @property
+    def IDENTITY_CACHE_MAX_ENTRIES(self) -> int:
+        return int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", 4096))
+
+    @property
+    def IDENTITY_CACHE_POLL_INTERVAL(self) -> float:
+        return float(os.getenv("IDENTITY_CACHE_POLL_INTERVAL", 1))
+
+    # 依課表在上課前預熱 Moodle / OJ 連線
+    @property
+    def PREWARM_ENABLED(self) -> bool:
+        return os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+
+    @property
+    def PREWARM_LEAD_MINUTES(self) -> float:
+        return float(os.getenv("PREWARM_LEAD_MINUTES", 15))
+
+    @property
+    def PREWARM_SESSION_MINUTES(self) -> float:
+        return float(os.getenv("PREWARM_SESSION_MINUTES", 180))
+
+    @property
+    def PREWARM_CLASS_START_HOUR(self) -> int:
+        return int(os.getenv("PREWARM_CLASS_START_HOUR", 9))
+
+    @property
+    def PREWARM_INTERVAL(self) -> float:
+        return float(os.getenv("PREWARM_INTERVAL", 30))
+
+    # message_logs / event_logs 寫入方式："buffered"（背景批次寫）或 "sync"（每筆同步 INSERT）
+    # buffered 的 log_id 是 64-bit，要先套用 migrations/linebot/0006（int → bigint）才能打開
+    @property
+    def LOG_WRITER_MODE(self) -> str:
+        return os.getenv("LOG_WRITER_MODE", "sync")
+
+    # buffered 的 log_id worker id（0–1023），每個行程都必須不同，buffered 模式必填。
+    # 每個 replica 設不重疊的區段起點（例如第 k 台設 k × gunicorn workers 數），
+    # 各 worker 再加上自己的槽位（gunicorn.conf.py 的 pre_fork/post_fork 設 LOG_WORKER_SLOT）
+    @property
+    def LOG_WORKER_ID(self) -> Optional[int]:
+        base = os.getenv("LOG_WORKER_ID", "")
+        if not base:
+            return None
+        return int(base) + int(os.getenv("LOG_WORKER_SLOT", 0))
+
+    @property
+    def LOG_BUFFER_MAX_ROWS(self) -> int:
+        return int(os.getenv("LOG_BUFFER_MAX_ROWS", 10000))
+
+    @property
+    def LOG_BATCH_SIZE(self) -> int:
+        return int(os.getenv("LOG_BATCH_SIZE", 200))
+
+    @property
+    def LOG_FLUSH_INTERVAL(self) -> float:
+        return float(os.getenv("LOG_FLUSH_INTERVAL", 1))
+
+    # 緩衝區滿了："drop" 丟掉新的、"block" 最多等 LOG_BUFFER_BLOCK_TIMEOUT 秒
+    @property
+    def LOG_BUFFER_OVERFLOW_POLICY(self) -> str:
+        return os.getenv("LOG_BUFFER_OVERFLOW_POLICY", "drop")
+
+    @property
+    def LOG_BUFFER_BLOCK_TIMEOUT(self) -> float:
+        return float(os.getenv("LOG_BUFFER_BLOCK_TIMEOUT", 1))
+
+    @property
+    def OJ_CATALOGUE_TTL(self) -> float:
+        return float(os.getenv("OJ_CATALOGUE_TTL", 600))
+
+    @property
+    def SHEET_CACHE_TTL(self) -> float:
+        return float(os.getenv("SHEET_CACHE_TTL", 60))
+
+    @property
+    def SHEET_CACHE_STALE_TTL(self) -> float:
+        return float(os.getenv("SHEET_CACHE_STALE_TTL", 3600))
+
+    # 抓 Google Sheet 的 HTTP timeout（秒），不超過查分時等錯誤回顧成績的 6 秒
+    @property
+    def SHEET_FETCH_TIMEOUT(self) -> float:
+        return float(os.getenv("SHEET_FETCH_TIMEOUT", 5))
+
+    @property
+    def COURSE_CACHE_TTL(self) -> float:
+        return float(os.getenv("COURSE_CACHE_TTL", 300))
+
+    @property
+    def COURSE_CACHE_MAX_ENTRIES(self) -> int:
+        return int(os.getenv("COURSE_CACHE_MAX_ENTRIES", 256))
+
+    @property
+    def COURSE_CALENDAR_TTL(self) -> float:
+        return float(os.getenv("COURSE_CALENDAR_TTL", 600))
+
+    @property
+    def COURSE_CALENDAR_REVALIDATE_INTERVAL(self) -> float:
+        return float(os.getenv("COURSE_CALENDAR_REVALIDATE_INTERVAL", 30))
+
 
 class DevelopmentConfig(BaseConfig):
     FLASK_DEBUG = True
@@ -209,6 +379,15 @@ class TestingConfig(DevelopmentConfig):
     LINE_CHANNEL_SECRET = "this_is_a_fixed_test_secret"
     LINE_ACCESS_TOKEN = "this_is_a_fixed_test_access_token"
 
+    # 測試會反覆 seed / truncate course_info，關掉課程快取避免讀到上一個測試的資料
+    COURSE_CACHE_TTL = 0
+    COURSE_CALENDAR_TTL = 0
+    IDENTITY_CACHE_TTL = 0
+    # 測試不要在背景開 tunnel
+    PREWARM_ENABLED = False
+    # 測試寫完馬上查 message_logs / event_logs，維持同步寫入
+    LOG_WRITER_MODE = "sync"
+
 
 CONFIG_BY_NAME = {
     "development": DevelopmentConfig,
@@ -1,12 +1,16 @@
 from unittest.mock import MagicMock
 
+import requests
 from dependency_injector import containers, providers
 from linebot.v3.messaging import ApiClient
 from linebot.v3.messaging import Configuration as LineMessagingConfig
 from linebot.v3.messaging import MessagingApi
 
 from application.ask_TA_service import AskTAService
+from application.buffered_log_writer import BufferedLogWriter
 from application.chatbot_logger import ChatbotLogger
+from application.connection_prewarmer import ConnectionPrewarmer
+from application.log_id_generator import TimeOrderedIdGenerator
 from application.check_attendance_service import CheckAttendanceService
 from application.check_score_service import CheckScoreService
 from application.GenAI_feedback_service import (GenAIFeedbackService,
@@ -21,32 +25,63 @@ from application.summary_usecases.grade_batch import GradeBatchUseCase
 from application.summary_usecases.grade_single import GradeSingleUseCase
 from application.user_state_accessor import UserStateAccessor
 from domain.score import ScoreAggregator
+from infrastructure.gateways.google_sheet_cache import GoogleSheetCsvCache
 from infrastructure.gateways.line_api_service import LineApiService
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.cached_course_repository import CachedCourseRepository
+from infrastructure.cached_student_repository import CachedStudentRepository
 from infrastructure.mysql_course_repository import MySQLCourseRepository
 from infrastructure.mysql_event_log_repository import MySQLEventLogRepository
 from infrastructure.mysql_feedback_push_repository import \
     MySQLFeedbackPushRepository
 from infrastructure.mysql_feedback_repository import MySQLFeedbackRepository
+from infrastructure.mysql_identity_invalidation_log import \
+    MySQLIdentityInvalidationLog
 from infrastructure.mysql_grading_log_repository import \
     MySQLGradingLogRepository
 from infrastructure.mysql_leave_repository import MySQLLeaveRepository
 from infrastructure.mysql_message_log_repository import \
     MySQLMessageLogRepository
+from infrastructure.mysql_session_snapshot_repository import \
+    MySQLSessionSnapshotRepository
 from infrastructure.mysql_student_repository import MySQLStudentRepository
 from infrastructure.mysql_suggestion_query_repository import \
     MySQLSuggestionQueryRepository
 from infrastructure.mysql_summary_repository import MySQLSummaryRepository
 from infrastructure.mysql_user_state_repository import MySQLUserStateRepository
-from infrastructure.postgresql_moodle_repository import \
-    PostgreSQLMoodleRepository
+from infrastructure.postgresql_moodle_repository import (
+    LazyMoodleConnectionManager, PostgreSQLMoodleRepository)
+from infrastructure.onlinejudge_catalogue_cache import \
+    OnlinejudgeCatalogueCache
 from infrastructure.postgresql_onlinejudge_repository import \
     PostgreSQLOnlinejudgeRepository
+from infrastructure.postgresql_tunnel_pool import TunneledPostgreSQLPool
+
+
+def closing(factory, *args, **kwargs):
+    """
+    把有 close() 的物件包成 providers.Resource：
+    行程內只建一次，container.shutdown_resources() 時呼叫 close()。
+    """
+    resource = factory(*args, **kwargs)
+    try:
+        yield resource
+    finally:
+        resource.close()
 
 
 class AppContainer(containers.DeclarativeContainer):
     """
     The Dependency Injection container for the application.
     It declares how to build all our components.
+
+    生命週期約定：
+    - providers.Resource：連線池、SSH tunnel 管理器、HTTP client 等「行程層級」資源，
+      create_app() 時 init_resources() 一次建好（在任何 worker thread 之前），
+      行程結束時 shutdown_resources() 統一 close()
+    - providers.ThreadSafeSingleton：沒有外部資源、但要跨請求共用狀態的物件（各種快取）
+    - providers.Factory：repository、service、use case 等每個事件各建一份的輕量物件，
+      它們只持有上面共用資源的參考
     """
     # 1. Configuration Provider
     # This provider will hold the application configuration.
@@ -58,19 +93,20 @@ class AppContainer(containers.DeclarativeContainer):
         access_token=config.LINE_ACCESS_TOKEN,   # ← 確認 key 名稱真的存在
     )
 
-    # 用上面的 Configuration 實例去建 ApiClient（單例）
-    line_api_client = providers.Singleton(
+    # 用上面的 Configuration 實例去建 ApiClient（行程層級資源）
+    line_api_client = providers.Resource(
+        closing,
         ApiClient,
         configuration=line_messaging_config,    # ← 傳 provider，會被解析成「實例」
     )
 
     # Real 版
-    _real_line_bot_api = providers.Singleton(
+    _real_line_bot_api = providers.ThreadSafeSingleton(
         MessagingApi,
         api_client=line_api_client,
     )
     # Mock 版
-    _mock_line_bot_api = providers.Singleton(
+    _mock_line_bot_api = providers.ThreadSafeSingleton(
         lambda: MagicMock(spec=MessagingApi)
     )
 
@@ -88,75 +124,221 @@ class AppContainer(containers.DeclarativeContainer):
         line_rich_menus=config.LINE_RICH_MENUS,
     )
 
+    # 2. MySQL 連線池（行程層級資源，所有 MySQL repository 共用）
+    linebot_db_pool = providers.Resource(
+        closing,
+        MySQLConnectionPool,
+        db_config=config.LINEBOT_DB_CONFIG,
+        max_size=config.MYSQL_POOL_SIZE,
+        max_overflow=config.MYSQL_POOL_MAX_OVERFLOW,
+        timeout=config.MYSQL_POOL_TIMEOUT,
+        recycle=config.MYSQL_POOL_RECYCLE,
+        idle_timeout=config.MYSQL_POOL_IDLE_TIMEOUT,
+    )
+    verify_db_pool = providers.Resource(
+        closing,
+        MySQLConnectionPool,
+        db_config=config.VERIFY_DB_CONFIG,
+        max_size=config.MYSQL_POOL_SIZE,
+        max_overflow=config.MYSQL_POOL_MAX_OVERFLOW,
+        timeout=config.MYSQL_POOL_TIMEOUT,
+        recycle=config.MYSQL_POOL_RECYCLE,
+        idle_timeout=config.MYSQL_POOL_IDLE_TIMEOUT,
+    )
+    review_system_db_pool = providers.Resource(
+        closing,
+        MySQLConnectionPool,
+        db_config=config.REVIEW_SYSTEM_DB_CONFIG,
+        max_size=config.MYSQL_POOL_SIZE,
+        max_overflow=config.MYSQL_POOL_MAX_OVERFLOW,
+        timeout=config.MYSQL_POOL_TIMEOUT,
+        recycle=config.MYSQL_POOL_RECYCLE,
+        idle_timeout=config.MYSQL_POOL_IDLE_TIMEOUT,
+    )
+
     # 3. Repository Providers (Infrastructure)
-    student_repo = providers.Factory(
+    mysql_student_repo = providers.Factory(
         MySQLStudentRepository,
-        db_config=config.LINEBOT_DB_CONFIG
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
     )
-    course_repo = providers.Factory(
+    identity_invalidation_log = providers.Factory(
+        MySQLIdentityInvalidationLog,
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
+    )
+    # 每個事件都要 find_by_line_id：行程內身分快取（單例），跨 worker 失效透過 identity_invalidation_log
+    student_repo = providers.ThreadSafeSingleton(
+        CachedStudentRepository,
+        inner=mysql_student_repo,
+        ttl=config.IDENTITY_CACHE_TTL,
+        negative_ttl=config.IDENTITY_CACHE_NEGATIVE_TTL,
+        max_entries=config.IDENTITY_CACHE_MAX_ENTRIES,
+        invalidation_log=identity_invalidation_log,
+        poll_interval=config.IDENTITY_CACHE_POLL_INTERVAL
+    )
+    mysql_course_repo = providers.Factory(
         MySQLCourseRepository,
         linebot_db_config=config.LINEBOT_DB_CONFIG,
-        rs_db_config=config.REVIEW_SYSTEM_DB_CONFIG
+        rs_db_config=config.REVIEW_SYSTEM_DB_CONFIG,
+        linebot_pool=linebot_db_pool,
+        rs_pool=review_system_db_pool
+    )
+    # 課程資料一學期只改幾次：行程內快取（單例），可由 /admin/course_cache/refresh/ 清除
+    course_repo = providers.ThreadSafeSingleton(
+        CachedCourseRepository,
+        inner=mysql_course_repo,
+        ttl=config.COURSE_CACHE_TTL,
+        max_entries=config.COURSE_CACHE_MAX_ENTRIES,
+        calendar_ttl=config.COURSE_CALENDAR_TTL,
+        revalidate_interval=config.COURSE_CALENDAR_REVALIDATE_INTERVAL
     )
     message_repo = providers.Factory(
         MySQLMessageLogRepository,
-        db_config=config.LINEBOT_DB_CONFIG
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
     )
     event_repo = providers.Factory(
         MySQLEventLogRepository,
-        db_config=config.LINEBOT_DB_CONFIG
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
     )
     leave_repo = providers.Factory(
         MySQLLeaveRepository,
-        db_config=config.LINEBOT_DB_CONFIG
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
     )
     summary_repo = providers.Factory(
         MySQLSummaryRepository,
         linebot_db_config=config.LINEBOT_DB_CONFIG,
-        verify_db_config=config.VERIFY_DB_CONFIG
+        verify_db_config=config.VERIFY_DB_CONFIG,
+        linebot_pool=linebot_db_pool,
+        verify_pool=verify_db_pool
     )
     user_state_repo = providers.Factory(
         MySQLUserStateRepository,
-        db_config=config.LINEBOT_DB_CONFIG
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
+    )
+    # webhook 每個事件一次 JOIN 讀出 學生 + 課程 shell + 對話狀態
+    session_repo = providers.Factory(
+        MySQLSessionSnapshotRepository,
+        db_config=config.LINEBOT_DB_CONFIG,
+        pool=linebot_db_pool
     )
 
+    # Moodle：行程內共用一個 lazy 連線池（一條 tunnel + 多條連線），註冊尖峰時重複利用，閒置後自動關閉
+    moodle_connection_manager = providers.Resource(
+        closing,
+        LazyMoodleConnectionManager,
+        db_config=config.MOODLE_DB_CONFIG,
+        ssh_config=config.MOODLE_SSH_CONFIG,
+        pool_size=config.MOODLE_POOL_SIZE,
+        idle_timeout=config.MOODLE_POOL_IDLE_TIMEOUT,
+        liveness_check_after=config.MOODLE_POOL_LIVENESS_CHECK_AFTER
+    )
     moodle_repo = providers.Factory(
         PostgreSQLMoodleRepository,
         db_config=config.MOODLE_DB_CONFIG,
-        ssh_config=config.MOODLE_SSH_CONFIG
+        ssh_config=config.MOODLE_SSH_CONFIG,
+        conn_mgr=moodle_connection_manager
+    )
+    # OJ：一條長駐 SSH tunnel + 小連線池，所有 oj_repo 共用
+    oj_db_pool = providers.Resource(
+        closing,
+        TunneledPostgreSQLPool,
+        db_config=config.OJ_DB_CONFIG,
+        ssh_config=config.OJ_SSH_CONFIG,
+        pool_size=config.OJ_POOL_SIZE,
+        idle_timeout=config.OJ_POOL_IDLE_TIMEOUT,
+        statement_timeout=config.OJ_STATEMENT_TIMEOUT
+    )
+    # OJ 題目目錄（contest id / 題目 id）快取，助教上架題目後可由 /admin/oj_catalogue/refresh/ 清掉
+    oj_catalogue = providers.ThreadSafeSingleton(
+        OnlinejudgeCatalogueCache,
+        ttl=config.OJ_CATALOGUE_TTL
+    )
+    # 上課前預熱 Moodle / OJ 連線（create_app 依 PREWARM_ENABLED 決定是否啟動）
+    connection_prewarmer = providers.Resource(
+        closing,
+        ConnectionPrewarmer,
+        course_repo=course_repo,
+        targets=providers.Dict(
+            moodle=moodle_connection_manager,
+            oj=oj_db_pool
+        ),
+        lead_minutes=config.PREWARM_LEAD_MINUTES,
+        session_minutes=config.PREWARM_SESSION_MINUTES,
+        class_start_hour=config.PREWARM_CLASS_START_HOUR,
+        interval=config.PREWARM_INTERVAL
     )
     oj_repo = providers.Factory(
         PostgreSQLOnlinejudgeRepository,
         db_config=config.OJ_DB_CONFIG,
-        ssh_config=config.OJ_SSH_CONFIG
+        ssh_config=config.OJ_SSH_CONFIG,
+        pool=oj_db_pool,
+        catalogue=oj_catalogue
     )
     
     grading_logs_repo = providers.Factory(
         MySQLGradingLogRepository,
         linebot_db_config=config.LINEBOT_DB_CONFIG,
-        verify_db_config=config.VERIFY_DB_CONFIG
+        verify_db_config=config.VERIFY_DB_CONFIG,
+        linebot_pool=linebot_db_pool,
+        verify_pool=verify_db_pool
     )
     
     pushes_repo = providers.Factory(
         MySQLFeedbackPushRepository,
-        linebot_db_config=config.LINEBOT_DB_CONFIG
+        linebot_db_config=config.LINEBOT_DB_CONFIG,
+        linebot_pool=linebot_db_pool
     )
     
     suggestion_repo = providers.Factory(
         MySQLSuggestionQueryRepository,
         linebot_db_config=config.LINEBOT_DB_CONFIG,
-        verify_db_config=config.VERIFY_DB_CONFIG
+        verify_db_config=config.VERIFY_DB_CONFIG,
+        linebot_pool=linebot_db_pool,
+        verify_pool=verify_db_pool
     )
     
     feedback_repo = providers.Factory(
         MySQLFeedbackRepository,
-        verify_db_config=config.VERIFY_DB_CONFIG
+        verify_db_config=config.VERIFY_DB_CONFIG,
+        verify_pool=verify_db_pool
+    )
+
+    # message_logs / event_logs 背景批次寫入（行程內一份，shutdown 時寫完剩下的）
+    log_writer = providers.Resource(
+        closing,
+        BufferedLogWriter,
+        message_repo=message_repo,
+        event_repo=event_repo,
+        max_buffer=config.LOG_BUFFER_MAX_ROWS,
+        batch_size=config.LOG_BATCH_SIZE,
+        flush_interval=config.LOG_FLUSH_INTERVAL,
+        overflow_policy=config.LOG_BUFFER_OVERFLOW_POLICY,
+        block_timeout=config.LOG_BUFFER_BLOCK_TIMEOUT
     )
 
+    # buffered 模式的 log_id 產生器：行程內一個，worker id 來自 LOG_WORKER_ID（沒設就在建立時報錯）
+    log_id_generator = providers.ThreadSafeSingleton(
+        TimeOrderedIdGenerator, worker_id=config.LOG_WORKER_ID)
+
     # 4. Service Providers (Application)
     # The container automatically wires the dependencies together.
     chatbot_logger = providers.Factory(
-        ChatbotLogger, message_repo=message_repo, event_repo=event_repo)
+        ChatbotLogger, message_repo=message_repo, event_repo=event_repo,
+        writer=providers.Selector(
+            config.LOG_WRITER_MODE,
+            buffered=log_writer,
+            sync=providers.Object(None),
+        ),
+        id_generator=providers.Selector(
+            config.LOG_WRITER_MODE,
+            buffered=log_id_generator,
+            sync=providers.Object(None),
+        ))
 
     mail_carrier = providers.Factory(
         GmailSMTPMailCarrier, send_from=config.EMAIL_SEND_FROM, password=config.EMAIL_PASSWORD)
@@ -164,8 +346,17 @@ class AppContainer(containers.DeclarativeContainer):
     user_state_accessor = providers.Factory(
         UserStateAccessor, user_state_repo=user_state_repo)
 
+    # Google Sheet（點名表、錯誤回顧成績表）CSV 快取，行程內共用
+    sheet_cache = providers.Resource(
+        closing,
+        GoogleSheetCsvCache,
+        ttl=config.SHEET_CACHE_TTL,
+        stale_ttl=config.SHEET_CACHE_STALE_TTL,
+        timeout=config.SHEET_FETCH_TIMEOUT
+    )
+
     score_aggregator = providers.Factory(
-        ScoreAggregator, oj_repo=oj_repo, summary_repo=summary_repo)
+        ScoreAggregator, oj_repo=oj_repo, summary_repo=summary_repo, sheet_source=sheet_cache)
 
     registration_service = providers.Factory(
         RegistrationService,
@@ -198,7 +389,8 @@ class AppContainer(containers.DeclarativeContainer):
         CheckAttendanceService,
         course_repo=course_repo,
         line_service=line_api_service,
-        chatbot_logger=chatbot_logger
+        chatbot_logger=chatbot_logger,
+        sheet_source=sheet_cache
     )
 
     check_score_service = providers.Factory(
@@ -210,7 +402,9 @@ class AppContainer(containers.DeclarativeContainer):
         chatbot_logger=chatbot_logger
     )
     
-    openai_client = providers.Factory(
+    # OpenAI SDK client 內含 HTTP 連線池，行程內共用
+    openai_client = providers.Resource(
+        closing,
         OpenAIClient,
         api_key=config.SUMMARY_OPENAI_KEY
     )
@@ -227,6 +421,12 @@ class AppContainer(containers.DeclarativeContainer):
         suggestion_repo=suggestion_repo
     )
     
+    # 呼叫 162 批改服務的 keep-alive session；GraderClient 本身依賴每個事件的 service，維持 Factory
+    grader_http_session = providers.Resource(
+        closing,
+        requests.Session
+    )
+
     grading_port_provider = providers.Factory(
         GraderClient,
         base_url=config.GRADER_BASE_URL,
@@ -238,7 +438,8 @@ class AppContainer(containers.DeclarativeContainer):
         feedbacker=feedbacker,
         mail_carrier=mail_carrier,
         user_state_accessor=user_state_accessor,
-        chatbot_logger=chatbot_logger
+        chatbot_logger=chatbot_logger,
+        session=grader_http_session
     )
     
     get_suggestion_use_case = providers.Factory(
@@ -259,7 +460,8 @@ class AppContainer(containers.DeclarativeContainer):
         mail_carrier=mail_carrier,
         feedbacker=feedbacker,
         suggestion_service=suggestion_service,
-        chatbot_logger=chatbot_logger
+        chatbot_logger=chatbot_logger,
+        genai_enabled=config.SUMMARY_GENAI_FEEDBACK_ENABLED
     )
     
     grade_batch_use_case = providers.Factory(
@@ -271,7 +473,10 @@ class AppContainer(containers.DeclarativeContainer):
         line_service=line_api_service,
         feedbacker=feedbacker,
         suggestion_service=suggestion_service,
-        chatbot_logger=chatbot_logger
+        chatbot_logger=chatbot_logger,
+        concurrency=config.GRADE_BATCH_CONCURRENCY,
+        follow_up_concurrency=config.GRADE_BATCH_FOLLOW_UP_CONCURRENCY,
+        genai_enabled=config.SUMMARY_GENAI_FEEDBACK_ENABLED
     )
 
     # ... add other services like LeaveService here ...
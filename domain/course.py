@@ -104,3 +104,10 @@ class CourseRepository(ABC):
     @abstractmethod
     def populate_units(self, course: Course) -> Course:
         pass
+
+    def get_calendar_fingerprint(self, context_title: str):
+        """
+        回傳代表此課程單元/期限設定的指紋，設定有變指紋就會變；
+        不支援時回傳 None（快取只能靠 TTL 過期）。
+        """
+        return None
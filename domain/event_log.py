@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -42,3 +42,8 @@ class EventLogRepository(ABC):
     @abstractmethod
     def save_event_log(self, event_log: EventLog) -> None:
         pass
+
+    @abstractmethod
+    def save_event_logs(self, event_logs: List[EventLog]) -> None:
+        """批次寫入"""
+        pass
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -13,8 +13,21 @@ class MessageLog:
     log_id: Optional[int] = None
 
 
+class DuplicateLogIdError(Exception):
+    """同一個 log_id 已經存在、但內容不同：兩個行程產生了同一個 id"""
+
+
 class MessageLogRepository(ABC):
 
     @abstractmethod
     def save_message_log(self, message_log: MessageLog) -> None:
         pass
+
+    @abstractmethod
+    def save_message_logs(self, message_logs: List[MessageLog]) -> None:
+        """
+        批次寫入；每筆都必須已經有 log_id（由呼叫端產生）。
+        同一個 log_id、同樣內容重複寫入不會報錯，讓寫入失敗後可以整批重送；
+        內容不同就丟 DuplicateLogIdError，整批不寫入。
+        """
+        pass
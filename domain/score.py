@@ -1,18 +1,61 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-import re
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+from typing import Callable, Optional
 
-import pandas as pd
 
 from domain.student import Student
 from domain.course import Course
+from domain.sheet import SheetCsvSource, SheetTable, parse_sheet_url
+
+
+logger = logging.getLogger(__name__)
+
+# 查分時同時打 OJ / summary / Google Sheet；與 webhook 的 executor 分開，避免互相卡住
+_SOURCE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=12, thread_name_prefix="score-source")
+
+# 各資料來源最多等幾秒，逾時的欄位單獨顯示錯誤，不影響其他欄位
+# （逾時只是不再等，已經在跑的查詢停不下來：OJ 的 statement_timeout、Sheet 的 HTTP timeout 要設得不超過這裡）
+DEFAULT_SOURCE_TIMEOUTS = {
+    "oj": 5.0,
+    "summary": 3.0,
+    "mistake_review": 6.0,
+}
+
+# 每個資料來源同時最多佔幾個 executor 執行緒：某個來源卡住時，其他來源還有執行緒可用。
+# 名額在查詢真正結束時才歸還（不是逾時的時候），名額用完的來源直接回報 BUSY
+MAX_IN_FLIGHT_PER_SOURCE = 4
+_SOURCE_SLOTS = {name: threading.BoundedSemaphore(MAX_IN_FLIGHT_PER_SOURCE)
+                 for name in DEFAULT_SOURCE_TIMEOUTS}
 
 
 @dataclass
 class ScoreReport:
     contents_name: str
     scores: dict[str, str]
+    # 各資料來源花費秒數（含 "total"），僅供 log / 監控，不參與比較
+    latency: dict[str, float] = field(default_factory=dict, compare=False)
+
+
+@dataclass(frozen=True)
+class UnitProgress:
+    """某學生在某單元的 OJ 進度：題目總數與在 deadline 前 AC 的題數"""
+    exercise_total: int
+    exercise_done: int
+    advance_total: int
+    advance_done: int
+
+
+@dataclass(frozen=True)
+class SummaryScoreSnapshot:
+    """某學生某單元的總結概念狀態：最新一筆 log、是否待助教驗證、deadline 前的分數（100 / 80 / 0）"""
+    log_id: Optional[int]
+    under_review: bool
+    score: Optional[int]
 
 
 class OnlinejudgeRepository(ABC):
@@ -32,6 +75,22 @@ class OnlinejudgeRepository(ABC):
     def get_advance_submission_by_contents_name(self, oj_contest_title: str, contents_name: str, stdID: str, deadline) -> int:
         pass
 
+    def get_unit_progress(self, oj_contest_title: str, contents_name: str, stdID: str, deadline) -> UnitProgress:
+        """
+        一次取回 Exercise / Advance 的題數與完成數。
+        預設用上面四個方法組起來；實作端應覆寫成單一查詢，省掉來回。
+        """
+        return UnitProgress(
+            exercise_total=self.get_exercise_number_by_contents_name(
+                oj_contest_title, contents_name),
+            exercise_done=self.get_exercise_submission_by_contents_name(
+                oj_contest_title, contents_name, stdID, deadline),
+            advance_total=self.get_advance_number_by_contents_name(
+                oj_contest_title, contents_name),
+            advance_done=self.get_advance_submission_by_contents_name(
+                oj_contest_title, contents_name, stdID, deadline),
+        )
+
 
 class SummaryRepository(ABC):
     @abstractmethod
@@ -48,32 +107,73 @@ class SummaryRepository(ABC):
                          contents_name: str, deadline: str) -> Optional[int]:
         pass
 
+    def get_summary_score_snapshot(self, stdID: str, context_title: str,
+                                   contents_name: str, deadline: str) -> SummaryScoreSnapshot:
+        """
+        一次取回查分需要的三個值。
+        預設用上面三個方法組起來；實作端應覆寫成單一查詢，省掉來回。
+        """
+        log_id = self.get_latest_log_id(stdID, context_title, contents_name)
+        if not log_id:
+            return SummaryScoreSnapshot(log_id=None, under_review=False, score=None)
+        if self.is_log_under_review(log_id):
+            return SummaryScoreSnapshot(log_id=log_id, under_review=True, score=None)
+        return SummaryScoreSnapshot(
+            log_id=log_id, under_review=False,
+            score=self.get_score_result(stdID, context_title, contents_name, deadline))
+
 
 class ScoreAggregator:
-    def __init__(self, oj_repo: OnlinejudgeRepository, summary_repo: SummaryRepository):
+    def __init__(self, oj_repo: OnlinejudgeRepository, summary_repo: SummaryRepository,
+                 executor: ThreadPoolExecutor = None, source_timeouts: dict[str, float] = None,
+                 sheet_source: SheetCsvSource = None,
+                 source_slots: dict[str, threading.BoundedSemaphore] = None):
         self.oj_repo = oj_repo
         self.summary_repo = summary_repo
+        # 錯誤回顧成績表的來源（共用快取）
+        self.sheet_source = sheet_source
+        self.executor = executor or _SOURCE_EXECUTOR
+        self.source_timeouts = {**DEFAULT_SOURCE_TIMEOUTS,
+                                **(source_timeouts or {})}
+        self.source_slots = {**_SOURCE_SLOTS, **(source_slots or {})}
 
     def aggregate(self, student: Student, course: Course, unit_name: str, mistake_review_sheet_url: str) -> ScoreReport:
+        """
+        三個資料來源（OJ、summary、錯誤回顧 Google Sheet）同時查詢，各自有 timeout；
+        某個來源失敗或逾時只影響它自己的欄位，其他成績照常回覆。
+        """
         unit = next(
             (unit for unit in course.units if unit.name == unit_name), None)
         if not unit:
             raise ValueError(f"找不到單元 {unit_name}")
 
-        try:
-            oj_exercise_score = self._get_OJ_exercise_score(
-                stdID=student.student_id, contents_name=unit_name, oj_contest_title=course.oj_contest_title, deadline=unit.deadlines.oj_deadline
-            )
-            oj_advance_score = self._get_OJ_advance_score(
-                stdID=student.student_id, contents_name=unit_name, oj_contest_title=course.oj_contest_title, deadline=unit.deadlines.oj_deadline
-            )
-            summary_score = self._get_summary_score(
-                context_title=course.context_title, stdID=student.student_id, contents_name=unit_name, deadline=unit.deadlines.summary_deadline)
-            mistake_review_score = self._get_mistake_review_value(
-                student.student_id, unit_name, mistake_review_sheet_url)
-        except Exception as e:
-            error_code = getattr(e, "args", ["UNKNOWN_ERROR"])[0]
-            mistake_review_score = f"發生異常，請通知助教。(異常代碼: {error_code})"
+        sources: dict[str, Callable] = {
+            # 四個 OJ 數字用一次查詢拿回來
+            "oj": lambda: self.oj_repo.get_unit_progress(
+                oj_contest_title=course.oj_contest_title, contents_name=unit_name, stdID=student.student_id, deadline=unit.deadlines.oj_deadline),
+            "summary": lambda: self._get_summary_score(
+                context_title=course.context_title, stdID=student.student_id, contents_name=unit_name, deadline=unit.deadlines.summary_deadline),
+            "mistake_review": lambda: self._get_mistake_review_value(
+                student.student_id, unit_name, mistake_review_sheet_url),
+        }
+        results, errors, latency = self._fan_out(sources)
+
+        if "oj" in results:
+            progress = results["oj"]
+            oj_exercise_score = f'{progress.exercise_done} / {progress.exercise_total}'
+            oj_advance_score = f'{progress.advance_done} / {progress.advance_total}'
+        else:
+            oj_exercise_score = oj_advance_score = self._error_message(
+                errors["oj"])
+
+        summary_score = results["summary"] if "summary" in results \
+            else self._error_message(errors["summary"])
+        mistake_review_score = results["mistake_review"] if "mistake_review" in results \
+            else self._error_message(errors["mistake_review"])
+
+        logger.info("score aggregate stdID=%s unit=%s latency=%s errors=%s",
+                    student.student_id, unit_name, latency,
+                    {k: type(e).__name__ for k, e in errors.items()})
 
         return ScoreReport(
             contents_name=unit_name,
@@ -82,31 +182,63 @@ class ScoreAggregator:
                 "OJ Advance(完成題數)": oj_advance_score,
                 "總結概念成績": summary_score,
                 "錯誤回顧成績": mistake_review_score
-            }
+            },
+            latency=latency
         )
 
-    def _get_OJ_exercise_score(self, oj_contest_title, contents_name, stdID, deadline) -> str:
-        """
-        OJ_score = math.ceil(100 * OJ_all_submission / OJ_all_problem)
-        if OJ_score > 100: OJ_score = 100
-        return OJ_score
-        """
-        OJ_all_problem = self.oj_repo.get_exercise_number_by_contents_name(
-            oj_contest_title=oj_contest_title, contents_name=contents_name)
-
-        OJ_all_submission = self.oj_repo.get_exercise_summission_by_contents_name(
-            oj_contest_title=oj_contest_title, contents_name=contents_name, stdID=stdID, deadline=deadline)
-
-        return f'{OJ_all_submission} / {OJ_all_problem}'
-
-    def _get_OJ_advance_score(self, oj_contest_title, contents_name, stdID, deadline) -> str:
-        OJ_all_problem = self.oj_repo.get_advance_number_by_contents_name(
-            oj_contest_title=oj_contest_title, contents_name=contents_name)
-
-        OJ_all_submission = self.oj_repo.get_advance_summission_by_contents_name(
-            oj_contest_title=oj_contest_title, contents_name=contents_name, stdID=stdID, deadline=deadline)
-
-        return f'{OJ_all_submission} / {OJ_all_problem}'
+    def _fan_out(self, sources: dict[str, Callable]) -> tuple[dict, dict[str, Exception], dict[str, float]]:
+        started = time.monotonic()
+        elapsed: dict[str, float] = {}
+
+        def timed(name, fn, slot):
+            t0 = time.monotonic()
+            try:
+                return fn()
+            finally:
+                elapsed[name] = time.monotonic() - t0
+                if slot is not None:
+                    slot.release()
+
+        results, errors, latency = {}, {}, {}
+        futures = {}
+        for name, fn in sources.items():
+            slot = self.source_slots.get(name)
+            if slot is not None and not slot.acquire(blocking=False):
+                # 這個來源已經有 MAX_IN_FLIGHT_PER_SOURCE 個查詢卡著，不再多佔執行緒
+                errors[name] = TimeoutError("BUSY")
+                latency[name] = 0.0
+                continue
+            try:
+                futures[name] = self.executor.submit(timed, name, fn, slot)
+            except Exception:
+                if slot is not None:
+                    slot.release()
+                raise
+
+        for name, future in futures.items():
+            # timeout 從一起送出的時間點開始算，不會因為前一個來源慢而被拉長
+            remaining = started + self.source_timeouts[name] - time.monotonic()
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                if future.cancel():
+                    # 還沒開始跑就被取消，timed 不會執行，名額在這裡歸還
+                    slot = self.source_slots.get(name)
+                    if slot is not None:
+                        slot.release()
+                errors[name] = TimeoutError("TIMEOUT")
+            except Exception as e:
+                errors[name] = e
+            latency[name] = round(
+                elapsed.get(name, time.monotonic() - started), 6)
+
+        latency["total"] = round(time.monotonic() - started, 6)
+        return results, errors, latency
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        error_code = error.args[0] if error.args else "UNKNOWN_ERROR"
+        return f"發生異常，請通知助教。(異常代碼: {error_code})"
 
     def _get_summary_score(self, context_title, contents_name, stdID, deadline):
         """
@@ -115,6 +247,7 @@ class ScoreAggregator:
         3. 如果在 deadline 前繳交，並且 result = 1，分數為 100
         4. 如果在 deadline 前繳交，並且 result = 0、penalty != -1，分數為 80
         5. 除此之外 0 分
+        （以上由 summary_repo.get_summary_score_snapshot 一次查回）
 
         ---
 
@@ -122,16 +255,15 @@ class ScoreAggregator:
         這個 function 的作用是假如計算分數的邏輯又有改，就在這邊處理。
         譬如多做什麼事可加分，這個機制既不放在資料表的schema，也不放在原本的評分流程，而是真的多出來的就在這邊處理。
         """
-        log_id = self.summary_repo.get_latest_log_id(
-            stdID, context_title, contents_name)
-        if not log_id:
+        snapshot = self.summary_repo.get_summary_score_snapshot(
+            stdID, context_title, contents_name, deadline)
+        if not snapshot.log_id:
             return "沒有紀錄"
 
-        if self.summary_repo.is_log_under_review(log_id):
+        if snapshot.under_review:
             return "最新提交評分中，批改完開放查詢分數，請稍候!"
 
-        score = self.summary_repo.get_score_result(
-            stdID, context_title, contents_name, deadline)
+        score = snapshot.score
         if score == 100:
             return "100"
         elif score == 80:
@@ -145,7 +277,7 @@ class ScoreAggregator:
         """
         查詢指定學生在某單元（週次）的錯誤回顧成績。
 
-        此函式會從 Google Sheets 讀取學生成績數據，根據學生學號 `stdID` 與單元名稱 `contents_name`
+        此函式會從 Google Sheets（經由 sheet_source 快取）讀取學生成績數據，根據學生學號 `stdID` 與單元名稱 `contents_name`
         查找對應的錯誤回顧成績，並回傳以下幾種可能結果：
 
         - 0: 錯誤回顧成績為 0
@@ -182,37 +314,37 @@ class ScoreAggregator:
         "無成績"
         """
 
-        sheet_id_match = re.search(
-            r"/spreadsheets/d/([a-zA-Z0-9-_]+)", mistake_review_sheet_url)
-        gid_match = re.search(r"gid=([0-9]+)", mistake_review_sheet_url)
+        sheet_id, gid = parse_sheet_url(mistake_review_sheet_url)
 
-        if not (sheet_id_match and gid_match):
+        if not (sheet_id and gid):
             raise ValueError("INVALID_URL")
 
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id_match.group(1)}/export?format=csv&gid={gid_match.group(1)}"
-
         try:
-            df = pd.read_csv(csv_url)
+            table = self._get_sheet_table(sheet_id, gid)
         except Exception:
             raise RuntimeError("CSV_READ_ERROR")
 
-        # 找到包含 contents_name 的欄位
-        matched_columns = [col for col in df.iloc[:,
-                                                  4:].columns if f"({contents_name})" in col]
+        # 找到包含 contents_name 的欄位（前四欄是 id、name、department、grade）
+        matched_column = table.find_unit_column(contents_name, start=4)
 
-        if not matched_columns:
+        if matched_column is None:
             raise LookupError("COLUMN_NOT_FOUND")
 
-        value = df.loc[df['id'] == stdID, matched_columns].values
+        row = table.lookup('id', stdID)
 
-        if value.size == 0:
+        if row is None:
             raise LookupError("STUDENT_NOT_FOUND")
 
-        if value[0][0] in (0, 100):
-            return value[0][0]
+        if row[matched_column] in (0, 100):
+            return row[matched_column]
 
         return "無成績"
 
+    def _get_sheet_table(self, sheet_id: str, gid: str) -> SheetTable:
+        if self.sheet_source is None:
+            raise RuntimeError("sheet_source is not configured")
+        return self.sheet_source.get_table(sheet_id, gid)
+
 
 class ScoreAggregationFailed(Exception):
     pass
@@ -0,0 +1,36 @@
+# domain/session.py
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from domain.course import Course
+from domain.student import Student
+from domain.user_state import UserStateEnum
+
+
+@dataclass(frozen=True)
+class SessionSnapshot:
+    """
+    一個 LINE 事件開始時的使用者上下文：學生、所屬課程（只有 shell，沒有 units）與對話狀態。
+
+    webhook 進來時一次讀好，往下傳給各個 service，處理同一個事件時不再各自重查。
+    快照本身不可變；要交給會改動 Course（例如 populate_units）的流程時請用 course_shell() 取複本。
+    """
+    student: Student
+    course: Optional[Course]
+    state: UserStateEnum = UserStateEnum.IDLE
+
+    def course_shell(self) -> Optional[Course]:
+        if self.course is None:
+            return None
+        return replace(self.course, ta_emails=list(self.course.ta_emails), units=[])
+
+
+class SessionSnapshotRepository(ABC):
+    @abstractmethod
+    def get_snapshot(self, line_user_id: str) -> Optional[SessionSnapshot]:
+        """
+        回傳使用者的 SessionSnapshot；沒有綁定進行中課程的使用者回傳 None。
+        沒有對話狀態紀錄的使用者視為 IDLE。
+        """
+        pass
@@ -0,0 +1,130 @@
+from abc import ABC, abstractmethod
+import csv
+import io
+import re
+from typing import Any, Iterable, Optional
+
+# 與 pandas.read_csv 預設相同，這些字串視為空值
+NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+})
+
+
+def parse_sheet_url(url: str) -> tuple[Optional[str], Optional[str]]:
+    """從 Google Sheet 分享連結抽出 (sheet_id, gid)，抽不到的部分回傳 None"""
+    sheet_id_match = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", url or "")
+    gid_match = re.search(r"gid=([0-9]+)", url or "")
+    return (
+        sheet_id_match.group(1) if sheet_id_match else None,
+        gid_match.group(1) if gid_match else None
+    )
+
+
+def csv_export_url(sheet_id: str, gid: str) -> str:
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+
+class SheetTable:
+    """
+    解析好的試算表分頁，查詢用的索引在第一次用到時建立並記住：
+
+    - lookup(column, key)：以某欄（如 id、name）的值找出整列，O(1)
+    - find_unit_column(contents_name)：找出標題含 "(C1)" 這類單元名稱的欄位
+
+    同一份 CSV 內容只會解析一次、建一次索引；內容變了由來源換一個新的 SheetTable。
+    """
+
+    def __init__(self, headers: Iterable[str], rows: Iterable[tuple]):
+        self.headers: tuple[str, ...] = tuple(str(h).strip() for h in headers)
+        self.rows: list[tuple] = [tuple(r) for r in rows]
+        self._positions = {h: i for i, h in reversed(
+            list(enumerate(self.headers)))}
+        self._indexes: dict[str, dict[Any, tuple]] = {}
+        self._unit_columns: dict[tuple[str, int], Optional[str]] = {}
+
+    @classmethod
+    def from_csv_text(cls, text: str) -> 'SheetTable':
+        """
+        用標準庫 csv 逐列讀入，不需要 pandas。
+        欄位型別比照 pandas.read_csv 的推斷：整欄都是整數就轉 int，有空值或小數就轉 float，
+        其餘維持字串；空值（含 "NA"、"nan" 等）一律為 None。
+        """
+        reader = csv.reader(io.StringIO(text.lstrip("\ufeff")))
+        headers = next(reader, None)
+        if headers is None:
+            return cls([], [])
+
+        width = len(headers)
+        columns: list[list[str]] = [[] for _ in range(width)]
+        for raw in reader:
+            if not raw:
+                continue  # pandas 預設略過空白列
+            raw = raw[:width] + [""] * (width - len(raw))
+            for i, cell in enumerate(raw):
+                columns[i].append(cell)
+
+        converted = [_convert_column(col) for col in columns]
+        return cls(headers, zip(*converted) if converted else [])
+
+    def lookup(self, key_column: str, key) -> Optional[dict]:
+        """
+        回傳 key_column 欄位等於 key 的第一列（dict），找不到回傳 None。
+        欄位不存在時丟 KeyError。
+        """
+        index = self._indexes.get(key_column)
+        if index is None:
+            if key_column not in self._positions:
+                raise KeyError(key_column)
+            pos = self._positions[key_column]
+            index = {}
+            for row in self.rows:
+                # 與原本的 df[df[col] == key].iloc[0] 一致：重複時取第一筆
+                index.setdefault(row[pos], row)
+            self._indexes[key_column] = index
+
+        row = index.get(key)
+        return dict(zip(self.headers, row)) if row is not None else None
+
+    def find_unit_column(self, contents_name: str, start: int = 0) -> Optional[str]:
+        """從第 start 欄之後找出標題含 "(contents_name)" 的第一個欄位"""
+        memo_key = (contents_name, start)
+        if memo_key not in self._unit_columns:
+            self._unit_columns[memo_key] = next(
+                (h for h in self.headers[start:] if f"({contents_name})" in h), None)
+        return self._unit_columns[memo_key]
+
+
+def _convert_column(cells: list[str]) -> list:
+    values = [None if c in NA_VALUES else c for c in cells]
+    present = [v for v in values if v is not None]
+    if not present:
+        return values
+
+    try:
+        ints = [int(v) if v is not None else None for v in values]
+        if len(present) == len(values):
+            return ints
+        # 整數欄有空值時 pandas 會轉成 float64
+        return [float(v) if v is not None else None for v in ints]
+    except ValueError:
+        pass
+
+    try:
+        return [float(v) if v is not None else None for v in values]
+    except ValueError:
+        return values
+
+
+class SheetCsvSource(ABC):
+    """提供 Google Sheet 某個分頁的 CSV 內容（通常會有快取）"""
+
+    @abstractmethod
+    def get_csv(self, sheet_id: str, gid: str) -> str:
+        pass
+
+    @abstractmethod
+    def get_table(self, sheet_id: str, gid: str) -> SheetTable:
+        """解析好、可直接查詢的表格；同一份內容應回傳同一個 SheetTable"""
+        pass
@@ -1,5 +1,35 @@
 # domain/summary_repositories.py
-from typing import List, Optional, Protocol, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from typing import List, Optional, Protocol, Dict, Any, Set, Tuple
+
+
+@dataclass(frozen=True)
+class SummaryStatus:
+    """
+    「查看總結建議」一次需要的全部資料：
+    最新 log、是否送進 SummarySubmissions / 待驗證、最新的助教回饋，
+    以及產生建議用的 get_suggestion_info 結果與 (keywords, questions)。
+    """
+    log_id: Optional[int] = None
+    in_submissions: bool = False
+    under_review: bool = False
+    teacher_feedback: Optional[str] = None
+    suggestion_info: Optional[Dict[str, Any]] = None
+    keywords: List[str] = field(default_factory=list)
+    questions: List[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class SummaryFeedback:
+    """要寫進 verify DB SummarySubmissions 的一筆 GenAI 總結回饋"""
+    student_id: str
+    topic_id: str  # 單元名稱（contents_name）
+    gpt_feedback: str
+    context_title: str
+    student_summary: str
+    summary_gradding_log_id: int
+    basic_feedback: str
+    line_id: str
 
 
 class GradingLogRepository(Protocol):
@@ -10,12 +40,24 @@ class GradingLogRepository(Protocol):
                                    contents_name: str) -> int: ...
     # 若需要，也可加：get_last_gradding_summary(...) 但先照你現況即可
 
+    # ——GenAI 回饋寫入 verify DB（寫入並把同單元舊的 wait_review 標成 covered）——
+    def write_summary_GPT_feedback_to_verify_db_with_check_repeat(
+        self, StudentId, TopicId, GPT_Feedback, context_title, student_summary,
+        summary_gradding_log_id, basic_feedback, line_id) -> str: ...
+
+    def write_summary_GPT_feedbacks_to_verify_db(
+        self, feedbacks: List[SummaryFeedback]) -> int: ...
+
 
 class SuggestionQueryRepository(Protocol):
     # ——產生建議所需的查詢（含「綜合視圖」）——
     def get_suggestion_info(self, student_id: str, context_title: str,
                             contents_name: str) -> Optional[Dict[str, Any]]: ...
 
+    # 整班一次查（GradeBatchUseCase 用），回傳 {student_id: get_suggestion_info 結果}
+    def get_suggestion_info_many(self, student_ids: List[str], context_title: str,
+                                 contents_name: str) -> Dict[str, Dict[str, Any]]: ...
+
     def get_questions(self, context_title: str,
                       contents_name: str) -> Tuple[List[str], List[str]]: ...
     def get_example_summary(self, context_title: str,
@@ -26,6 +68,10 @@ class SuggestionQueryRepository(Protocol):
     def use_summary_grading_log_id_get_GenAI_feedback(
         self, log_id: int) -> Optional[str]: ...
 
+    # 以上全部併成一次查詢（GetSuggestionUseCase 用）
+    def get_summary_status(self, student_id: str, context_title: str,
+                           contents_name: str) -> SummaryStatus: ...
+
 
 class FeedbackPushRepository(Protocol):
     # ——推播控管（避免重複推送）——
@@ -34,3 +80,10 @@ class FeedbackPushRepository(Protocol):
 
     def write_summary_feedback_push(self, stdID: str, context_title: str,
                                     contents_name: str) -> None: ...
+
+    # 整班版本：已推送過的學生 / 一次記錄多位學生
+    def get_pushed_student_ids(self, student_ids: List[str], context_title: str,
+                               contents_name: str) -> Set[str]: ...
+
+    def write_summary_feedback_pushes(self, student_ids: List[str], context_title: str,
+                                      contents_name: str) -> None: ...
@@ -32,3 +32,12 @@ class UserStateRepository(ABC):
     @abstractmethod
     def delete(self, line_user_id: str):
         pass
+
+    @abstractmethod
+    def transition(self, line_user_id: str, new_state: UserStateEnum,
+                   expected_state: Optional[UserStateEnum] = None) -> bool:
+        """
+        原子地把狀態改成 new_state（保留 context）。
+        給了 expected_state 時是 compare-and-set：目前狀態（沒有紀錄視為 IDLE）不是 expected_state 就不改，回傳 False。
+        """
+        pass
@@ -1,3 +1,4 @@
+import itertools
 import os
 from dotenv import load_dotenv
 from ngrok import forward
@@ -24,3 +25,21 @@ def on_exit(server):
         server.ngrok_listener.close()
     except Exception:
         pass
+
+
+def pre_fork(server, worker):
+    # 每個 worker 一個固定槽位（0..workers-1），重啟的 worker 補上空出來的槽位；
+    # log_id 的 worker id = LOG_WORKER_ID + 槽位（config/settings.py）
+    used = {getattr(w, "log_worker_slot", None) for w in server.WORKERS.values()}
+    worker.log_worker_slot = next(i for i in itertools.count() if i not in used)
+
+
+def post_fork(server, worker):
+    os.environ["LOG_WORKER_SLOT"] = str(worker.log_worker_slot)
+
+
+def worker_exit(server, worker):
+    # worker 結束時關閉連線池、SSH tunnel 與 HTTP client（atexit 在被 kill 時不一定會跑）
+    container = getattr(getattr(worker, "wsgi", None), "container", None)
+    if container is not None:
+        container.shutdown_resources()
@@ -0,0 +1,217 @@
+# infrastructure/cached_course_repository.py
+"""
+CourseRepository 的快取裝飾器。
+
+course_info 一學期只改幾次，但請假、查分、點名、補改信、grader client 幾乎每個流程都會
+`get_course_shell`，註冊則每次都 `get_in_progress_courses`。這裡把結果留在行程記憶體裡：
+
+- ttl 秒後過期；也可透過 /admin/course_cache/refresh/ 手動清除
+- 最多保留 max_entries 筆課程（LRU），避免每個 gunicorn worker 無上限長大
+- 快取內存的是不可變的 CourseSnapshot，每次回傳都是新建的 Course，
+  呼叫端（例如 populate_units 會改 course.units）改了也不會污染其他請求
+- populate_units 的單元/期限行事曆另外按 context_title 快取（calendar_ttl），
+  每 revalidate_interval 秒用 get_calendar_fingerprint 檢查 review_publish / change_HW_deadline 是否有變
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from domain.course import Course, CourseRepository, CourseUnit, DeadlinesVO
+
+
+@dataclass(frozen=True)
+class CourseSnapshot:
+    context_title: str
+    ta_emails: tuple[str, ...]
+    leave_notice: int
+    day_of_week: int
+    oj_contest_title: str
+    attendance_sheet_url: str
+
+    @classmethod
+    def of(cls, course: Course) -> 'CourseSnapshot':
+        return cls(
+            context_title=course.context_title,
+            ta_emails=tuple(course.ta_emails),
+            leave_notice=course.leave_notice,
+            day_of_week=course.day_of_week,
+            oj_contest_title=course.oj_contest_title,
+            attendance_sheet_url=course.attendance_sheet_url,
+        )
+
+    def to_course(self) -> Course:
+        return Course(
+            context_title=self.context_title,
+            ta_emails=list(self.ta_emails),
+            leave_notice=self.leave_notice,
+            day_of_week=self.day_of_week,
+            oj_contest_title=self.oj_contest_title,
+            attendance_sheet_url=self.attendance_sheet_url,
+            units=[]
+        )
+
+
+@dataclass(frozen=True)
+class UnitCalendar:
+    """某門課已發布單元與期限的不可變快照：((unit_name, oj_deadline, summary_deadline), ...)"""
+    units: tuple[tuple[str, str, str], ...]
+    fingerprint: object
+    loaded_at: float
+    checked_at: float
+
+    @classmethod
+    def of(cls, units: list[CourseUnit], fingerprint, now: float) -> 'UnitCalendar':
+        return cls(
+            units=tuple((u.name, u.deadlines.oj_deadline, u.deadlines.summary_deadline)
+                        for u in units),
+            fingerprint=fingerprint, loaded_at=now, checked_at=now)
+
+    def to_units(self) -> list[CourseUnit]:
+        return [CourseUnit(name=name, deadlines=DeadlinesVO(oj_deadline=oj, summary_deadline=summary))
+                for name, oj, summary in self.units]
+
+
+class CachedCourseRepository(CourseRepository):
+    def __init__(self, inner: CourseRepository, ttl: float = 300, max_entries: int = 256,
+                 calendar_ttl: float = 600, revalidate_interval: float = 30):
+        self.inner = inner
+        self.ttl = ttl
+        self.max_entries = int(max_entries)
+        self.calendar_ttl = calendar_ttl
+        self.revalidate_interval = revalidate_interval
+
+        self._lock = threading.Lock()
+        # context_title -> (loaded_at, snapshot)
+        self._shells: OrderedDict[str, tuple[float, CourseSnapshot]] = OrderedDict()
+        # reserved -> (loaded_at, snapshots)
+        self._in_progress: dict[str, tuple[float, tuple[CourseSnapshot, ...]]] = {}
+        self._calendars: OrderedDict[str, UnitCalendar] = OrderedDict()
+
+        self._hits = 0
+        self._misses = 0
+        self._calendar_hits = 0
+        self._calendar_loads = 0
+        self._calendar_revalidations = 0
+
+    def get_course_shell(self, context_title: str) -> Course:
+        with self._lock:
+            cached = self._shells.get(context_title)
+            if cached is not None and self._fresh(cached[0]):
+                self._shells.move_to_end(context_title)
+                self._hits += 1
+                return cached[1].to_course()
+            self._misses += 1
+
+        course = self.inner.get_course_shell(context_title)
+        if course is None:
+            # 查無課程不快取，避免新開的課要等 TTL 才查得到
+            return None
+
+        snapshot = CourseSnapshot.of(course)
+        self._put_shell(snapshot)
+        return snapshot.to_course()
+
+    def get_in_progress_courses(self, reserved: str = "") -> list[Course]:
+        with self._lock:
+            cached = self._in_progress.get(reserved)
+            if cached is not None and self._fresh(cached[0]):
+                self._hits += 1
+                return [s.to_course() for s in cached[1]]
+            self._misses += 1
+
+        snapshots = tuple(CourseSnapshot.of(c)
+                          for c in self.inner.get_in_progress_courses(reserved))
+        with self._lock:
+            self._in_progress[reserved] = (time.monotonic(), snapshots)
+        for snapshot in snapshots:
+            self._put_shell(snapshot)
+        return [s.to_course() for s in snapshots]
+
+    def populate_units(self, course: Course) -> Course:
+        if self.calendar_ttl <= 0:
+            return self.inner.populate_units(course)
+
+        context_title = course.context_title
+        now = time.monotonic()
+        with self._lock:
+            calendar = self._calendars.get(context_title)
+        if calendar is not None and now - calendar.loaded_at >= self.calendar_ttl:
+            calendar = None
+
+        if calendar is not None and now - calendar.checked_at >= self.revalidate_interval:
+            # 超過檢查間隔：比對指紋，沒變就延長，有變（或不支援指紋）就重新載入
+            fingerprint = self.inner.get_calendar_fingerprint(context_title)
+            with self._lock:
+                self._calendar_revalidations += 1
+            if fingerprint is not None and fingerprint == calendar.fingerprint:
+                calendar = UnitCalendar(units=calendar.units, fingerprint=fingerprint,
+                                        loaded_at=calendar.loaded_at, checked_at=now)
+                self._put_calendar(context_title, calendar)
+            else:
+                calendar = None
+        elif calendar is not None:
+            with self._lock:
+                self._calendar_hits += 1
+
+        if calendar is None:
+            # 先取指紋再載入：載入途中若有異動，下次檢查就會發現
+            fingerprint = self.inner.get_calendar_fingerprint(context_title)
+            loaded = self.inner.populate_units(CourseSnapshot.of(course).to_course())
+            calendar = UnitCalendar.of(loaded.units, fingerprint, now)
+            self._put_calendar(context_title, calendar)
+            with self._lock:
+                self._calendar_loads += 1
+
+        course.units = calendar.to_units()
+        return course
+
+    def get_calendar_fingerprint(self, context_title: str):
+        return self.inner.get_calendar_fingerprint(context_title)
+
+    def invalidate(self, context_title: Optional[str] = None) -> int:
+        """清掉某門課（或全部）的課程與行事曆快取，回傳清掉的課程筆數"""
+        with self._lock:
+            # 進行中課程清單可能包含該課程，一併清掉
+            self._in_progress.clear()
+            if context_title is None:
+                removed = len(self._shells)
+                self._shells.clear()
+                self._calendars.clear()
+                return removed
+            self._calendars.pop(context_title, None)
+            return 1 if self._shells.pop(context_title, None) is not None else 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+                "entries": len(self._shells),
+                "in_progress_lists": len(self._in_progress),
+                "hits": self._hits,
+                "misses": self._misses,
+                "calendar_ttl": self.calendar_ttl,
+                "calendars": len(self._calendars),
+                "calendar_hits": self._calendar_hits,
+                "calendar_loads": self._calendar_loads,
+                "calendar_revalidations": self._calendar_revalidations,
+            }
+
+    def _put_shell(self, snapshot: CourseSnapshot):
+        with self._lock:
+            self._shells[snapshot.context_title] = (time.monotonic(), snapshot)
+            self._shells.move_to_end(snapshot.context_title)
+            while len(self._shells) > self.max_entries:
+                self._shells.popitem(last=False)
+
+    def _put_calendar(self, context_title: str, calendar: UnitCalendar):
+        with self._lock:
+            self._calendars[context_title] = calendar
+            self._calendars.move_to_end(context_title)
+            while len(self._calendars) > self.max_entries:
+                self._calendars.popitem(last=False)
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl
@@ -0,0 +1,192 @@
+# infrastructure/cached_student_repository.py
+"""
+StudentRepository 的身分快取裝飾器。
+
+註冊、補改信、批次評分等流程都會 `find_by_line_id`（account_info JOIN course_info），
+結果只有在註冊或帳號被刪除時才會變。這裡以 line_user_id 為 key：
+
+- 已註冊的使用者快取 ttl 秒；查無此人（還在輸入學號的新使用者）只快取 negative_ttl 秒，
+  讓他註冊完馬上就查得到
+- 最多保留 max_entries 筆（LRU）
+- save() 後立刻清掉該使用者；invalidate() 另外透過 invalidation_log 通知其他 worker，
+  其他 worker 每 poll_interval 秒檢查一次；查詢失敗時間隔加倍退避（最多 MAX_POLL_BACKOFF 秒），
+  同一段失敗只記一次 log
+- 回傳的是 Student 的複本，呼叫端改了也不會污染快取
+
+注意: webhook 熱路徑改用 MySQLSessionSnapshotRepository，一次 JOIN 連同對話狀態一起讀（狀態本來就得查 DB），
+不經過這個快取，因此解除綁定在 webhook 上立即生效。
+"""
+import dataclasses
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from domain.student import Student, StudentRepository
+from infrastructure.mysql_identity_invalidation_log import \
+    MySQLIdentityInvalidationLog
+
+logger = logging.getLogger(__name__)
+
+
+class CachedStudentRepository(StudentRepository):
+    MAX_POLL_BACKOFF = 300
+
+    def __init__(self, inner: StudentRepository, ttl: float = 300, negative_ttl: float = 10,
+                 max_entries: int = 4096, invalidation_log: MySQLIdentityInvalidationLog = None,
+                 poll_interval: float = 1):
+        self.inner = inner
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = int(max_entries)
+        self.invalidation_log = invalidation_log
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        # line_user_id -> (loaded_at, student 或 None)
+        self._entries: OrderedDict[str, tuple[float, Optional[Student]]] = OrderedDict()
+        # 每次失效 +1：查詢途中若被清過，就不把（可能過期的）結果放回快取
+        self._generation = 0
+        self._last_event_id: Optional[int] = None
+        self._last_poll = 0.0
+        self._poll_delay = poll_interval
+        self._poll_failures = 0
+
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._remote_invalidations = 0
+
+    def find_by_line_id(self, line_user_id: str) -> Optional[Student]:
+        if self.ttl <= 0:
+            return self.inner.find_by_line_id(line_user_id)
+
+        self._poll_invalidations()
+        with self._lock:
+            cached = self._entries.get(line_user_id)
+            if cached is not None:
+                loaded_at, student = cached
+                ttl = self.ttl if student is not None else self.negative_ttl
+                if time.monotonic() - loaded_at < ttl:
+                    self._entries.move_to_end(line_user_id)
+                    if student is None:
+                        self._negative_hits += 1
+                        return None
+                    self._hits += 1
+                    return dataclasses.replace(student)
+            self._misses += 1
+            generation = self._generation
+
+        student = self.inner.find_by_line_id(line_user_id)
+        with self._lock:
+            if generation != self._generation:
+                return student
+            self._entries[line_user_id] = (
+                time.monotonic(), dataclasses.replace(student) if student else None)
+            self._entries.move_to_end(line_user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return student
+
+    def find_by_student_id(self, student_id: str) -> Optional[Student]:
+        return self.inner.find_by_student_id(student_id)
+
+    def get_all_students(self, context_title: str) -> List[Student]:
+        return self.inner.get_all_students(context_title)
+
+    def save(self, student: Student) -> None:
+        try:
+            self.inner.save(student)
+        finally:
+            # 寫入失敗（例如學號已被綁定）也清掉，避免留著剛才的「查無此人」
+            self.invalidate(student.line_user_id)
+
+    def invalidate(self, line_user_id: Optional[str] = None) -> int:
+        """
+        清掉某位（不給就全部）使用者的快取並通知其他 worker，回傳本行程清掉的筆數。
+        助教手動解除綁定、刪除帳號後呼叫。
+        """
+        removed = self._evict(line_user_id)
+        with self._lock:
+            self._invalidations += 1
+        if self.invalidation_log is not None:
+            try:
+                self.invalidation_log.publish(line_user_id)
+            except Exception:
+                logger.warning("identity cache invalidation broadcast failed", exc_info=True)
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "negative_ttl": self.negative_ttl,
+                "max_entries": self.max_entries,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "remote_invalidations": self._remote_invalidations,
+                "last_event_id": self._last_event_id,
+                "poll_failures": self._poll_failures,
+            }
+
+    def _evict(self, line_user_id: Optional[str]) -> int:
+        with self._lock:
+            self._generation += 1
+            if line_user_id is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            return 1 if self._entries.pop(line_user_id, None) is not None else 0
+
+    def _poll_invalidations(self):
+        if self.invalidation_log is None:
+            return
+        now = time.monotonic()
+        if now - self._last_poll < self._poll_delay:
+            return
+        # 同一時間只要一個執行緒去查，其他人直接用快取
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_poll = now
+            if self._last_event_id is None:
+                # 第一次只記下目前位置，不重播舊事件（快取本來就是空的）
+                self._last_event_id = self.invalidation_log.latest_id()
+            else:
+                last_id, line_user_ids = self.invalidation_log.poll(self._last_event_id)
+                self._last_event_id = last_id
+                for line_user_id in line_user_ids:
+                    self._evict(line_user_id)
+                if line_user_ids:
+                    with self._lock:
+                        self._remote_invalidations += len(line_user_ids)
+        except Exception as e:
+            # DB 暫時查不到就沿用快取，退避後再試
+            self._poll_failed(e)
+        else:
+            if self._poll_failures:
+                logger.info("identity cache invalidation poll recovered after %d failures",
+                            self._poll_failures)
+            self._poll_failures = 0
+            self._poll_delay = self.poll_interval
+        finally:
+            self._poll_lock.release()
+
+    def _poll_failed(self, exc: Exception):
+        self._poll_failures += 1
+        self._poll_delay = min(max(self.poll_interval, 1) * 2 ** self._poll_failures,
+                               self.MAX_POLL_BACKOFF)
+        if self._poll_failures > 1:
+            return
+        if MySQLIdentityInvalidationLog.is_missing_table(exc):
+            logger.error("identity_cache_invalidation table is missing (run `python cli.py migrate`); "
+                         "other workers' invalidations are not seen, identities may be stale for up to %ss",
+                         self.ttl)
+        else:
+            logger.warning("identity cache invalidation poll failed, backing off", exc_info=True)
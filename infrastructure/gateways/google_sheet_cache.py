@@ -0,0 +1,205 @@
+# infrastructure/gateways/google_sheet_cache.py
+"""
+Google Sheet CSV 匯出的行程內快取。
+
+點名表、錯誤回顧成績表在下課後會被幾十個學生同時查，原本每次都整張重抓。
+這裡以 (sheet_id, gid) 為 key：
+
+- ttl 內直接回傳快取
+- 過期後同一張表只有一個執行緒去抓（single-flight），其他人有舊資料就先拿舊資料，沒有就等它抓完
+- 有 ETag / Last-Modified 時帶 If-None-Match / If-Modified-Since 做條件式重新驗證，304 只更新時間
+- Google 慢或掛掉時，stale_ttl 內的舊資料照樣回傳（stale-on-error）
+- stats() 提供 hit / miss / refresh 延遲等計數
+- get_table() 另外把每張表解析成 SheetTable（含查詢索引），CSV 內容沒變就不重建
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+
+from domain.sheet import SheetCsvSource, SheetTable, csv_export_url
+from infrastructure.mysql_unit_of_work import external_io
+
+
+class SheetFetchError(Exception):
+    """下載失敗且沒有可用的舊資料"""
+
+
+@dataclass(frozen=True)
+class SheetSnapshot:
+    text: str
+    digest: str
+    # 內容真的變了才 +1，給下游判斷要不要重建衍生資料
+    version: int
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+SheetKey = tuple[str, str]
+
+
+class GoogleSheetCsvCache(SheetCsvSource):
+    def __init__(self, ttl: float = 60, stale_ttl: float = 3600, timeout: float = 5,
+                 session: requests.Session = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+        self._lock = threading.Lock()
+        self._entries: dict[SheetKey, SheetSnapshot] = {}
+        self._key_locks: dict[SheetKey, threading.Lock] = {}
+        # key -> (CSV digest, 解析好的表格)
+        self._tables: dict[SheetKey, tuple[str, SheetTable]] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._revalidated = 0
+        self._changed = 0
+        self._stale_served = 0
+        self._errors = 0
+        self._refresh_total = 0.0
+        self._refresh_max = 0.0
+        self._table_builds = 0
+
+    # ---------- public ----------
+
+    def get_csv(self, sheet_id: str, gid: str) -> str:
+        return self.get_snapshot(sheet_id, gid).text
+
+    def get_table(self, sheet_id: str, gid: str) -> SheetTable:
+        snapshot = self.get_snapshot(sheet_id, gid)
+        key = (sheet_id, gid)
+        with self._lock:
+            cached = self._tables.get(key)
+            if cached is not None and cached[0] == snapshot.digest:
+                return cached[1]
+
+        # 解析在鎖外做；同版本偶爾被重複解析也無妨，結果相同
+        table = SheetTable.from_csv_text(snapshot.text)
+        with self._lock:
+            self._tables[key] = (snapshot.digest, table)
+            self._table_builds += 1
+        return table
+
+    def get_snapshot(self, sheet_id: str, gid: str) -> SheetSnapshot:
+        key = (sheet_id, gid)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._age(entry) < self.ttl:
+                self._hits += 1
+                return entry
+            self._misses += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 已經有人在更新這張表：有舊資料就先給舊的，不排隊
+        if entry is not None and self._age(entry) < self.stale_ttl:
+            if not key_lock.acquire(blocking=False):
+                with self._lock:
+                    self._stale_served += 1
+                return entry
+        else:
+            key_lock.acquire()
+
+        try:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._age(entry) < self.ttl:
+                    # 等鎖期間別人已經更新好了
+                    return entry
+            return self._refresh(key, entry)
+        finally:
+            key_lock.release()
+
+    def invalidate(self, sheet_id: Optional[str] = None) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if sheet_id is None or k[0] == sheet_id]
+            for k in keys:
+                del self._entries[k]
+                self._tables.pop(k, None)
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "revalidated": self._revalidated,
+                "changed": self._changed,
+                "stale_served": self._stale_served,
+                "errors": self._errors,
+                "refresh_total_s": round(self._refresh_total, 6),
+                "refresh_avg_s": round(self._refresh_total / self._refreshes, 6) if self._refreshes else 0.0,
+                "refresh_max_s": round(self._refresh_max, 6),
+                "table_builds": self._table_builds,
+            }
+
+    def close(self):
+        """關閉 HTTP session（行程結束時由 container 呼叫）"""
+        self.session.close()
+
+    # ---------- internals ----------
+
+    @external_io
+    def _refresh(self, key: SheetKey, previous: Optional[SheetSnapshot]) -> SheetSnapshot:
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        started = time.monotonic()
+        try:
+            resp = self.session.get(csv_export_url(*key), headers=headers, timeout=self.timeout)
+            if resp.status_code == 304 and previous is not None:
+                snapshot = SheetSnapshot(
+                    text=previous.text, digest=previous.digest, version=previous.version,
+                    fetched_at=time.monotonic(), etag=previous.etag,
+                    last_modified=previous.last_modified)
+                revalidated, changed = True, False
+            else:
+                resp.raise_for_status()
+                # Google 匯出的 CSV 是 UTF-8，但 header 不一定帶 charset
+                text = resp.content.decode("utf-8-sig")
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                changed = previous is None or previous.digest != digest
+                snapshot = SheetSnapshot(
+                    text=text, digest=digest,
+                    version=(previous.version if previous else 0) + (1 if changed else 0),
+                    fetched_at=time.monotonic(),
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"))
+                revalidated = False
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+                if previous is not None and self._age(previous) < self.stale_ttl:
+                    self._stale_served += 1
+                    return previous
+            raise SheetFetchError(f"failed to fetch sheet {key}: {e}") from e
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._refreshes += 1
+                self._refresh_total += elapsed
+                self._refresh_max = max(self._refresh_max, elapsed)
+
+        with self._lock:
+            self._entries[key] = snapshot
+            self._revalidated += int(revalidated)
+            self._changed += int(changed)
+        return snapshot
+
+    @staticmethod
+    def _age(entry: SheetSnapshot) -> float:
+        return time.monotonic() - entry.fetched_at
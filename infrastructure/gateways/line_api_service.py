@@ -4,6 +4,8 @@ from typing import List
 from linebot.v3.messaging import (Message, MessagingApi, PushMessageRequest,
                                   ReplyMessageRequest, TextMessage)
 
+from infrastructure.mysql_unit_of_work import external_io
+
 
 class LineApiService:
     def __init__(self, line_bot_api: MessagingApi, channel_access_token: str, line_rich_menus: dict):
@@ -11,6 +13,7 @@ class LineApiService:
         self.channel_access_token = channel_access_token
         self.line_rich_menus = line_rich_menus
 
+    @external_io
     def reply_message(self, reply_token: str, messages: List[Message]):
         if not isinstance(messages, list):
             messages = [messages]
@@ -30,6 +33,7 @@ class LineApiService:
         text_message = TextMessage(text=text)
         self.reply_message(reply_token, [text_message])
 
+    @external_io
     def push_message(self, user_id: str, messages: List[Message]):
         if not isinstance(messages, list):
             messages = [messages]
@@ -41,6 +45,7 @@ class LineApiService:
             )
         )
 
+    @external_io
     def link_rich_menu_to_user(self, user_id: str, menu_alias: str):
         """
         將一個預先建立好的 Rich Menu 連結給指定使用者。
@@ -0,0 +1,237 @@
+# infrastructure/mysql_connection_pool.py
+"""
+行程內共用的 MySQL 連線池。
+
+原本每個 repository 方法都 `pymysql.connect(**config)` → 查詢 → close，
+一則文字訊息至少就要三次 TCP + auth handshake。這裡把連線留在池子裡重複使用：
+
+- max_size：池子常駐（閒置時保留）的連線數上限
+- max_overflow：尖峰時可額外開出的連線數，歸還時直接關閉
+- timeout：池子滿載時最多等多久，逾時丟 PoolTimeoutError
+- recycle：連線存活超過此秒數就換新（避開 MySQL wait_timeout）
+- ping_interval：閒置超過此秒數的連線，借出前先 ping 一次做健康檢查
+- idle_timeout：在池子裡閒置超過此秒數的連線直接關閉，離峰時把連線數縮回來
+
+歸還時一律 rollback，避免把未結束的交易（與 REPEATABLE READ 的舊快照）留給下一位使用者。
+在 unit of work 裡（見 mysql_unit_of_work.py）則改成整個事件共用同一條連線、最後一次 commit。
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pymysql
+
+from infrastructure.mysql_unit_of_work import current_unit_of_work
+
+
+class PoolTimeoutError(Exception):
+    """池子滿載且在 timeout 內等不到可用連線"""
+
+
+@dataclass
+class _PooledConnection:
+    conn: pymysql.connections.Connection
+    created_at: float
+    last_used: float
+
+
+class MySQLConnectionPool:
+    def __init__(self, db_config: dict, max_size: int = 5, max_overflow: int = 5,
+                 timeout: float = 10.0, recycle: float = 3600.0, ping_interval: float = 30.0,
+                 idle_timeout: float = 300.0):
+        self.db_config = db_config
+        self.max_size = int(max_size)
+        self.max_overflow = int(max_overflow)
+        self.timeout = float(timeout)
+        self.recycle = float(recycle)
+        self.ping_interval = float(ping_interval)
+        self.idle_timeout = float(idle_timeout)
+
+        self._cond = threading.Condition()
+        self._idle: deque[_PooledConnection] = deque()
+        self._size = 0      # 目前開著的連線數（含借出中）
+        self._in_use = 0
+        self._closed = False
+        self._pid = os.getpid()
+
+        # 統計
+        self._checkouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._idle_closed = 0
+        self._failed_pings = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._uow_joins = 0
+
+    # ---------- public ----------
+
+    @contextmanager
+    def connection(self):
+        """
+        借出一條連線，離開 with 區塊時自動歸還（不會真的關閉）。
+
+            with pool.connection() as conn:
+                with conn.cursor() as cur:
+                    ...
+                conn.commit()
+
+        在 unit of work 裡時回傳它為這個池子保留的連線（commit 延到事件結束）。
+        """
+        uow = current_unit_of_work()
+        if uow is not None and uow.owned_by_current_thread():
+            conn = uow.connection_for(self)
+            with self._cond:
+                self._uow_joins += 1
+            yield conn
+            return
+
+        entry = self._acquire()
+        try:
+            yield entry.conn
+        finally:
+            self._release(entry)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "max_overflow": self.max_overflow,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "uow_joins": self._uow_joins,
+                "created": self._created,
+                "recycled": self._recycled,
+                "idle_closed": self._idle_closed,
+                "failed_pings": self._failed_pings,
+                "timeouts": self._timeouts,
+                "wait_total_s": round(self._wait_total, 6),
+                "wait_avg_s": round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+                "wait_max_s": round(self._wait_max, 6),
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.conn)
+
+    # ---------- internals ----------
+
+    def _acquire(self) -> _PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            self._check_fork()
+            while True:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                if self._idle:
+                    entry = self._idle.pop()  # LIFO：優先用最熱的連線
+                    break
+                if self._size < self.max_size + self.max_overflow:
+                    self._size += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"no MySQL connection available within {self.timeout}s "
+                        f"(size={self._size}, in_use={self._in_use})")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        # 建立/檢查連線在鎖外做，避免網路 IO 卡住其他借用者
+        try:
+            return self._connect() if entry is None else self._validate(entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, entry: _PooledConnection):
+        reusable = True
+        try:
+            entry.conn.rollback()
+        except Exception:
+            reusable = False
+
+        now = time.monotonic()
+        to_close = []
+        with self._cond:
+            self._in_use -= 1
+            if reusable and not self._closed and len(self._idle) < self.max_size:
+                entry.last_used = now
+                self._idle.append(entry)
+            else:
+                self._size -= 1
+                to_close.append(entry.conn)
+
+            # deque 左邊是最久沒用的連線，閒置太久就收掉
+            while self._idle and now - self._idle[0].last_used >= self.idle_timeout:
+                stale = self._idle.popleft()
+                self._size -= 1
+                self._idle_closed += 1
+                to_close.append(stale.conn)
+            self._cond.notify()
+
+        for conn in to_close:
+            self._close_quietly(conn)
+
+    def _connect(self) -> _PooledConnection:
+        conn = pymysql.connect(**self.db_config)
+        now = time.monotonic()
+        with self._cond:
+            self._created += 1
+        return _PooledConnection(conn=conn, created_at=now, last_used=now)
+
+    def _validate(self, entry: _PooledConnection) -> _PooledConnection:
+        now = time.monotonic()
+        if now - entry.created_at >= self.recycle:
+            self._close_quietly(entry.conn)
+            with self._cond:
+                self._recycled += 1
+            return self._connect()
+
+        if now - entry.last_used >= self.ping_interval:
+            try:
+                entry.conn.ping(reconnect=False)
+            except Exception:
+                self._close_quietly(entry.conn)
+                with self._cond:
+                    self._failed_pings += 1
+                return self._connect()
+        return entry
+
+    def _check_fork(self):
+        # gunicorn fork 之後，子行程不能沿用父行程的 socket；直接丟掉（不送 COM_QUIT）
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._idle.clear()
+            self._size = 0
+            self._in_use = 0
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
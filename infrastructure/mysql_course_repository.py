@@ -4,18 +4,22 @@ from datetime import datetime
 import pymysql
 
 from domain.course import Course, CourseRepository, CourseUnit
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLCourseRepository(CourseRepository):
-    def __init__(self, linebot_db_config: dict, rs_db_config: dict):
+    def __init__(self, linebot_db_config: dict, rs_db_config: dict,
+                 linebot_pool: MySQLConnectionPool = None, rs_pool: MySQLConnectionPool = None):
         self.linebot_db_config = linebot_db_config
+        self.linebot_pool = linebot_pool or MySQLConnectionPool(linebot_db_config)
         self.rs_db_config = rs_db_config
+        self.rs_pool = rs_pool or MySQLConnectionPool(rs_db_config)
 
     def _get_linebot_db_connection(self):
-        return pymysql.connect(**self.linebot_db_config)
+        return self.linebot_pool.connection()
 
     def _get_rs_db_connection(self):
-        return pymysql.connect(**self.rs_db_config)
+        return self.rs_pool.connection()
 
     def get_in_progress_courses(self, reserved: str = "") -> list[Course]:
         with self._get_linebot_db_connection() as conn:
@@ -49,23 +53,16 @@ class MySQLCourseRepository(CourseRepository):
                 cur.execute(query, (course.context_title,))
                 rows = cur.fetchall()
 
+        # 一次撈出整門課的期限調整，不再每個單元各開一條連線查
+        overrides = self._get_deadline_overrides(course.context_title) if rows else {}
+
         units = []
         for row in rows:
             contents_name = row['contents_name']
             unit_name = contents_name.split('_')[0]
             start_time = row['lesson_date']  # "%Y-%m-%d %H:%M:%S"
 
-            with self._get_linebot_db_connection() as conn2:
-                with conn2.cursor(pymysql.cursors.DictCursor) as cur2:
-                    query_dl = '''
-                        SELECT OJ_D1, Summary_D1
-                        FROM change_HW_deadline
-                        WHERE context_title = %s AND contents_name = %s
-                    '''
-                    cur2.execute(
-                        query_dl, (course.context_title, contents_name))
-                    dl_row = cur2.fetchone()
-
+            dl_row = overrides.get(contents_name)
             oj_days = dl_row['OJ_D1'] if dl_row else 6
             summary_days = dl_row['Summary_D1'] if dl_row else 7
 
@@ -81,7 +78,50 @@ class MySQLCourseRepository(CourseRepository):
         course.units = units
         return course
 
-    def _map_row_to_course(self, row: dict) -> Course:
+    def _get_deadline_overrides(self, context_title: str) -> dict[str, dict]:
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                query = '''
+                    SELECT contents_name, OJ_D1, Summary_D1
+                    FROM change_HW_deadline
+                    WHERE context_title = %s
+                '''
+                cur.execute(query, (context_title,))
+                overrides = {}
+                for row in cur.fetchall():
+                    # 同一單元有多筆時與原本的 fetchone 一樣取第一筆
+                    overrides.setdefault(row['contents_name'], row)
+                return overrides
+
+    def get_calendar_fingerprint(self, context_title: str) -> tuple:
+        """
+        review_publish / change_HW_deadline 沒有更新時間欄位，用 COUNT + BIT_XOR(CRC32(...))
+        算出這門課單元與期限設定的指紋；任一列新增、刪除或修改都會改變結果。
+        """
+        with self._get_rs_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT COUNT(*),
+                           COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', id, contents_name, lesson_date, publish_flag))), 0)
+                    FROM review_publish
+                    WHERE context_title = %s
+                ''', (context_title,))
+                publish_fp = tuple(cur.fetchone())
+
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT COUNT(*),
+                           COALESCE(BIT_XOR(CRC32(CONCAT_WS('|', contents_name, OJ_D1, Summary_D1))), 0)
+                    FROM change_HW_deadline
+                    WHERE context_title = %s
+                ''', (context_title,))
+                deadline_fp = tuple(cur.fetchone())
+
+        return publish_fp + deadline_fp
+
+    @staticmethod
+    def _map_row_to_course(row: dict) -> Course:
         return Course(
             context_title=row["context_title"],
             ta_emails=row["mails_of_TAs"].split(
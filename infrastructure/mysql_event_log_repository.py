@@ -1,35 +1,47 @@
 # infrastructure/mysql_event_log_repository.py
-import pymysql
+from typing import List
 
 from domain.event_log import EventLog, EventLogRepository
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLEventLogRepository(EventLogRepository):
-    def __init__(self, db_config: dict):
+    INSERT_SQL = """
+        INSERT INTO event_logs (
+            operation_time, student_ID, operation_event,
+            problem_id, HW_id, context_title, message_log_id
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+
+    def __init__(self, db_config: dict, pool: MySQLConnectionPool = None):
         self.db_config = db_config
+        self.pool = pool or MySQLConnectionPool(db_config)
 
     def _get_connection(self):
-        return pymysql.connect(**self.db_config)
+        return self.pool.connection()
 
     def save_event_log(self, event_log: EventLog) -> None:
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             with conn.cursor() as cursor:
-                sql = """
-                    INSERT INTO event_logs (
-                        operation_time, student_ID, operation_event,
-                        problem_id, HW_id, context_title, message_log_id
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(sql, (
-                    event_log.operation_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    event_log.student_id,
-                    event_log.event_type.value,
-                    event_log.problem_id,
-                    event_log.hw_id,
-                    event_log.context_title,
-                    event_log.message_log_id
-                ))
+                cursor.execute(self.INSERT_SQL, self._to_row(event_log))
                 conn.commit()
-        finally:
-            conn.close()
+
+    def save_event_logs(self, event_logs: List[EventLog]) -> None:
+        if not event_logs:
+            return
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.executemany(self.INSERT_SQL, [self._to_row(e) for e in event_logs])
+            conn.commit()
+
+    @staticmethod
+    def _to_row(event_log: EventLog) -> tuple:
+        return (
+            event_log.operation_time.strftime("%Y-%m-%d %H:%M:%S"),
+            event_log.student_id,
+            event_log.event_type.value,
+            event_log.problem_id,
+            event_log.hw_id,
+            event_log.context_title,
+            event_log.message_log_id
+        )
@@ -1,15 +1,18 @@
 # infrastructure/mysql_feedback_push_repository.py
+from typing import List, Set
 
 import pymysql
 from domain.summary_repositories import FeedbackPushRepository
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLFeedbackPushRepository(FeedbackPushRepository):
-    def __init__(self, linebot_db_config: dict):
+    def __init__(self, linebot_db_config: dict, linebot_pool: MySQLConnectionPool = None):
         self.linebot_db_config = linebot_db_config
+        self.linebot_pool = linebot_pool or MySQLConnectionPool(linebot_db_config)
 
     def _get_linebot_db_connection(self):
-        return pymysql.connect(**self.linebot_db_config)
+        return self.linebot_pool.connection()
 
     def check_summary_feedback_push(self, stdID: str, context_title: str, contents_name: str) -> bool:
         with self._get_linebot_db_connection() as conn:
@@ -29,7 +32,7 @@ class MySQLFeedbackPushRepository(FeedbackPushRepository):
         with self._get_linebot_db_connection() as conn:
             with conn.cursor() as cur:
                 query = """
-                INSERT INTO summary_feedback_push (created_at, context_title, contents_name, student_id)
+                INSERT INTO summary_feedback_push (operation_time, context_title, contents_name, student_ID)
                 VALUES (
                     CONVERT_TZ(UTC_TIMESTAMP(), '+00:00', '+08:00'),
                     %s, %s, %s
@@ -37,3 +40,35 @@ class MySQLFeedbackPushRepository(FeedbackPushRepository):
                 """
                 cur.execute(query, (context_title, contents_name, stdID))
             conn.commit()
+
+    def get_pushed_student_ids(self, student_ids: List[str], context_title: str, contents_name: str) -> Set[str]:
+        """整班一次查哪些學生已經推送過（走 summary_feedback_push 的 (student_ID, context_title, contents_name) 索引）"""
+        if not student_ids:
+            return set()
+        placeholders = ", ".join(["%s"] * len(student_ids))
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                query = f"""
+                SELECT DISTINCT student_ID
+                FROM summary_feedback_push
+                WHERE student_ID IN ({placeholders})
+                AND context_title = %s
+                AND contents_name = %s
+                """
+                cur.execute(query, (*student_ids, context_title, contents_name))
+                return {row["student_ID"] for row in cur.fetchall()}
+
+    def write_summary_feedback_pushes(self, student_ids: List[str], context_title: str, contents_name: str) -> None:
+        if not student_ids:
+            return
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor() as cur:
+                query = """
+                INSERT INTO summary_feedback_push (operation_time, context_title, contents_name, student_ID)
+                VALUES (
+                    CONVERT_TZ(UTC_TIMESTAMP(), '+00:00', '+08:00'),
+                    %s, %s, %s
+                )
+                """
+                cur.executemany(query, [(context_title, contents_name, sid) for sid in student_ids])
+            conn.commit()
@@ -1,14 +1,16 @@
 import pymysql
 
 from domain.feedback import FeedbackRepository
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLFeedbackRepository(FeedbackRepository):
-    def __init__(self, verify_db_config: dict):
+    def __init__(self, verify_db_config: dict, verify_pool: MySQLConnectionPool = None):
         self.verify_db_config = verify_db_config
+        self.verify_pool = verify_pool or MySQLConnectionPool(verify_db_config)
 
     def _get_verify_db_connection(self):
-        return pymysql.connect(**self.verify_db_config)
+        return self.verify_pool.connection()
 
     def get_summarysubmissions(self):
         with self._get_verify_db_connection() as conn:
@@ -1,30 +1,36 @@
 # infrastructure/mysql_grading_log_repository.py
 import datetime
-from typing import Optional
+import logging
+from typing import List, Optional
 import pymysql
-from domain.summary_repositories import GradingLogRepository
+from domain.summary_repositories import GradingLogRepository, SummaryFeedback
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+
+logger = logging.getLogger(__name__)
 
 
 class MySQLGradingLogRepository(GradingLogRepository):
-    def __init__(self, linebot_db_config: dict, verify_db_config: dict):
+    def __init__(self, linebot_db_config: dict, verify_db_config: dict,
+                 linebot_pool: MySQLConnectionPool = None, verify_pool: MySQLConnectionPool = None):
         self.linebot_db_config = linebot_db_config
+        self.linebot_pool = linebot_pool or MySQLConnectionPool(linebot_db_config)
         self.verify_db_config = verify_db_config
+        self.verify_pool = verify_pool or MySQLConnectionPool(verify_db_config)
 
     def _get_linebot_db_connection(self):
-        return pymysql.connect(**self.linebot_db_config)
+        return self.linebot_pool.connection()
 
     def _get_verify_db_connection(self):
-        return pymysql.connect(**self.verify_db_config)
+        return self.verify_pool.connection()
 
     def get_latest_log_id(self, stdID: str, context_title: str, contents_name: str) -> Optional[int]:
         with self._get_linebot_db_connection() as conn:
             with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                # summary_latest_log 由 trigger 維護（migrations/linebot/0003），一次 PK 查詢
                 query = '''
                 SELECT log_id
-                FROM summary_gradding_log
-                WHERE student_ID = %s and context_title = %s and contents_name like %s
-                ORDER BY operation_time DESC
-                LIMIT 1;
+                FROM summary_latest_log
+                WHERE student_ID = %s AND context_title = %s AND contents_name = %s;
                 '''
                 cur.execute(query, (stdID, context_title, contents_name,))
                 row = cur.fetchone()
@@ -45,36 +51,29 @@ class MySQLGradingLogRepository(GradingLogRepository):
 
                 return int(row['times']) if row and row.get('times') is not None else 0
 
-    def write_summary_GPT_feedback_to_verify_db_with_check_repeat(self, StudentId, TopicId, GPT_Feedback, context_title, student_summary, summary_gradding_log_id, basic_feedback, line_id):
-        """寫入GenAI生成的summary feedback"""
-        submit_time = self.get_timestamp()  # 拿到提交時間
-        insert_query = '''
-        INSERT INTO SummarySubmissions 
-        (StudentId, TopicId, GPT_Feedback, SubmitTime,verify_status, context_title, student_summary, summary_gradding_log_id, basic_feedback, LineID) 
+    INSERT_SUBMISSION_SQL = '''
+        INSERT INTO SummarySubmissions
+        (StudentId, TopicId, GPT_Feedback, SubmitTime, verify_status, context_title, student_summary, summary_gradding_log_id, basic_feedback, LineID)
         VALUES (%s, %s, %s, %s, 'wait_review', %s, %s, %s, %s, %s);
         '''
-        values = (StudentId, TopicId, GPT_Feedback, submit_time, context_title,
-                  student_summary, summary_gradding_log_id, basic_feedback, line_id)
 
+    def write_summary_GPT_feedback_to_verify_db_with_check_repeat(self, StudentId, TopicId, GPT_Feedback, context_title, student_summary, summary_gradding_log_id, basic_feedback, line_id):
+        """
+        寫入GenAI生成的summary feedback，並把同一學生同一單元先前還在 wait_review 的標成 covered。
+        INSERT 與 UPDATE 在同一個交易裡，新列的 id 直接用 cursor.lastrowid，
+        不再用 (StudentId, SubmitTime) 回頭查（沒有索引，而且同一秒兩筆會分不出來）。
+        """
+        feedback = SummaryFeedback(StudentId, TopicId, GPT_Feedback, context_title, student_summary,
+                                   summary_gradding_log_id, basic_feedback, line_id)
         try:
             with self._get_verify_db_connection() as conn:
-                with conn.cursor() as cursor:
-                    # 插入資料
-                    cursor.execute(insert_query, values)
-                    conn.commit()
-
-                    # 查詢新插入的 SubmissionId
-                    select_query = '''
-                    SELECT SubmissionId FROM SummarySubmissions
-                    WHERE StudentId = %s AND SubmitTime = %s;
-                    '''
-                    cursor.execute(select_query, (StudentId, submit_time))
-                    result = cursor.fetchone()
+                # 中途失敗要自己 rollback：在 unit of work 裡連線不會歸還，沒 rollback 的 INSERT 會在事件結束時被 commit
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute(self.INSERT_SUBMISSION_SQL,
+                                       self._to_submission_row(feedback, self.get_timestamp()))
+                        submission_id = cursor.lastrowid
 
-                    if result:
-                        submission_id = result['SubmissionId']
-
-                        # 更新其他符合條件的紀錄
                         update_query = '''
                         UPDATE SummarySubmissions
                         SET verify_status = 'covered'
@@ -86,14 +85,62 @@ class MySQLGradingLogRepository(GradingLogRepository):
                         '''
                         cursor.execute(
                             update_query, (StudentId, context_title, TopicId, submission_id))
-                        conn.commit()
-
-                        return f"已儲存至SummarySubmissions，並更新了 {cursor.rowcount} 筆紀錄的狀態。"
-                    else:
-                        return "儲存至SummarySubmissions時發生錯誤：無法找到提交記錄。"
+                        covered = cursor.rowcount
+                    conn.commit()
+                except pymysql.MySQLError:
+                    conn.rollback()
+                    raise
+            return f"已儲存至SummarySubmissions，並更新了 {covered} 筆紀錄的狀態。"
         except pymysql.MySQLError as e:
-            print(f"Error executing database operations: {e}")
+            logger.warning("writing summary feedback for %s failed", StudentId, exc_info=True)
             return f"儲存並更新至SummarySubmissions時發生錯誤: {e}"
 
+    def write_summary_GPT_feedbacks_to_verify_db(self, feedbacks: List[SummaryFeedback]) -> int:
+        """
+        批次版本（GradeBatchUseCase 用）：整批一個交易，executemany 合成一個多列 INSERT，
+        再用一個 UPDATE 把每個 (學生, 課程, 單元) 除了最新一筆以外的 wait_review 標成 covered。
+        同一批裡同一位學生出現多次時，結果與逐筆呼叫單筆版本相同（最後一筆留下）。
+        回傳寫入筆數。
+        """
+        if not feedbacks:
+            return 0
+        submit_time = self.get_timestamp()
+        keys = sorted({(f.student_id, f.context_title, f.topic_id) for f in feedbacks})
+        with self._get_verify_db_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.executemany(self.INSERT_SUBMISSION_SQL,
+                                       [self._to_submission_row(f, submit_time) for f in feedbacks])
+                    inserted = cursor.rowcount
+                    placeholders = ", ".join(["(%s, %s, %s)"] * len(keys))
+                    cursor.execute(
+                        f'''
+                        UPDATE SummarySubmissions ss
+                        JOIN (
+                            SELECT StudentId, context_title, TopicId, MAX(SubmissionId) AS keep_id
+                            FROM SummarySubmissions
+                            WHERE verify_status = 'wait_review'
+                            AND (StudentId, context_title, TopicId) IN ({placeholders})
+                            GROUP BY StudentId, context_title, TopicId
+                        ) latest
+                          ON ss.StudentId = latest.StudentId
+                         AND ss.context_title = latest.context_title
+                         AND ss.TopicId = latest.TopicId
+                        SET ss.verify_status = 'covered'
+                        WHERE ss.verify_status = 'wait_review'
+                        AND ss.SubmissionId != latest.keep_id;
+                        ''',
+                        [value for key in keys for value in key])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return inserted
+
+    @staticmethod
+    def _to_submission_row(f: SummaryFeedback, submit_time: str) -> tuple:
+        return (f.student_id, f.topic_id, f.gpt_feedback, submit_time, f.context_title,
+                f.student_summary, f.summary_gradding_log_id, f.basic_feedback, f.line_id)
+
     def get_timestamp(self):
         return (datetime.datetime.now() + datetime.timedelta(hours=8)).strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,62 @@
+# infrastructure/mysql_identity_invalidation_log.py
+"""
+跨 worker 的身分快取失效通知。
+
+每個 gunicorn worker 都有自己的 CachedStudentRepository，只清本行程的快取不夠：
+助教解除某位學生的綁定後，其他 worker 仍會拿舊資料直到 TTL 過期。
+這裡把失效事件寫進 linebot DB 的 identity_cache_invalidation（只增不改的小表），
+各 worker 每隔 poll_interval 秒用主鍵範圍查一次有沒有新事件。
+表由 migrations/linebot/0005_identity_cache_invalidation.sql 建立。
+"""
+from typing import Optional
+
+import pymysql
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+
+
+class MySQLIdentityInvalidationLog:
+    # 超過這個時間的事件已經沒有 worker 需要，寫入時順手清掉
+    RETENTION_HOURS = 24
+
+    def __init__(self, db_config: dict, pool: MySQLConnectionPool = None):
+        self.db_config = db_config
+        self.pool = pool or MySQLConnectionPool(db_config)
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    @staticmethod
+    def is_missing_table(exc: Exception) -> bool:
+        """還沒跑 migration（ER_NO_SUCH_TABLE）"""
+        return isinstance(exc, pymysql.err.ProgrammingError) and bool(exc.args) and exc.args[0] == 1146
+
+    def publish(self, line_user_id: Optional[str] = None) -> None:
+        """line_user_id 為 None 代表全部清掉"""
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO identity_cache_invalidation (line_userID) VALUES (%s)",
+                    (line_user_id,))
+                cur.execute(
+                    "DELETE FROM identity_cache_invalidation WHERE created_at < NOW() - INTERVAL %s HOUR",
+                    (self.RETENTION_HOURS,))
+            conn.commit()
+
+    def latest_id(self) -> int:
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM identity_cache_invalidation")
+                row = cur.fetchone()
+                return int(row[0]) if row else 0
+
+    def poll(self, after_id: int) -> tuple[int, list[Optional[str]]]:
+        """回傳 (最新事件 id, after_id 之後要失效的 line_user_id 清單；None 代表全部)"""
+        with self._get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT id, line_userID FROM identity_cache_invalidation WHERE id > %s ORDER BY id",
+                    (after_id,))
+                rows = cur.fetchall()
+        if not rows:
+            return after_id, []
+        return int(rows[-1][0]), [row[1] for row in rows]
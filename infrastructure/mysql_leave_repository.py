@@ -1,6 +1,6 @@
-import pymysql
 from pymysql.cursors import DictCursor
 from domain.leave_request import LeaveRequest, LeaveRequestRepository
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 def _fmt_maybe_dt(value, fmt: str):
@@ -15,23 +15,17 @@ class MySQLLeaveRepository(LeaveRequestRepository):
     """
     MySQL 寫入請假資料的 Repository。
 
-    - 預設強制使用 utf8mb4 與 DictCursor，避免中文寫入問題與欄位名取值混亂。
-    - 若 db_config 內提供相同 key，會覆寫預設（例如你想用 autocommit=True）。
+    - 連線由 MySQLConnectionPool 提供（未注入時自建一個），charset 沿用 pymysql 預設的 utf8mb4。
+    - 游標一律用 DictCursor，避免欄位名取值混亂。
     """
 
-    def __init__(self, db_config: dict, logger=None):
+    def __init__(self, db_config: dict, logger=None, pool: MySQLConnectionPool = None):
         self.db_config = db_config
         self.logger = logger
+        self.pool = pool or MySQLConnectionPool(db_config)
 
     def _get_connection(self):
-        # 預設適合測試與正式：明確 charset、回傳 dict 列
-        cfg = {
-            "charset": "utf8mb4",
-            "cursorclass": DictCursor,
-            "autocommit": False,  # 如需 autocommit 可在 db_config 覆寫
-        }
-        cfg.update(self.db_config)
-        return pymysql.connect(**cfg)
+        return self.pool.connection()
 
     def save_leave_request(self, leave: LeaveRequest) -> str:
         sql = """
@@ -39,24 +33,22 @@ class MySQLLeaveRepository(LeaveRequestRepository):
             operation_time, student_ID, student_name, apply_time, reason, context_title
         ) VALUES (%s, %s, %s, %s, %s, %s)
         """
-        conn = None
-        try:
-            conn = self._get_connection()
-
-            op_time = _fmt_maybe_dt(leave.operation_time, "%Y-%m-%d %H:%M:%S")
-            # 若欄位型別是 DATE：用 YYYY-MM-DD；若是 DATETIME，可改 "%Y-%m-%d %H:%M:%S"
-            apply_time = _fmt_maybe_dt(leave.apply_time, "%Y-%m-%d")
+        op_time = _fmt_maybe_dt(leave.operation_time, "%Y-%m-%d %H:%M:%S")
+        # 若欄位型別是 DATE：用 YYYY-MM-DD；若是 DATETIME，可改 "%Y-%m-%d %H:%M:%S"
+        apply_time = _fmt_maybe_dt(leave.apply_time, "%Y-%m-%d")
 
-            with conn.cursor() as cur:
-                cur.execute(sql, (
-                    op_time,
-                    leave.student_id,
-                    leave.student_name,
-                    apply_time,
-                    leave.reason,
-                    leave.context_title,
-                ))
-            conn.commit()
+        try:
+            with self._get_connection() as conn:
+                with conn.cursor(DictCursor) as cur:
+                    cur.execute(sql, (
+                        op_time,
+                        leave.student_id,
+                        leave.student_name,
+                        apply_time,
+                        leave.reason,
+                        leave.context_title,
+                    ))
+                conn.commit()
             return "收到，已經幫你請好假了。"
 
         except Exception as e:
@@ -69,15 +61,14 @@ class MySQLLeaveRepository(LeaveRequestRepository):
 
             try:
                 # 重複請假容錯檢查（依你的產品邏輯保留）
-                conn = conn or self._get_connection()
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "SELECT 1 FROM ask_for_leave WHERE student_ID=%s AND apply_time=%s LIMIT 1",
-                        (leave.student_id, _fmt_maybe_dt(
-                            leave.apply_time, "%Y-%m-%d")),
-                    )
-                    if cur.fetchone():
-                        return "同學你已經請過假了喔。"
+                with self._get_connection() as conn:
+                    with conn.cursor(DictCursor) as cur:
+                        cur.execute(
+                            "SELECT 1 FROM ask_for_leave WHERE student_ID=%s AND apply_time=%s LIMIT 1",
+                            (leave.student_id, apply_time),
+                        )
+                        if cur.fetchone():
+                            return "同學你已經請過假了喔。"
             except Exception as e2:
                 if self.logger:
                     self.logger.exception("fallback select failed")
@@ -85,7 +76,3 @@ class MySQLLeaveRepository(LeaveRequestRepository):
                     print("[LeaveRepo] SELECT fallback 也失敗：", repr(e2))
 
             return "很抱歉，請假失敗。"
-
-        finally:
-            if conn:
-                conn.close()
@@ -1,30 +1,84 @@
 # infrastructure/mysql_message_log_repository.py
-import pymysql
-from domain.message_log import MessageLog, MessageLogRepository
+from typing import List
+
+from domain.message_log import (DuplicateLogIdError, MessageLog,
+                                MessageLogRepository)
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLMessageLogRepository(MessageLogRepository):
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, pool: MySQLConnectionPool = None):
         self.db_config = db_config
+        self.pool = pool or MySQLConnectionPool(db_config)
 
     def _get_connection(self):
-        return pymysql.connect(**self.db_config)
+        return self.pool.connection()
 
     def save_message_log(self, message_log: MessageLog) -> int:
-        conn = self._get_connection()
-        try:
+        with self._get_connection() as conn:
             with conn.cursor() as cursor:
+                if message_log.log_id is not None:
+                    cursor.execute("""
+                        INSERT INTO message_logs (log_id, operation_time, student_ID, message, context_title)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, self._to_row(message_log))
+                    conn.commit()
+                    return message_log.log_id
+
                 sql = """
                     INSERT INTO message_logs (operation_time, student_ID, message, context_title)
                     VALUES (%s, %s, %s, %s)
                 """
-                cursor.execute(sql, (
-                    message_log.operation_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    message_log.student_id,
-                    message_log.message,
-                    message_log.context_title
-                ))
+                cursor.execute(sql, self._to_row(message_log)[1:])
                 conn.commit()
                 return cursor.lastrowid
-        finally:
-            conn.close()
+
+    def save_message_logs(self, message_logs: List[MessageLog]) -> None:
+        if not message_logs:
+            return
+        rows = [self._to_row(m) for m in message_logs]
+        with self._get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    # pymysql 會把 executemany 的 INSERT ... VALUES 合併成一條多列 INSERT
+                    # 重送同一批時以 log_id 去重（ON DUPLICATE KEY 不更新任何欄位）
+                    cursor.executemany("""
+                        INSERT INTO message_logs (log_id, operation_time, student_ID, message, context_title)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE log_id = log_id
+                    """, rows)
+                    if cursor.rowcount < len(rows):
+                        # 有 id 已經存在：內容相同是重送，不同就是兩個行程撞號，不能默默丟掉
+                        self._check_duplicates(cursor, rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def _check_duplicates(cursor, rows: List[tuple]):
+        placeholders = ", ".join(["%s"] * len(rows))
+        cursor.execute(f"""
+            SELECT log_id, operation_time, student_ID, message, context_title
+            FROM message_logs WHERE log_id IN ({placeholders})
+        """, [row[0] for row in rows])
+        stored = {}
+        for r in cursor.fetchall():
+            if isinstance(r, dict):
+                r = (r["log_id"], r["operation_time"], r["student_ID"], r["message"], r["context_title"])
+            stored[r[0]] = tuple(r)
+        conflicts = [row[0] for row in rows if row[0] in stored and stored[row[0]] != row]
+        if conflicts:
+            raise DuplicateLogIdError(
+                f"message_logs already has different rows for log_id {conflicts}; "
+                "check that LOG_WORKER_ID is unique per process")
+
+    @staticmethod
+    def _to_row(message_log: MessageLog) -> tuple:
+        return (
+            message_log.log_id,
+            message_log.operation_time.strftime("%Y-%m-%d %H:%M:%S"),
+            message_log.student_id,
+            message_log.message,
+            message_log.context_title
+        )
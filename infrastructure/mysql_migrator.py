@@ -0,0 +1,187 @@
+# infrastructure/mysql_migrator.py
+"""
+版本化的 schema migration（`python cli.py migrate`）。
+
+schema_*.sql 是建新資料庫用的基準；之後對既有資料庫的變更放在 migrations/<資料庫>/ 底下：
+
+    migrations/linebot/0001_summary_grading_indexes.sql
+    migrations/verify/0001_summary_submissions_review_index.sql
+
+- 檔名 `<版本>_<說明>.sql`，版本是每個資料庫各自遞增的整數，依版本順序套用
+- 套用過的版本記在該資料庫的 schema_migrations（含檔案 checksum）；
+  已套用的檔案被改過會直接報錯，要改就新增下一個版本
+- 一個檔案可以有多個 statement，以行尾的 `;` 分隔；trigger 這類本體裡有 `;` 的，
+  跟 mysql client 一樣用 `DELIMITER $$` ... `DELIMITER ;` 換分隔符號
+- MySQL 的 DDL 會自動 commit，沒辦法整個檔案 rollback：
+  每個檔案成功後才記錄版本，中途失敗就停在那個檔案，修好後重跑
+- 用 GET_LOCK 避免兩個行程同時跑 migration
+"""
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+_FILENAME = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: str
+    checksum: str
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+    def statements(self) -> list[str]:
+        with open(self.path, encoding="utf-8") as f:
+            return split_statements(f.read())
+
+
+@dataclass(frozen=True)
+class MigrationStatus:
+    migration: Migration
+    applied_at: Optional[datetime]
+
+
+def split_statements(sql: str) -> list[str]:
+    """去掉 `--` 註解行，以行尾的分隔符號（預設 `;`，可用 DELIMITER 換）切成一個個 statement"""
+    statements, current = [], []
+    delimiter = ";"
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("--") or (not current and not stripped):
+            continue
+        if not current and stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        current.append(line)
+        if line.rstrip().endswith(delimiter):
+            statement = "\n".join(current).strip()[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            current = []
+    tail = "\n".join(current).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def discover_migrations(directory: str) -> list[Migration]:
+    migrations = []
+    for filename in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations.append(Migration(version=int(match.group(1)), name=match.group(2),
+                                    path=path, checksum=checksum))
+
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    duplicated = sorted({v for v in versions if versions.count(v) > 1})
+    if duplicated:
+        raise MigrationError(f"duplicate migration versions in {directory}: {duplicated}")
+    return migrations
+
+
+class MySQLMigrator:
+    LOCK_NAME = "pychatbot_schema_migrations"
+    LOCK_TIMEOUT = 30
+
+    def __init__(self, db_config: dict, directory: str):
+        self.db_config = db_config
+        self.directory = directory
+
+    def _connect(self):
+        return pymysql.connect(**{**self.db_config, "autocommit": True,
+                                  "cursorclass": pymysql.cursors.Cursor})
+
+    def status(self) -> list[MigrationStatus]:
+        conn = self._connect()
+        try:
+            applied = self._applied(conn)
+        finally:
+            conn.close()
+        migrations = discover_migrations(self.directory)
+        self._verify_checksums(migrations, applied)
+        return [MigrationStatus(m, applied[m.version][1] if m.version in applied else None)
+                for m in migrations]
+
+    def pending(self) -> list[Migration]:
+        return [s.migration for s in self.status() if s.applied_at is None]
+
+    def migrate(self, target: Optional[int] = None, dry_run: bool = False) -> list[Migration]:
+        """套用到 target 版本（預設全部），回傳這次套用的 migration"""
+        migrations = discover_migrations(self.directory)
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT GET_LOCK(%s, %s)", (self.LOCK_NAME, self.LOCK_TIMEOUT))
+                if cur.fetchone()[0] != 1:
+                    raise MigrationError("another migration is running")
+            try:
+                applied = self._applied(conn)
+                self._verify_checksums(migrations, applied)
+                todo = [m for m in migrations if m.version not in applied
+                        and (target is None or m.version <= target)]
+                if not dry_run:
+                    for migration in todo:
+                        self._apply(conn, migration)
+                return todo
+            finally:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT RELEASE_LOCK(%s)", (self.LOCK_NAME,))
+        finally:
+            conn.close()
+
+    def _apply(self, conn, migration: Migration):
+        logger.info("applying migration %s", migration.filename)
+        with conn.cursor() as cur:
+            for statement in migration.statements():
+                try:
+                    cur.execute(statement)
+                except pymysql.MySQLError as e:
+                    raise MigrationError(f"{migration.filename} failed: {e}") from e
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, migration.checksum))
+
+    def _applied(self, conn) -> dict[int, tuple[str, datetime]]:
+        with conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version int NOT NULL,
+                    name varchar(255) NOT NULL,
+                    checksum char(64) NOT NULL,
+                    applied_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (version)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            cur.execute("SELECT version, checksum, applied_at FROM schema_migrations")
+            return {int(version): (checksum, applied_at) for version, checksum, applied_at in cur.fetchall()}
+
+    @staticmethod
+    def _verify_checksums(migrations: list[Migration], applied: dict):
+        changed = [m.filename for m in migrations
+                   if m.version in applied and applied[m.version][0] != m.checksum]
+        if changed:
+            raise MigrationError(
+                f"applied migrations were modified: {changed}; add a new version instead")
@@ -0,0 +1,51 @@
+# infrastructure/mysql_session_snapshot_repository.py
+"""
+webhook 熱路徑的單次查詢。
+
+原本每個事件要分別 find_by_line_id、get_state，handler 裡再 get_course_shell，
+這裡把 account_info / course_info / user_states 併成一個 JOIN，一次往返拿到整個 SessionSnapshot。
+"""
+from typing import Optional
+
+import pymysql
+
+from domain.session import SessionSnapshot, SessionSnapshotRepository
+from domain.user_state import UserStateEnum
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.mysql_course_repository import MySQLCourseRepository
+from infrastructure.mysql_student_repository import MySQLStudentRepository
+
+
+class MySQLSessionSnapshotRepository(SessionSnapshotRepository):
+    def __init__(self, db_config: dict, pool: MySQLConnectionPool = None):
+        self.db_config = db_config
+        self.pool = pool or MySQLConnectionPool(db_config)
+
+    def _get_connection(self):
+        return self.pool.connection()
+
+    def get_snapshot(self, line_user_id: str) -> Optional[SessionSnapshot]:
+        with self._get_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                # 條件與 MySQLStudentRepository.find_by_line_id 相同；沒有狀態紀錄時 state_name 為 NULL
+                sql = """
+                SELECT ai.*, ci.mails_of_TAs, ci.leave_notice, ci.day_of_week,
+                       ci.OJ_contest_title, ci.present_url, us.state_name
+                FROM account_info ai
+                JOIN course_info ci ON ai.context_title = ci.context_title
+                LEFT JOIN user_states us ON us.line_user_id = ai.line_userID
+                WHERE ai.line_userID = %s AND ai.del = 0
+                AND ci.status = 'in_progress' AND ci.reserved LIKE "";
+                """
+                cur.execute(sql, (line_user_id,))
+                row = cur.fetchone()
+                return self._map_row_to_snapshot(row) if row else None
+
+    @staticmethod
+    def _map_row_to_snapshot(row: dict) -> SessionSnapshot:
+        state_name = row.get("state_name")
+        return SessionSnapshot(
+            student=MySQLStudentRepository._map_row_to_student(row),
+            course=MySQLCourseRepository._map_row_to_course(row),
+            state=UserStateEnum[state_name] if state_name else UserStateEnum.IDLE
+        )
@@ -6,18 +6,20 @@ import pymysql
 from pymysql.err import IntegrityError
 
 from domain.student import RoleEnum, Student, StudentStatus, StudentRepository, StudentIdAlreadyBoundError
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLStudentRepository(StudentRepository):
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, pool: MySQLConnectionPool = None):
         self.db_config = db_config
+        self.pool = pool or MySQLConnectionPool(db_config)
 
     def _get_connection(self):
-        return pymysql.connect(**self.db_config, cursorclass=pymysql.cursors.DictCursor)
+        return self.pool.connection()
 
     def find_by_line_id(self, line_user_id: str) -> Optional[Student]:
         with self._get_connection() as conn:
-            with conn.cursor() as cur:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
                 # 使用參數化查詢，防止 SQL 注入
                 sql = """
                 SELECT ai.* FROM account_info ai
@@ -31,7 +33,7 @@ class MySQLStudentRepository(StudentRepository):
 
     def find_by_student_id(self, student_id: str) -> Optional[Student]:
         with self._get_connection() as conn:
-            with conn.cursor() as cur:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
                 # 使用參數化查詢，防止 SQL 注入
                 sql = """
                 SELECT ai.* FROM account_info ai
@@ -52,7 +54,7 @@ class MySQLStudentRepository(StudentRepository):
               AND ai.del = 0
         """
         with self._get_connection() as conn:
-            with conn.cursor() as cur:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
                 cur.execute(sql, (context_title, RoleEnum.STUDENT.value))
                 rows = cur.fetchall()
                 return [self._map_row_to_student(row) for row in rows]
@@ -82,7 +84,8 @@ class MySQLStudentRepository(StudentRepository):
                     raise StudentIdAlreadyBoundError(student.student_id) from e
                 raise
 
-    def _map_row_to_student(self, row: dict) -> Student:
+    @staticmethod
+    def _map_row_to_student(row: dict) -> Student:
         return Student(
             line_user_id=row['line_userID'],
             student_id=row['student_ID'],
@@ -4,19 +4,23 @@ import json
 from typing import Any, Dict, List, Optional, Tuple
 
 import pymysql
-from domain.summary_repositories import SuggestionQueryRepository
+from domain.summary_repositories import SuggestionQueryRepository, SummaryStatus
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLSuggestionQueryRepository(SuggestionQueryRepository):
-    def __init__(self, linebot_db_config: dict, verify_db_config: dict):
+    def __init__(self, linebot_db_config: dict, verify_db_config: dict,
+                 linebot_pool: MySQLConnectionPool = None, verify_pool: MySQLConnectionPool = None):
         self.linebot_db_config = linebot_db_config
+        self.linebot_pool = linebot_pool or MySQLConnectionPool(linebot_db_config)
         self.verify_db_config = verify_db_config
+        self.verify_pool = verify_pool or MySQLConnectionPool(verify_db_config)
 
     def _get_linebot_db_connection(self):
-        return pymysql.connect(**self.linebot_db_config)
+        return self.linebot_pool.connection()
 
     def _get_verify_db_connection(self):
-        return pymysql.connect(**self.verify_db_config)
+        return self.verify_pool.connection()
 
     def is_log_under_review(self, log_id: int) -> bool:
         with self._get_verify_db_connection() as conn:
@@ -125,16 +129,15 @@ class MySQLSuggestionQueryRepository(SuggestionQueryRepository):
         """
         with self._get_linebot_db_connection() as conn:
             with conn.cursor(pymysql.cursors.DictCursor) as cur:
-                # 先抓最近一筆 grading log
+                # 先抓最近一筆 grading log（summary_latest_log 指標 + log_id PK，兩次 PK 查詢）
                 cur.execute(
                     """
-                    SELECT log_id, summary, loss_kw, similarity, penalty, score, result
-                    FROM summary_gradding_log
-                    WHERE context_title = %s
-                      AND contents_name = %s
-                      AND student_ID   = %s
-                    ORDER BY log_id DESC
-                    LIMIT 1
+                    SELECT g.log_id, g.summary, g.loss_kw, g.similarity, g.penalty, g.score, g.result
+                    FROM summary_latest_log latest
+                    JOIN summary_gradding_log g ON g.log_id = latest.log_id
+                    WHERE latest.context_title = %s
+                      AND latest.contents_name = %s
+                      AND latest.student_ID   = %s
                     """,
                     (context_title, contents_name, student_id),
                 )
@@ -142,16 +145,6 @@ class MySQLSuggestionQueryRepository(SuggestionQueryRepository):
                 if row is None:
                     return None
 
-                out: Dict[str, Any] = {
-                    "log_id": int(row["log_id"]),
-                    "summary": row.get("summary") or "",
-                    "loss_kw": self._parse_list_field(row.get("loss_kw")),
-                    "similarity": float(row["similarity"]) if row.get("similarity") is not None else None,
-                    "penalty": float(row["penalty"]) if row.get("penalty") is not None else None,
-                    "score": int(row["score"]) if row.get("score") is not None else None,
-                    "result": int(row["result"]) if row.get("result") is not None else None,
-                }
-
                 # 再抓對應的 lime_explain_log（若有多筆，拿最新）
                 cur.execute(
                     """
@@ -161,18 +154,173 @@ class MySQLSuggestionQueryRepository(SuggestionQueryRepository):
                     ORDER BY id DESC
                     LIMIT 1
                     """,
-                    (out["log_id"],),
+                    (int(row["log_id"]),),
+                )
+                return self._map_suggestion_info(row, cur.fetchone())
+
+    def get_suggestion_info_many(
+        self,
+        student_ids: List[str],
+        context_title: str,
+        contents_name: str,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        整班版本的 get_suggestion_info（GradeBatchUseCase 用）：一次查詢取回每位學生
+        最新一筆 grading log 與對應最新的 lime_explain_log，回傳 {student_id: 同格式 dict}。
+        - 最新 log 走 summary_latest_log 指標（student_ID IN (...) 走主鍵）
+        - lime 用 ROW_NUMBER() 依 summary_gradding_log_id 分組取 id 最大的一筆
+        沒有評分紀錄的學生不會出現在結果裡。
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        if not student_ids:
+            return {}
+        placeholders = ", ".join(["%s"] * len(student_ids))
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                cur.execute(
+                    f"""
+                    WITH latest AS (
+                        SELECT l.student_ID, g.log_id, g.summary, g.loss_kw, g.similarity,
+                               g.penalty, g.score, g.result
+                        FROM summary_latest_log l
+                        JOIN summary_gradding_log g ON g.log_id = l.log_id
+                        WHERE l.context_title = %s
+                          AND l.contents_name = %s
+                          AND l.student_ID IN ({placeholders})
+                    ),
+                    lime AS (
+                        SELECT summary_gradding_log_id, excess, loss_concept_kws,
+                               ROW_NUMBER() OVER (PARTITION BY summary_gradding_log_id
+                                                  ORDER BY id DESC) AS rn
+                        FROM lime_explain_log
+                        WHERE summary_gradding_log_id IN (SELECT log_id FROM latest)
+                    )
+                    SELECT latest.*, lime.excess, lime.loss_concept_kws,
+                           lime.summary_gradding_log_id AS lime_log_id
+                    FROM latest
+                    LEFT JOIN lime ON lime.summary_gradding_log_id = latest.log_id AND lime.rn = 1
+                    """,
+                    (context_title, contents_name, *student_ids),
+                )
+                rows = cur.fetchall() or []
+        return {row["student_ID"]: self._map_suggestion_info(
+                    row, row if row.get("lime_log_id") is not None else None)
+                for row in rows}
+
+    @classmethod
+    def _map_suggestion_info(cls, row: Dict[str, Any], lime: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "log_id": int(row["log_id"]),
+            "summary": row.get("summary") or "",
+            "loss_kw": cls._parse_list_field(row.get("loss_kw")),
+            "similarity": float(row["similarity"]) if row.get("similarity") is not None else None,
+            "penalty": float(row["penalty"]) if row.get("penalty") is not None else None,
+            "score": int(row["score"]) if row.get("score") is not None else None,
+            "result": int(row["result"]) if row.get("result") is not None else None,
+            "excess": cls._parse_list_field(lime.get("excess")) if lime else [],
+            "loss_concept_kws": cls._parse_list_field(lime.get("loss_concept_kws")) if lime else [],
+        }
+
+    def get_summary_status(self, student_id: str, context_title: str,
+                           contents_name: str) -> SummaryStatus:
+        """
+        GetSuggestionUseCase 原本要 get_latest_log_id → check_summary_in_SummarySubmissions →
+        is_log_under_review → GenAI feedback 或 get_suggestion_info + get_questions，最多七次連線；
+        這裡併成一次跨 schema 查詢（linebot 與 verify 在同一台 MySQL）：
+        - 最新 log 走 summary_latest_log 指標
+        - lime_explain_log / 助教回饋各取最新一筆（LATERAL）
+        - 關鍵字題目用 JSON_ARRAYAGG 帶回來
+        兩個 DB 設定不在同一台時退回原本的逐一查詢。
+        """
+        if not self._same_server():
+            return self._compose_summary_status(student_id, context_title, contents_name)
+
+        verify = self._verify_schema()
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                cur.execute(
+                    f"""
+                    SELECT g.log_id, g.summary, g.loss_kw, g.similarity, g.penalty, g.score, g.result,
+                           EXISTS (SELECT 1 FROM {verify}.SummarySubmissions ss
+                                   WHERE ss.summary_gradding_log_id = g.log_id) AS in_submissions,
+                           (SELECT COUNT(*) FROM {verify}.SummarySubmissions ss
+                            WHERE ss.summary_gradding_log_id = g.log_id
+                              AND ss.verify_status = 'wait_review') = 1 AS under_review,
+                           fb.Feedback AS teacher_feedback,
+                           lime.excess, lime.loss_concept_kws,
+                           (SELECT JSON_ARRAYAGG(JSON_OBJECT('keyword', kq.keyword, 'question', kq.question))
+                            FROM concept_keyword_and_question kq
+                            WHERE kq.context_title = latest.context_title
+                              AND kq.contents_name = %s
+                              AND kq.`del` = 0) AS keyword_questions
+                    FROM summary_latest_log latest
+                    JOIN summary_gradding_log g ON g.log_id = latest.log_id
+                    LEFT JOIN LATERAL (
+                        SELECT excess, loss_concept_kws
+                        FROM lime_explain_log
+                        WHERE summary_gradding_log_id = g.log_id
+                        ORDER BY id DESC
+                        LIMIT 1
+                    ) lime ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT tf.Feedback
+                        FROM {verify}.SummarySubmissions ss
+                        JOIN {verify}.TeacherFeedbacks tf ON ss.SubmissionId = tf.SubmissionId
+                        WHERE ss.summary_gradding_log_id = g.log_id
+                          AND tf.SubmissionType = 'Summary'
+                        ORDER BY tf.FeedbackTime DESC
+                        LIMIT 1
+                    ) fb ON TRUE
+                    WHERE latest.context_title = %s
+                      AND latest.contents_name = %s
+                      AND latest.student_ID   = %s
+                    """,
+                    (contents_name + '_', context_title, contents_name, student_id),
                 )
-                lime = cur.fetchone()
-                if lime:
-                    out["excess"] = self._parse_list_field(lime.get("excess"))
-                    out["loss_concept_kws"] = self._parse_list_field(
-                        lime.get("loss_concept_kws"))
-                else:
-                    out["excess"] = []
-                    out["loss_concept_kws"] = []
-
-                return out
+                row = cur.fetchone()
+
+        if row is None:
+            return SummaryStatus()
+
+        pairs = json.loads(row["keyword_questions"]) if row.get("keyword_questions") else []
+        return SummaryStatus(
+            log_id=int(row["log_id"]),
+            in_submissions=bool(row["in_submissions"]),
+            under_review=bool(row["under_review"]),
+            teacher_feedback=row.get("teacher_feedback"),
+            suggestion_info=self._map_suggestion_info(row, row),
+            # 與 get_questions 相同：keyword / question 各自略過 NULL
+            keywords=[p["keyword"] for p in pairs if p.get("keyword") is not None],
+            questions=[p["question"] for p in pairs if p.get("question") is not None],
+        )
+
+    def _compose_summary_status(self, student_id: str, context_title: str,
+                                contents_name: str) -> SummaryStatus:
+        info = self.get_suggestion_info(student_id, context_title, contents_name)
+        if info is None:
+            return SummaryStatus()
+        log_id = info["log_id"]
+        in_submissions = self.check_summary_in_SummarySubmissions(log_id)
+        under_review = in_submissions and self.is_log_under_review(log_id)
+        kws, questions = ([], []) if in_submissions else self.get_questions(context_title, contents_name)
+        return SummaryStatus(
+            log_id=log_id,
+            in_submissions=in_submissions,
+            under_review=under_review,
+            teacher_feedback=self.use_summary_grading_log_id_get_GenAI_feedback(log_id)
+            if in_submissions and not under_review else None,
+            suggestion_info=info,
+            keywords=kws,
+            questions=questions,
+        )
+
+    def _same_server(self) -> bool:
+        linebot, verify = self.linebot_db_config, self.verify_db_config
+        return bool(verify.get("db")) and \
+            (linebot.get("host"), linebot.get("port")) == (verify.get("host"), verify.get("port"))
+
+    def _verify_schema(self) -> str:
+        return "`" + self.verify_db_config["db"].replace("`", "``") + "`"
 
     @staticmethod
     def _parse_list_field(val: Any) -> List[str]:
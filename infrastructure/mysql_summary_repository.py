@@ -2,29 +2,32 @@ from typing import Optional
 
 import pymysql
 
-from domain.score import SummaryRepository
+from domain.score import SummaryRepository, SummaryScoreSnapshot
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLSummaryRepository(SummaryRepository):
-    def __init__(self, linebot_db_config: dict, verify_db_config: dict):
+    def __init__(self, linebot_db_config: dict, verify_db_config: dict,
+                 linebot_pool: MySQLConnectionPool = None, verify_pool: MySQLConnectionPool = None):
         self.linebot_db_config = linebot_db_config
+        self.linebot_pool = linebot_pool or MySQLConnectionPool(linebot_db_config)
         self.verify_db_config = verify_db_config
+        self.verify_pool = verify_pool or MySQLConnectionPool(verify_db_config)
 
     def _get_linebot_db_connection(self):
-        return pymysql.connect(**self.linebot_db_config)
+        return self.linebot_pool.connection()
 
     def _get_verify_db_connection(self):
-        return pymysql.connect(**self.verify_db_config)
+        return self.verify_pool.connection()
 
     def get_latest_log_id(self, stdID: str, context_title: str, contents_name: str) -> Optional[int]:
         with self._get_linebot_db_connection() as conn:
             with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                # summary_latest_log 由 trigger 維護（migrations/linebot/0003），一次 PK 查詢
                 query = '''
                 SELECT log_id
-                FROM summary_gradding_log
-                WHERE student_ID = %s and context_title = %s and contents_name like %s
-                ORDER BY operation_time DESC
-                LIMIT 1;
+                FROM summary_latest_log
+                WHERE student_ID = %s AND context_title = %s AND contents_name = %s;
                 '''
                 cur.execute(query, (stdID, context_title, contents_name,))
                 row = cur.fetchone()
@@ -84,3 +87,57 @@ class MySQLSummaryRepository(SummaryRepository):
                     return 80
 
                 return 0
+
+    def get_summary_score_snapshot(self, stdID: str, context_title: str,
+                                   contents_name: str, deadline: str) -> SummaryScoreSnapshot:
+        """
+        get_latest_log_id + is_log_under_review + get_score_result 併成一次查詢。
+        linebot 與 verify 兩個 schema 在同一台 MySQL，直接跨 schema 查 SummarySubmissions；
+        分數原本的兩個 LIKE 探測改成對同一批列做一次條件式聚合。
+        兩個 DB 設定不在同一台（host / port 不同）時退回預設的三次查詢。
+        """
+        if not self._same_server():
+            return super().get_summary_score_snapshot(stdID, context_title, contents_name, deadline)
+
+        with self._get_linebot_db_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cur:
+                # 各條件與上面三個方法相同：latest 查 summary_latest_log、分數用前綴比對
+                query = f'''
+                SELECT
+                    latest.log_id,
+                    (SELECT COUNT(*)
+                     FROM {self._verify_schema()}.SummarySubmissions ss
+                     WHERE ss.summary_gradding_log_id = latest.log_id
+                     AND ss.verify_status = 'wait_review') = 1 AS under_review,
+                    (SELECT COALESCE(MAX(CASE
+                                WHEN result = 1 THEN 100
+                                WHEN result = 0 AND penalty != -1 THEN 80
+                                ELSE 0 END), 0)
+                     FROM summary_gradding_log
+                     WHERE context_title = %s
+                     AND contents_name LIKE %s
+                     AND student_ID = %s
+                     AND operation_time <= %s) AS score
+                FROM summary_latest_log latest
+                WHERE latest.student_ID = %s AND latest.context_title = %s AND latest.contents_name = %s;
+                '''
+                cur.execute(query, (context_title, contents_name + "%", stdID, deadline,
+                                    stdID, context_title, contents_name))
+                row = cur.fetchone()
+
+        if not row:
+            return SummaryScoreSnapshot(log_id=None, under_review=False, score=None)
+        under_review = bool(row["under_review"])
+        return SummaryScoreSnapshot(
+            log_id=row["log_id"],
+            under_review=under_review,
+            score=None if under_review else int(row["score"]),
+        )
+
+    def _same_server(self) -> bool:
+        linebot, verify = self.linebot_db_config, self.verify_db_config
+        return bool(verify.get("db")) and \
+            (linebot.get("host"), linebot.get("port")) == (verify.get("host"), verify.get("port"))
+
+    def _verify_schema(self) -> str:
+        return "`" + self.verify_db_config["db"].replace("`", "``") + "`"
@@ -0,0 +1,173 @@
+# infrastructure/mysql_unit_of_work.py
+"""
+一個 webhook 事件一個交易：request 範圍的 unit of work。
+
+原本一個 postback（例如 summary:get_grade）裡，學生、message log、grading log、event log
+各自跟連線池借一條連線、各自 commit。在 `with unit_of_work():` 區塊裡，
+MySQLConnectionPool.connection() 會自動改成加入目前的 unit of work：
+
+- 每個連線池（= 每個資料庫）整個區塊只借一條連線，repository 不用改
+- repository 自己呼叫的 conn.commit() 先記下來，區塊正常結束時每條連線 commit 一次；
+  區塊丟例外就全部 rollback，讓 message log + event log 這類相關寫入一起成功或一起失敗
+- 目前的 unit of work 放在 contextvar 裡；只有開啟它的執行緒會加入，
+  背景執行緒（例如 BufferedLogWriter）照常自己借連線
+- 交易用 READ COMMITTED：事件中途呼叫外部服務（162 批改）寫進 DB 的資料，後面的查詢要看得到
+- 外部 I/O（162 批改、OpenAI、寄信、Google Sheet、LINE 回覆/推播）只在 DB 區段之間進行：
+  標了 @external_io 的呼叫會先 checkpoint()——把到目前為止的寫入 commit、連線還給連線池、放掉列鎖，
+  之後的查詢再借新連線（仍在同一個 unit of work 裡）。
+  所以不會拿著連線和 user_states 的列鎖等好幾秒的 HTTP，回覆學生之前狀態也已經 commit，
+  回覆之後才出錯不會把剛告訴學生的變更 rollback 掉
+
+注意:
+- 兩次外部 I/O 之間的寫入才是同一個交易；不同資料庫是分開 commit 的（不是 2PC），
+  前一個 commit 成功、後一個失敗時不會回復前一個
+"""
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["MySQLUnitOfWork"]] = ContextVar(
+    "mysql_unit_of_work", default=None)
+
+
+class _DeferredCommitConnection:
+    """交給 repository 的連線：commit() 延到 unit of work 結束，其他操作照常轉給真的連線"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.commit_requested = False
+
+    def commit(self):
+        self.commit_requested = True
+
+    def close(self):
+        # 連線屬於 unit of work，由它歸還給連線池
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class MySQLUnitOfWork:
+    ISOLATION_SQL = "SET TRANSACTION ISOLATION LEVEL READ COMMITTED"
+
+    def __init__(self):
+        self._thread_id = threading.get_ident()
+        # id(pool) -> (pool, 池子借出的 entry, 交給 repository 的連線)
+        self._joined: dict[int, tuple[object, object, _DeferredCommitConnection]] = {}
+        self._closed = False
+        self.checkpoints = 0
+
+    def owned_by_current_thread(self) -> bool:
+        return not self._closed and threading.get_ident() == self._thread_id
+
+    def connection_for(self, pool) -> _DeferredCommitConnection:
+        joined = self._joined.get(id(pool))
+        if joined is not None:
+            return joined[2]
+
+        entry = pool._acquire()
+        try:
+            with entry.conn.cursor() as cur:
+                cur.execute(self.ISOLATION_SQL)
+        except Exception:
+            pool._release(entry)
+            raise
+        conn = _DeferredCommitConnection(entry.conn)
+        self._joined[id(pool)] = (pool, entry, conn)
+        return conn
+
+    def commit(self):
+        """把 repository 要求過 commit 的連線一一 commit；中途失敗就把還沒 commit 的 rollback"""
+        pending = [(pool, entry, conn) for pool, entry, conn in self._joined.values()
+                   if conn.commit_requested]
+        for index, (_, entry, conn) in enumerate(pending):
+            try:
+                entry.conn.commit()
+            except Exception:
+                for _, rest, _ in pending[index + 1:]:
+                    self._rollback_quietly(rest.conn)
+                raise
+            conn.commit_requested = False
+
+    def checkpoint(self):
+        """commit 目前要求過的寫入，並把連線還給連線池（列鎖跟著釋放）；之後再用到時重新借"""
+        self.commit()
+        joined, self._joined = list(self._joined.values()), {}
+        for pool, entry, _ in joined:
+            pool._release(entry)
+        self.checkpoints += 1
+
+    def rollback(self):
+        for _, entry, conn in self._joined.values():
+            self._rollback_quietly(entry.conn)
+            conn.commit_requested = False
+
+    def close(self):
+        """把連線還給各自的連線池（池子歸還時會再 rollback 一次，沒 commit 的都不會留下）"""
+        self._closed = True
+        joined, self._joined = list(self._joined.values()), {}
+        for pool, entry, _ in joined:
+            pool._release(entry)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._joined)
+
+    @staticmethod
+    def _rollback_quietly(conn):
+        try:
+            conn.rollback()
+        except Exception:
+            logger.warning("unit of work rollback failed", exc_info=True)
+
+
+def current_unit_of_work() -> Optional[MySQLUnitOfWork]:
+    return _current.get()
+
+
+def checkpoint():
+    """目前執行緒在 unit of work 裡就先 commit 並歸還連線；不在就什麼都不做"""
+    uow = _current.get()
+    if uow is not None and uow.owned_by_current_thread():
+        uow.checkpoint()
+
+
+def external_io(func):
+    """標記會呼叫外部服務的方法：呼叫前先 checkpoint()，不在外部 I/O 期間拿著連線和列鎖"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        checkpoint()
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def unit_of_work() -> Iterator[MySQLUnitOfWork]:
+    """
+    開啟一個 unit of work；已經在某個 unit of work 裡時直接加入外層的（由外層負責 commit）。
+
+        with unit_of_work():
+            on_postback(event, destination)
+    """
+    existing = _current.get()
+    if existing is not None and existing.owned_by_current_thread():
+        yield existing
+        return
+
+    uow = MySQLUnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+        uow.commit()
+    except BaseException:
+        uow.rollback()
+        raise
+    finally:
+        _current.reset(token)
+        uow.close()
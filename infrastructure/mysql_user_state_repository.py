@@ -1,16 +1,16 @@
 import json
 
-import pymysql
-
 from domain.user_state import UserState, UserStateEnum, UserStateRepository
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
 
 
 class MySQLUserStateRepository(UserStateRepository):
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, pool: MySQLConnectionPool = None):
         self.db_config = db_config
+        self.pool = pool or MySQLConnectionPool(db_config)
 
     def _get_connection(self):
-        return pymysql.connect(**self.db_config)
+        return self.pool.connection()
 
     def get(self, line_user_id: str):
         with self._get_connection() as conn:
@@ -33,6 +33,38 @@ class MySQLUserStateRepository(UserStateRepository):
                 """, (state.line_user_id, state.status.name, json.dumps(state.context)))
                 conn.commit()
 
+    def transition(self, line_user_id: str, new_state: UserStateEnum,
+                   expected_state: UserStateEnum = None) -> bool:
+        if expected_state is not None and expected_state == new_state:
+            # 沒有要改的東西，只確認目前狀態
+            current = self.get(line_user_id)
+            return (current.status if current else UserStateEnum.IDLE) == expected_state
+
+        with self._get_connection() as conn:
+            with conn.cursor() as cursor:
+                if expected_state is None:
+                    cursor.execute("""
+                        INSERT INTO user_states (line_user_id, state_name, context)
+                        VALUES (%s, %s, '{}')
+                        ON DUPLICATE KEY UPDATE state_name = VALUES(state_name)
+                    """, (line_user_id, new_state.name))
+                    conn.commit()
+                    return True
+
+                if expected_state == UserStateEnum.IDLE:
+                    # 沒有紀錄也算 IDLE：插入成功 (1) 或 IDLE 被改掉 (2) 才算數，其他狀態維持原樣 (0)
+                    affected = cursor.execute("""
+                        INSERT INTO user_states (line_user_id, state_name, context)
+                        VALUES (%s, %s, '{}')
+                        ON DUPLICATE KEY UPDATE state_name = IF(state_name = %s, VALUES(state_name), state_name)
+                    """, (line_user_id, new_state.name, expected_state.name))
+                else:
+                    affected = cursor.execute(
+                        "UPDATE user_states SET state_name = %s WHERE line_user_id = %s AND state_name = %s",
+                        (new_state.name, line_user_id, expected_state.name))
+                conn.commit()
+                return affected > 0
+
     def delete(self, line_user_id: str):
         with self._get_connection() as conn:
             with conn.cursor() as cursor:
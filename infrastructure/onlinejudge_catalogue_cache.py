@@ -0,0 +1,98 @@
+# infrastructure/onlinejudge_catalogue_cache.py
+"""
+OJ 題目目錄快取。
+
+某課程某單元有哪些 contest、哪些可見題目，只有助教上架題目時才會變，
+但每次查分都要用 `ILIKE '%...%'` 掃 problem / contest。
+這裡以 (oj_contest_title, contents_name, type) 為 key，把模糊比對解析出來的
+contest id 與題目 id 留在記憶體裡，TTL 到期或手動 refresh 後才重新載入。
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class CatalogueEntry:
+    contest_ids: tuple[int, ...]
+    # problem.id：題號符合 '%C1_E%'（算總題數）
+    problem_ids: tuple[int, ...]
+    # problem._id：總題數以題號 distinct 計算
+    problem_codes: frozenset[str]
+    # problem.id：題號符合 'C1_E%'（算完成題數，與原本的 submission query 一致）
+    submission_problem_ids: tuple[int, ...]
+    loaded_at: float
+
+    @property
+    def total(self) -> int:
+        return len(self.problem_codes)
+
+
+CatalogueKey = tuple[str, str, str]
+
+
+class OnlinejudgeCatalogueCache:
+    def __init__(self, ttl: float = 600):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[CatalogueKey, CatalogueEntry] = {}
+        # 每個 key 一把鎖：同一單元同時被查時只載入一次
+        self._key_locks: dict[CatalogueKey, threading.Lock] = {}
+
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+
+    def get_or_load(self, key: CatalogueKey, loader: Callable[[], CatalogueEntry]) -> CatalogueEntry:
+        entry = self._get_fresh(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 等鎖期間可能已經有人載入完
+            entry = self._get_fresh(key, count=False)
+            if entry is not None:
+                return entry
+            entry = loader()
+            with self._lock:
+                self._entries[key] = entry
+                self._loads += 1
+            return entry
+
+    def refresh(self, oj_contest_title: Optional[str] = None, contents_name: Optional[str] = None) -> int:
+        """
+        丟掉符合條件的快取（不給條件就全部清掉），下次查詢會重新載入。
+        回傳被清掉的筆數。
+        """
+        with self._lock:
+            keys = [k for k in self._entries
+                    if (oj_contest_title is None or k[0] == oj_contest_title)
+                    and (contents_name is None or k[1] == contents_name)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "loads": self._loads,
+            }
+
+    def _get_fresh(self, key: CatalogueKey, count: bool = True) -> Optional[CatalogueEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and time.monotonic() - entry.loaded_at < self.ttl
+            if count:
+                if fresh:
+                    self._hits += 1
+                else:
+                    self._misses += 1
+            return entry if fresh else None
@@ -22,18 +22,16 @@ idle_timeout 為 60 秒，測試方法就是直接等
 """
 # infrastructure/postgresql_moodle_repository.py
 from typing import List, Optional
-from threading import Lock, Timer
-from contextlib import contextmanager
 
 from domain.moodle_enrollment import MoodleEnrollment, MoodleRepository
-
-from sshtunnel import SSHTunnelForwarder
-import psycopg2
+from infrastructure.postgresql_tunnel_pool import TunneledPostgreSQLPool
 
 
 class PostgreSQLMoodleRepository(MoodleRepository):
-    def __init__(self, db_config: dict, ssh_config: dict):
-        self.conn_mgr = LazyMoodleConnectionManager(db_config, ssh_config)
+    def __init__(self, db_config: dict, ssh_config: dict, conn_mgr: 'LazyMoodleConnectionManager' = None):
+        # 連線管理器必須是行程內共用的那一個（由 container 注入），tunnel 才會在註冊尖峰時被重複利用；
+        # 沒給就自己建一個（測試/腳本用）
+        self.conn_mgr = conn_mgr or LazyMoodleConnectionManager(db_config, ssh_config)
 
     def find_student_enrollments(self, student_id: str) -> List[MoodleEnrollment]:
         with self.conn_mgr.get_cursor() as cur:
@@ -82,7 +80,7 @@ class PostgreSQLMoodleRepository(MoodleRepository):
             }
 
 
-class LazyMoodleConnectionManager:
+class LazyMoodleConnectionManager(TunneledPostgreSQLPool):
     """
     ## ✅ 推薦方案：**高峰期動態啟動連線 + 自動關閉機制**
 
@@ -92,100 +90,19 @@ class LazyMoodleConnectionManager:
 
     ----------
 
-    ## 🛠️ 技術方案：Lazy SSH + Expiring Connection Wrapper
+    ## 🛠️ 技術方案：Lazy SSH + 多條連線共用一條 tunnel
+
+    原本只有一條 psycopg2 連線、由一把 Lock 保護，第一堂課 30~40 人同時註冊時
+    每個 `find_student_info` / `find_student_enrollments` 都排在同一把鎖後面，
+    而且每次都先跑一次 `SELECT 1`。現在沿用 OJ 的 TunneledPostgreSQLPool：
+
+    - 一條 lazy SSH tunnel，上面最多開 pool_size 條連線，借不到就排隊（timeout 秒後 TimeoutError）
+    - 連線閒置超過 liveness_check_after 秒才做 `SELECT 1`
+    - 全部歸還後 idle_timeout 秒沒人用，連線與 tunnel 一起關掉
+    - stats() 提供排隊等待時間、tunnel 建立/重建次數與耗時
     """
 
-    def __init__(self, db_config, ssh_config, idle_timeout=60):
-        # host, port, database, user, password
-        self.db_config = dict(db_config)
-        # enabled, ssh_host, ssh_port, ssh_username, ssh_password
-        self.ssh_config = dict(ssh_config)
-        self.db_config['port'] = int(self.db_config.get('port', 5432))
-        self.ssh_config['ssh_port'] = int(self.ssh_config.get('ssh_port', 22))
-        self.ssh_enabled = bool(self.ssh_config.get('enabled', True))
-
-        self.idle_timeout = idle_timeout
-        self.lock = Lock()
-        self._conn = None
-        self._tunnel = None
-        self._timer = None
-
-    def _start(self):
-        try:
-            if self.ssh_enabled:
-                self._tunnel = SSHTunnelForwarder(
-                    (self.ssh_config['ssh_host'],
-                     self.ssh_config.get('ssh_port', 22)),
-                    ssh_username=self.ssh_config['ssh_username'],
-                    ssh_password=self.ssh_config.get('ssh_password'),
-                    remote_bind_address=(
-                        self.db_config['host'], self.db_config['port'])
-                )
-                self._tunnel.start()
-                host = "127.0.0.1"
-                port = self._tunnel.local_bind_port
-            else:
-                # 直連：連目標 host:port（在 compose 內用服務名）
-                host = self.db_config['host']
-                port = self.db_config['port']
-
-            self._conn = psycopg2.connect(
-                host=host,
-                port=port,
-                database=self.db_config['database'],
-                user=self.db_config['user'],
-                password=self.db_config['password']
-            )
-        except Exception as e:
-            if self._tunnel:
-                try:
-                    self._tunnel.close()
-                except Exception:
-                    pass
-            self._tunnel = None
-            self._conn = None
-            raise
-
-    def _schedule_close(self):
-        if self._timer:
-            self._timer.cancel()
-        self._timer = Timer(self.idle_timeout, self.close)
-        self._timer.start()
-
-    @contextmanager
-    def get_cursor(self):
-        with self.lock:
-            if self._conn is None:
-                self._start()
-            else:
-                # 連線失效時自動重連
-                try:
-                    with self._conn.cursor() as _test:
-                        _test.execute("SELECT 1")
-                except Exception:
-                    try:
-                        self._conn.close()
-                    except Exception:
-                        pass
-                    self._conn = None
-                    self._start()
-
-            self._schedule_close()
-            cur = self._conn.cursor()
-        try:
-            yield cur
-        finally:
-            cur.close()
-
-    def close(self):
-        with self.lock:
-            if self._conn:
-                try:
-                    self._conn.close()
-                finally:
-                    self._conn = None
-            if self._tunnel:
-                try:
-                    self._tunnel.close()
-                finally:
-                    self._tunnel = None
+    def __init__(self, db_config, ssh_config, pool_size=4, idle_timeout=60, timeout=10,
+                 liveness_check_after=30):
+        super().__init__(db_config, ssh_config, pool_size=pool_size, idle_timeout=idle_timeout,
+                         timeout=timeout, liveness_check_after=liveness_check_after)
@@ -1,94 +1,155 @@
-from sshtunnel import SSHTunnelForwarder
-import psycopg2
+import time
 
-from domain.score import OnlinejudgeRepository
+from domain.score import OnlinejudgeRepository, UnitProgress
+from infrastructure.onlinejudge_catalogue_cache import (
+    CatalogueEntry, OnlinejudgeCatalogueCache)
+from infrastructure.postgresql_tunnel_pool import TunneledPostgreSQLPool
+
+Q_TYPES = {'E': 'Exercise', 'A': 'Advance'}
 
 
 class PostgreSQLOnlinejudgeRepository(OnlinejudgeRepository):
-    def __init__(self, db_config: dict, ssh_config: dict):
+    def __init__(self, db_config: dict, ssh_config: dict, pool: TunneledPostgreSQLPool = None,
+                 catalogue: OnlinejudgeCatalogueCache = None):
         self.db_config = db_config
         self.ssh_config = ssh_config
+        # 共用一條長駐 tunnel + 小連線池；沒給就自己建一個（測試/腳本用）
+        self.pool = pool or TunneledPostgreSQLPool(db_config, ssh_config)
+        # 題目目錄快取，同樣應由 container 注入共用的那一份
+        self.catalogue = catalogue or OnlinejudgeCatalogueCache()
 
-    def _get_connection(self):
-        tunnel = SSHTunnelForwarder(
-            (self.ssh_config['ssh_host'], self.ssh_config.get('ssh_port', 22)),
-            ssh_username=self.ssh_config['ssh_username'],
-            ssh_password=self.ssh_config['ssh_password'],
-            remote_bind_address=(
-                self.db_config['host'], self.db_config['port'])
-        )
-        tunnel.start()
-
-        conn = psycopg2.connect(
-            host="127.0.0.1",
-            port=tunnel.local_bind_port,
-            user=self.db_config['user'],
-            password=self.db_config['password'],
-            database=self.db_config['database']
+    def _get_catalogue(self, oj_contest_title, contents_name, type_suffix) -> CatalogueEntry:
+        return self.catalogue.get_or_load(
+            (oj_contest_title, contents_name, type_suffix),
+            lambda: self._load_catalogue(oj_contest_title, contents_name, type_suffix))
+
+    def _load_catalogue(self, oj_contest_title, contents_name, type_suffix) -> CatalogueEntry:
+        """
+        把模糊的 contest 名稱解析成 contest id，並列出其中可見、題號符合單元/類型的題目。
+        LEFT JOIN：即使還沒上架題目，也先把 contest id 解析出來。
+        """
+        with self.pool.get_cursor() as cur:
+            query = """
+                SELECT contest.id, problem.id, problem._id,
+                       COALESCE(problem._id ILIKE %(submission_like)s, FALSE)
+                FROM contest
+                LEFT JOIN problem ON problem.contest_id = contest.id
+                    AND problem.visible = TRUE
+                    AND problem._id ILIKE %(problem_like)s
+                WHERE contest.title ILIKE %(contest_title_like)s;
+            """
+            cur.execute(query, {
+                "problem_like": f"%{contents_name}_{type_suffix}%",
+                "submission_like": f"{contents_name}_{type_suffix}%",
+                "contest_title_like": f"%{oj_contest_title}%{contents_name}%{Q_TYPES[type_suffix]}%",
+            })
+            rows = cur.fetchall()
+
+        contest_ids, problem_ids, problem_codes, submission_problem_ids = set(), set(), set(), set()
+        for contest_id, problem_id, problem_code, is_submission_match in rows:
+            contest_ids.add(contest_id)
+            if problem_id is None:
+                continue
+            problem_ids.add(problem_id)
+            problem_codes.add(problem_code)
+            if is_submission_match:
+                submission_problem_ids.add(problem_id)
+
+        return CatalogueEntry(
+            contest_ids=tuple(sorted(contest_ids)),
+            problem_ids=tuple(sorted(problem_ids)),
+            problem_codes=frozenset(problem_codes),
+            submission_problem_ids=tuple(sorted(submission_problem_ids)),
+            loaded_at=time.monotonic(),
         )
-        return tunnel, conn
-
-    def _count_problem_by_type(self, oj_contest_title, contents_name, type_suffix, q_type):
-        tunnel, conn = self._get_connection()
-        try:
-            with conn.cursor() as cur:
-                query = """
-                    SELECT COUNT(DISTINCT problem._id)
-                    FROM problem
-                    JOIN contest ON problem.contest_id = contest.id
-                    WHERE problem._id ILIKE %s
-                    AND contest.title ILIKE %s
-                    AND problem.visible = TRUE;
-                """
-                problem_like = f"%{contents_name}_{type_suffix}%"
-                contest_title_like = f"%{oj_contest_title}%{contents_name}%{q_type}%"
-                cur.execute(query, (problem_like, contest_title_like))
-                result = cur.fetchone()
-                return int(result[0]) if result else 0
-        finally:
-            conn.close()
-            tunnel.close()
+
+    def refresh_catalogue(self, oj_contest_title=None, contents_name=None) -> int:
+        """助教上架/隱藏題目後呼叫，讓下次查詢重新載入題目目錄"""
+        return self.catalogue.refresh(oj_contest_title, contents_name)
 
     def get_exercise_number_by_contents_name(self, oj_contest_title, contents_name):
-        return self._count_problem_by_type(oj_contest_title, contents_name, 'E', 'Exercise')
+        return self._get_catalogue(oj_contest_title, contents_name, 'E').total
 
     def get_advance_number_by_contents_name(self, oj_contest_title, contents_name):
-        return self._count_problem_by_type(oj_contest_title, contents_name, 'A', 'Advance')
-
-    def _count_submission_by_type(self, OJ_contest_title, contents_name, stdID, deadline, type_suffix, q_type):
-        tunnel, conn = self._get_connection()
-        try:
-            with conn.cursor() as cur:
-                query = """
-                    SELECT COUNT(DISTINCT problem._id)
-                    FROM problem
-                    JOIN submission ON submission.problem_id = problem.id
-                    JOIN contest ON submission.contest_id = contest.id
-                    WHERE problem._id ILIKE %s
-                    AND submission.result = 0
-                    AND submission.create_time <= %s
-                    AND (submission.username ILIKE %s OR submission.username = %s)
-                    AND contest.title ILIKE %s
-                    AND problem.visible = TRUE;
-                """
-                problem_like = f"{contents_name}_{type_suffix}%"
-                username_like = f"{stdID}@%"
-                contest_title_like = f"%{OJ_contest_title}%{contents_name}%{q_type}%"
-                cur.execute(query, (
-                    problem_like,
-                    deadline,
-                    username_like,
-                    stdID,
-                    contest_title_like
-                ))
-                result = cur.fetchone()
-                return int(result[0]) if result else 0
-        finally:
-            conn.close()
-            tunnel.close()
+        return self._get_catalogue(oj_contest_title, contents_name, 'A').total
+
+    def _count_submission_by_type(self, OJ_contest_title, contents_name, stdID, deadline, type_suffix):
+        entry = self._get_catalogue(OJ_contest_title, contents_name, type_suffix)
+        if not entry.contest_ids or not entry.submission_problem_ids:
+            return 0
+
+        with self.pool.get_cursor() as cur:
+            query = """
+                SELECT COUNT(DISTINCT problem._id)
+                FROM submission
+                JOIN problem ON submission.problem_id = problem.id
+                WHERE submission.problem_id = ANY(%(problem_ids)s)
+                AND submission.contest_id = ANY(%(contest_ids)s)
+                AND submission.result = 0
+                AND submission.create_time <= %(deadline)s
+                AND (submission.username ILIKE %(username_like)s OR submission.username = %(stdID)s);
+            """
+            cur.execute(query, {
+                "problem_ids": list(entry.submission_problem_ids),
+                "contest_ids": list(entry.contest_ids),
+                "deadline": deadline,
+                "username_like": f"{stdID}@%",
+                "stdID": stdID,
+            })
+            result = cur.fetchone()
+            return int(result[0]) if result else 0
 
     def get_advance_submission_by_contents_name(self, OJ_contest_title, contents_name, stdID, deadline):
-        return self._count_submission_by_type(OJ_contest_title, contents_name, stdID, deadline, 'A', 'Advance')
+        return self._count_submission_by_type(OJ_contest_title, contents_name, stdID, deadline, 'A')
 
     def get_exercise_submission_by_contents_name(self, OJ_contest_title, contents_name, stdID, deadline):
-        return self._count_submission_by_type(OJ_contest_title, contents_name, stdID, deadline, 'E', 'Exercise')
+        return self._count_submission_by_type(OJ_contest_title, contents_name, stdID, deadline, 'E')
+
+    def get_unit_progress(self, oj_contest_title, contents_name, stdID, deadline) -> UnitProgress:
+        """
+        一次取回 Exercise / Advance 的題數與完成數。
+        題數直接從題目目錄快取拿；完成數用已解析的 contest / problem id 做一次條件式聚合。
+        """
+        exercise = self._get_catalogue(oj_contest_title, contents_name, 'E')
+        advance = self._get_catalogue(oj_contest_title, contents_name, 'A')
+
+        problem_ids = list(exercise.submission_problem_ids +
+                           advance.submission_problem_ids)
+        if not problem_ids:
+            return UnitProgress(exercise_total=exercise.total, exercise_done=0,
+                                advance_total=advance.total, advance_done=0)
+
+        with self.pool.get_cursor() as cur:
+            query = """
+                SELECT
+                    COUNT(DISTINCT problem._id) FILTER (
+                        WHERE submission.problem_id = ANY(%(exercise_problem_ids)s)
+                        AND submission.contest_id = ANY(%(exercise_contest_ids)s)) AS exercise_done,
+                    COUNT(DISTINCT problem._id) FILTER (
+                        WHERE submission.problem_id = ANY(%(advance_problem_ids)s)
+                        AND submission.contest_id = ANY(%(advance_contest_ids)s)) AS advance_done
+                FROM submission
+                JOIN problem ON submission.problem_id = problem.id
+                WHERE submission.problem_id = ANY(%(problem_ids)s)
+                AND submission.result = 0
+                AND submission.create_time <= %(deadline)s
+                AND (submission.username ILIKE %(username_like)s OR submission.username = %(stdID)s);
+            """
+            cur.execute(query, {
+                "exercise_problem_ids": list(exercise.submission_problem_ids),
+                "exercise_contest_ids": list(exercise.contest_ids),
+                "advance_problem_ids": list(advance.submission_problem_ids),
+                "advance_contest_ids": list(advance.contest_ids),
+                "problem_ids": problem_ids,
+                "deadline": deadline,
+                "username_like": f"{stdID}@%",
+                "stdID": stdID,
+            })
+            row = cur.fetchone() or (0, 0)
+
+        return UnitProgress(
+            exercise_total=exercise.total,
+            exercise_done=int(row[0] or 0),
+            advance_total=advance.total,
+            advance_done=int(row[1] or 0),
+        )
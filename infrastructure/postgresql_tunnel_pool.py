@@ -0,0 +1,359 @@
+# infrastructure/postgresql_tunnel_pool.py
+"""
+透過「一條」長駐 SSH tunnel 提供多條 psycopg2 連線的小型連線池。
+
+OJ 查分一次要打好幾個 count query，原本每個 query 都：
+開 SSHTunnelForwarder → psycopg2.connect → 查詢 → 關連線 → 關 tunnel，
+光建 tunnel 就是數百毫秒。這裡改成：
+
+- tunnel 延遲建立、由 lock 保護，多執行緒共用同一條；斷線時自動重建
+- tunnel 上最多開 pool_size 條連線，借出/歸還，不夠就排隊等（timeout 後丟 TimeoutError）
+- 連線閒置超過 liveness_check_after 秒才做 `SELECT 1` 檢查，熱連線直接用
+- 整個池子 idle_timeout 秒沒人用，就把連線與 tunnel 一起關掉（沿用 LazyMoodleConnectionManager 的想法）
+- statement_timeout（秒）：有設就帶進每條連線（libpq connect_timeout + 伺服器端 statement_timeout），
+  卡住的查詢在伺服器端被取消，呼叫端的執行緒不會一直被佔著
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import psycopg2
+from sshtunnel import SSHTunnelForwarder
+
+
+@dataclass
+class _PooledPGConnection:
+    conn: "psycopg2.extensions.connection"
+    last_used: float
+    # 建立時的 tunnel 世代；close() 之後舊世代的連線歸還時直接關掉
+    generation: int = 0
+
+
+class TunneledPostgreSQLPool:
+    def __init__(self, db_config: dict, ssh_config: dict, pool_size: int = 4,
+                 idle_timeout: float = 60, timeout: float = 10,
+                 liveness_check_after: float = 30, statement_timeout: Optional[float] = None):
+        # host, port, database, user, password
+        self.db_config = dict(db_config)
+        # enabled, ssh_host, ssh_port, ssh_username, ssh_password
+        self.ssh_config = dict(ssh_config)
+        self.db_config['port'] = int(self.db_config.get('port') or 5432)
+        self.ssh_config['ssh_port'] = int(
+            self.ssh_config.get('ssh_port') or 22)
+        self.ssh_enabled = bool(self.ssh_config.get('enabled', True))
+
+        self.pool_size = int(pool_size)
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.liveness_check_after = liveness_check_after
+        self.statement_timeout = statement_timeout
+
+        self._cond = threading.Condition()
+        self._tunnel_lock = threading.Lock()
+        self._tunnel = None
+        self._idle: deque[_PooledPGConnection] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._timer = None
+        # 正在關閉連線與 tunnel 的次數（> 0 時 _acquire 先等，關完再重開 tunnel）
+        self._closing = 0
+        self._generation = 0
+
+        # 統計
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_timeouts = 0
+        self._tunnel_starts = 0
+        self._tunnel_start_total = 0.0
+        self._tunnel_last_start = 0.0
+        # tunnel 斷線（is_active 為 False 或連不上）後重建的次數，不含閒置關閉後的正常重開
+        self._tunnel_rebuilds = 0
+        self._idle_closes = 0
+        self._connects = 0
+        self._liveness_checks = 0
+        self._reconnects = 0
+
+    # ---------- public ----------
+
+    @contextmanager
+    def get_cursor(self):
+        entry = self._acquire()
+        broken = False
+        cur = entry.conn.cursor()
+        try:
+            yield cur
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+            self._release(entry, broken)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pool_size": self.pool_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "tunnel_active": self._tunnel is not None,
+                "checkouts": self._checkouts,
+                "wait_total_s": round(self._wait_total, 6),
+                "wait_avg_s": round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+                "wait_max_s": round(self._wait_max, 6),
+                "wait_timeouts": self._wait_timeouts,
+                "tunnel_starts": self._tunnel_starts,
+                "tunnel_start_total_s": round(self._tunnel_start_total, 6),
+                "tunnel_last_start_s": round(self._tunnel_last_start, 6),
+                "tunnel_rebuilds": self._tunnel_rebuilds,
+                "idle_closes": self._idle_closes,
+                "connects": self._connects,
+                "liveness_checks": self._liveness_checks,
+                "reconnects": self._reconnects,
+            }
+
+    def warm_up(self):
+        """先把 tunnel 與一條連線建好放回池子，讓第一位使用者不用付冷啟動成本"""
+        with self.get_cursor():
+            pass
+
+    def close(self):
+        """關閉所有閒置連線與 tunnel（借出中的連線歸還時會被關掉）"""
+        with self._cond:
+            idle = self._begin_close_locked()
+        self._finish_close(idle)
+
+    # ---------- internals ----------
+
+    def _acquire(self) -> _PooledPGConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            while True:
+                if not self._closing:
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.pool_size:
+                        self._size += 1
+                        entry = None
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._wait_timeouts += 1
+                    raise TimeoutError(
+                        f"no PostgreSQL connection available within {self.timeout}s")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+        try:
+            if entry is None:
+                return self._connect()
+            return self._check_liveness(entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+                self._schedule_close_if_idle()
+            raise
+
+    def _release(self, entry: _PooledPGConnection, broken: bool = False):
+        if not broken:
+            try:
+                # 結束隱含交易，讓下一位拿到乾淨的連線
+                entry.conn.rollback()
+            except Exception:
+                broken = True
+
+        with self._cond:
+            self._in_use -= 1
+            if broken or entry.conn.closed or entry.generation != self._generation:
+                self._size -= 1
+                to_close = entry.conn
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                to_close = None
+            self._cond.notify()
+            self._schedule_close_if_idle()
+
+        if to_close is not None:
+            self._close_quietly(to_close)
+
+    def _check_liveness(self, entry: _PooledPGConnection) -> _PooledPGConnection:
+        if not entry.conn.closed and time.monotonic() - entry.last_used < self.liveness_check_after:
+            return entry
+
+        with self._cond:
+            self._liveness_checks += 1
+        try:
+            if entry.conn.closed:
+                raise psycopg2.InterfaceError("connection already closed")
+            with entry.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            entry.conn.rollback()
+            return entry
+        except Exception:
+            self._close_quietly(entry.conn)
+            with self._cond:
+                self._reconnects += 1
+            return self._connect()
+
+    def _connect(self) -> _PooledPGConnection:
+        host, port = self._ensure_tunnel()
+        # 連線前先記下世代：連線途中 tunnel 被重建或 close()，這條連線歸還時就會被淘汰
+        with self._cond:
+            generation = self._generation
+        try:
+            conn = self._pg_connect(host, port)
+        except psycopg2.OperationalError:
+            # 只有 tunnel 本身斷了（例如 SSH server 重開）才重建再試一次；
+            # 密碼錯、DB 啟動中、max_connections 滿了都跟 tunnel 無關，
+            # 拆掉 tunnel 只會把其他執行緒正在用的連線一起弄斷
+            if not self.ssh_enabled or self._tunnel_is_active():
+                raise
+            host, port = self._ensure_tunnel()
+            with self._cond:
+                generation = self._generation
+            conn = self._pg_connect(host, port)
+        with self._cond:
+            self._connects += 1
+        return _PooledPGConnection(conn=conn, last_used=time.monotonic(), generation=generation)
+
+    def _pg_connect(self, host, port):
+        timeouts = {}
+        if self.statement_timeout:
+            timeouts = {"connect_timeout": max(math.ceil(self.statement_timeout), 2),
+                        "options": f"-c statement_timeout={int(self.statement_timeout * 1000)}"}
+        return psycopg2.connect(
+            host=host,
+            port=port,
+            database=self.db_config['database'],
+            user=self.db_config['user'],
+            password=self.db_config['password'],
+            **timeouts
+        )
+
+    def _ensure_tunnel(self) -> tuple:
+        if not self.ssh_enabled:
+            # 直連：連目標 host:port（在 compose 內用服務名）
+            return self.db_config['host'], self.db_config['port']
+
+        with self._tunnel_lock:
+            if self._tunnel is not None and not self._tunnel.is_active:
+                # 舊 tunnel 上的連線都不能用了：換世代讓借出中的歸還時淘汰，閒置的直接關掉
+                with self._cond:
+                    self._tunnel_rebuilds += 1
+                    self._generation += 1
+                    stale, self._idle = list(self._idle), deque()
+                    self._size -= len(stale)
+                    self._cond.notify_all()
+                for entry in stale:
+                    self._close_quietly(entry.conn)
+                self._close_tunnel_locked()
+
+            if self._tunnel is None:
+                started = time.monotonic()
+                tunnel = SSHTunnelForwarder(
+                    (self.ssh_config['ssh_host'], self.ssh_config['ssh_port']),
+                    ssh_username=self.ssh_config['ssh_username'],
+                    ssh_password=self.ssh_config.get('ssh_password'),
+                    remote_bind_address=(
+                        self.db_config['host'], self.db_config['port'])
+                )
+                try:
+                    tunnel.start()
+                except Exception:
+                    try:
+                        tunnel.close()
+                    except Exception:
+                        pass
+                    raise
+                self._tunnel = tunnel
+                elapsed = time.monotonic() - started
+                with self._cond:
+                    self._tunnel_starts += 1
+                    self._tunnel_start_total += elapsed
+                    self._tunnel_last_start = elapsed
+
+            return "127.0.0.1", self._tunnel.local_bind_port
+
+    def _tunnel_is_active(self) -> bool:
+        with self._tunnel_lock:
+            return self._tunnel is not None and self._tunnel.is_active
+
+    def _schedule_close_if_idle(self):
+        # 呼叫端需持有 self._cond
+        if self._in_use == 0 and self.idle_timeout is not None:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _close_if_idle(self):
+        with self._cond:
+            # 判斷閒置與取出閒置連線都在 lock 裡完成；之後進來的 _acquire 會等關閉結束再重開 tunnel
+            if self._in_use > 0 or self._closing:
+                return
+            self._idle_closes += 1
+            idle = self._begin_close_locked()
+        self._finish_close(idle)
+
+    def _begin_close_locked(self) -> list:
+        # 呼叫端需持有 self._cond
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        idle, self._idle = list(self._idle), deque()
+        self._size -= len(idle)
+        self._closing += 1
+        self._generation += 1
+        return idle
+
+    def _finish_close(self, idle: list):
+        try:
+            for entry in idle:
+                self._close_quietly(entry.conn)
+            self._close_tunnel()
+        finally:
+            with self._cond:
+                self._closing -= 1
+                self._cond.notify_all()
+
+    def _close_tunnel(self):
+        with self._tunnel_lock:
+            self._close_tunnel_locked()
+
+    def _close_tunnel_locked(self):
+        if self._tunnel is not None:
+            try:
+                self._tunnel.close()
+            except Exception:
+                pass
+            finally:
+                self._tunnel = None
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,116 @@
+from flask import Blueprint, request
+from dependency_injector.wiring import inject, Provide
+from application.buffered_log_writer import BufferedLogWriter
+from application.connection_prewarmer import ConnectionPrewarmer
+from containers import AppContainer
+
+from infrastructure.cached_course_repository import CachedCourseRepository
+from infrastructure.cached_student_repository import CachedStudentRepository
+from infrastructure.gateways.google_sheet_cache import GoogleSheetCsvCache
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.onlinejudge_catalogue_cache import OnlinejudgeCatalogueCache
+from infrastructure.postgresql_tunnel_pool import TunneledPostgreSQLPool
+
+admin_bp = Blueprint('admin', __name__)
+
+
+@admin_bp.route("/admin/db_pool_stats/", methods=['GET'])
+@inject
+def db_pool_stats(linebot_db_pool: MySQLConnectionPool = Provide[AppContainer.linebot_db_pool],
+                  verify_db_pool: MySQLConnectionPool = Provide[AppContainer.verify_db_pool],
+                  review_system_db_pool: MySQLConnectionPool = Provide[AppContainer.review_system_db_pool],
+                  oj_db_pool: TunneledPostgreSQLPool = Provide[AppContainer.oj_db_pool],
+                  moodle_db_pool: TunneledPostgreSQLPool = Provide[AppContainer.moodle_connection_manager]):
+    """
+    回傳本 worker 行程內各 MySQL / OJ / Moodle 連線池的統計（checkouts、等待時間、in_use、tunnel 建立次數...），
+    用來在開課尖峰時評估 MYSQL_POOL_SIZE / MYSQL_POOL_MAX_OVERFLOW 要開多大。
+    注意: gunicorn 每個 worker 各有一份連線池，這裡只看得到處理這次 request 的那個 worker。
+    """
+    return {
+        'linebot': linebot_db_pool.stats(),
+        'verify': verify_db_pool.stats(),
+        'review_system': review_system_db_pool.stats(),
+        'oj': oj_db_pool.stats(),
+        'moodle': moodle_db_pool.stats(),
+    }
+
+
+@admin_bp.route("/admin/oj_catalogue/refresh/", methods=['POST'])
+@inject
+def refresh_oj_catalogue(oj_catalogue: OnlinejudgeCatalogueCache = Provide[AppContainer.oj_catalogue]):
+    """
+    助教上架/隱藏 OJ 題目後呼叫，清掉題目目錄快取。
+    可用 JSON body 的 oj_contest_title / contents_name 只清特定課程或單元，不給就全部清掉。
+    """
+    body = request.get_json(silent=True) or {}
+    removed = oj_catalogue.refresh(
+        oj_contest_title=body.get('oj_contest_title'),
+        contents_name=body.get('contents_name'))
+    return {'removed': removed, 'stats': oj_catalogue.stats()}
+
+
+@admin_bp.route("/admin/sheet_cache/", methods=['GET'])
+@inject
+def sheet_cache_stats(sheet_cache: GoogleSheetCsvCache = Provide[AppContainer.sheet_cache]):
+    """Google Sheet CSV 快取的 hit / miss / refresh 延遲統計"""
+    return sheet_cache.stats()
+
+
+@admin_bp.route("/admin/sheet_cache/refresh/", methods=['POST'])
+@inject
+def refresh_sheet_cache(sheet_cache: GoogleSheetCsvCache = Provide[AppContainer.sheet_cache]):
+    """助教改完表單想立刻生效時呼叫；JSON body 可帶 sheet_id 只清特定試算表"""
+    body = request.get_json(silent=True) or {}
+    removed = sheet_cache.invalidate(sheet_id=body.get('sheet_id'))
+    return {'removed': removed, 'stats': sheet_cache.stats()}
+
+
+@admin_bp.route("/admin/course_cache/", methods=['GET'])
+@inject
+def course_cache_stats(course_repo: CachedCourseRepository = Provide[AppContainer.course_repo]):
+    return course_repo.stats()
+
+
+@admin_bp.route("/admin/course_cache/refresh/", methods=['POST'])
+@inject
+def refresh_course_cache(course_repo: CachedCourseRepository = Provide[AppContainer.course_repo]):
+    """
+    改完 course_info、review_publish 或 change_HW_deadline 後呼叫（課程與單元行事曆一併清除）；
+    JSON body 可帶 context_title 只清特定課程。
+    注意: 只清得到處理這次 request 的 worker，其他 worker 要等 COURSE_CACHE_TTL 過期。
+    """
+    body = request.get_json(silent=True) or {}
+    removed = course_repo.invalidate(context_title=body.get('context_title'))
+    return {'removed': removed, 'stats': course_repo.stats()}
+
+
+@admin_bp.route("/admin/prewarm/", methods=['GET'])
+@inject
+def prewarm_stats(connection_prewarmer: ConnectionPrewarmer = Provide[AppContainer.connection_prewarmer]):
+    """上課時段預熱的狀態與最近一個時段的命中率（同樣只看得到這個 worker）"""
+    return connection_prewarmer.stats()
+
+
+@admin_bp.route("/admin/identity_cache/", methods=['GET'])
+@inject
+def identity_cache_stats(student_repo: CachedStudentRepository = Provide[AppContainer.student_repo]):
+    return student_repo.stats()
+
+
+@admin_bp.route("/admin/identity_cache/invalidate/", methods=['POST'])
+@inject
+def invalidate_identity_cache(student_repo: CachedStudentRepository = Provide[AppContainer.student_repo]):
+    """
+    助教解除綁定或刪除帳號後呼叫；JSON body 可帶 line_user_id 只清特定使用者，不給就全部清掉。
+    會寫一筆失效事件，其他 worker 在 IDENTITY_CACHE_POLL_INTERVAL 秒內跟著清掉。
+    """
+    body = request.get_json(silent=True) or {}
+    removed = student_repo.invalidate(line_user_id=body.get('line_user_id'))
+    return {'removed': removed, 'stats': student_repo.stats()}
+
+
+@admin_bp.route("/admin/log_writer/", methods=['GET'])
+@inject
+def log_writer_stats(log_writer: BufferedLogWriter = Provide[AppContainer.log_writer]):
+    """message / event log 背景寫入的緩衝量、丟棄筆數與批次寫入耗時（LOG_WRITER_MODE=sync 時不會有資料）"""
+    return log_writer.stats()
@@ -25,8 +25,9 @@ from application.summary_usecases.get_suggestion import GetSuggestionUseCase
 from application.summary_usecases.grade_single import GradeSingleUseCase
 from application.user_state_accessor import UserStateAccessor
 from containers import AppContainer
-from domain.student import StudentRepository
+from domain.session import SessionSnapshotRepository
 from domain.user_state import UserStateEnum
+from infrastructure.mysql_unit_of_work import unit_of_work
 
 from interfaces.postback_parser import parse_postback
 
@@ -56,7 +57,7 @@ def on_message(
     event: MessageEvent,
     destination: str,                # 👈 第二個位置參數用來接住 line-bot-sdk 傳進來的 destination
     *,
-    student_repository: StudentRepository = Provide[AppContainer.student_repo],
+    session_repository: SessionSnapshotRepository = Provide[AppContainer.session_repo],
     registration_service: RegistrationService = Provide[AppContainer.registration_service],
     user_state_accessor: UserStateAccessor = Provide[AppContainer.user_state_accessor],
     ask_ta_service: AskTAService = Provide[AppContainer.ask_ta_service],
@@ -68,14 +69,18 @@ def on_message(
     user_id = event.source.user_id
     text = event.message.text.strip()
 
+    # 一次查詢取得 學生 + 課程 shell + 對話狀態，底下的 service 直接沿用
+    session = session_repository.get_snapshot(user_id)
+
     # 第一層：存在性檢查
-    student = student_repository.find_by_line_id(user_id)
-    if not student:
+    if not session:
         # 如果使用者不存在，任何訊息都視為嘗試註冊學號
         registration_service.register_student(
             user_id, text, event.reply_token)
         return
 
+    student = session.student
+
     # 第二層：領域狀態檢查 (雖然在目前流程中，不存在的用戶已處理，但這是一個好的實踐)
     if not student.is_registered():
         registration_service.register_student(
@@ -86,11 +91,11 @@ def on_message(
     message_log_id = chatbot_logger.log_message(
         student_id=student.student_id, message=text, context_title=student.context_title)
 
-    session_state = user_state_accessor.get_state(user_id)
+    session_state = session.state
 
     if session_state == UserStateEnum.AWAITING_LEAVE_REASON:
         leave_service.submit_leave_reason(
-            student=student, reason=text, reply_token=event.reply_token)
+            student=student, reason=text, reply_token=event.reply_token, course=session.course_shell())
         return
     elif session_state == UserStateEnum.AWAITING_TA_QUESTION:
         ask_ta_service.submit_question(
@@ -98,10 +103,12 @@ def on_message(
         return
     elif session_state == UserStateEnum.AWAITING_CONTENTS_NAME:
         check_score_service.check_score(
-            student=student, reply_token=event.reply_token, target_content=text, mistake_review_sheet_url=mistake_review_sheet_url, message_log_id=message_log_id)
+            student=student, reply_token=event.reply_token, target_content=text, mistake_review_sheet_url=mistake_review_sheet_url, message_log_id=message_log_id,
+            course=session.course_shell())
         return
     elif session_state == UserStateEnum.AWAITING_REGRADE_BY_TA_REASON:
-        user_state_accessor.set_state(user_id, UserStateEnum.IDLE)
+        user_state_accessor.transition(
+            user_id, UserStateEnum.IDLE, expected_state=UserStateEnum.AWAITING_REGRADE_BY_TA_REASON)
         return
     if text == "助教安安，我有問題!":
         ask_ta_service.start_inquiry(
@@ -116,7 +123,7 @@ def on_postback(
     event: PostbackEvent,
     destination: str,                # 👈 第二個位置參數用來接住 line-bot-sdk 傳進來的 destination
     *,
-    student_repository: StudentRepository = Provide[AppContainer.student_repo],
+    session_repository: SessionSnapshotRepository = Provide[AppContainer.session_repo],
     check_attendance_service: CheckAttendanceService = Provide[
         AppContainer.check_attendance_service],
     check_score_service: CheckScoreService = Provide[AppContainer.check_score_service],
@@ -149,12 +156,14 @@ def on_postback(
     """
     user_id = event.source.user_id
 
-    student = student_repository.find_by_line_id(user_id)
+    session = session_repository.get_snapshot(user_id)
 
-    if not student:
+    if not session:
         # 理論上不會有這情況
         return
 
+    student = session.student
+
     data = event.postback.data
     parsed = parse_postback(data)
 
@@ -163,15 +172,15 @@ def on_postback(
 
     if parsed.action == 'apply_leave':
         leave_service.apply_for_leave(
-            student=student, reply_token=event.reply_token)
+            student=student, reply_token=event.reply_token, course=session.course_shell())
 
     elif parsed.action == 'fetch_absence_info':
         check_attendance_service.check_attendance(
-            student=student, reply_token=event.reply_token)
+            student=student, reply_token=event.reply_token, course=session.course_shell())
 
     elif parsed.action == 'check_homework':
         check_score_service.check_publish_contents(
-            student=student, reply_token=event.reply_token)
+            student=student, reply_token=event.reply_token, course=session.course_shell())
 
     elif parsed.action == 'action:confirm_leave':
         leave_service.ask_leave_reason(
@@ -220,7 +229,8 @@ def on_postback(
                 student=student,
                 contents_name=contents_name,
                 reply_token=event.reply_token,
-                message_log_id=message_log_id
+                message_log_id=message_log_id,
+                course=session.course_shell()
             )
             return
 
@@ -280,7 +290,9 @@ def _process_payload_in_bg(app, body, signature):
         events = parser.parse(body_text, signature)
 
         for event in events:
-            _dispatch(event, destination)
+            # 一個事件一個 unit of work：每個資料庫一條連線；外部 I/O（162、OpenAI、寄信、LINE 回覆）前先 commit 並歸還連線
+            with unit_of_work():
+                _dispatch(event, destination)
 
     except Exception as e:
         app.logger.error(f"Background processing failed: {e}", exc_info=True)
@@ -1,3 +1,4 @@
+import atexit
 import os
 
 from dotenv import load_dotenv
@@ -6,6 +7,7 @@ from flask import Flask
 
 from config.settings import CONFIG_BY_NAME
 from containers import AppContainer
+from interfaces.admin_route import admin_bp
 from interfaces.linebot_route import create_linebot_blueprint
 from interfaces.grade_batch_route import grade_batch_bp
 from interfaces.summary_feedback_verify_route import summary_feedback_verify_bp
@@ -27,10 +29,18 @@ def create_app():
     # ✅ 先 wire（很重要：要在建立 blueprint 之前）
     container.wire(packages=["interfaces"])
 
+    # 行程層級資源（連線池、tunnel 管理器、HTTP client）在這裡一次建好，
+    # 之後 webhook thread pool 裡的請求共用同一份；行程結束時統一關閉
+    container.init_resources()
+    atexit.register(container.shutdown_resources)
+    if app.config.get("PREWARM_ENABLED"):
+        container.connection_prewarmer().start()
+
     # 再建立並註冊 blueprint
     app.register_blueprint(create_linebot_blueprint(container))
     app.register_blueprint(grade_batch_bp)
     app.register_blueprint(summary_feedback_verify_bp)
+    app.register_blueprint(admin_bp)
 
     app.container = container
     return app
@@ -0,0 +1,13 @@
+-- summary_gradding_log 原本只有 PK(log_id)，查分 / 建議 / 重新批改都是全表掃描。
+-- 這些查詢都用 (student_ID, context_title, contents_name) 篩選、依 operation_time 或 log_id 排序；
+-- 再帶上 result / penalty，get_latest_log_id、get_score_result、get_summary_score_snapshot 只讀索引就夠
+-- （InnoDB 次要索引本身就帶 PK log_id）。
+ALTER TABLE `summary_gradding_log`
+  ADD KEY `idx_sgl_student_ctx_contents_time`
+    (`student_ID`, `context_title`, `contents_name`, `operation_time`, `result`, `penalty`),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- check_summary_feedback_push 以 學生 / 課程 / 單元 查是否推播過
+ALTER TABLE `summary_feedback_push`
+  ADD KEY `idx_sfp_student_ctx_contents` (`student_ID`, `context_title`, `contents_name`),
+  ALGORITHM=INPLACE, LOCK=NONE;
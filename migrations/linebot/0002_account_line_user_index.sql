@@ -0,0 +1,5 @@
+-- 每個 webhook 事件都會以 line_userID 查 account_info（find_by_line_id / session snapshot），
+-- 欄位是 text 只能建前綴索引；LINE user id 固定 33 字元，64 足夠。
+ALTER TABLE `account_info`
+  ADD KEY `idx_account_line_user` (`line_userID`(64)),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,115 @@
+-- summary_latest_log：每個 (學生, 課程, 單元) 最新一筆 summary_gradding_log 的指標。
+-- get_latest_log_id / get_suggestion_info / get_summary_score_snapshot 改查這張表，
+-- 不論 log 累積多少都是一次 PK 查詢。
+-- 「最新」= operation_time 最大，同時間取 log_id 大的。
+--
+-- summary_gradding_log 是 162 批改服務寫的，這裡用 trigger 維護，不依賴寫入端配合。
+-- 注意: 開了 binlog 的主機建立 trigger 需要 SUPER 或 log_bin_trust_function_creators=1；
+--       TRUNCATE summary_gradding_log 不會觸發 trigger，要一起 TRUNCATE summary_latest_log。
+CREATE TABLE `summary_latest_log` (
+  `student_ID` char(30) NOT NULL,
+  `context_title` char(50) NOT NULL,
+  `contents_name` char(50) NOT NULL,
+  `log_id` int NOT NULL,
+  `result` int DEFAULT NULL,
+  `penalty` float DEFAULT NULL,
+  `operation_time` char(30) DEFAULT NULL,
+  PRIMARY KEY (`student_ID`, `context_title`, `contents_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- 新增：比現有指標新才換。ON DUPLICATE KEY UPDATE 是逐欄依序求值的，
+-- 所以 log_id 要排在 operation_time 前面、result / penalty 排最前面，條件才會用到更新前的值。
+DELIMITER $$
+CREATE TRIGGER `trg_summary_gradding_log_ai` AFTER INSERT ON `summary_gradding_log`
+FOR EACH ROW
+BEGIN
+  IF NEW.student_ID IS NOT NULL AND NEW.context_title IS NOT NULL AND NEW.contents_name IS NOT NULL THEN
+    INSERT INTO summary_latest_log
+      (student_ID, context_title, contents_name, log_id, result, penalty, operation_time)
+    VALUES
+      (NEW.student_ID, NEW.context_title, NEW.contents_name, NEW.log_id, NEW.result, NEW.penalty, NEW.operation_time)
+    ON DUPLICATE KEY UPDATE
+      result = IF(COALESCE(VALUES(operation_time), '') > COALESCE(operation_time, '')
+                  OR (COALESCE(VALUES(operation_time), '') = COALESCE(operation_time, '') AND VALUES(log_id) > log_id),
+                  VALUES(result), result),
+      penalty = IF(COALESCE(VALUES(operation_time), '') > COALESCE(operation_time, '')
+                   OR (COALESCE(VALUES(operation_time), '') = COALESCE(operation_time, '') AND VALUES(log_id) > log_id),
+                   VALUES(penalty), penalty),
+      log_id = IF(COALESCE(VALUES(operation_time), '') > COALESCE(operation_time, '')
+                  OR (COALESCE(VALUES(operation_time), '') = COALESCE(operation_time, '') AND VALUES(log_id) > log_id),
+                  VALUES(log_id), log_id),
+      operation_time = IF(COALESCE(VALUES(operation_time), '') > COALESCE(operation_time, ''),
+                          VALUES(operation_time), operation_time);
+  END IF;
+END$$
+
+-- 修改 / 刪除很少發生（人工重新批改），直接依 0001 的索引重算受影響的 key
+CREATE TRIGGER `trg_summary_gradding_log_au` AFTER UPDATE ON `summary_gradding_log`
+FOR EACH ROW
+BEGIN
+  DELETE FROM summary_latest_log
+  WHERE student_ID = OLD.student_ID AND context_title = OLD.context_title AND contents_name = OLD.contents_name;
+  INSERT INTO summary_latest_log
+    (student_ID, context_title, contents_name, log_id, result, penalty, operation_time)
+  SELECT student_ID, context_title, contents_name, log_id, result, penalty, operation_time
+  FROM summary_gradding_log
+  WHERE student_ID = OLD.student_ID AND context_title = OLD.context_title AND contents_name = OLD.contents_name
+  ORDER BY operation_time DESC, log_id DESC
+  LIMIT 1;
+
+  IF NOT (NEW.student_ID <=> OLD.student_ID AND NEW.context_title <=> OLD.context_title
+          AND NEW.contents_name <=> OLD.contents_name) THEN
+    DELETE FROM summary_latest_log
+    WHERE student_ID = NEW.student_ID AND context_title = NEW.context_title AND contents_name = NEW.contents_name;
+    INSERT INTO summary_latest_log
+      (student_ID, context_title, contents_name, log_id, result, penalty, operation_time)
+    SELECT student_ID, context_title, contents_name, log_id, result, penalty, operation_time
+    FROM summary_gradding_log
+    WHERE student_ID = NEW.student_ID AND context_title = NEW.context_title AND contents_name = NEW.contents_name
+    ORDER BY operation_time DESC, log_id DESC
+    LIMIT 1;
+  END IF;
+END$$
+
+CREATE TRIGGER `trg_summary_gradding_log_ad` AFTER DELETE ON `summary_gradding_log`
+FOR EACH ROW
+BEGIN
+  DELETE FROM summary_latest_log
+  WHERE student_ID = OLD.student_ID AND context_title = OLD.context_title AND contents_name = OLD.contents_name;
+  INSERT INTO summary_latest_log
+    (student_ID, context_title, contents_name, log_id, result, penalty, operation_time)
+  SELECT student_ID, context_title, contents_name, log_id, result, penalty, operation_time
+  FROM summary_gradding_log
+  WHERE student_ID = OLD.student_ID AND context_title = OLD.context_title AND contents_name = OLD.contents_name
+  ORDER BY operation_time DESC, log_id DESC
+  LIMIT 1;
+END$$
+DELIMITER ;
+
+-- 回填既有資料（trigger 先建好，回填期間新寫入的列不會漏；用同樣的「比較新才換」規則）
+INSERT INTO summary_latest_log
+  (student_ID, context_title, contents_name, log_id, result, penalty, operation_time)
+SELECT student_ID, context_title, contents_name, log_id, result, penalty, operation_time
+FROM (
+  SELECT g.*, ROW_NUMBER() OVER (
+           PARTITION BY student_ID, context_title, contents_name
+           ORDER BY operation_time DESC, log_id DESC) AS rn
+  FROM summary_gradding_log g
+  WHERE student_ID IS NOT NULL AND context_title IS NOT NULL AND contents_name IS NOT NULL
+) ranked
+WHERE rn = 1
+ON DUPLICATE KEY UPDATE
+  result = IF(COALESCE(ranked.operation_time, '') > COALESCE(summary_latest_log.operation_time, '')
+              OR (COALESCE(ranked.operation_time, '') = COALESCE(summary_latest_log.operation_time, '')
+                  AND ranked.log_id > summary_latest_log.log_id),
+              ranked.result, summary_latest_log.result),
+  penalty = IF(COALESCE(ranked.operation_time, '') > COALESCE(summary_latest_log.operation_time, '')
+               OR (COALESCE(ranked.operation_time, '') = COALESCE(summary_latest_log.operation_time, '')
+                   AND ranked.log_id > summary_latest_log.log_id),
+               ranked.penalty, summary_latest_log.penalty),
+  log_id = IF(COALESCE(ranked.operation_time, '') > COALESCE(summary_latest_log.operation_time, '')
+              OR (COALESCE(ranked.operation_time, '') = COALESCE(summary_latest_log.operation_time, '')
+                  AND ranked.log_id > summary_latest_log.log_id),
+              ranked.log_id, summary_latest_log.log_id),
+  operation_time = IF(COALESCE(ranked.operation_time, '') > COALESCE(summary_latest_log.operation_time, ''),
+                      ranked.operation_time, summary_latest_log.operation_time);
@@ -0,0 +1,11 @@
+-- lime_explain_log 由 162 批改服務建立與寫入，正式環境早就有，但 schema_linebot.sql 沒有收。
+-- get_suggestion_info / get_summary_status 會讀它，這裡補上（已存在就略過），
+-- 新建時一併建 summary_gradding_log_id 索引，LATERAL 取最新一筆時不用全表掃描。
+CREATE TABLE IF NOT EXISTS `lime_explain_log` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `summary_gradding_log_id` int DEFAULT NULL,
+  `excess` text,
+  `loss_concept_kws` text,
+  PRIMARY KEY (`id`),
+  KEY `idx_lime_explain_log_sgl` (`summary_gradding_log_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,10 @@
+-- 跨 worker 的身分快取失效通知（CachedStudentRepository / MySQLIdentityInvalidationLog）。
+-- 原本只加在 schema_linebot.sql，既有資料庫沒有這張表，各 worker 的輪詢會一直失敗；
+-- 已存在就略過。
+CREATE TABLE IF NOT EXISTS `identity_cache_invalidation` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `line_userID` varchar(64) DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `idx_identity_cache_invalidation_created` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,12 @@
+-- message_logs.log_id 改由應用程式產生時間有序的 64-bit id（application/log_id_generator.py），
+-- 超出 int 範圍：LOG_WRITER_MODE=buffered 之前必須先套用這個 migration。
+-- MODIFY 成同樣定義不會改動資料，重跑也安全。
+-- 正式環境可能有 event_logs.message_log_id → message_logs.log_id 的 FK，兩邊型別要一起改，
+-- 中途暫時關掉 FK 檢查（只影響這個 migration 的連線）。
+SET FOREIGN_KEY_CHECKS = 0;
+
+ALTER TABLE `message_logs` MODIFY `log_id` bigint NOT NULL AUTO_INCREMENT;
+
+ALTER TABLE `event_logs` MODIFY `message_log_id` bigint DEFAULT NULL;
+
+SET FOREIGN_KEY_CHECKS = 1;
@@ -0,0 +1,7 @@
+-- is_log_under_review / check_summary_in_SummarySubmissions 以
+-- summary_gradding_log_id + verify_status 查，改成複合索引只讀索引就能回答；
+-- 原本的 idx_sumsub_sgl 是它的前綴，一起拿掉。
+ALTER TABLE `SummarySubmissions`
+  ADD KEY `idx_sumsub_sgl_status` (`summary_gradding_log_id`, `verify_status`),
+  DROP KEY `idx_sumsub_sgl`,
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -77,8 +77,11 @@ CREATE TABLE `course_info` (
   PRIMARY KEY (`context_title`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+-- log_id 由應用程式產生（時間有序 64-bit，見 application/log_id_generator.py），AUTO_INCREMENT 只給舊的同步寫入用
+-- （MySQL 會把 AUTO_INCREMENT 推到最大的 log_id 之後，同一個資料庫不要讓 buffered / sync 兩種模式的行程同時寫）
+-- 既有資料庫由 migrations/linebot/0006_bigint_message_log_ids.sql 改成 bigint（套用後才能用 LOG_WRITER_MODE=buffered）
 CREATE TABLE `message_logs` (
-  `log_id` int NOT NULL AUTO_INCREMENT,
+  `log_id` bigint NOT NULL AUTO_INCREMENT,
   `operation_time` char(30) DEFAULT NULL,
   `student_ID` char(30) DEFAULT NULL,
   `message` text,
@@ -96,7 +99,7 @@ CREATE TABLE `event_logs` (
   `problem_id` char(20) DEFAULT NULL,
   `HW_id` char(20) DEFAULT NULL,
   `context_title` char(50) DEFAULT NULL,
-  `message_log_id` int DEFAULT NULL,
+  `message_log_id` bigint DEFAULT NULL,
   `GAI_auto_reply_status` varchar(255) DEFAULT NULL,
   PRIMARY KEY (`log_id`),
   KEY `idx_event_logs_message_log_id` (`message_log_id`),
@@ -134,3 +137,12 @@ CREATE TABLE `user_states` (
   `context` text,
   PRIMARY KEY (`line_user_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- 身分快取（CachedStudentRepository）跨 worker 失效通知；line_userID 為 NULL 代表全部
+CREATE TABLE `identity_cache_invalidation` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `line_userID` varchar(64) DEFAULT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `idx_identity_cache_invalidation_created` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -60,8 +60,8 @@ def test_submit_question_behavior(student, service):
 
     svc.submit_question(student, 42)
 
-    user_state.set_state.assert_called_once_with(
-        student.line_user_id, UserStateEnum.IDLE)
+    user_state.transition.assert_called_once_with(
+        student.line_user_id, UserStateEnum.IDLE, expected_state=UserStateEnum.AWAITING_TA_QUESTION)
 
     logger.log_event.assert_called_once_with(
         student_id=student.student_id,
@@ -71,3 +71,17 @@ def test_submit_question_behavior(student, service):
         hw_id=None,
         context_title=student.context_title
     )
+
+
+def test_submit_question_skips_when_another_event_already_submitted(student, service):
+    """
+    Scenario: 同一位學生連送兩則訊息，另一則已經把狀態改回 IDLE
+
+    Expect: 這則不再記成提問
+    """
+    svc, user_state, line, logger = service
+    user_state.transition.return_value = False
+
+    svc.submit_question(student, 43)
+
+    logger.log_event.assert_not_called()
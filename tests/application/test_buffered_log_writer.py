@@ -0,0 +1,180 @@
+# uv run -m pytest tests/application/test_buffered_log_writer.py
+import threading
+from datetime import datetime
+
+import pytest
+
+from application.buffered_log_writer import BufferedLogWriter
+from domain.event_log import EventEnum, EventLog
+from domain.message_log import DuplicateLogIdError, MessageLog
+
+pytestmark = pytest.mark.unit
+
+
+class FakeLogRepo:
+    """同時扮演 message / event repository，記錄每次批次寫入"""
+
+    def __init__(self):
+        self.batches = []
+        self.fail_times = 0
+        self.error = ConnectionError("db down")
+        self.gate = None
+
+    def _write(self, kind, rows):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise self.error
+        if rows:
+            self.batches.append((kind, list(rows)))
+
+    def save_message_logs(self, rows):
+        self._write("message", rows)
+
+    def save_event_logs(self, rows):
+        self._write("event", rows)
+
+    def rows(self, kind):
+        return [r for k, rows in self.batches if k == kind for r in rows]
+
+
+def message(log_id):
+    return MessageLog(datetime.now(), "114514", f"msg {log_id}", "1122_程式設計-Python_黃鈺晴教師", log_id=log_id)
+
+
+def event(message_log_id):
+    return EventLog(datetime.now(), "114514", EventEnum.CHECK_HOMEWORK, message_log_id=message_log_id)
+
+
+@pytest.fixture
+def repo():
+    return FakeLogRepo()
+
+
+def make_writer(repo, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return BufferedLogWriter(repo, repo, **kwargs)
+
+
+def test_batch_size_triggers_one_bulk_write(repo):
+    writer = make_writer(repo, batch_size=4)
+    for i in range(2):
+        writer.submit_message(message(i))
+        writer.submit_event(event(i))
+
+    assert writer.flush(timeout=2)
+    # 一批裡 message 先寫、event 後寫，各一次 executemany
+    assert [kind for kind, _ in repo.batches] == ["message", "event"]
+    assert [m.log_id for m in repo.rows("message")] == [0, 1]
+    assert writer.stats()["written_events"] == 2
+    writer.close()
+
+
+def test_flush_interval_writes_small_batches(repo):
+    writer = make_writer(repo, batch_size=100, flush_interval=0.05)
+    writer.submit_event(event(1))
+
+    deadline = threading.Event()
+    for _ in range(40):
+        if repo.batches:
+            break
+        deadline.wait(0.05)
+    assert len(repo.rows("event")) == 1
+    writer.close()
+
+
+def test_close_flushes_pending_rows(repo):
+    writer = make_writer(repo, batch_size=100)
+    writer.submit_message(message(1))
+    writer.submit_event(event(1))
+
+    writer.close()
+
+    assert len(repo.rows("message")) == 1
+    assert len(repo.rows("event")) == 1
+    assert writer.stats()["pending"] == 0
+
+
+def test_submit_after_close_writes_synchronously(repo):
+    writer = make_writer(repo)
+    writer.close()
+
+    assert writer.submit_event(event(1)) is True
+    assert len(repo.rows("event")) == 1
+
+
+def test_message_needs_client_generated_id(repo):
+    writer = make_writer(repo)
+    with pytest.raises(ValueError):
+        writer.submit_message(MessageLog(datetime.now(), "114514", "hi"))
+    writer.close()
+
+
+def test_drop_policy_when_buffer_full(repo):
+    repo.gate = threading.Event()  # 讓背景寫入卡住，緩衝區不會清空
+    writer = make_writer(repo, max_buffer=2, batch_size=100, overflow_policy="drop")
+
+    assert writer.submit_event(event(1)) is True
+    assert writer.submit_event(event(2)) is True
+    assert writer.submit_event(event(3)) is False
+    assert writer.stats()["dropped"] == 1
+
+    repo.gate.set()
+    writer.close()
+    assert len(repo.rows("event")) == 2
+
+
+def test_block_policy_waits_for_space(repo):
+    repo.gate = threading.Event()
+    writer = make_writer(repo, max_buffer=1, batch_size=1, overflow_policy="block", block_timeout=5)
+    writer.submit_event(event(1))
+
+    # 背景寫入 0.1 秒後放行，第二筆應該等到空間而不是被丟掉
+    threading.Timer(0.1, repo.gate.set).start()
+    assert writer.submit_event(event(2)) is True
+
+    writer.close()
+    assert writer.stats()["dropped"] == 0
+    assert len(repo.rows("event")) == 2
+
+
+def test_failed_batch_is_retried_then_written(repo):
+    repo.fail_times = 1
+    writer = make_writer(repo, batch_size=10)
+    writer.submit_message(message(1))
+
+    assert writer.flush(timeout=5)
+    assert [m.log_id for m in repo.rows("message")] == [1]
+    assert writer.stats()["write_errors"] == 1
+    writer.close()
+
+
+def test_batch_dropped_after_max_retries(repo):
+    repo.fail_times = 10
+    writer = make_writer(repo, batch_size=1, max_retries=2)
+    writer.submit_event(event(1))
+
+    assert writer.flush(timeout=5)
+    stats = writer.stats()
+    assert stats["write_errors"] == 2
+    assert stats["dropped"] == 1
+    writer.close()
+
+
+def test_duplicate_log_id_is_not_retried(repo):
+    repo.fail_times = 10
+    repo.error = DuplicateLogIdError("log_id 1 already has a different row")
+    writer = make_writer(repo, batch_size=1, max_retries=5)
+    writer.submit_message(message(1))
+
+    assert writer.flush(timeout=5)
+    stats = writer.stats()
+    assert stats["write_errors"] == 1
+    assert stats["dropped"] == 1
+    writer.close()
+
+
+def test_unknown_overflow_policy_is_rejected(repo):
+    with pytest.raises(ValueError):
+        make_writer(repo, overflow_policy="spill")
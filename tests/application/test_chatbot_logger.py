@@ -55,3 +55,20 @@ def test_log_event_should_call_repo_with_correct_data():
     assert saved_event.context_title == "Python 課程"
     assert saved_event.log_id is None
     assert isinstance(saved_event.operation_time, datetime)
+
+
+def test_buffered_log_message_uses_client_generated_id():
+    writer = MagicMock()
+    ids = MagicMock()
+    ids.next_id.return_value = 7_000_000_000_000_000_001
+    logger = ChatbotLogger(MagicMock(), MagicMock(), writer=writer, id_generator=ids)
+
+    message_log_id = logger.log_message("S123", "這是一則訊息", "Python 課程")
+    logger.log_event("S123", EventEnum.CHECK_HOMEWORK, message_log_id=message_log_id)
+
+    # 還沒寫進 DB，event 就能引用 message 的 id
+    assert message_log_id == 7_000_000_000_000_000_001
+    assert writer.submit_message.call_args[0][0].log_id == message_log_id
+    assert writer.submit_event.call_args[0][0].message_log_id == message_log_id
+    logger.message_repo.save_message_log.assert_not_called()
+    logger.event_repo.save_event_log.assert_not_called()
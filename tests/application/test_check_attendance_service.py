@@ -1,11 +1,11 @@
 # uv run -m pytest tests/application/test_check_attendance_service.py
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
-import pandas as pd
 import pytest
 
 from application.check_attendance_service import CheckAttendanceService
 from domain.event_log import EventEnum
+from domain.sheet import SheetTable
 from domain.student import RoleEnum, Student, StudentStatus
 
 pytestmark = pytest.mark.unit
@@ -82,20 +82,24 @@ def test_extract_sheet_id_and_gid_from_url():
 # ===_get_absence_info_by_name===
 
 
-@patch("application.check_attendance_service.pd.read_csv")
-def test_get_absence_info_matching_name(mock_read_csv):
-    df = pd.DataFrame({
-        "id": ["109201XXX", "114514000", "110408YYY"],
-        "name": ["劉AA", "旅歐文", "陳BB"],
-        "department": ["系A", "創新學院", "系B"],
-        "grade": [4, 1, 4],
-        "3/6": ["", "", "缺席"],
-        "3/13": ["", "", "缺席"],
-        "3/20": ["", "病假", "缺席"]
-    })
-    mock_read_csv.return_value = df
+ATTENDANCE_CSV = (
+    "id,name,department,grade,3/6,3/13 ,3/20\n"
+    "109201XXX,劉AA,系A,4,,,\n"
+    "114514000,旅歐文,創新學院,1,,,病假\n"
+    "110408YYY,陳BB,系B,4,缺席,缺席,缺席\n"
+)
+
+
+@pytest.fixture
+def sheet_source():
+    source = MagicMock()
+    source.get_table.side_effect = lambda sheet_id, gid: SheetTable.from_csv_text(
+        ATTENDANCE_CSV)
+    return source
 
-    svc = CheckAttendanceService(None, None, None)
+
+def test_get_absence_info_matching_name(sheet_source):
+    svc = CheckAttendanceService(None, None, None, sheet_source=sheet_source)
 
     # 傳入模擬的 sheet_url
     sheet_url = "https://docs.google.com/spreadsheets/d/fake_sheet_id/edit#gid=999999"
@@ -105,22 +109,13 @@ def test_get_absence_info_matching_name(mock_read_csv):
     assert result is not None
     assert result["name"] == "旅歐文"
     assert result["3/20"] == "病假"
+    # 欄位名稱前後空白會被去掉，空格子為 None
+    assert result["3/13"] is None
+    sheet_source.get_table.assert_called_once_with("fake_sheet_id", "999999")
 
 
-@patch("application.check_attendance_service.pd.read_csv")
-def test_get_absence_info_no_matching_name(mock_read_csv):
-    df = pd.DataFrame({
-        "id": ["109201XXX", "114514000", "110408YYY"],
-        "name": ["劉AA", "旅歐文", "陳BB"],
-        "department": ["系A", "創新學院", "系B"],
-        "grade": [4, 1, 4],
-        "3/6": ["", "", "缺席"],
-        "3/13": ["", "", "缺席"],
-        "3/20": ["", "病假", "缺席"]
-    })
-    mock_read_csv.return_value = df
-
-    svc = CheckAttendanceService(None, None, None)
+def test_get_absence_info_no_matching_name(sheet_source):
+    svc = CheckAttendanceService(None, None, None, sheet_source=sheet_source)
 
     # 傳入模擬的 sheet_url
     sheet_url = "https://docs.google.com/spreadsheets/d/fake_sheet_id/edit#gid=999999"
@@ -129,6 +124,24 @@ def test_get_absence_info_no_matching_name(mock_read_csv):
 
     assert result is None
 
+
+def test_get_absence_info_read_failure_returns_none(sheet_source):
+    sheet_source.get_table.side_effect = Exception("boom")
+    svc = CheckAttendanceService(None, None, None, sheet_source=sheet_source)
+
+    result = svc._get_absence_info_by_name(
+        "https://docs.google.com/spreadsheets/d/fake_sheet_id/edit#gid=999999", "旅歐文")
+
+    assert result is None
+
+
+def test_absence_message_from_parsed_row(sheet_source):
+    svc = CheckAttendanceService(None, None, None, sheet_source=sheet_source)
+    info = svc._get_absence_info_by_name(
+        "https://docs.google.com/spreadsheets/d/fake_sheet_id/edit#gid=999999", "旅歐文")
+
+    assert svc._to_message(info) == "旅歐文 你好，你在以下日期有缺席紀錄:\n3/20: 病假"
+
 # ===_to_message===
 
 
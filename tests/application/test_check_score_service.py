@@ -95,6 +95,20 @@ def test_check_publish_contents_has_contents(service, student, course_with_units
         student.line_user_id, UserStateEnum.AWAITING_CONTENTS_NAME)
 
 
+def test_check_publish_contents_uses_given_course_shell(service, student, course_with_units):
+    """webhook 已經從 session snapshot 拿到課程 shell，就不再查 get_course_shell"""
+    svc, course_repo, user_state, aggregator, line, logger = service
+    shell = Course("1122_程式設計-Python_黃鈺晴教師", ["mail"], 1, 3, "contest", "sheet", [])
+    course_repo.populate_units.return_value = course_with_units
+
+    svc.check_publish_contents(student, "reply_token", course=shell)
+
+    course_repo.get_course_shell.assert_not_called()
+    course_repo.populate_units.assert_called_once_with(shell)
+    user_state.set_state.assert_called_once_with(
+        student.line_user_id, UserStateEnum.AWAITING_CONTENTS_NAME)
+
+
 def test_check_score_with_wrong_content(service, student, course_with_units):
     """
     Scenario: 查詢不存在的單元
@@ -0,0 +1,118 @@
+# uv run -m pytest tests/application/test_connection_prewarmer.py
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.connection_prewarmer import ConnectionPrewarmer
+from domain.course import Course
+
+pytestmark = pytest.mark.unit
+
+# 2025-03-03 是星期一
+MONDAY = datetime(2025, 3, 3)
+
+
+class FakePool:
+    """模擬連線池：tunnel 閒置關閉後，下一次借用要重建"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.tunnel_starts = 0
+        self.tunnel_active = False
+
+    def checkout(self):
+        self.checkouts += 1
+        if not self.tunnel_active:
+            self.tunnel_active = True
+            self.tunnel_starts += 1
+
+    def warm_up(self):
+        self.checkout()
+
+    def stats(self):
+        return {"checkouts": self.checkouts, "tunnel_starts": self.tunnel_starts}
+
+
+def make_course(title, day_of_week):
+    return Course(context_title=title, ta_emails=[], leave_notice=0, day_of_week=day_of_week,
+                  oj_contest_title="", attendance_sheet_url="", units=[])
+
+
+@pytest.fixture
+def course_repo():
+    repo = MagicMock()
+    repo.get_in_progress_courses.return_value = [
+        make_course("1132_程式設計-Python_黃鈺晴教師", 0)]
+    return repo
+
+
+@pytest.fixture
+def pools():
+    return {"moodle": FakePool(), "oj": FakePool()}
+
+
+@pytest.fixture
+def prewarmer(course_repo, pools):
+    return ConnectionPrewarmer(course_repo, pools, lead_minutes=15,
+                               session_minutes=180, class_start_hour=9)
+
+
+def test_no_warmup_outside_class_window(prewarmer, pools):
+    assert prewarmer.tick(MONDAY.replace(hour=8, minute=40)) is False
+    # 星期二不是上課日
+    assert prewarmer.tick(datetime(2025, 3, 4, 9, 30)) is False
+
+    assert pools["moodle"].checkouts == 0
+    assert pools["oj"].checkouts == 0
+
+
+def test_warms_all_targets_from_lead_time_through_session(prewarmer, pools):
+    assert prewarmer.tick(MONDAY.replace(hour=8, minute=45)) is True
+    assert prewarmer.tick(MONDAY.replace(hour=11, minute=59)) is True
+    assert prewarmer.tick(MONDAY.replace(hour=12, minute=0)) is False
+
+    assert pools["moodle"].checkouts == 2
+    assert pools["oj"].checkouts == 2
+    assert prewarmer.stats()["windows_completed"] == 1
+
+
+def test_hit_rate_excludes_prewarmer_own_checkouts(prewarmer, pools):
+    prewarmer.tick(MONDAY.replace(hour=8, minute=50))
+
+    # 上課期間學生借用 3 次，tunnel 已經是熱的
+    for _ in range(3):
+        pools["moodle"].checkout()
+    # OJ tunnel 中途被閒置關掉，一位學生碰上冷啟動
+    pools["oj"].tunnel_active = False
+    pools["oj"].checkout()
+    pools["oj"].checkout()
+
+    prewarmer.tick(MONDAY.replace(hour=12, minute=30))
+
+    rates = prewarmer.stats()["last_hit_rate"]
+    assert rates["moodle"] == 1.0
+    assert rates["oj"] == 0.5
+
+
+def test_failed_warmup_does_not_stop_other_targets(prewarmer, pools):
+    pools["moodle"].warm_up = MagicMock(side_effect=Exception("SSH down"))
+
+    assert prewarmer.tick(MONDAY.replace(hour=9)) is True
+
+    assert pools["oj"].checkouts == 1
+    assert prewarmer.stats()["warmup_errors"] == 1
+
+
+def test_courses_sharing_a_time_slot_share_one_window(course_repo, prewarmer, pools):
+    course_repo.get_in_progress_courses.return_value = [
+        make_course("1132_程式設計-Python_黃鈺晴教師", 0),
+        make_course("1132_程式設計-Python_A班", 0),
+    ]
+
+    prewarmer.tick(MONDAY.replace(hour=9))
+
+    windows = prewarmer.stats()["active_windows"]
+    assert len(windows) == 1
+    assert len(windows[0]["courses"]) == 2
+    assert pools["moodle"].checkouts == 1
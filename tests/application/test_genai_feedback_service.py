@@ -0,0 +1,59 @@
+# uv run -m pytest tests/application/test_genai_feedback_service.py
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.GenAI_feedback_service import GenAIFeedbackService
+from domain.student import RoleEnum, Student, StudentStatus
+
+pytestmark = pytest.mark.unit
+
+COURSE = "1122_程式設計-Python_黃鈺晴教師"
+
+
+def make_student(student_id):
+    return Student(line_user_id=f"U_{student_id}", student_id=student_id, mdl_id="1", name="旅歐文",
+                   context_title=COURSE, role=RoleEnum.STUDENT, is_active=True,
+                   status=StudentStatus.REGISTERED)
+
+
+def genai_request(student_id, log_id):
+    return dict(stdID=student_id, contents_name="C1", example_summary="範例",
+                student_summary="摘要", summary_grading_log_id=log_id, basic_feedback="基本回饋")
+
+
+@pytest.fixture
+def service():
+    openai_client = MagicMock()
+    openai_client.generate_content.return_value = "<suggestion>多描述</suggestion><suggestion>迴圈條件</suggestion>"
+    student_repo = MagicMock()
+    student_repo.find_by_student_id.side_effect = make_student
+    grading_logs_repo = MagicMock()
+    grading_logs_repo.write_summary_GPT_feedbacks_to_verify_db.side_effect = len
+    svc = GenAIFeedbackService(openai_client, student_repo, grading_logs_repo)
+    svc.create_summary_prompt = MagicMock(return_value="prompt")
+    return svc
+
+
+def test_single_feedback_is_written_with_student_context(service):
+    service.generate_feedback_for_summary("S001", "C1", "範例", "摘要", 7, "基本回饋")
+
+    service.grading_logs_repo.write_summary_GPT_feedback_to_verify_db_with_check_repeat.assert_called_once_with(
+        "S001", "C1", "多描述迴圈條件", COURSE, "摘要", 7, "基本回饋", "U_S001")
+
+
+def test_batch_writes_all_feedbacks_in_one_call_and_skips_gpt_failures(service):
+    service.openai_client.generate_content.side_effect = ["<suggestion>A</suggestion>", None,
+                                                          "<suggestion>C</suggestion>"]
+
+    written = service.generate_feedbacks_for_summaries(
+        [genai_request("S001", 1), genai_request("S002", 2), genai_request("S003", 3)])
+
+    assert written == 2
+    repo = service.grading_logs_repo
+    repo.write_summary_GPT_feedbacks_to_verify_db.assert_called_once()
+    feedbacks = repo.write_summary_GPT_feedbacks_to_verify_db.call_args.args[0]
+    assert [(f.student_id, f.gpt_feedback, f.summary_gradding_log_id, f.line_id) for f in feedbacks] == [
+        ("S001", "A", 1, "U_S001"), ("S003", "C", 3, "U_S003")]
+    repo.write_summary_GPT_feedback_to_verify_db_with_check_repeat.assert_not_called()
+
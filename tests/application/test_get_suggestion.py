@@ -0,0 +1,76 @@
+# uv run -m pytest tests/application/test_get_suggestion.py
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.suggestion_service import SuggestionService
+from application.summary_usecases.get_suggestion import GetSuggestionUseCase
+from domain.student import RoleEnum, Student, StudentStatus
+from domain.summary_repositories import SummaryStatus
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def student():
+    return Student(line_user_id="U1", student_id="S001", mdl_id="1", name="旅歐文",
+                   context_title="1122_程式設計-Python_黃鈺晴教師", role=RoleEnum.STUDENT, is_active=True,
+                   status=StudentStatus.REGISTERED)
+
+
+@pytest.fixture
+def deps():
+    suggestion_repo = MagicMock()
+    return {
+        "grading_logs_repo": MagicMock(),
+        "suggestion_repo": suggestion_repo,
+        "suggestion_service": SuggestionService(suggestion_repo),
+        "line_service": MagicMock(),
+        "chatbot_logger": MagicMock(),
+    }
+
+
+def run(deps, student, status):
+    deps["suggestion_repo"].get_summary_status.return_value = status
+    return GetSuggestionUseCase(**deps).exec(student, "C1", "reply-token", 42)["message"]
+
+
+@pytest.mark.parametrize("status, expected", [
+    (SummaryStatus(log_id=7, in_submissions=True, under_review=True), "最新提交評分中"),
+    (SummaryStatus(log_id=7, in_submissions=True, teacher_feedback="寫得很好"), "寫得很好"),
+    (SummaryStatus(log_id=7, in_submissions=True), "查無回饋內容"),
+    (SummaryStatus(), "目前找不到你的評分紀錄"),
+])
+def test_branches_on_resolved_status(deps, student, status, expected):
+    assert expected in run(deps, student, status)
+
+
+def test_suggestion_is_built_from_resolved_inputs_without_more_queries(deps, student):
+    status = SummaryStatus(
+        log_id=7,
+        suggestion_info={"log_id": 7, "summary": "我的總結", "loss_kw": ["迴圈"], "penalty": 0,
+                         "result": 0, "loss_concept_kws": []},
+        keywords=["迴圈", "變數"], questions=["什麼是迴圈？", "什麼是變數？"])
+
+    text = run(deps, student, status)
+
+    assert "[不通過]" in text
+    assert "1. 什麼是迴圈？" in text
+    assert "變數" not in text
+    repo = deps["suggestion_repo"]
+    repo.get_summary_status.assert_called_once_with(
+        "S001", "1122_程式設計-Python_黃鈺晴教師", "C1")
+    repo.get_suggestion_info.assert_not_called()
+    repo.get_questions.assert_not_called()
+    repo.check_summary_in_SummarySubmissions.assert_not_called()
+    deps["grading_logs_repo"].get_latest_log_id.assert_not_called()
+    deps["line_service"].reply_text_message.assert_called_once_with(reply_token="reply-token", text=text)
+
+
+def test_resolver_failure_replies_busy_message(deps, student):
+    deps["suggestion_repo"].get_summary_status.side_effect = RuntimeError("db down")
+
+    result = GetSuggestionUseCase(**deps).exec(student, "C1", "reply-token", 42)
+
+    assert result["message"] == "系統忙碌或發生錯誤，請稍後再試。"
+    deps["chatbot_logger"].log_event.assert_called_once()
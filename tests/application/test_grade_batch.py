@@ -0,0 +1,163 @@
+# uv run -m pytest tests/application/test_grade_batch.py
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from application.suggestion_service import SuggestionService
+from application.summary_usecases.grade_batch import GradeBatchUseCase
+from domain.student import RoleEnum, Student, StudentStatus
+
+pytestmark = pytest.mark.unit
+
+COURSE = "1122_程式設計-Python_黃鈺晴教師"
+
+
+def make_student(student_id):
+    return Student(line_user_id=f"U_{student_id}", student_id=student_id, mdl_id="1", name="旅歐文",
+                   context_title=COURSE, role=RoleEnum.STUDENT, is_active=True,
+                   status=StudentStatus.REGISTERED)
+
+
+def info(sid, loss_kw=("迴圈",)):
+    return {"log_id": int(sid[1:]), "summary": f"{sid} 摘要", "penalty": 0, "result": 0,
+            "loss_kw": list(loss_kw), "loss_concept_kws": []}
+
+
+@pytest.fixture
+def deps():
+    suggestion_repo = MagicMock()
+    suggestion_repo.get_example_summary.return_value = "範例"
+    suggestion_repo.get_questions.return_value = (["迴圈"], ["什麼是迴圈？"])
+    infos = {"S001": info("S001"), "S003": info("S003"), "S004": info("S004", loss_kw=())}
+    suggestion_repo.get_suggestion_info_many.side_effect = lambda sids, *_: {
+        sid: infos[sid] for sid in sids if sid in infos}
+    student_repo = MagicMock()
+    student_repo.get_all_students.return_value = [make_student(f"S00{i}") for i in range(1, 5)]
+    grading_port = MagicMock()
+    grading_port.grade_single.side_effect = lambda sid, *_: {
+        "status": "repeat" if sid == "S002" else "graded"}
+    pushes_repo = MagicMock()
+    pushes_repo.get_pushed_student_ids.return_value = {"S002"}
+    feedbacker = MagicMock()
+    feedbacker.generate_feedbacks_for_summaries.side_effect = len
+    return dict(grading_port=grading_port, suggestion_repo=suggestion_repo, pushes_repo=pushes_repo,
+                student_repo=student_repo, line_service=MagicMock(), feedbacker=feedbacker,
+                suggestion_service=SuggestionService(suggestion_repo), chatbot_logger=MagicMock(),
+                genai_enabled=True)
+
+
+def genai_requests(feedbacker):
+    return sorted((r for c in feedbacker.generate_feedbacks_for_summaries.call_args_list for r in c.args[0]),
+                  key=lambda r: r["stdID"])
+
+
+def test_batch_reads_roster_state_with_bulk_queries(deps):
+    result = GradeBatchUseCase(**deps, wave_size=10, wave_interval=5).exec(COURSE, "C1")
+
+    repo = deps["suggestion_repo"]
+    repo.get_suggestion_info_many.assert_called_once()
+    assert sorted(repo.get_suggestion_info_many.call_args.args[0]) == ["S001", "S003", "S004"]
+    repo.get_questions.assert_called_once_with(COURSE, "C1")
+    repo.get_suggestion_info.assert_not_called()
+
+    pending = genai_requests(deps["feedbacker"])
+    assert [(r["stdID"], r["summary_grading_log_id"], r["student_summary"]) for r in pending] == [
+        ("S001", 1, "S001 摘要"), ("S003", 3, "S003 摘要")]
+    assert pending[0]["example_summary"] == "範例"
+    assert "什麼是迴圈？" in pending[0]["basic_feedback"]
+    assert result["stats"] == {"graded": 3, "repeat": 1, "no_summary": 0,
+                               "error": 0, "genai": 2, "pushed": 3, "push_error": 0}
+
+
+def test_batch_pushes_only_new_students_and_records_them_once(deps):
+    GradeBatchUseCase(**deps).exec(COURSE, "C1")
+
+    pushes = deps["pushes_repo"]
+    pushes.get_pushed_student_ids.assert_called_once_with(
+        ["S001", "S002", "S003", "S004"], COURSE, "C1")
+    assert sorted(c.kwargs["user_id"] for c in deps["line_service"].push_message.call_args_list) == [
+        "U_S001", "U_S003", "U_S004"]
+    pushes.write_summary_feedback_pushes.assert_called_once()
+    recorded, *rest = pushes.write_summary_feedback_pushes.call_args.args
+    assert sorted(recorded) == ["S001", "S003", "S004"] and rest == [COURSE, "C1"]
+    pushes.check_summary_feedback_push.assert_not_called()
+
+
+def test_push_failure_is_counted_and_the_rest_still_go_out(deps):
+    def push(user_id, messages):
+        if user_id == "U_S003":
+            raise RuntimeError("LINE API down")
+    deps["line_service"].push_message.side_effect = push
+
+    result = GradeBatchUseCase(**deps).exec(COURSE, "C1")
+
+    assert result["stats"]["pushed"] == 2
+    assert result["stats"]["push_error"] == 1
+    recorded = deps["pushes_repo"].write_summary_feedback_pushes.call_args.args[0]
+    assert sorted(recorded) == ["S001", "S004"]
+
+
+def test_grader_calls_are_bounded_and_stats_are_exact_under_concurrency(deps):
+    students = [make_student(f"S{i:03d}") for i in range(40)]
+    deps["student_repo"].get_all_students.return_value = students
+    deps["pushes_repo"].get_pushed_student_ids.return_value = set()
+    deps["suggestion_repo"].get_suggestion_info_many.side_effect = lambda sids, *_: {
+        sid: info(sid) for sid in sids}
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def grade(sid, *_):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return {"status": ("graded", "repeat", "no_summary", "error")[int(sid[1:]) % 4]}
+    deps["grading_port"].grade_single.side_effect = grade
+
+    result = GradeBatchUseCase(**deps, concurrency=3, wave_size=5, wave_interval=0.05).exec(COURSE, "C1")
+
+    assert 1 < peak[0] <= 3
+    assert result["stats"] == {"graded": 10, "repeat": 10, "no_summary": 10,
+                               "error": 10, "genai": 10, "pushed": 40, "push_error": 0}
+    assert len(genai_requests(deps["feedbacker"])) == 10
+    stages = result["timing"]["stages"]
+    assert stages["grade"]["items"] == 40
+    assert stages["push"]["items"] == 40
+    assert stages["genai"]["items"] == 10
+    assert result["timing"]["elapsed_s"] >= stages["grade"]["wall_s"]
+
+
+def test_follow_up_overlaps_with_grading(deps):
+    pushed_first = threading.Event()
+    deps["line_service"].push_message.side_effect = lambda **_: pushed_first.set()
+
+    def grade(sid, *_):
+        if sid == "S004":
+            # 最慢的學生：其他人的推送要在它評完前就發生
+            assert pushed_first.wait(timeout=5)
+        return {"status": "graded"}
+    deps["grading_port"].grade_single.side_effect = grade
+
+    result = GradeBatchUseCase(**deps, concurrency=4, wave_size=1).exec(COURSE, "C1")
+
+    assert result["stats"]["graded"] == 4
+    assert result["stats"]["error"] == 0
+
+
+def test_genai_feedback_is_off_unless_enabled(deps):
+    deps.pop("genai_enabled")
+
+    result = GradeBatchUseCase(**deps).exec(COURSE, "C1")
+
+    deps["feedbacker"].generate_feedbacks_for_summaries.assert_not_called()
+    deps["suggestion_repo"].get_suggestion_info_many.assert_not_called()
+    assert result["stats"]["genai"] == 0
+    assert result["stats"]["pushed"] == 3
+
+
+def test_rejects_non_positive_concurrency(deps):
+    with pytest.raises(ValueError):
+        GradeBatchUseCase(**deps, concurrency=0)
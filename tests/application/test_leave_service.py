@@ -1,11 +1,13 @@
 # uv run -m pytest tests/application/test_leave_service.py
+import threading
 from unittest.mock import MagicMock
 
 import pytest
 
 from application.leave_service import LeaveService
+from application.user_state_accessor import UserStateAccessor
 from domain.student import RoleEnum, Student, StudentStatus
-from domain.user_state import UserStateEnum
+from domain.user_state import UserState, UserStateEnum, UserStateRepository
 
 pytestmark = pytest.mark.unit
 
@@ -65,6 +67,21 @@ def test_submit_leave_reason_sends_email_if_needed(service, student):
     mailer.send_email.assert_called_once()
 
 
+def test_submit_leave_reason_uses_given_course_shell(service, student):
+    svc, course_repo, _, _, _, _, mailer = service
+    course = MagicMock()
+    course.get_next_course_date.return_value = "2025-07-30"
+    course.leave_notice = True
+    course.ta_emails = ["ta@school.edu"]
+    svc.leave_repo.save_leave_request.return_value = "收到，已經幫你請好假了。"
+
+    svc.submit_leave_reason(student, "感冒", "reply_token", course=course)
+
+    course_repo.get_course_shell.assert_not_called()
+    mailer.send_email.assert_called_once()
+    assert mailer.send_email.call_args.kwargs["to"] == ["ta@school.edu"]
+
+
 def test_submit_leave_reason_does_not_send_email_if_flag_false(service, student):
     svc, course_repo, *_ = service
     course_repo.get_course_shell.return_value.leave_notice = False
@@ -75,6 +92,67 @@ def test_submit_leave_reason_does_not_send_email_if_flag_false(service, student)
     svc.mail_carrier.send_email.assert_not_called()
 
 
+class InMemoryUserStateRepository(UserStateRepository):
+    """以一把鎖模擬 DB 單一敘述的原子性"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def get(self, line_user_id):
+        with self._lock:
+            status = self._states.get(line_user_id)
+            return UserState(line_user_id, status) if status else None
+
+    def save(self, state):
+        with self._lock:
+            self._states[state.line_user_id] = state.status
+
+    def delete(self, line_user_id):
+        with self._lock:
+            self._states.pop(line_user_id, None)
+
+    def transition(self, line_user_id, new_state, expected_state=None):
+        with self._lock:
+            current = self._states.get(line_user_id, UserStateEnum.IDLE)
+            if expected_state is not None and current != expected_state:
+                return False
+            self._states[line_user_id] = new_state
+            return True
+
+
+def test_concurrent_leave_reasons_submit_only_once(student):
+    """
+    Scenario: 學生在 AWAITING_LEAVE_REASON 時連送多則訊息，被不同 executor thread 同時處理
+
+    Expect: 只有一則被當成請假原因（只存一次假單）
+    """
+    state_repo = InMemoryUserStateRepository()
+    accessor = UserStateAccessor(state_repo)
+    accessor.set_state(student.line_user_id, UserStateEnum.AWAITING_LEAVE_REASON)
+
+    course_repo = MagicMock()
+    course_repo.get_course_shell.return_value.leave_notice = False
+    leave_repo = MagicMock()
+    svc = LeaveService(course_repo, leave_repo, accessor,
+                       MagicMock(), MagicMock(), MagicMock())
+
+    barrier = threading.Barrier(8)
+
+    def submit(i):
+        barrier.wait()
+        svc.submit_leave_reason(student, f"原因 {i}", f"token-{i}")
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+
+    leave_repo.save_leave_request.assert_called_once()
+    assert accessor.get_state(student.line_user_id) == UserStateEnum.IDLE
+
+
 def test_now_string_format():
     svc = LeaveService(None, None, None, None, None, None)
     result = svc._now_string()
@@ -0,0 +1,87 @@
+# uv run -m pytest tests/application/test_log_id_generator.py
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from application.log_id_generator import (EPOCH_MS, MAX_SEQUENCE,
+                                          TimeOrderedIdGenerator)
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self):
+        return self.seconds
+
+
+def test_ids_are_time_ordered_and_fit_signed_bigint():
+    clock = FakeClock(1_760_000_000.0)
+    gen = TimeOrderedIdGenerator(worker_id=7, clock=clock)
+
+    first = gen.next_id()
+    clock.seconds += 0.001
+    second = gen.next_id()
+
+    assert first < second < 2 ** 63
+    assert TimeOrderedIdGenerator.timestamp_ms(first) == 1_760_000_000_000
+    assert first > EPOCH_MS  # 遠大於舊的 AUTO_INCREMENT 範圍
+
+
+def test_same_millisecond_and_clock_going_backwards_still_increase():
+    clock = FakeClock(1_760_000_000.0)
+    gen = TimeOrderedIdGenerator(worker_id=1, clock=clock)
+
+    ids = [gen.next_id() for _ in range(MAX_SEQUENCE + 10)]
+    clock.seconds -= 5
+    ids.append(gen.next_id())
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_workers_never_collide_in_the_same_millisecond():
+    clock = FakeClock(1_760_000_000.0)
+    a = TimeOrderedIdGenerator(worker_id=1, clock=clock)
+    b = TimeOrderedIdGenerator(worker_id=2, clock=clock)
+
+    assert {a.next_id() for _ in range(100)}.isdisjoint({b.next_id() for _ in range(100)})
+
+
+def test_concurrent_ids_are_unique():
+    gen = TimeOrderedIdGenerator(worker_id=3)
+    results = []
+
+    def produce():
+        results.extend(gen.next_id() for _ in range(2000))
+
+    threads = [threading.Thread(target=produce) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(results)) == 16000
+
+
+def test_worker_id_range_is_checked():
+    with pytest.raises(ValueError):
+        TimeOrderedIdGenerator(worker_id=1024)
+
+
+def test_worker_id_is_required():
+    # 不能再用 pid 推算：容器裡各 replica 的 worker pid 幾乎都一樣
+    with pytest.raises(ValueError, match="LOG_WORKER_ID"):
+        TimeOrderedIdGenerator(worker_id=None)
+
+
+def test_generator_refuses_to_run_in_a_forked_child():
+    gen = TimeOrderedIdGenerator(worker_id=5)
+    gen.next_id()
+
+    with patch("application.log_id_generator.os.getpid", return_value=-1):
+        with pytest.raises(RuntimeError, match="after fork"):
+            gen.next_id()
@@ -7,6 +7,7 @@ import pytest
 from application.registration_service import RegistrationService
 from domain.student import Student, RoleEnum, StudentStatus
 from domain.moodle_enrollment import MoodleEnrollment
+from domain.user_state import UserStateEnum
 
 pytestmark = pytest.mark.unit
 
@@ -115,7 +116,8 @@ def test_register_student_success(service, student_repo, moodle_repo, course_rep
     service.register_student("lineid", "114514", "reply_token")
 
     student_repo.save.assert_called_once()
-    state_repo.save.assert_called_once()
+    state_repo.transition.assert_called_once_with(
+        "lineid", UserStateEnum.IDLE)
     logger.log_event.assert_called_once()
     line_service.link_rich_menu_to_user.assert_called_once_with(
         "lineid", "main")
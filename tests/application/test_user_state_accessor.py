@@ -42,37 +42,36 @@ def test_get_state_returns_idle_if_none():
     assert result == UserStateEnum.IDLE
 
 
-def test_set_state_creates_new_state_if_none():
+def test_set_state_is_a_single_unconditional_transition():
     """
-    Scenario: 第一次設定狀態
+    Scenario: 設定狀態
 
-    Expect: 建立新 UserState 並儲存
+    Expect: 直接呼叫 repo.transition（一次 upsert），不再先 get 再 save
     """
     mock_repo = MagicMock()
-    mock_repo.get.return_value = None
 
     accessor = UserStateAccessor(mock_repo)
     accessor.set_state("U123", UserStateEnum.AWAITING_LEAVE_REASON)
 
-    # 檢查 save() 被呼叫，且內容正確
-    args = mock_repo.save.call_args[0][0]  # 第一個參數
-    assert args.line_user_id == "U123"
-    assert args.status == UserStateEnum.AWAITING_LEAVE_REASON
+    mock_repo.transition.assert_called_once_with(
+        "U123", UserStateEnum.AWAITING_LEAVE_REASON)
+    mock_repo.get.assert_not_called()
+    mock_repo.save.assert_not_called()
 
 
-def test_set_state_updates_existing_state():
+def test_transition_passes_expected_state_and_result():
     """
-    Scenario: 使用者已存在狀態紀錄
+    Scenario: 狀態已被其他事件改掉
 
-    Expect: 直接更新 status 欄位並呼叫 save()
+    Expect: compare-and-set 失敗時回傳 False
     """
-    existing_state = UserState("U123", UserStateEnum.AWAITING_TA_QUESTION)
     mock_repo = MagicMock()
-    mock_repo.get.return_value = existing_state
+    mock_repo.transition.return_value = False
 
     accessor = UserStateAccessor(mock_repo)
-    accessor.set_state("U123", UserStateEnum.IDLE)
+    ok = accessor.transition("U123", UserStateEnum.IDLE,
+                             expected_state=UserStateEnum.AWAITING_TA_QUESTION)
 
-    saved_state = mock_repo.save.call_args[0][0]
-    assert saved_state.line_user_id == "U123"
-    assert saved_state.status == UserStateEnum.IDLE
+    assert ok is False
+    mock_repo.transition.assert_called_once_with(
+        "U123", UserStateEnum.IDLE, UserStateEnum.AWAITING_TA_QUESTION)
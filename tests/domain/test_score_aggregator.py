@@ -1,11 +1,14 @@
 # uv run -m pytest tests/domain/test_score_aggregator.py
+import threading
+import time
 from datetime import date
-from unittest.mock import MagicMock, patch
-import pandas as pd
+from unittest.mock import MagicMock
 import pytest
 
 from domain.course import Course, CourseUnit
-from domain.score import ScoreAggregator, ScoreReport
+from domain.sheet import SheetTable
+from domain.score import (OnlinejudgeRepository, ScoreAggregator, ScoreReport,
+                          SummaryRepository, SummaryScoreSnapshot, UnitProgress)
 from domain.student import RoleEnum, Student, StudentStatus
 
 pytestmark = pytest.mark.unit
@@ -48,79 +51,99 @@ def valid_url():
 ])
 def test_summary_score_all_paths(log_id, is_reviewing, score, expected):
     repo = MagicMock()
-    repo.get_latest_log_id.return_value = log_id
-    repo.is_log_under_review.return_value = is_reviewing
-    repo.get_score_result.return_value = score
+    repo.get_summary_score_snapshot.return_value = SummaryScoreSnapshot(
+        log_id=log_id, under_review=bool(is_reviewing), score=score)
 
     aggregator = ScoreAggregator(None, repo)
     result = aggregator._get_summary_score("課", "C1", "s456", "deadline")
     assert expected in result
 
 
+def sheet_source_with(csv_text):
+    sheet_source = MagicMock()
+    sheet_source.get_table.side_effect = lambda sheet_id, gid: SheetTable.from_csv_text(
+        csv_text)
+    return sheet_source
+
+
 @pytest.mark.parametrize("target_id, week_col, score, expected", [
     ("109201XXX", "C1", 100, 100),
     ("109201XXX", "C1", 0, 0),
     ("109201XXX", "C1", 50, "無成績"),
 ])
-@patch("domain.score.pd.read_csv")
-def test_mistake_review_score_various(mock_read_csv, target_id, week_col, score, expected, valid_url):
-    df = pd.DataFrame({
-        "id": ["109201XXX", "110408YYY"],
-        "name": ["劉AA", "陳BB"],
-        "department": ["系A", "系B"],
-        "grade": [4, 4],
-        "Week2 (C1)": [score, 100],
-        "Week3 (C2)": [0, 100],
-    })
-    mock_read_csv.return_value = df
-
-    aggregator = ScoreAggregator(None, None)
+def test_mistake_review_score_various(target_id, week_col, score, expected, valid_url):
+    csv_text = (
+        "id,name,department,grade,Week2 (C1),Week3 (C2)\n"
+        f"109201XXX,劉AA,系A,4,{score},0\n"
+        "110408YYY,陳BB,系B,4,100,100\n"
+    )
+
+    aggregator = ScoreAggregator(
+        None, None, sheet_source=sheet_source_with(csv_text))
     result = aggregator._get_mistake_review_value(
         target_id, week_col, valid_url)
     assert result == expected
 
 
-@patch("domain.score.pd.read_csv")
-def test_mistake_review_id_not_found(mock_read_csv, valid_url):
-    df = pd.DataFrame({
-        "id": ["some_other_id"],
-        "Week2 (C1)": [100]
-    })
-    mock_read_csv.return_value = df
+def test_mistake_review_empty_cell_is_no_score(valid_url):
+    csv_text = (
+        "id,name,department,grade,Week2 (C1)\n"
+        "109201XXX,劉AA,系A,4,\n"
+        "110408YYY,陳BB,系B,4,100\n"
+    )
+
+    aggregator = ScoreAggregator(
+        None, None, sheet_source=sheet_source_with(csv_text))
+    assert aggregator._get_mistake_review_value(
+        "109201XXX", "C1", valid_url) == "無成績"
+    # 整欄有空值時和 pandas 一樣轉成 float，仍視為 100 分
+    assert aggregator._get_mistake_review_value(
+        "110408YYY", "C1", valid_url) == 100
+
+
+def test_mistake_review_id_not_found(valid_url):
+    csv_text = "id,Week2 (C1)\nsome_other_id,100\n"
 
-    aggregator = ScoreAggregator(None, None)
+    aggregator = ScoreAggregator(
+        None, None, sheet_source=sheet_source_with(csv_text))
     with pytest.raises(LookupError) as exc:
         result = aggregator._get_mistake_review_value("s456", "C1", valid_url)
     assert "COLUMN_NOT_FOUND" in str(exc.value)
 
 
-@patch("domain.score.pd.read_csv")
-def test_mistake_review_column_not_found(mock_read_csv, valid_url):
-    df = pd.DataFrame({
-        "id": ["s456"],
-        "Week2 (C1)": [100]
-    })
-    mock_read_csv.return_value = df
+def test_mistake_review_student_not_found(valid_url):
+    csv_text = "id,name,department,grade,Week2 (C1)\nsome_other_id,劉AA,系A,4,100\n"
 
-    aggregator = ScoreAggregator(None, None)
+    aggregator = ScoreAggregator(
+        None, None, sheet_source=sheet_source_with(csv_text))
+    with pytest.raises(LookupError) as exc:
+        aggregator._get_mistake_review_value("s456", "C1", valid_url)
+    assert "STUDENT_NOT_FOUND" in str(exc.value)
+
+
+def test_mistake_review_column_not_found(valid_url):
+    csv_text = "id,Week2 (C1)\ns456,100\n"
+
+    aggregator = ScoreAggregator(
+        None, None, sheet_source=sheet_source_with(csv_text))
     with pytest.raises(LookupError) as exc:
         result = aggregator._get_mistake_review_value("s456", "C1_", valid_url)
     assert "COLUMN_NOT_FOUND" in str(exc.value)
 
 
-@patch("domain.score.pd.read_csv")
-def test_mistake_review_score_should_handle_invalid_url(mock_read_csv):
+def test_mistake_review_score_should_handle_invalid_url():
     # 假設 regex 不 match，無效 URL
-    aggregator = ScoreAggregator(None, None)
+    aggregator = ScoreAggregator(None, None, sheet_source=MagicMock())
     with pytest.raises(ValueError) as exc:
         result = aggregator._get_mistake_review_value(
             "s456", "C1", "invalid-url")
     assert "INVALID_URL" in str(exc.value)
 
 
-@patch("domain.score.pd.read_csv", side_effect=Exception("boom"))
-def test_mistake_review_read_csv_exception(mock_read_csv, valid_url):
-    aggregator = ScoreAggregator(None, None)
+def test_mistake_review_read_csv_exception(valid_url):
+    sheet_source = MagicMock()
+    sheet_source.get_table.side_effect = Exception("boom")
+    aggregator = ScoreAggregator(None, None, sheet_source=sheet_source)
     with pytest.raises(RuntimeError) as exc:
         aggregator._get_mistake_review_value("s456", "C1", valid_url)
     assert "CSV_READ_ERROR" in str(exc.value)
@@ -131,14 +154,11 @@ def test_score_aggregator_should_return_score_report(student, course, aggregator
     course = course
     aggregator, mock_oj_repo, mock_summary_repo = aggregator_with_mock
 
-    mock_oj_repo.get_exercise_number_by_contents_name.return_value = 10
-    mock_oj_repo.get_exercise_summission_by_contents_name.return_value = 9
-    mock_oj_repo.get_advance_number_by_contents_name.return_value = 5
-    mock_oj_repo.get_advance_summission_by_contents_name.return_value = 3
+    mock_oj_repo.get_unit_progress.return_value = UnitProgress(
+        exercise_total=10, exercise_done=9, advance_total=5, advance_done=3)
 
-    mock_summary_repo.get_latest_log_id.return_value = 123
-    mock_summary_repo.is_log_under_review.return_value = False
-    mock_summary_repo.get_score_result.return_value = 100
+    mock_summary_repo.get_summary_score_snapshot.return_value = SummaryScoreSnapshot(
+        log_id=123, under_review=False, score=100)
 
     report = aggregator.aggregate(student, course, "C1", "fake_url")
     assert report == ScoreReport(
@@ -150,6 +170,15 @@ def test_score_aggregator_should_return_score_report(student, course, aggregator
             '錯誤回顧成績': "100"
         }
     )
+    # 熱路徑只打一次 OJ
+    mock_oj_repo.get_unit_progress.assert_called_once_with(
+        oj_contest_title="中央_1122", contents_name="C1", stdID="s456",
+        deadline=course.units[0].deadlines.oj_deadline)
+    mock_oj_repo.get_exercise_number_by_contents_name.assert_not_called()
+    # summary 也只打一次
+    mock_summary_repo.get_summary_score_snapshot.assert_called_once_with(
+        "s456", course.context_title, "C1", course.units[0].deadlines.summary_deadline)
+    mock_summary_repo.get_latest_log_id.assert_not_called()
 
 
 def test_aggregate_should_raise_if_unit_not_found(student, course, aggregator_with_mock):
@@ -163,12 +192,178 @@ def test_aggregate_should_raise_if_unit_not_found(student, course, aggregator_wi
 # === OJ 題數為 0 ===
 
 
-def test_oj_score_should_return_divide_by_zero_safe():
-    mock_oj_repo = MagicMock()
-    mock_oj_repo.get_exercise_number_by_contents_name.return_value = 0
-    mock_oj_repo.get_exercise_summission_by_contents_name.return_value = 9
+def test_oj_score_should_return_divide_by_zero_safe(student, course, aggregator_with_mock):
+    aggregator, mock_oj_repo, _ = aggregator_with_mock
+    mock_oj_repo.get_unit_progress.return_value = UnitProgress(
+        exercise_total=0, exercise_done=9, advance_total=0, advance_done=0)
+
+    scores = aggregator.aggregate(student, course, "C1", "url").scores
+
+    assert scores["OJ Exercise(完成題數)"] == "9 / 0"
+    assert scores["OJ Advance(完成題數)"] == "0 / 0"
+
+
+def test_default_get_unit_progress_composes_per_type_methods():
+    class FakeOJRepo(OnlinejudgeRepository):
+        def get_exercise_number_by_contents_name(self, oj_contest_title, contents_name):
+            return 10
+
+        def get_exercise_submission_by_contents_name(self, oj_contest_title, contents_name, stdID, deadline):
+            return 9
+
+        def get_advance_number_by_contents_name(self, oj_contest_title, contents_name):
+            return 5
+
+        def get_advance_submission_by_contents_name(self, oj_contest_title, contents_name, stdID, deadline):
+            return 3
+
+    assert FakeOJRepo().get_unit_progress("oj_title", "C1", "s456", "deadline") == \
+        UnitProgress(exercise_total=10, exercise_done=9, advance_total=5, advance_done=3)
+
+
+class FakeSummaryRepo(SummaryRepository):
+    def __init__(self, log_id, under_review, score):
+        self.log_id, self.under_review, self.score = log_id, under_review, score
+        self.score_calls = 0
+
+    def get_latest_log_id(self, stdID, context_title, contents_name):
+        return self.log_id
+
+    def is_log_under_review(self, log_id):
+        return self.under_review
+
+    def get_score_result(self, stdID, context_title, contents_name, deadline):
+        self.score_calls += 1
+        return self.score
+
+
+@pytest.mark.parametrize("log_id, under_review, score, expected", [
+    (None, False, 100, SummaryScoreSnapshot(None, False, None)),
+    (123, True, 100, SummaryScoreSnapshot(123, True, None)),
+    (123, False, 80, SummaryScoreSnapshot(123, False, 80)),
+])
+def test_default_get_summary_score_snapshot_composes_methods(log_id, under_review, score, expected):
+    repo = FakeSummaryRepo(log_id, under_review, score)
+
+    assert repo.get_summary_score_snapshot("s456", "課", "C1", "deadline") == expected
+    # 沒有紀錄或評分中時不必算分數
+    assert repo.score_calls == (1 if expected.score is not None else 0)
+
+
+# === 並行查詢 / 部分結果 ===
+
+
+def test_sheet_failure_keeps_oj_and_summary_scores(student, course):
+    oj_repo = MagicMock()
+    oj_repo.get_unit_progress.return_value = UnitProgress(
+        exercise_total=10, exercise_done=9, advance_total=5, advance_done=3)
+    summary_repo = MagicMock()
+    summary_repo.get_summary_score_snapshot.return_value = SummaryScoreSnapshot(
+        log_id=123, under_review=False, score=80)
+
+    aggregator = ScoreAggregator(oj_repo, summary_repo)
+    aggregator._get_mistake_review_value = MagicMock(
+        side_effect=RuntimeError("CSV_READ_ERROR"))
+
+    report = aggregator.aggregate(student, course, "C1", "fake_url")
+
+    assert report.scores["OJ Exercise(完成題數)"] == "9 / 10"
+    assert report.scores["OJ Advance(完成題數)"] == "3 / 5"
+    assert report.scores["總結概念成績"] == "80"
+    assert report.scores["錯誤回顧成績"] == "發生異常，請通知助教。(異常代碼: CSV_READ_ERROR)"
+
+
+def test_slow_source_times_out_without_blocking_others(student, course, aggregator_with_mock):
+    aggregator, mock_oj_repo, mock_summary_repo = aggregator_with_mock
+    aggregator.source_timeouts["oj"] = 0.05
+    release = threading.Event()
+
+    def slow_progress(**kwargs):
+        release.wait(2)
+        return UnitProgress(1, 1, 1, 1)
+
+    mock_oj_repo.get_unit_progress.side_effect = slow_progress
+    mock_summary_repo.get_summary_score_snapshot.return_value = SummaryScoreSnapshot(
+        log_id=None, under_review=False, score=None)
+
+    try:
+        report = aggregator.aggregate(student, course, "C1", "fake_url")
+    finally:
+        release.set()
+
+    assert report.scores["OJ Exercise(完成題數)"] == "發生異常，請通知助教。(異常代碼: TIMEOUT)"
+    assert report.scores["OJ Advance(完成題數)"] == "發生異常，請通知助教。(異常代碼: TIMEOUT)"
+    assert report.scores["總結概念成績"] == "沒有紀錄"
+    assert report.scores["錯誤回顧成績"] == "100"
+    assert report.latency["total"] < 1
+
+
+def test_stuck_source_cannot_take_more_than_its_slots(student, course, aggregator_with_mock):
+    aggregator, mock_oj_repo, mock_summary_repo = aggregator_with_mock
+    aggregator.source_slots = {"oj": threading.BoundedSemaphore(1),
+                               "summary": threading.BoundedSemaphore(1),
+                               "mistake_review": threading.BoundedSemaphore(1)}
+    aggregator.source_timeouts["oj"] = 0.05
+    release = threading.Event()
+
+    def stuck_progress(**kwargs):
+        release.wait(2)
+        return UnitProgress(1, 1, 1, 1)
+
+    mock_oj_repo.get_unit_progress.side_effect = stuck_progress
+    mock_summary_repo.get_summary_score_snapshot.return_value = SummaryScoreSnapshot(
+        log_id=None, under_review=False, score=None)
+
+    try:
+        first = aggregator.aggregate(student, course, "C1", "fake_url")
+        # 第一個 OJ 查詢逾時但還卡著：名額沒還，第二次不再佔執行緒
+        second = aggregator.aggregate(student, course, "C1", "fake_url")
+    finally:
+        release.set()
+
+    assert "TIMEOUT" in first.scores["OJ Exercise(完成題數)"]
+    assert "BUSY" in second.scores["OJ Exercise(完成題數)"]
+    assert second.scores["總結概念成績"] == "沒有紀錄"
+    assert mock_oj_repo.get_unit_progress.call_count == 1
+
+    # 卡住的查詢結束後名額歸還
+    for _ in range(100):
+        if aggregator.source_slots["oj"].acquire(blocking=False):
+            break
+        time.sleep(0.01)
+    else:
+        pytest.fail("oj slot was never released")
+
+
+def test_sources_run_concurrently_and_report_latency(student, course, aggregator_with_mock):
+    aggregator, mock_oj_repo, mock_summary_repo = aggregator_with_mock
+
+    def sleepy(value):
+        def _inner(*args, **kwargs):
+            time.sleep(0.1)
+            return value
+        return _inner
+
+    mock_oj_repo.get_unit_progress.side_effect = sleepy(UnitProgress(1, 1, 1, 1))
+    mock_summary_repo.get_summary_score_snapshot.side_effect = sleepy(
+        SummaryScoreSnapshot(log_id=None, under_review=False, score=None))
+    aggregator._get_mistake_review_value = MagicMock(side_effect=sleepy(100))
+
+    report = aggregator.aggregate(student, course, "C1", "fake_url")
+
+    assert set(report.latency) == {"oj", "summary", "mistake_review", "total"}
+    assert report.latency["oj"] >= 0.1
+    # 三個 0.1 秒的來源同時跑，總時間應明顯小於依序執行的 0.3 秒
+    assert report.latency["total"] < 0.25
+
+
+def test_mistake_review_reads_indexed_table_from_sheet_source(valid_url):
+    sheet_source = MagicMock()
+    sheet_source.get_table.return_value = SheetTable(
+        ["id", "name", "department", "grade", "Week2 (C1)"],
+        [("109201XXX", "劉AA", "系A", 4, 100)])
+    aggregator = ScoreAggregator(None, None, sheet_source=sheet_source)
 
-    aggregator = ScoreAggregator(mock_oj_repo, None)
-    result = aggregator._get_OJ_exercise_score(
-        "oj_title", "C1", "s456", "deadline")
-    assert result == "9 / 0"
+    assert aggregator._get_mistake_review_value(
+        "109201XXX", "C1", valid_url) == 100
+    sheet_source.get_table.assert_called_once_with("fake123", "456")
@@ -0,0 +1,41 @@
+# uv run -m pytest tests/domain/test_session.py
+import dataclasses
+
+import pytest
+
+from domain.course import Course, CourseUnit
+from domain.session import SessionSnapshot
+from domain.student import RoleEnum, Student, StudentStatus
+from domain.user_state import UserStateEnum
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def session():
+    student = Student("lineid", "114514000", "12345", "旅歐文", "1122_程式設計-Python_黃鈺晴教師",
+                      RoleEnum.STUDENT, True, StudentStatus.REGISTERED)
+    course = Course("1122_程式設計-Python_黃鈺晴教師", ["ta@example.com"], 1, 3, "contest", "sheet", [])
+    return SessionSnapshot(student=student, course=course, state=UserStateEnum.AWAITING_CONTENTS_NAME)
+
+
+def test_snapshot_is_immutable(session):
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        session.state = UserStateEnum.IDLE
+
+
+def test_course_shell_is_a_fresh_copy(session):
+    shell = session.course_shell()
+    # populate_units 之類的流程改 shell 不會影響快照，也不會影響下一份 shell
+    shell.units.append(CourseUnit("C1"))
+    shell.ta_emails.append("other@example.com")
+
+    assert session.course.units == []
+    assert session.course_shell().ta_emails == ["ta@example.com"]
+    assert session.course_shell() is not session.course
+
+
+def test_course_shell_without_course():
+    student = Student("lineid", "1", "1", "n", "t", RoleEnum.STUDENT, True, StudentStatus.REGISTERED)
+
+    assert SessionSnapshot(student=student, course=None).course_shell() is None
@@ -0,0 +1,82 @@
+# uv run -m pytest tests/domain/test_sheet.py
+import pytest
+
+from domain.sheet import SheetTable, parse_sheet_url
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def table():
+    return SheetTable(
+        [" id", "name ", "department", "grade", "Week2 (C1)", "Week3 (C2)"],
+        [
+            ("109201XXX", "劉AA", "系A", 4, 100, 0),
+            ("110408YYY", "陳BB", "系B", 4, 0, 100),
+            ("109201XXX", "劉AA(重複)", "系A", 4, 0, 0),
+        ])
+
+
+def test_headers_are_stripped(table):
+    assert table.headers[:2] == ("id", "name")
+
+
+def test_lookup_returns_first_matching_row_as_dict(table):
+    row = table.lookup("id", "109201XXX")
+
+    assert row["name"] == "劉AA"
+    assert row["Week2 (C1)"] == 100
+    assert table.lookup("name", "陳BB")["id"] == "110408YYY"
+    assert table.lookup("id", "nobody") is None
+
+
+def test_lookup_index_is_built_once(table):
+    table.lookup("id", "109201XXX")
+    index = table._indexes["id"]
+    table.lookup("id", "110408YYY")
+
+    assert table._indexes["id"] is index
+
+
+def test_lookup_unknown_column_raises_key_error(table):
+    with pytest.raises(KeyError):
+        table.lookup("學號", "109201XXX")
+
+
+def test_find_unit_column(table):
+    assert table.find_unit_column("C2", start=4) == "Week3 (C2)"
+    assert table.find_unit_column("C9", start=4) is None
+
+
+def test_parse_sheet_url():
+    assert parse_sheet_url(
+        "https://docs.google.com/spreadsheets/d/abc-1_2/edit#gid=98765") == ("abc-1_2", "98765")
+    assert parse_sheet_url("invalid-url") == (None, None)
+
+
+def test_from_csv_text_matches_pandas_read_csv_semantics():
+    table = SheetTable.from_csv_text(
+        "\ufeff id ,name,grade,score,note\n"
+        "jz1452896,甲,4,100,\n"
+        "108504510,乙,NA,,缺席\n"
+        "\n"
+        "109201XXX,丙,3,0\n"
+    )
+
+    assert table.headers == ("id", "name", "grade", "score", "note")
+    assert len(table.rows) == 3
+    # 有非數字值的欄位整欄維持字串
+    assert table.lookup("id", "108504510")["name"] == "乙"
+    # 整數欄有空值 → float；空值 / NA → None；缺少的尾端欄位補 None
+    assert table.lookup("id", "jz1452896")["grade"] == 4.0
+    assert table.lookup("id", "108504510")["grade"] is None
+    assert table.lookup("id", "jz1452896")["score"] == 100
+    assert table.lookup("id", "109201XXX")["note"] is None
+    assert table.lookup("id", "108504510")["note"] == "缺席"
+
+
+def test_from_csv_text_integer_column_stays_int():
+    table = SheetTable.from_csv_text("id,score\na,100\nb,0\n")
+
+    assert table.lookup("id", "a")["score"] == 100
+    assert isinstance(table.lookup("id", "b")["score"], int)
@@ -31,7 +31,7 @@ MYSQL_LINEBOT_TABLES = [
 
 
 @pytest.fixture
-def linebot_mysql_truncate(container):
+def linebot_mysql_truncate(container, mysql_migrated):
     """整合測試用：清空 linebot DB 內會用到的表，seed 後 commit。"""
     cfg = container.config.LINEBOT_DB_CONFIG()
     conn = _mysql_autocommit(cfg)
@@ -4,6 +4,8 @@ import types
 import pytest
 import pymysql
 
+from infrastructure.mysql_migrator import MIGRATIONS_ROOT, MySQLMigrator
+
 
 def _db(name):
     return {
@@ -44,7 +46,8 @@ def _safe_truncate(cur, table):
 LINEBOT_TABLES = [
     "course_info", "account_info", "user_states",
     "message_logs", "event_logs", "change_HW_deadline", "ask_for_leave",
-    "summary_gradding_log",
+    "summary_gradding_log", "summary_latest_log", "summary_feedback_push",
+    "lime_explain_log", "concept_keyword_and_question",
 ]
 
 REVIEW_TABLES = [
@@ -52,12 +55,21 @@ REVIEW_TABLES = [
 ]
 
 VERIFY_TABLES = [
-    "SummarySubmissions",
+    "SummarySubmissions", "TeacherFeedbacks",
 ]
 
 
+@pytest.fixture(scope="session")
+def mysql_migrated(test_config):
+    """schema_*.sql 建出來的測試庫再套用 migrations/，與正式環境的索引一致"""
+    MySQLMigrator(test_config.LINEBOT_DB_CONFIG,
+                  os.path.join(MIGRATIONS_ROOT, "linebot")).migrate()
+    MySQLMigrator(test_config.VERIFY_DB_CONFIG,
+                  os.path.join(MIGRATIONS_ROOT, "verify")).migrate()
+
+
 @pytest.fixture
-def linebot_mysql_conn(test_config):
+def linebot_mysql_conn(test_config, mysql_migrated):
     return _mysql_autocommit(test_config.LINEBOT_DB_CONFIG)
 
 
@@ -67,7 +79,7 @@ def review_mysql_conn(test_config):
 
 
 @pytest.fixture
-def verify_mysql_conn(test_config):
+def verify_mysql_conn(test_config, mysql_migrated):
     return _mysql_autocommit(test_config.VERIFY_DB_CONFIG)
 
 
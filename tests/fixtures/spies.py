@@ -4,6 +4,9 @@ from typing import Any, Dict, List
 import pytest
 from dependency_injector import providers
 
+from domain.session import SessionSnapshot
+from domain.user_state import UserStateEnum
+
 
 # ---- line_service Spy：收集 reply_text_message ----
 class LineApiServiceSpy:
@@ -157,13 +160,34 @@ class StudentRepoStub:
         return self._by_line_id.get(line_id)
 
 
+class SessionRepoStub:
+    """
+    webhook 改用 session_repo 一次取得 學生 + 課程 + 狀態；
+    測試裡由 StudentRepoStub 決定學生、container 目前的 user_state_accessor（可能是 spy）決定狀態。
+    """
+
+    def __init__(self, container, student_repo: StudentRepoStub):
+        self.container = container
+        self.student_repo = student_repo
+
+    def get_snapshot(self, line_id: str):
+        student = self.student_repo.find_by_line_id(line_id)
+        if student is None:
+            return None
+        course = self.container.course_repo().get_course_shell(student.context_title)
+        state = self.container.user_state_accessor().get_state(line_id)
+        return SessionSnapshot(student=student, course=course, state=state or UserStateEnum.IDLE)
+
+
 @pytest.fixture
 def student_repo_stub(container):
     stub = StudentRepoStub()
     container.student_repo.override(providers.Object(stub))
+    container.session_repo.override(providers.Object(SessionRepoStub(container, stub)))
     try:
         yield stub
     finally:
+        container.session_repo.reset_override()
         container.student_repo.reset_override()
 
 
@@ -254,6 +278,14 @@ class UserStateAccessorSpy:
         self._record("set_state", user_id, state)
         self._states[user_id] = state
 
+    def transition(self, user_id, state, expected_state=None):
+        self._record("transition", user_id, state, expected_state=expected_state)
+        current = self._states.get(user_id, self._default)
+        if expected_state is not None and current != expected_state:
+            return False
+        self._states[user_id] = state
+        return True
+
     # 小工具
     def _record(self, method, *args, **kwargs):
         c = Call(method, args, kwargs)
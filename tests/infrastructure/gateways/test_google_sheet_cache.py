@@ -0,0 +1,137 @@
+# uv run -m pytest tests/infrastructure/gateways/test_google_sheet_cache.py
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from infrastructure.gateways.google_sheet_cache import (GoogleSheetCsvCache,
+                                                        SheetFetchError)
+
+pytestmark = pytest.mark.contract
+
+CSV = "id,name\n114514000,旅歐文\n"
+
+
+def make_response(status=200, text=CSV, headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.content = text.encode("utf-8")
+    resp.headers = headers or {}
+    if status >= 400:
+        resp.raise_for_status.side_effect = requests.HTTPError(str(status))
+    return resp
+
+
+@pytest.fixture
+def session():
+    s = MagicMock()
+    s.get.return_value = make_response(headers={"ETag": '"v1"'})
+    return s
+
+
+def test_hit_within_ttl_does_not_refetch(session):
+    cache = GoogleSheetCsvCache(ttl=60, session=session)
+
+    assert cache.get_csv("sid", "1") == CSV
+    assert cache.get_csv("sid", "1") == CSV
+
+    session.get.assert_called_once()
+    url = session.get.call_args[0][0]
+    assert url == "https://docs.google.com/spreadsheets/d/sid/export?format=csv&gid=1"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_keys_are_per_sheet_and_gid(session):
+    cache = GoogleSheetCsvCache(ttl=60, session=session)
+    cache.get_csv("sid", "1")
+    cache.get_csv("sid", "2")
+
+    assert session.get.call_count == 2
+
+
+def test_expired_entry_is_revalidated_with_etag(session):
+    cache = GoogleSheetCsvCache(ttl=0, session=session)
+    first = cache.get_snapshot("sid", "1")
+
+    session.get.return_value = make_response(status=304)
+    second = cache.get_snapshot("sid", "1")
+
+    assert session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    assert second.text == CSV
+    assert second.version == first.version
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_version_bumps_only_when_content_changes(session):
+    cache = GoogleSheetCsvCache(ttl=0, session=session)
+    v1 = cache.get_snapshot("sid", "1").version
+    v_same = cache.get_snapshot("sid", "1").version
+
+    session.get.return_value = make_response(text=CSV + "110408YYY,陳BB\n")
+    v2 = cache.get_snapshot("sid", "1").version
+
+    assert v1 == v_same == 1
+    assert v2 == 2
+
+
+def test_stale_entry_is_served_when_google_fails(session):
+    cache = GoogleSheetCsvCache(ttl=0, stale_ttl=60, session=session)
+    cache.get_csv("sid", "1")
+
+    session.get.side_effect = requests.Timeout("slow")
+
+    assert cache.get_csv("sid", "1") == CSV
+    assert cache.stats()["errors"] == 1
+    assert cache.stats()["stale_served"] == 1
+
+
+def test_failure_without_cached_copy_raises(session):
+    cache = GoogleSheetCsvCache(session=session)
+    session.get.return_value = make_response(status=500)
+
+    with pytest.raises(SheetFetchError):
+        cache.get_csv("sid", "1")
+
+
+def test_concurrent_misses_download_once(session):
+    gate = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        gate.wait(1)
+        return make_response()
+
+    session.get.side_effect = slow_get
+    cache = GoogleSheetCsvCache(ttl=60, session=session)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_csv("sid", "1")))
+               for _ in range(10)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join(2)
+
+    assert results == [CSV] * 10
+    session.get.assert_called_once()
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_table_is_rebuilt_only_when_csv_changes(session):
+    cache = GoogleSheetCsvCache(ttl=0, session=session)
+
+    t1 = cache.get_table("sid", "1")
+    t2 = cache.get_table("sid", "1")
+    assert t1 is t2
+    assert t1.lookup("name", "旅歐文")["id"] == 114514000
+
+    session.get.return_value = make_response(text=CSV + "110408,陳BB\n")
+    t3 = cache.get_table("sid", "1")
+
+    assert t3 is not t1
+    assert t3.lookup("name", "陳BB") is not None
+    assert cache.stats()["table_builds"] == 2
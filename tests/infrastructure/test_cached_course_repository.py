@@ -0,0 +1,190 @@
+# uv run -m pytest tests/infrastructure/test_cached_course_repository.py
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from domain.course import Course, CourseUnit, DeadlinesVO
+from infrastructure.cached_course_repository import CachedCourseRepository
+
+pytestmark = pytest.mark.unit
+
+
+def make_course(context_title="1122_測試課程"):
+    return Course(context_title, ["ta@example.com"], 1, 3, "contest_123", "https://example.com", units=[])
+
+
+@pytest.fixture
+def inner():
+    repo = MagicMock()
+    repo.get_course_shell.side_effect = lambda title: make_course(title)
+    repo.get_in_progress_courses.return_value = [
+        make_course("A"), make_course("B")]
+    return repo
+
+
+def test_course_shell_is_cached(inner):
+    repo = CachedCourseRepository(inner, ttl=60)
+
+    first = repo.get_course_shell("1122_測試課程")
+    second = repo.get_course_shell("1122_測試課程")
+
+    assert first == second
+    inner.get_course_shell.assert_called_once_with("1122_測試課程")
+    assert repo.stats()["hits"] == 1
+
+
+def test_callers_cannot_mutate_cached_snapshot(inner):
+    repo = CachedCourseRepository(inner, ttl=60)
+
+    course = repo.get_course_shell("1122_測試課程")
+    course.units.append(CourseUnit("C1"))
+    course.ta_emails.append("intruder@example.com")
+
+    fresh = repo.get_course_shell("1122_測試課程")
+    assert fresh is not course
+    assert fresh.units == []
+    assert fresh.ta_emails == ["ta@example.com"]
+
+
+def test_expired_entry_is_reloaded(inner):
+    repo = CachedCourseRepository(inner, ttl=0)
+
+    repo.get_course_shell("1122_測試課程")
+    repo.get_course_shell("1122_測試課程")
+
+    assert inner.get_course_shell.call_count == 2
+
+
+def test_missing_course_is_not_cached(inner):
+    inner.get_course_shell.side_effect = None
+    inner.get_course_shell.return_value = None
+    repo = CachedCourseRepository(inner, ttl=60)
+
+    assert repo.get_course_shell("nope") is None
+    assert repo.get_course_shell("nope") is None
+    assert inner.get_course_shell.call_count == 2
+
+
+def test_entries_are_bounded_lru(inner):
+    repo = CachedCourseRepository(inner, ttl=60, max_entries=2)
+
+    repo.get_course_shell("A")
+    repo.get_course_shell("B")
+    repo.get_course_shell("A")      # A 變成最近使用
+    repo.get_course_shell("C")      # 擠掉 B
+
+    assert repo.stats()["entries"] == 2
+    repo.get_course_shell("A")
+    repo.get_course_shell("B")
+    assert [c.args[0] for c in inner.get_course_shell.call_args_list] == [
+        "A", "B", "C", "B"]
+
+
+def test_in_progress_courses_are_cached_and_warm_shells(inner):
+    repo = CachedCourseRepository(inner, ttl=60)
+
+    courses = repo.get_in_progress_courses()
+    again = repo.get_in_progress_courses()
+
+    assert [c.context_title for c in courses] == ["A", "B"]
+    assert again == courses and again[0] is not courses[0]
+    inner.get_in_progress_courses.assert_called_once_with("")
+    repo.get_course_shell("A")
+    inner.get_course_shell.assert_not_called()
+
+
+def test_invalidate(inner):
+    repo = CachedCourseRepository(inner, ttl=60)
+    repo.get_course_shell("A")
+    repo.get_course_shell("B")
+
+    assert repo.invalidate("A") == 1
+    repo.get_course_shell("A")
+    assert inner.get_course_shell.call_count == 3
+
+    assert repo.invalidate() == 2
+    assert repo.stats()["entries"] == 0
+
+
+def test_populate_units_delegates_when_calendar_cache_disabled(inner):
+    repo = CachedCourseRepository(inner, ttl=60, calendar_ttl=0)
+    course = make_course()
+
+    repo.populate_units(course)
+
+    inner.populate_units.assert_called_once_with(course)
+
+
+# === 單元行事曆 ===
+
+
+def populate_with(*unit_names):
+    def _populate(course):
+        units = []
+        for name in unit_names:
+            unit = CourseUnit(name)
+            unit.get_homework_deadlines(base_date=date(2025, 9, 11))
+            units.append(unit)
+        course.units = units
+        return course
+    return _populate
+
+
+def test_calendar_is_cached_and_returns_fresh_units(inner):
+    inner.populate_units.side_effect = populate_with("C1", "C2")
+    inner.get_calendar_fingerprint.return_value = (2, 123, 0, 0)
+    repo = CachedCourseRepository(inner, ttl=60, calendar_ttl=60)
+
+    first = repo.populate_units(make_course())
+    first.units[0].name = "mutated"
+    second = repo.populate_units(make_course())
+
+    assert [u.name for u in second.units] == ["C1", "C2"]
+    assert second.units[0].deadlines == DeadlinesVO(
+        oj_deadline="2025-09-17 04:01:00", summary_deadline="2025-09-18 12:01:00")
+    inner.populate_units.assert_called_once()
+    assert repo.stats()["calendar_hits"] == 1
+
+
+def test_calendar_is_kept_when_fingerprint_unchanged(inner):
+    inner.populate_units.side_effect = populate_with("C1")
+    inner.get_calendar_fingerprint.return_value = (1, 123, 0, 0)
+    repo = CachedCourseRepository(
+        inner, ttl=60, calendar_ttl=60, revalidate_interval=0)
+
+    repo.populate_units(make_course())
+    repo.populate_units(make_course())
+
+    inner.populate_units.assert_called_once()
+    assert repo.stats()["calendar_revalidations"] == 1
+
+
+def test_calendar_is_reloaded_when_fingerprint_changes(inner):
+    inner.populate_units.side_effect = populate_with("C1")
+    inner.get_calendar_fingerprint.side_effect = [
+        (1, 123, 0, 0), (2, 456, 0, 0), (2, 456, 0, 0)]
+    repo = CachedCourseRepository(
+        inner, ttl=60, calendar_ttl=60, revalidate_interval=0)
+
+    repo.populate_units(make_course())
+    inner.populate_units.side_effect = populate_with("C1", "C2")
+    course = repo.populate_units(make_course())
+
+    assert [u.name for u in course.units] == ["C1", "C2"]
+    assert inner.populate_units.call_count == 2
+
+
+def test_calendar_expires_after_ttl_and_on_invalidate(inner):
+    inner.populate_units.side_effect = populate_with("C1")
+    inner.get_calendar_fingerprint.return_value = None
+    repo = CachedCourseRepository(inner, ttl=60, calendar_ttl=60)
+
+    repo.populate_units(make_course())
+    repo.invalidate("1122_測試課程")
+    repo.populate_units(make_course())
+    assert inner.populate_units.call_count == 2
+
+    repo.calendar_ttl = 0
+    repo.populate_units(make_course())
+    assert inner.populate_units.call_count == 3
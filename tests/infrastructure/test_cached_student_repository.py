@@ -0,0 +1,182 @@
+# uv run -m pytest tests/infrastructure/test_cached_student_repository.py
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from domain.student import RoleEnum, Student, StudentIdAlreadyBoundError, StudentStatus
+from infrastructure.cached_student_repository import CachedStudentRepository
+
+pytestmark = pytest.mark.unit
+
+
+def make_student(line_user_id="U_line"):
+    return Student(line_user_id, "114514000", "12345", "旅歐文", "1132_程式設計-Python_黃鈺晴教師",
+                   RoleEnum.STUDENT, True, StudentStatus.REGISTERED)
+
+
+class FakeInvalidationLog:
+    """模擬共用的 identity_cache_invalidation 表"""
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, line_user_id=None):
+        self.events.append(line_user_id)
+
+    def latest_id(self):
+        return len(self.events)
+
+    def poll(self, after_id):
+        return len(self.events), self.events[after_id:]
+
+
+@pytest.fixture
+def inner():
+    repo = MagicMock()
+    repo.find_by_line_id.side_effect = lambda line_user_id: make_student(line_user_id)
+    return repo
+
+
+@pytest.fixture
+def clock():
+    with patch('infrastructure.cached_student_repository.time.monotonic') as m:
+        m.return_value = 1000.0
+        yield m
+
+
+def test_registered_user_is_cached(inner, clock):
+    repo = CachedStudentRepository(inner, ttl=300)
+
+    first = repo.find_by_line_id("U_line")
+    second = repo.find_by_line_id("U_line")
+
+    assert first == second
+    assert first is not second
+    inner.find_by_line_id.assert_called_once_with("U_line")
+    assert repo.stats()["hits"] == 1
+
+
+def test_callers_cannot_mutate_cached_student(inner, clock):
+    repo = CachedStudentRepository(inner, ttl=300)
+
+    repo.find_by_line_id("U_line").name = "改掉"
+
+    assert repo.find_by_line_id("U_line").name == "旅歐文"
+
+
+def test_unregistered_user_uses_short_negative_ttl(inner, clock):
+    inner.find_by_line_id.side_effect = None
+    inner.find_by_line_id.return_value = None
+    repo = CachedStudentRepository(inner, ttl=300, negative_ttl=10)
+
+    assert repo.find_by_line_id("U_new") is None
+    clock.return_value = 1005.0
+    assert repo.find_by_line_id("U_new") is None
+    assert inner.find_by_line_id.call_count == 1
+    assert repo.stats()["negative_hits"] == 1
+
+    # 負向快取過期後重新查，已註冊就查得到
+    inner.find_by_line_id.return_value = make_student("U_new")
+    clock.return_value = 1011.0
+    assert repo.find_by_line_id("U_new").student_id == "114514000"
+
+
+def test_entry_expires_after_ttl(inner, clock):
+    repo = CachedStudentRepository(inner, ttl=300)
+    repo.find_by_line_id("U_line")
+
+    clock.return_value = 1300.0
+    repo.find_by_line_id("U_line")
+
+    assert inner.find_by_line_id.call_count == 2
+
+
+def test_lru_bound(inner, clock):
+    repo = CachedStudentRepository(inner, ttl=300, max_entries=2)
+    for user in ("U1", "U2", "U1", "U3"):
+        repo.find_by_line_id(user)
+
+    assert repo.stats()["entries"] == 2
+    repo.find_by_line_id("U1")
+    repo.find_by_line_id("U2")
+    # U2 最久沒用被擠掉，要重查
+    assert [c.args[0] for c in inner.find_by_line_id.call_args_list] == ["U1", "U2", "U3", "U2"]
+
+
+def test_save_invalidates_negative_entry(inner, clock):
+    inner.find_by_line_id.side_effect = None
+    inner.find_by_line_id.return_value = None
+    repo = CachedStudentRepository(inner, ttl=300, negative_ttl=10)
+    repo.find_by_line_id("U_new")
+
+    student = make_student("U_new")
+    repo.save(student)
+    inner.find_by_line_id.return_value = student
+
+    assert repo.find_by_line_id("U_new") == student
+    inner.save.assert_called_once_with(student)
+
+
+def test_failed_save_still_invalidates(inner, clock):
+    inner.save.side_effect = StudentIdAlreadyBoundError("114514000")
+    repo = CachedStudentRepository(inner, ttl=300)
+    repo.find_by_line_id("U_line")
+
+    with pytest.raises(StudentIdAlreadyBoundError):
+        repo.save(make_student("U_line"))
+
+    assert repo.stats()["entries"] == 0
+
+
+def test_invalidation_reaches_other_workers(inner, clock):
+    log = FakeInvalidationLog()
+    worker_a = CachedStudentRepository(inner, ttl=300, invalidation_log=log, poll_interval=1)
+    worker_b = CachedStudentRepository(inner, ttl=300, invalidation_log=log, poll_interval=1)
+    worker_a.find_by_line_id("U_line")
+    worker_b.find_by_line_id("U_line")
+
+    # 助教解除綁定，只打到 worker_a 的 admin endpoint
+    worker_a.invalidate("U_line")
+
+    # 在 poll_interval 內 worker_b 仍用快取
+    worker_b.find_by_line_id("U_line")
+    assert inner.find_by_line_id.call_count == 2
+
+    clock.return_value = 1001.0
+    worker_b.find_by_line_id("U_line")
+    assert inner.find_by_line_id.call_count == 3
+    assert worker_b.stats()["remote_invalidations"] == 1
+
+
+def test_zero_ttl_bypasses_cache(inner, clock):
+    repo = CachedStudentRepository(inner, ttl=0)
+    repo.find_by_line_id("U_line")
+    repo.find_by_line_id("U_line")
+
+    assert inner.find_by_line_id.call_count == 2
+
+
+def test_missing_invalidation_table_is_logged_once_and_polling_backs_off(inner, clock, caplog):
+    import pymysql
+    log = FakeInvalidationLog()
+    log.latest_id = MagicMock(side_effect=pymysql.err.ProgrammingError(
+        1146, "Table 'linebot.identity_cache_invalidation' doesn't exist"))
+    repo = CachedStudentRepository(inner, ttl=300, invalidation_log=log, poll_interval=1)
+
+    for now in (1000.0, 1001.0, 1002.0, 1003.0, 1004.0):
+        clock.return_value = now
+        assert repo.find_by_line_id("U_line") is not None
+
+    # 1000 失敗 → 等 2 秒；1002 失敗 → 等 4 秒；中間的都沒有再查
+    assert log.latest_id.call_count == 2
+    assert repo.stats()["poll_failures"] == 2
+    errors = [r for r in caplog.records if "identity_cache_invalidation" in r.getMessage()]
+    assert len(errors) == 1
+    assert "migrate" in errors[0].getMessage()
+
+    # 表建好之後恢復原本的間隔
+    log.latest_id = MagicMock(return_value=0)
+    clock.return_value = 1006.0
+    repo.find_by_line_id("U_line")
+    assert repo.stats()["poll_failures"] == 0
+    log.latest_id.assert_called_once()
@@ -0,0 +1,90 @@
+# uv run -m pytest tests/infrastructure/test_container_lifecycle.py
+from unittest.mock import patch
+
+import pytest
+
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+
+pytestmark = pytest.mark.contract
+
+
+@pytest.fixture
+def moodle_externals():
+    with patch('infrastructure.postgresql_tunnel_pool.psycopg2.connect') as MockConnect, \
+            patch('infrastructure.postgresql_tunnel_pool.SSHTunnelForwarder') as MockSSHTunnel, \
+            patch('infrastructure.postgresql_tunnel_pool.threading.Timer'):
+        MockConnect.return_value.closed = 0
+        MockConnect.return_value.cursor.return_value.fetchone.return_value = (
+            1, "112522001", "王小明")
+        yield MockSSHTunnel, MockConnect
+
+
+def test_moodle_tunnel_is_reused_across_events(container, moodle_externals):
+    """每個事件各自 resolve 一個 moodle_repo，但應共用同一個連線管理器與 tunnel"""
+    MockSSHTunnel, MockConnect = moodle_externals
+
+    first = container.moodle_repo()
+    second = container.moodle_repo()
+    assert first is not second
+    assert first.conn_mgr is second.conn_mgr
+
+    first.find_student_info("112522001")
+    second.find_student_info("112522001")
+
+    MockSSHTunnel.return_value.start.assert_called_once()
+    MockConnect.assert_called_once()
+
+    container.shutdown_resources()
+
+
+def test_shutdown_closes_process_resources(container, moodle_externals):
+    MockSSHTunnel, MockConnect = moodle_externals
+
+    container.moodle_repo().find_student_info("112522001")
+    pool = container.linebot_db_pool()
+    assert isinstance(pool, MySQLConnectionPool)
+
+    container.shutdown_resources()
+
+    MockSSHTunnel.return_value.close.assert_called_once()
+    MockConnect.return_value.close.assert_called_once()
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.connection():
+            pass
+
+
+def test_process_resources_are_shared_and_per_event_objects_are_not(container):
+    assert container.linebot_db_pool() is container.linebot_db_pool()
+    assert container.oj_db_pool() is container.oj_db_pool()
+    assert container.sheet_cache() is container.sheet_cache()
+    assert container.openai_client() is container.openai_client()
+    assert container.grader_http_session() is container.grader_http_session()
+
+    assert container.mysql_student_repo() is not container.mysql_student_repo()
+    assert container.mysql_student_repo().pool is container.linebot_db_pool()
+
+    container.shutdown_resources()
+
+
+def test_chatbot_logger_writer_follows_log_writer_mode(container):
+    # TestingConfig 是 sync：每筆直接寫 DB
+    assert container.chatbot_logger().writer is None
+
+    with container.config.LOG_WRITER_MODE.override("buffered"), \
+            container.config.LOG_WORKER_ID.override(12):
+        first, second = container.chatbot_logger(), container.chatbot_logger()
+        assert first.writer is container.log_writer()
+        assert first.writer is second.writer
+        assert first.id_generator is second.id_generator
+        assert first.id_generator.worker_id == 12
+
+    container.shutdown_resources()
+
+
+def test_buffered_logging_requires_log_worker_id(container):
+    # 沒設 LOG_WORKER_ID 就不能用 pid 推算，直接報錯
+    with container.config.LOG_WRITER_MODE.override("buffered"):
+        with pytest.raises(ValueError, match="LOG_WORKER_ID"):
+            container.chatbot_logger()
+
+    container.shutdown_resources()
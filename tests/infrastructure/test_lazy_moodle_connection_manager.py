@@ -1,5 +1,7 @@
 # uv run -m pytest tests/infrastructure/test_lazy_moodle_connection_manager.py
-from unittest.mock import patch
+import threading
+import time
+from unittest.mock import MagicMock, patch
 
 import psycopg2
 import pytest
@@ -9,139 +11,174 @@ from infrastructure.postgresql_moodle_repository import LazyMoodleConnectionMana
 
 pytestmark = pytest.mark.contract
 
-# 我們需要 patch 掉所有外部依賴
-# 使用 autospec=True 可以讓 mock 物件的簽名與原物件一致，更安全
-
-
-@patch('infrastructure.postgresql_moodle_repository.psycopg2', autospec=True)
-@patch('infrastructure.postgresql_moodle_repository.SSHTunnelForwarder', autospec=True)
-@patch('infrastructure.postgresql_moodle_repository.Timer', autospec=True)
-class TestLazyMoodleConnectionManager:
-
-    @pytest.fixture
-    def manager_instance(self):
-        """提供一個 manager 實體，並設定短的 timeout 以加速測試"""
-        # 提供包含必要鍵的假設定，即使值是假的也沒關係
-        dummy_ssh_config = {
-            "ssh_host": "dummy_host",
-            "ssh_username": "dummy_user",
-            "ssh_password": "dummy_password"
-        }
-        dummy_db_config = {
-            "host": "dummy_db_host",
-            "port": 5432,
-            "database": "dummy_db",
-            "user": "dummy_user",
-            "password": "dummy_password"
-        }
-        return LazyMoodleConnectionManager(dummy_db_config, dummy_ssh_config, idle_timeout=0.1)
-
-    def test_initial_state_is_lazy(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試初始狀態，所有連線物件都應為 None"""
-        assert manager_instance._conn is None
-        assert manager_instance._tunnel is None
-        assert manager_instance._timer is None
-
-    def test_first_call_establishes_connection(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試第一次呼叫 get_cursor 會建立連線"""
-        # 執行
-        with manager_instance.get_cursor():
-            pass
+# LazyMoodleConnectionManager 建在 TunneledPostgreSQLPool 上，外部依賴都在 postgresql_tunnel_pool 模組裡
 
-        # 驗證
-        MockSSHTunnel.return_value.start.assert_called_once()
-        MockPsycopg2.connect.assert_called_once()
-        assert manager_instance._conn is not None
-        assert manager_instance._tunnel is not None
+DUMMY_SSH_CONFIG = {
+    "ssh_host": "dummy_host",
+    "ssh_username": "dummy_user",
+    "ssh_password": "dummy_password"
+}
+DUMMY_DB_CONFIG = {
+    "host": "dummy_db_host",
+    "port": 5432,
+    "database": "dummy_db",
+    "user": "dummy_user",
+    "password": "dummy_password"
+}
 
-    def test_subsequent_calls_reuse_connection(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試後續呼叫會重複使用連線，而不是建立新的"""
-        # 第一次呼叫
-        with manager_instance.get_cursor():
-            pass
-        # 第二次呼叫
-        with manager_instance.get_cursor():
-            pass
 
-        # 驗證 start 和 connect 依然只被呼叫一次
-        MockSSHTunnel.return_value.start.assert_called_once()
-        MockPsycopg2.connect.assert_called_once()
+@pytest.fixture
+def MockSSHTunnel():
+    with patch('infrastructure.postgresql_tunnel_pool.SSHTunnelForwarder') as m:
+        m.side_effect = lambda *a, **kw: MagicMock(
+            name="tunnel", is_active=True, local_bind_port=40000)
+        yield m
+
+
+@pytest.fixture
+def MockConnect():
+    with patch('infrastructure.postgresql_tunnel_pool.psycopg2.connect') as m:
+        m.side_effect = lambda **kw: MagicMock(name="conn", closed=0)
+        yield m
 
-    def test_auto_close_is_scheduled(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試 get_cursor 是否會排程自動關閉"""
-        with manager_instance.get_cursor():
-            pass
 
-        # 驗證 Timer 被建立，且其回呼函式是 self.close
-        MockTimer.assert_called_with(0.1, manager_instance.close)
-        # 驗證 Timer 的 start 方法被呼叫
-        MockTimer.return_value.start.assert_called_once()
+@pytest.fixture
+def MockTimer():
+    with patch('infrastructure.postgresql_tunnel_pool.threading.Timer') as m:
+        yield m
 
-    def test_manual_close_cleans_up_resources(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試手動呼叫 close 方法是否能正確清理資源"""
-        # 先建立連線
+
+@pytest.fixture
+def manager_instance(MockSSHTunnel, MockConnect, MockTimer):
+    """提供一個 manager 實體，並設定短的 timeout 以加速測試"""
+    manager = LazyMoodleConnectionManager(
+        DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG, pool_size=2, idle_timeout=0.1, timeout=0.5)
+    yield manager
+    manager.close()
+
+
+def test_initial_state_is_lazy(manager_instance, MockSSHTunnel, MockConnect):
+    """初始狀態不建 tunnel、不開連線"""
+    assert manager_instance._tunnel is None
+    assert manager_instance.stats()["size"] == 0
+    MockSSHTunnel.assert_not_called()
+    MockConnect.assert_not_called()
+
+
+def test_first_call_establishes_connection(manager_instance, MockSSHTunnel, MockConnect):
+    with manager_instance.get_cursor():
+        pass
+
+    MockSSHTunnel.assert_called_once()
+    manager_instance._tunnel.start.assert_called_once()
+    MockConnect.assert_called_once_with(
+        host='127.0.0.1', port=40000, database='dummy_db',
+        user='dummy_user', password='dummy_password')
+
+
+def test_subsequent_calls_reuse_connection(manager_instance, MockSSHTunnel, MockConnect):
+    """依序呼叫重複使用同一條連線，且熱連線不做 SELECT 1"""
+    for _ in range(3):
         with manager_instance.get_cursor():
             pass
 
-        # 取得 mock 的連線和通道物件
-        mock_conn = manager_instance._conn
-        mock_tunnel = manager_instance._tunnel
+    MockSSHTunnel.assert_called_once()
+    MockConnect.assert_called_once()
+    assert manager_instance.stats()["liveness_checks"] == 0
+
 
-        # 手動關閉
-        manager_instance.close()
+def test_concurrent_registrations_share_one_tunnel(manager_instance, MockSSHTunnel, MockConnect):
+    """尖峰時同時查詢不再排在同一把鎖後面：各拿一條連線，但只有一條 tunnel"""
+    with manager_instance.get_cursor() as cur1, manager_instance.get_cursor() as cur2:
+        assert cur1 is not cur2
+        assert manager_instance.stats()["in_use"] == 2
 
-        # 驗證資源的 close 方法被呼叫
-        mock_conn.close.assert_called_once()
-        mock_tunnel.close.assert_called_once()
+    MockSSHTunnel.assert_called_once()
+    assert MockConnect.call_count == 2
 
-        # 驗證內部狀態被重設為 None
-        assert manager_instance._conn is None
-        assert manager_instance._tunnel is None
 
-    def test_connection_failure_handling(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試連線失敗時的錯誤處理"""
-        # 讓建立 tunnel 時就引發例外
-        MockSSHTunnel.return_value.start.side_effect = Exception(
-            "SSH connection failed")
+def test_waiting_time_is_recorded_when_pool_is_exhausted(manager_instance):
+    entered = threading.Event()
 
-        # 驗證呼叫 get_cursor 時會拋出例外
-        with pytest.raises(Exception, match="SSH connection failed"):
-            with manager_instance.get_cursor():
-                pass
+    def hold():
+        with manager_instance.get_cursor(), manager_instance.get_cursor():
+            entered.set()
+            time.sleep(0.05)
 
-        # 驗證即使發生錯誤，內部狀態依然是乾淨的
-        assert manager_instance._conn is None
-        assert manager_instance._tunnel is None
+    holder = threading.Thread(target=hold)
+    holder.start()
+    entered.wait(2)
 
-    def test_get_cursor_after_manual_close(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試手動關閉後，再次呼叫 get_cursor 是否能重新建立連線"""
+    with manager_instance.get_cursor():
+        pass
+    holder.join(2)
+
+    stats = manager_instance.stats()
+    assert stats["checkouts"] == 3
+    assert stats["wait_max_s"] > 0
+
+
+def test_auto_close_is_scheduled(manager_instance, MockTimer):
+    with manager_instance.get_cursor():
+        pass
+
+    MockTimer.assert_called_with(0.1, manager_instance._close_if_idle)
+    MockTimer.return_value.start.assert_called_once()
+
+
+def test_idle_close_releases_connections_and_tunnel(manager_instance):
+    with manager_instance.get_cursor():
+        pass
+    tunnel = manager_instance._tunnel
+    conn = manager_instance._idle[0].conn
+
+    # 模擬計時器到期
+    manager_instance._close_if_idle()
+
+    conn.close.assert_called_once()
+    tunnel.close.assert_called_once()
+    assert manager_instance._tunnel is None
+    assert manager_instance.stats()["idle_closes"] == 1
+
+
+def test_get_cursor_after_manual_close(manager_instance, MockSSHTunnel, MockConnect):
+    with manager_instance.get_cursor():
+        pass
+    manager_instance.close()
+
+    with manager_instance.get_cursor():
+        pass  # 應該重新建立 tunnel 與連線
+
+    assert MockSSHTunnel.call_count == 2
+    assert MockConnect.call_count == 2
+    assert manager_instance.stats()["tunnel_starts"] == 2
+
+
+def test_connection_failure_handling(manager_instance, MockSSHTunnel):
+    """建立 tunnel 失敗時例外往外丟，池子狀態保持乾淨"""
+    MockSSHTunnel.side_effect = None
+    MockSSHTunnel.return_value.start.side_effect = Exception("SSH connection failed")
+
+    with pytest.raises(Exception, match="SSH connection failed"):
         with manager_instance.get_cursor():
             pass
 
-        # 先手動關閉連線
-        manager_instance.close()
+    assert manager_instance._tunnel is None
+    assert manager_instance.stats()["size"] == 0
+    assert manager_instance.stats()["in_use"] == 0
 
-        # 再次嘗試呼叫 get_cursor
+
+def test_connection_failure_handling_2(manager_instance, MockConnect):
+    """psycopg2.connect() 失敗時，不會留下半開的連線"""
+    MockConnect.side_effect = psycopg2.OperationalError("Database connection failed")
+
+    with pytest.raises(psycopg2.OperationalError, match="Database connection failed"):
         with manager_instance.get_cursor():
-            pass  # 應該重新建立連線
-
-        MockSSHTunnel.return_value.start.assert_called_with()
-        MockPsycopg2.connect.assert_any_call(
-            host='127.0.0.1',
-            port=MockSSHTunnel.return_value.local_bind_port,  # 使用 mock 生成的端口
-            database='dummy_db',
-            user='dummy_user',
-            password='dummy_password'
-        )
-
-    def test_connection_failure_handling_2(self, MockTimer, MockSSHTunnel, MockPsycopg2, manager_instance):
-        """測試 psycopg2.connect() 失敗時，連線會被正確處理"""
-        MockPsycopg2.connect.side_effect = psycopg2.OperationalError(
-            "Database connection failed")
-
-        with pytest.raises(psycopg2.OperationalError, match="Database connection failed"):
-            with manager_instance.get_cursor():
-                pass
-
-        assert manager_instance._conn is None
-        assert manager_instance._tunnel is None
+            pass
+
+    stats = manager_instance.stats()
+    assert stats["size"] == 0
+    assert stats["in_use"] == 0
+    # tunnel 還活著就不是 tunnel 的問題，不重建、也不拆掉
+    assert stats["tunnel_rebuilds"] == 0
+    MockConnect.assert_called_once()
@@ -0,0 +1,175 @@
+# uv run -m pytest tests/infrastructure/test_mysql_connection_pool.py
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from infrastructure.mysql_connection_pool import MySQLConnectionPool, PoolTimeoutError
+
+pytestmark = pytest.mark.contract
+
+DUMMY_DB_CONFIG = {"host": "dummy", "user": "dummy",
+                   "password": "dummy", "db": "dummy", "port": 3306}
+
+
+@pytest.fixture
+def mock_pymysql():
+    with patch('infrastructure.mysql_connection_pool.pymysql') as m:
+        # 每次 connect 都給一條新的假連線，方便區分
+        m.connect.side_effect = lambda **kw: MagicMock(name="conn")
+        yield m
+
+
+def test_connection_is_reused_across_checkouts(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG)
+
+    with pool.connection() as c1:
+        pass
+    with pool.connection() as c2:
+        pass
+
+    assert c1 is c2
+    mock_pymysql.connect.assert_called_once_with(**DUMMY_DB_CONFIG)
+    c1.close.assert_not_called()
+
+
+def test_release_rolls_back_open_transaction(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG)
+
+    with pool.connection() as conn:
+        pass
+
+    conn.rollback.assert_called_once()
+
+
+def test_exception_inside_block_still_returns_connection(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG)
+
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("boom")
+
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == 1
+
+
+def test_broken_connection_is_discarded(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG)
+
+    with pool.connection() as conn:
+        conn.rollback.side_effect = Exception("gone away")
+
+    conn.close.assert_called_once()
+    assert pool.stats()["size"] == 0
+
+
+def test_overflow_connections_are_closed_on_release(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG, max_size=1, max_overflow=1)
+
+    with pool.connection() as c1:
+        with pool.connection() as c2:
+            assert pool.stats()["in_use"] == 2
+
+    assert pool.stats()["idle"] == 1
+    assert pool.stats()["size"] == 1
+    # 後還的 c1 填不進已滿的池子 → 被關掉
+    c1.close.assert_called_once()
+    c2.close.assert_not_called()
+
+
+def test_checkout_times_out_when_exhausted(mock_pymysql):
+    pool = MySQLConnectionPool(
+        DUMMY_DB_CONFIG, max_size=1, max_overflow=0, timeout=0.05)
+
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_waiter_gets_connection_when_released(mock_pymysql):
+    pool = MySQLConnectionPool(
+        DUMMY_DB_CONFIG, max_size=1, max_overflow=0, timeout=2)
+    got = []
+    entered = threading.Event()
+
+    def worker():
+        entered.set()
+        with pool.connection() as conn:
+            got.append(conn)
+
+    with pool.connection() as first:
+        t = threading.Thread(target=worker)
+        t.start()
+        entered.wait()
+
+    t.join(timeout=2)
+    assert got == [first]
+    assert mock_pymysql.connect.call_count == 1
+
+
+def test_connection_is_recycled_after_max_lifetime(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG, recycle=0)
+
+    with pool.connection() as c1:
+        pass
+    with pool.connection() as c2:
+        pass
+
+    assert c1 is not c2
+    c1.close.assert_called_once()
+    assert pool.stats()["recycled"] == 1
+
+
+def test_idle_connection_is_pinged_and_replaced_when_dead(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG, ping_interval=0)
+
+    with pool.connection() as c1:
+        pass
+    c1.ping.side_effect = Exception("server has gone away")
+
+    with pool.connection() as c2:
+        pass
+
+    c1.ping.assert_called_once_with(reconnect=False)
+    assert c1 is not c2
+    assert pool.stats()["failed_pings"] == 1
+
+
+def test_idle_connections_past_idle_timeout_are_closed(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG, idle_timeout=0)
+
+    with pool.connection() as conn:
+        pass
+
+    conn.close.assert_called_once()
+    assert pool.stats()["size"] == 0
+    assert pool.stats()["idle_closed"] == 1
+
+
+def test_stats_counts_checkouts(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG)
+    for _ in range(3):
+        with pool.connection():
+            pass
+
+    stats = pool.stats()
+    assert stats["checkouts"] == 3
+    assert stats["created"] == 1
+    assert stats["in_use"] == 0
+    assert stats["wait_max_s"] >= 0
+
+
+def test_close_closes_idle_connections(mock_pymysql):
+    pool = MySQLConnectionPool(DUMMY_DB_CONFIG)
+    with pool.connection() as conn:
+        pass
+
+    pool.close()
+
+    conn.close.assert_called_once()
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            pass
@@ -0,0 +1,70 @@
+# uv run -m pytest tests/infrastructure/test_mysql_course_repository_units.py
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from domain.course import Course
+from infrastructure.mysql_course_repository import MySQLCourseRepository
+
+pytestmark = pytest.mark.contract
+
+
+class FakePool:
+    """記錄借了幾次連線；每次借出的 cursor 依序回傳預先排好的結果"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.checkouts = 0
+        self.queries = []
+
+    @contextmanager
+    def connection(self):
+        self.checkouts += 1
+        cur = MagicMock()
+        cur.__enter__.return_value = cur
+        cur.execute.side_effect = lambda q, p=None: self.queries.append((q, p))
+        cur.fetchall.return_value = self.results.pop(0)
+        conn = MagicMock()
+        conn.cursor.return_value = cur
+        yield conn
+
+
+def test_populate_units_fetches_deadline_overrides_in_one_query():
+    rs_pool = FakePool([[
+        {"contents_name": "C1_迴圈", "lesson_date": datetime(2025, 9, 11, 9)},
+        {"contents_name": "C2_函式", "lesson_date": datetime(2025, 9, 18, 9)},
+        {"contents_name": "C3_串列", "lesson_date": "2025-09-25 09:00:00"},
+    ]])
+    linebot_pool = FakePool([[
+        {"contents_name": "C2_函式", "OJ_D1": 3, "Summary_D1": 4},
+        {"contents_name": "C2_函式", "OJ_D1": 9, "Summary_D1": 9},
+    ]])
+    repo = MySQLCourseRepository({}, {}, linebot_pool=linebot_pool, rs_pool=rs_pool)
+    course = Course("1122_測試課程", [], 1, 3, "contest", "url", units=[])
+
+    repo.populate_units(course)
+
+    assert [u.name for u in course.units] == ["C1", "C2", "C3"]
+    # 預設期限 6 / 7 天
+    assert course.units[0].deadlines.oj_deadline == "2025-09-17 04:01:00"
+    assert course.units[0].deadlines.summary_deadline == "2025-09-18 12:01:00"
+    # 覆寫的期限取第一筆
+    assert course.units[1].deadlines.oj_deadline == "2025-09-21 04:01:00"
+    assert course.units[1].deadlines.summary_deadline == "2025-09-22 12:01:00"
+    assert course.units[2].deadlines.oj_deadline == "2025-10-01 04:01:00"
+
+    assert rs_pool.checkouts == 1
+    assert linebot_pool.checkouts == 1
+    assert linebot_pool.queries[0][1] == ("1122_測試課程",)
+
+
+def test_populate_units_skips_override_query_without_units():
+    rs_pool = FakePool([[]])
+    linebot_pool = FakePool([])
+    repo = MySQLCourseRepository({}, {}, linebot_pool=linebot_pool, rs_pool=rs_pool)
+    course = Course("1122_測試課程", [], 1, 3, "contest", "url", units=[])
+
+    assert repo.populate_units(course).units == []
+    assert linebot_pool.checkouts == 0
@@ -39,3 +39,17 @@ def test_save_event_log_inserts_correctly(repo, linebot_clean, event_log):
         assert row["student_ID"] == event_log.student_id
         assert row["operation_event"] == event_log.event_type.value
         assert row["message_log_id"] == event_log.message_log_id
+
+
+def test_save_event_logs_bulk(repo, linebot_clean):
+    message_log_id = 7_000_000_000_000_000_001  # 客戶端產生的 64-bit id
+    events = [EventLog(datetime.now(), "114514", EventEnum.CHECK_HOMEWORK,
+                       None, f"C{i}", "1122_程式設計-Python_黃鈺晴教師", message_log_id) for i in range(3)]
+
+    repo.save_event_logs(events)
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("SELECT HW_id, message_log_id FROM event_logs ORDER BY log_id")
+        rows = cur.fetchall()
+    assert [r["HW_id"] for r in rows] == ["C0", "C1", "C2"]
+    assert all(r["message_log_id"] == message_log_id for r in rows)
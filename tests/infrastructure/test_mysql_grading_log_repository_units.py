@@ -0,0 +1,101 @@
+# uv run -m pytest tests/infrastructure/test_mysql_grading_log_repository_units.py
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pymysql
+import pytest
+
+from domain.summary_repositories import SummaryFeedback
+from infrastructure.mysql_grading_log_repository import \
+    MySQLGradingLogRepository
+
+pytestmark = pytest.mark.contract
+
+COURSE = "1122_程式設計-Python_黃鈺晴教師"
+
+
+class FakePool:
+    """記錄 SQL 與 commit；fail_on 指定第幾個 execute 丟錯"""
+
+    def __init__(self, lastrowid=101, rowcount=2, fail_on=None):
+        self.queries = []
+        self.checkouts = 0
+        self.conn = MagicMock()
+        cur = MagicMock()
+        cur.__enter__.return_value = cur
+        cur.lastrowid = lastrowid
+        cur.rowcount = rowcount
+
+        def execute(q, p=None):
+            self.queries.append((q, p))
+            if fail_on is not None and len(self.queries) == fail_on:
+                raise pymysql.err.OperationalError(1205, "Lock wait timeout exceeded")
+        cur.execute.side_effect = execute
+        cur.executemany.side_effect = lambda q, rows: self.queries.append((q, rows))
+        self.conn.cursor.return_value = cur
+
+    @contextmanager
+    def connection(self):
+        self.checkouts += 1
+        yield self.conn
+
+
+def make_repo(verify_pool):
+    return MySQLGradingLogRepository({}, {}, linebot_pool=MagicMock(), verify_pool=verify_pool)
+
+
+def feedback(student_id, topic="C1", log_id=1):
+    return SummaryFeedback(student_id, topic, "多描述迴圈條件", COURSE, "摘要", log_id, "基本回饋", f"U_{student_id}")
+
+
+def test_single_write_uses_lastrowid_in_one_transaction():
+    pool = FakePool(lastrowid=101, rowcount=2)
+
+    message = make_repo(pool).write_summary_GPT_feedback_to_verify_db_with_check_repeat(
+        "S001", "C1", "多描述迴圈條件", COURSE, "摘要", 7, "基本回饋", "U1")
+
+    assert message == "已儲存至SummarySubmissions，並更新了 2 筆紀錄的狀態。"
+    assert pool.checkouts == 1
+    assert pool.conn.commit.call_count == 1
+    insert, update = pool.queries
+    assert "INSERT INTO SummarySubmissions" in insert[0]
+    # 不再用 (StudentId, SubmitTime) 回查新列
+    assert not any(q.lstrip().upper().startswith("SELECT") for q, _ in pool.queries)
+    assert update[1] == ("S001", COURSE, "C1", 101)
+
+
+def test_single_write_rolls_back_when_update_fails():
+    pool = FakePool(fail_on=2)
+
+    message = make_repo(pool).write_summary_GPT_feedback_to_verify_db_with_check_repeat(
+        "S001", "C1", "回饋", COURSE, "摘要", 7, "基本回饋", "U1")
+
+    assert message.startswith("儲存並更新至SummarySubmissions時發生錯誤")
+    pool.conn.commit.assert_not_called()
+    # 在 unit of work 裡連線不會歸還，INSERT 要當場 rollback
+    pool.conn.rollback.assert_called_once()
+
+
+def test_bulk_write_inserts_batch_and_covers_older_rows_once():
+    pool = FakePool(rowcount=3)
+    feedbacks = [feedback("S002"), feedback("S001"), feedback("S001", log_id=2)]
+
+    inserted = make_repo(pool).write_summary_GPT_feedbacks_to_verify_db(feedbacks)
+
+    assert inserted == 3
+    assert pool.checkouts == 1
+    assert pool.conn.commit.call_count == 1
+    (insert_sql, rows), (update_sql, keys) = pool.queries
+    assert "INSERT INTO SummarySubmissions" in insert_sql
+    assert [r[0] for r in rows] == ["S002", "S001", "S001"]
+    # 整批同一個送出時間
+    assert len({r[3] for r in rows}) == 1
+    assert "MAX(SubmissionId)" in update_sql
+    assert keys == ["S001", COURSE, "C1", "S002", COURSE, "C1"]
+
+
+def test_bulk_write_with_nothing_to_write_skips_database():
+    pool = FakePool()
+
+    assert make_repo(pool).write_summary_GPT_feedbacks_to_verify_db([]) == 0
+    assert pool.checkouts == 0
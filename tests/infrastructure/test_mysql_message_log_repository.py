@@ -2,7 +2,7 @@
 from datetime import datetime
 import pytest
 from infrastructure.mysql_message_log_repository import MySQLMessageLogRepository
-from domain.message_log import MessageLog
+from domain.message_log import DuplicateLogIdError, MessageLog
 
 pytestmark = pytest.mark.infrastructure
 
@@ -33,3 +33,34 @@ def test_save_event_log_inserts_correctly(repo, linebot_clean):
         assert row is not None
         assert row["student_ID"] == message_log.student_id
         assert row["message"] == message_log.message
+
+
+def test_save_message_logs_bulk_with_client_ids_is_idempotent(repo, linebot_clean):
+    logs = [MessageLog(datetime.now(), "114514", f"訊息 {i}", "1122_程式設計-Python_黃鈺晴教師",
+                       log_id=7_000_000_000_000_000_000 + i) for i in range(3)]
+
+    repo.save_message_logs(logs)
+    # 寫入失敗重送同一批不會重複、也不會報錯
+    repo.save_message_logs(logs)
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("SELECT log_id, message FROM message_logs ORDER BY log_id")
+        rows = cur.fetchall()
+    assert [r["log_id"] for r in rows] == [m.log_id for m in logs]
+    assert rows[2]["message"] == "訊息 2"
+
+
+def test_save_message_logs_rejects_same_id_with_different_message(repo, linebot_clean):
+    first = MessageLog(datetime.now(), "114514", "學生 A 的訊息", log_id=7_000_000_000_000_000_100)
+    other = MessageLog(datetime.now(), "1919810", "學生 B 的訊息", log_id=first.log_id)
+    repo.save_message_logs([first])
+
+    # 兩個行程撞號：不能默默丟掉第二筆
+    with pytest.raises(DuplicateLogIdError):
+        repo.save_message_logs([other, MessageLog(datetime.now(), "1919810", "同批", log_id=first.log_id + 1)])
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("SELECT log_id, message FROM message_logs ORDER BY log_id")
+        rows = cur.fetchall()
+    # 整批 rollback，原本那筆不變
+    assert [(r["log_id"], r["message"]) for r in rows] == [(first.log_id, "學生 A 的訊息")]
@@ -0,0 +1,143 @@
+# uv run -m pytest tests/infrastructure/test_mysql_migrator.py
+import os
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from infrastructure.mysql_migrator import (MIGRATIONS_ROOT, MigrationError,
+                                           MySQLMigrator, discover_migrations,
+                                           split_statements)
+
+pytestmark = pytest.mark.contract
+
+DUMMY_DB_CONFIG = {"host": "dummy", "user": "dummy",
+                   "password": "dummy", "db": "dummy", "port": 3306}
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    (tmp_path / "0001_first.sql").write_text("-- 說明\nCREATE INDEX a ON t (x);\n", encoding="utf-8")
+    (tmp_path / "0002_second.sql").write_text(
+        "ALTER TABLE t\n  ADD KEY b (y);\nALTER TABLE u ADD KEY c (z);\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("not a migration", encoding="utf-8")
+    return tmp_path
+
+
+def fake_connection(applied_rows):
+    conn = MagicMock(name="conn")
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchone.return_value = (1,)  # GET_LOCK
+    cur.fetchall.return_value = applied_rows
+    return conn, cur
+
+
+def executed(cur):
+    return [c.args[0].strip() for c in cur.execute.call_args_list]
+
+
+def test_split_statements_skips_comments_and_splits_on_trailing_semicolon():
+    sql = "-- 註解\nALTER TABLE t\n  ADD KEY a (x);\n\nALTER TABLE u ADD KEY b (y);\n"
+
+    assert split_statements(sql) == ["ALTER TABLE t\n  ADD KEY a (x)", "ALTER TABLE u ADD KEY b (y)"]
+
+
+def test_split_statements_supports_delimiter_for_trigger_bodies():
+    sql = ("-- 說明\n\nDELIMITER $$\n"
+           "CREATE TRIGGER t AFTER INSERT ON a FOR EACH ROW\nBEGIN\n  INSERT INTO b VALUES (NEW.id);\nEND$$\n"
+           "DELIMITER ;\n"
+           "ANALYZE TABLE b;\n")
+
+    assert split_statements(sql) == [
+        "CREATE TRIGGER t AFTER INSERT ON a FOR EACH ROW\nBEGIN\n  INSERT INTO b VALUES (NEW.id);\nEND",
+        "ANALYZE TABLE b",
+    ]
+
+
+def test_discover_orders_by_numeric_version(tmp_path):
+    (tmp_path / "10_later.sql").write_text("SELECT 1;")
+    (tmp_path / "2_earlier.sql").write_text("SELECT 1;")
+
+    assert [m.version for m in discover_migrations(str(tmp_path))] == [2, 10]
+
+
+def test_discover_rejects_duplicate_versions(tmp_path):
+    (tmp_path / "0001_a.sql").write_text("SELECT 1;")
+    (tmp_path / "001_b.sql").write_text("SELECT 1;")
+
+    with pytest.raises(MigrationError, match="duplicate"):
+        discover_migrations(str(tmp_path))
+
+
+def test_migrate_applies_only_pending_versions_in_order(migrations_dir):
+    first = discover_migrations(str(migrations_dir))[0]
+    conn, cur = fake_connection([(1, first.checksum, datetime(2025, 1, 1))])
+
+    with patch("infrastructure.mysql_migrator.pymysql.connect", return_value=conn) as connect:
+        applied = MySQLMigrator(DUMMY_DB_CONFIG, str(migrations_dir)).migrate()
+
+    assert [m.version for m in applied] == [2]
+    assert connect.call_args.kwargs["autocommit"] is True
+    statements = executed(cur)
+    assert statements[0].startswith("SELECT GET_LOCK")
+    assert "CREATE INDEX a ON t (x)" not in statements
+    assert statements.index("ALTER TABLE t\n  ADD KEY b (y)") < \
+        statements.index("ALTER TABLE u ADD KEY c (z)")
+    insert = next(c for c in cur.execute.call_args_list
+                  if c.args[0].startswith("INSERT INTO schema_migrations"))
+    assert insert.args[1][0] == 2
+    assert statements[-1].startswith("SELECT RELEASE_LOCK")
+    conn.close.assert_called_once()
+
+
+def test_migrate_refuses_modified_applied_migration(migrations_dir):
+    conn, cur = fake_connection([(1, "0" * 64, datetime(2025, 1, 1))])
+
+    with patch("infrastructure.mysql_migrator.pymysql.connect", return_value=conn):
+        with pytest.raises(MigrationError, match="0001_first.sql"):
+            MySQLMigrator(DUMMY_DB_CONFIG, str(migrations_dir)).migrate()
+
+    assert not any(s.startswith("ALTER") for s in executed(cur))
+    assert executed(cur)[-1].startswith("SELECT RELEASE_LOCK")
+
+
+def test_dry_run_and_target_do_not_run_later_versions(migrations_dir):
+    conn, cur = fake_connection([])
+
+    with patch("infrastructure.mysql_migrator.pymysql.connect", return_value=conn):
+        migrator = MySQLMigrator(DUMMY_DB_CONFIG, str(migrations_dir))
+        assert [m.version for m in migrator.migrate(dry_run=True)] == [1, 2]
+        assert not any(s.startswith(("ALTER", "CREATE INDEX")) for s in executed(cur))
+
+        assert [m.version for m in migrator.migrate(target=1)] == [1]
+        assert "CREATE INDEX a ON t (x)" in executed(cur)
+        assert not any(s.startswith("ALTER") for s in executed(cur))
+
+
+def test_migrate_stops_when_lock_is_held(migrations_dir):
+    conn, cur = fake_connection([])
+    cur.fetchone.return_value = (0,)
+
+    with patch("infrastructure.mysql_migrator.pymysql.connect", return_value=conn):
+        with pytest.raises(MigrationError, match="another migration"):
+            MySQLMigrator(DUMMY_DB_CONFIG, str(migrations_dir)).migrate()
+
+
+@pytest.mark.parametrize("database", ["linebot", "verify"])
+def test_shipped_migrations_parse(database):
+    migrations = discover_migrations(os.path.join(MIGRATIONS_ROOT, database))
+
+    assert migrations and migrations[0].version == 1
+    assert all(m.statements() for m in migrations)
+
+
+def test_linebot_migrations_bring_existing_database_up_to_code_schema():
+    """只加在 schema_linebot.sql 的變更，既有資料庫跑一次 migrate 也要拿到"""
+    statements = [" ".join(s.split()) for m in discover_migrations(os.path.join(MIGRATIONS_ROOT, "linebot"))
+                  for s in m.statements()]
+
+    # CachedStudentRepository 輪詢的失效通知表；已存在要略過
+    assert any(s.startswith("CREATE TABLE IF NOT EXISTS `identity_cache_invalidation`") for s in statements)
+    # buffered log writer 產生的 64-bit log id
+    assert "ALTER TABLE `message_logs` MODIFY `log_id` bigint NOT NULL AUTO_INCREMENT" in statements
+    assert "ALTER TABLE `event_logs` MODIFY `message_log_id` bigint DEFAULT NULL" in statements
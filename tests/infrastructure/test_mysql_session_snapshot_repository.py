@@ -0,0 +1,97 @@
+# uv run -m pytest tests/infrastructure/test_mysql_session_snapshot_repository.py -s
+import time
+
+import pytest
+
+from domain.student import RoleEnum
+from domain.user_state import UserState, UserStateEnum
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.mysql_course_repository import MySQLCourseRepository
+from infrastructure.mysql_session_snapshot_repository import \
+    MySQLSessionSnapshotRepository
+from infrastructure.mysql_student_repository import MySQLStudentRepository
+from infrastructure.mysql_user_state_repository import MySQLUserStateRepository
+
+pytestmark = pytest.mark.infrastructure
+
+COURSE = "1122_程式設計-Python_黃鈺晴教師"
+
+
+@pytest.fixture
+def pool(test_config):
+    pool = MySQLConnectionPool(test_config.LINEBOT_DB_CONFIG)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def repo(test_config, pool):
+    return MySQLSessionSnapshotRepository(test_config.LINEBOT_DB_CONFIG, pool=pool)
+
+
+@pytest.fixture(autouse=True)
+def clean_dbs(linebot_clean):
+    yield
+
+
+def test_snapshot_joins_student_course_and_state(repo, test_config, infra_seed_student):
+    infra_seed_student(student_id="114514000", user_id="lineid", name="旅歐文", context_title=COURSE)
+    MySQLUserStateRepository(test_config.LINEBOT_DB_CONFIG).save(
+        UserState("lineid", UserStateEnum.AWAITING_LEAVE_REASON))
+
+    session = repo.get_snapshot("lineid")
+
+    assert session.student.student_id == "114514000"
+    assert session.student.role == RoleEnum.STUDENT
+    assert session.course.context_title == COURSE
+    assert session.course.ta_emails == ["ta@example.com"]
+    assert session.course.units == []
+    assert session.state == UserStateEnum.AWAITING_LEAVE_REASON
+
+
+def test_snapshot_without_state_row_is_idle(repo, infra_seed_student):
+    infra_seed_student(user_id="lineid", context_title=COURSE)
+
+    assert repo.get_snapshot("lineid").state == UserStateEnum.IDLE
+
+
+def test_snapshot_matches_find_by_line_id_filters(repo, infra_seed_student):
+    infra_seed_student(student_id="1", user_id="deleted", deleted=1)
+
+    assert repo.get_snapshot("deleted") is None
+    assert repo.get_snapshot("nobody") is None
+
+
+def test_snapshot_round_trips_benchmark(repo, test_config, pool, infra_seed_student):
+    """
+    原本 webhook 進來先 find_by_line_id + get_state，handler 再 get_course_shell（都沒快取時）；
+    改成 snapshot 後只剩一次。以連線池借出次數當作往返次數，順便印出平均耗時。
+    """
+    infra_seed_student(user_id="lineid", context_title=COURSE)
+    cfg = test_config.LINEBOT_DB_CONFIG
+    students = MySQLStudentRepository(cfg, pool=pool)
+    states = MySQLUserStateRepository(cfg, pool=pool)
+    courses = MySQLCourseRepository(cfg, test_config.REVIEW_SYSTEM_DB_CONFIG, linebot_pool=pool)
+    rounds = 50
+
+    def separate_reads():
+        student = students.find_by_line_id("lineid")
+        states.get("lineid")
+        courses.get_course_shell(student.context_title)
+
+    def snapshot_read():
+        repo.get_snapshot("lineid")
+
+    results = {}
+    for name, read in (("separate", separate_reads), ("snapshot", snapshot_read)):
+        read()  # 先把連線建好
+        before = pool.stats()["checkouts"]
+        started = time.perf_counter()
+        for _ in range(rounds):
+            read()
+        elapsed = time.perf_counter() - started
+        results[name] = ((pool.stats()["checkouts"] - before) / rounds, elapsed / rounds * 1000)
+
+    print(f"\nround trips per event / avg ms: {results}")
+    assert results["separate"][0] == 3
+    assert results["snapshot"][0] == 1
@@ -0,0 +1,119 @@
+# uv run -m pytest tests/infrastructure/test_mysql_suggestion_query_repository.py
+import pytest
+
+from domain.summary_repositories import SummaryStatus
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.mysql_suggestion_query_repository import \
+    MySQLSuggestionQueryRepository
+
+pytestmark = pytest.mark.infrastructure
+
+COURSE = '課程V'
+
+
+@pytest.fixture
+def repo(test_config):
+    linebot_pool = MySQLConnectionPool(test_config.LINEBOT_DB_CONFIG)
+    verify_pool = MySQLConnectionPool(test_config.VERIFY_DB_CONFIG)
+    yield MySQLSuggestionQueryRepository(test_config.LINEBOT_DB_CONFIG, test_config.VERIFY_DB_CONFIG,
+                                         linebot_pool=linebot_pool, verify_pool=verify_pool)
+    linebot_pool.close()
+    verify_pool.close()
+
+
+@pytest.fixture
+def seeded(linebot_clean, verify_clean, infra_seed_summary_grading_log):
+    infra_seed_summary_grading_log(student_ID='S001', context_title=COURSE, contents_name='C1',
+                                   result=0, operation_time='2025-08-01 10:00:00')
+    with linebot_clean.cursor() as cur:
+        cur.execute("UPDATE summary_gradding_log SET summary = '我的總結', loss_kw = %s WHERE log_id = 1",
+                    ('["迴圈"]',))
+        cur.execute("INSERT INTO lime_explain_log (summary_gradding_log_id, excess, loss_concept_kws) "
+                    "VALUES (1, '[\"舊的\"]', '[]'), (1, '[\"多餘\"]', '[\"觀念\"]')")
+        cur.executemany(
+            "INSERT INTO concept_keyword_and_question (context_title, contents_name, kw_id, keyword, question, `del`) "
+            "VALUES (%s, 'C1_', %s, %s, %s, %s)",
+            [(COURSE, 1, '迴圈', '什麼是迴圈？', 0), (COURSE, 2, '變數', '什麼是變數？', 0),
+             (COURSE, 3, '刪掉', '不該出現', 1)])
+    return linebot_clean, verify_clean
+
+
+def add_submission(verify_conn, status, feedbacks=()):
+    with verify_conn.cursor() as cur:
+        cur.execute("INSERT INTO SummarySubmissions (summary_gradding_log_id, StudentId, verify_status, context_title) "
+                    "VALUES (1, 'S001', %s, %s)", (status, COURSE))
+        submission_id = cur.lastrowid
+        for text, at in feedbacks:
+            cur.execute("INSERT INTO TeacherFeedbacks (SubmissionId, SubmissionType, Feedback, FeedbackTime) "
+                        "VALUES (%s, 'Summary', %s, %s)", (submission_id, text, at))
+
+
+def test_status_without_log(repo, linebot_clean, verify_clean):
+    assert repo.get_summary_status('S001', COURSE, 'C1') == SummaryStatus()
+
+
+def test_status_carries_suggestion_inputs_when_not_submitted(repo, seeded):
+    status = repo.get_summary_status('S001', COURSE, 'C1')
+
+    assert status.log_id == 1
+    assert status.in_submissions is False
+    assert status.suggestion_info == repo.get_suggestion_info('S001', COURSE, 'C1')
+    assert status.suggestion_info["excess"] == ["多餘"]
+    assert sorted(zip(status.keywords, status.questions)) == \
+        sorted(zip(*repo.get_questions(COURSE, 'C1')))
+
+
+def test_status_reads_review_and_latest_teacher_feedback_across_schemas(repo, seeded):
+    _, verify_conn = seeded
+    add_submission(verify_conn, 'pass', [("舊回饋", "2025-08-02 10:00:00"),
+                                          ("新回饋", "2025-08-03 10:00:00")])
+
+    status = repo.get_summary_status('S001', COURSE, 'C1')
+
+    assert status.in_submissions is True
+    assert status.under_review is False
+    assert status.teacher_feedback == "新回饋" == repo.use_summary_grading_log_id_get_GenAI_feedback(1)
+
+
+def test_status_under_review(repo, seeded):
+    _, verify_conn = seeded
+    add_submission(verify_conn, 'wait_review')
+
+    status = repo.get_summary_status('S001', COURSE, 'C1')
+
+    assert status.under_review is True
+    assert status.teacher_feedback is None
+
+
+def test_status_is_one_round_trip(repo, seeded):
+    repo.get_summary_status('S001', COURSE, 'C1')
+
+    assert repo.linebot_pool.stats()["checkouts"] == 1
+    assert repo.verify_pool.stats()["checkouts"] == 0
+
+
+def test_suggestion_info_many_matches_per_student_lookup(repo, seeded, infra_seed_summary_grading_log):
+    linebot_conn, _ = seeded
+    infra_seed_summary_grading_log(student_ID='S002', context_title=COURSE, contents_name='C1',
+                                   result=1, operation_time='2025-08-01 11:00:00')
+    infra_seed_summary_grading_log(student_ID='S002', context_title=COURSE, contents_name='C1',
+                                   result=0, operation_time='2025-08-01 12:00:00')
+    with linebot_conn.cursor() as cur:
+        cur.execute("INSERT INTO lime_explain_log (summary_gradding_log_id, excess, loss_concept_kws) "
+                    "VALUES (2, '[\"舊 log 的\"]', '[]')")
+
+    infos = repo.get_suggestion_info_many(['S001', 'S002', 'S404'], COURSE, 'C1')
+
+    assert set(infos) == {'S001', 'S002'}
+    for sid in infos:
+        assert infos[sid] == repo.get_suggestion_info(sid, COURSE, 'C1')
+    assert infos['S001']["excess"] == ["多餘"]
+    assert infos['S002']["log_id"] == 3
+    assert infos['S002']["excess"] == []
+
+
+def test_suggestion_info_many_is_one_round_trip(repo, seeded):
+    assert repo.get_suggestion_info_many([], COURSE, 'C1') == {}
+    repo.get_suggestion_info_many(['S001', 'S002'], COURSE, 'C1')
+
+    assert repo.linebot_pool.stats()["checkouts"] == 1
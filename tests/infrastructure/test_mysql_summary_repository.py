@@ -2,6 +2,7 @@
 
 import pytest
 
+from domain.score import SummaryScoreSnapshot
 from infrastructure.mysql_summary_repository import MySQLSummaryRepository
 
 pytestmark = pytest.mark.infrastructure
@@ -102,3 +103,47 @@ def test_get_score_result_returns_0_when_no_match(infra_seed_summary_grading_log
         student_ID, context_title, contents_name, '2025-08-02 00:00:00')
 
     assert score == 0
+
+
+def test_summary_score_snapshot_without_log(repo):
+    snapshot = repo.get_summary_score_snapshot('S001', '課程V', 'C2', '2025-08-02 00:00:00')
+
+    assert snapshot == SummaryScoreSnapshot(log_id=None, under_review=False, score=None)
+
+
+def test_summary_score_snapshot_reads_review_status_across_schemas(
+        infra_seed_summary_grading_log, infra_seed_summary_submission, repo):
+    infra_seed_summary_grading_log(student_ID='S001', context_title='課程V', contents_name='C2',
+                                   operation_time='2025-08-01 16:00:00')
+    infra_seed_summary_submission(summary_gradding_log_id=1, verify_status='wait_review')
+
+    snapshot = repo.get_summary_score_snapshot('S001', '課程V', 'C2', '2025-08-02 00:00:00')
+
+    assert snapshot == SummaryScoreSnapshot(log_id=1, under_review=True, score=None)
+
+
+@pytest.mark.parametrize("result, penalty, expected", [(1, 0, 100), (0, 1, 80), (0, -1, 0)])
+def test_summary_score_snapshot_matches_separate_queries(infra_seed_summary_grading_log, repo,
+                                                         result, penalty, expected):
+    infra_seed_summary_grading_log(student_ID='S001', context_title='課程V', contents_name='C2',
+                                   result=result, penalty=penalty,
+                                   operation_time='2025-08-01 16:00:00')
+    args = ('S001', '課程V', 'C2', '2025-08-02 00:00:00')
+
+    snapshot = repo.get_summary_score_snapshot(*args)
+
+    assert snapshot.score == expected == repo.get_score_result(*args)
+    assert snapshot.log_id == repo.get_latest_log_id(*args[:3])
+    assert snapshot.under_review is False
+
+
+def test_summary_score_snapshot_uses_one_round_trip(infra_seed_summary_grading_log, repo):
+    infra_seed_summary_grading_log(student_ID='S001', context_title='課程V', contents_name='C2',
+                                   operation_time='2025-08-01 16:00:00')
+    linebot_before = repo.linebot_pool.stats()["checkouts"]
+    verify_before = repo.verify_pool.stats()["checkouts"]
+
+    repo.get_summary_score_snapshot('S001', '課程V', 'C2', '2025-08-02 00:00:00')
+
+    assert repo.linebot_pool.stats()["checkouts"] - linebot_before == 1
+    assert repo.verify_pool.stats()["checkouts"] == verify_before
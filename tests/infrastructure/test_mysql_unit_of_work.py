@@ -0,0 +1,167 @@
+# uv run -m pytest tests/infrastructure/test_mysql_unit_of_work.py
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from domain.event_log import EventEnum, EventLog
+from domain.message_log import MessageLog
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.mysql_event_log_repository import MySQLEventLogRepository
+from infrastructure.mysql_message_log_repository import \
+    MySQLMessageLogRepository
+from infrastructure.mysql_unit_of_work import (current_unit_of_work,
+                                               external_io, unit_of_work)
+
+pytestmark = pytest.mark.contract
+
+DUMMY_DB_CONFIG = {"host": "dummy", "user": "dummy",
+                   "password": "dummy", "db": "dummy", "port": 3306}
+
+
+@pytest.fixture
+def mock_pymysql():
+    with patch('infrastructure.mysql_connection_pool.pymysql') as m:
+        m.connect.side_effect = lambda **kw: MagicMock(name="conn")
+        yield m
+
+
+@pytest.fixture
+def pool(mock_pymysql):
+    return MySQLConnectionPool(DUMMY_DB_CONFIG)
+
+
+def executed(conn):
+    cur = conn.cursor.return_value.__enter__.return_value
+    return [c.args[0].strip().split()[0] for c in cur.execute.call_args_list]
+
+
+def test_repositories_share_one_connection_and_commit_once(pool):
+    messages = MySQLMessageLogRepository(DUMMY_DB_CONFIG, pool=pool)
+    events = MySQLEventLogRepository(DUMMY_DB_CONFIG, pool=pool)
+
+    with unit_of_work() as uow:
+        log_id = messages.save_message_log(
+            MessageLog(datetime.now(), "114514", "hi", "ctx", log_id=7_000_000_000_000_000_001))
+        events.save_event_log(EventLog(datetime.now(), "114514", EventEnum.CHECK_HOMEWORK,
+                                       message_log_id=log_id))
+        assert uow.connection_count == 1
+        (conn,) = {entry.conn for _, entry, _ in uow._joined.values()}
+        # repository 的 commit 先不送出
+        conn.commit.assert_not_called()
+
+    assert pool.stats()["checkouts"] == 1
+    assert pool.stats()["uow_joins"] == 2
+    conn.commit.assert_called_once()
+    assert executed(conn) == ["SET", "INSERT", "INSERT"]
+    assert pool.stats()["in_use"] == 0
+
+
+def test_exception_rolls_back_every_write(pool):
+    messages = MySQLMessageLogRepository(DUMMY_DB_CONFIG, pool=pool)
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work() as uow:
+            messages.save_message_log(MessageLog(datetime.now(), "114514", "hi", log_id=1))
+            (conn,) = {entry.conn for _, entry, _ in uow._joined.values()}
+            raise RuntimeError("LINE reply failed")
+
+    conn.commit.assert_not_called()
+    conn.rollback.assert_called()
+    assert current_unit_of_work() is None
+    assert pool.stats()["in_use"] == 0
+
+
+def test_one_connection_per_database(mock_pymysql):
+    linebot = MySQLConnectionPool(DUMMY_DB_CONFIG)
+    verify = MySQLConnectionPool(DUMMY_DB_CONFIG)
+
+    with unit_of_work() as uow:
+        for _ in range(3):
+            with linebot.connection():
+                pass
+            with verify.connection():
+                pass
+        assert uow.connection_count == 2
+
+    assert linebot.stats()["checkouts"] == 1
+    assert verify.stats()["checkouts"] == 1
+
+
+def test_read_only_unit_of_work_does_not_commit(pool):
+    with unit_of_work():
+        with pool.connection() as conn:
+            conn.cursor()
+
+    conn._conn.commit.assert_not_called()
+
+
+def test_nested_unit_of_work_joins_outer(pool):
+    with unit_of_work() as outer:
+        with unit_of_work() as inner:
+            assert inner is outer
+            with pool.connection() as conn:
+                conn.commit()
+        # 內層結束不 commit，由外層決定
+        conn._conn.commit.assert_not_called()
+    conn._conn.commit.assert_called_once()
+
+
+def test_other_threads_do_not_join(pool):
+    seen = {}
+
+    def background():
+        with pool.connection() as conn:
+            seen["conn"] = conn
+
+    with unit_of_work():
+        with pool.connection() as mine:
+            t = threading.Thread(target=background)
+            t.start()
+            t.join()
+
+    assert seen["conn"] is not mine
+    assert pool.stats()["checkouts"] == 2
+
+
+def test_without_unit_of_work_behaviour_is_unchanged(pool):
+    with pool.connection() as c1:
+        c1.commit()
+    c1.commit.assert_called_once()
+    assert pool.stats()["uow_joins"] == 0
+
+
+def test_external_io_commits_and_returns_connection_first(pool):
+    messages = MySQLMessageLogRepository(DUMMY_DB_CONFIG, pool=pool)
+    seen = {}
+
+    @external_io
+    def reply():
+        seen["in_use"] = pool.stats()["in_use"]
+
+    with pytest.raises(RuntimeError):
+        with unit_of_work() as uow:
+            messages.save_message_log(MessageLog(datetime.now(), "114514", "hi", log_id=1))
+            (first,) = {entry.conn for _, entry, _ in uow._joined.values()}
+            reply()
+            # 回覆學生之前就已經 commit，連線和列鎖都放掉了
+            first.commit.assert_called_once()
+            assert seen["in_use"] == 0 and uow.connection_count == 0
+            # 之後的查詢重新借連線，仍在同一個 unit of work
+            messages.save_message_log(MessageLog(datetime.now(), "114514", "again", log_id=2))
+            assert uow.connection_count == 1
+            raise RuntimeError("failed after reply")
+
+    # 回覆之後出錯只 rollback checkpoint 之後的寫入
+    first.commit.assert_called_once()
+    assert uow.checkpoints == 1
+    assert pool.stats()["in_use"] == 0
+
+
+def test_external_io_outside_unit_of_work_is_plain_call():
+    @external_io
+    def reply(x):
+        return x + 1
+
+    assert reply(1) == 2
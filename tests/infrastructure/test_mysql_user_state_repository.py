@@ -1,4 +1,6 @@
 # uv run -m pytest tests/infrastructure/test_mysql_user_state_repository.py
+import threading
+
 import pytest
 from infrastructure.mysql_user_state_repository import MySQLUserStateRepository
 from domain.user_state import UserState, UserStateEnum
@@ -35,3 +37,54 @@ def test_delete_user_state(repo, linebot_clean):
     result = repo.get("U_test")
 
     assert result is None
+
+
+def test_transition_without_expected_state_upserts(repo, linebot_clean):
+    assert repo.transition("U_test", UserStateEnum.AWAITING_TA_QUESTION) is True
+    assert repo.transition("U_test", UserStateEnum.IDLE) is True
+
+    assert repo.get("U_test").status == UserStateEnum.IDLE
+
+
+def test_transition_compare_and_set(repo, linebot_clean):
+    # 沒有紀錄視為 IDLE
+    assert repo.transition("U_test", UserStateEnum.AWAITING_LEAVE_REASON,
+                           expected_state=UserStateEnum.AWAITING_TA_QUESTION) is False
+    assert repo.get("U_test") is None
+
+    assert repo.transition("U_test", UserStateEnum.AWAITING_LEAVE_REASON,
+                           expected_state=UserStateEnum.IDLE) is True
+    assert repo.transition("U_test", UserStateEnum.AWAITING_TA_QUESTION,
+                           expected_state=UserStateEnum.IDLE) is False
+    assert repo.transition("U_test", UserStateEnum.IDLE,
+                           expected_state=UserStateEnum.AWAITING_LEAVE_REASON) is True
+
+    assert repo.get("U_test").status == UserStateEnum.IDLE
+
+
+def test_transition_keeps_context(repo, linebot_clean):
+    repo.save(UserState("U_test", UserStateEnum.IDLE, {"unit": "C1"}))
+
+    repo.transition("U_test", UserStateEnum.AWAITING_CONTENTS_NAME)
+
+    assert repo.get("U_test").context == {"unit": "C1"}
+
+
+def test_concurrent_conflicting_transitions_only_one_wins(repo, linebot_clean):
+    repo.save(UserState("U_test", UserStateEnum.AWAITING_LEAVE_REASON))
+    barrier = threading.Barrier(8)
+    results = []
+
+    def consume():
+        barrier.wait()
+        results.append(repo.transition(
+            "U_test", UserStateEnum.IDLE, expected_state=UserStateEnum.AWAITING_LEAVE_REASON))
+
+    threads = [threading.Thread(target=consume) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    assert results.count(True) == 1
+    assert repo.get("U_test").status == UserStateEnum.IDLE
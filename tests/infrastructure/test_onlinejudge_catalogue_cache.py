@@ -0,0 +1,73 @@
+# uv run -m pytest tests/infrastructure/test_onlinejudge_catalogue_cache.py
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from infrastructure.onlinejudge_catalogue_cache import (
+    CatalogueEntry, OnlinejudgeCatalogueCache)
+
+pytestmark = pytest.mark.unit
+
+KEY = ("中央_1122", "C1", "E")
+
+
+def make_entry(loaded_at=None):
+    return CatalogueEntry(contest_ids=(1,), problem_ids=(10, 11),
+                          problem_codes=frozenset({"C1_E1", "C1_E2"}),
+                          submission_problem_ids=(10, 11),
+                          loaded_at=time.monotonic() if loaded_at is None else loaded_at)
+
+
+def test_entry_is_loaded_once_within_ttl():
+    cache = OnlinejudgeCatalogueCache(ttl=60)
+    loader = MagicMock(side_effect=make_entry)
+
+    assert cache.get_or_load(KEY, loader).total == 2
+    cache.get_or_load(KEY, loader)
+
+    loader.assert_called_once()
+    assert cache.stats()["hits"] == 1
+
+
+def test_expired_entry_is_reloaded():
+    cache = OnlinejudgeCatalogueCache(ttl=60)
+    loader = MagicMock(side_effect=[make_entry(loaded_at=0), make_entry()])
+
+    cache.get_or_load(KEY, loader)
+    cache.get_or_load(KEY, loader)
+
+    assert loader.call_count == 2
+
+
+def test_refresh_only_drops_matching_keys():
+    cache = OnlinejudgeCatalogueCache(ttl=60)
+    cache.get_or_load(KEY, make_entry)
+    cache.get_or_load(("中央_1122", "C2", "E"), make_entry)
+
+    assert cache.refresh(contents_name="C1") == 1
+    assert cache.stats()["entries"] == 1
+    assert cache.refresh() == 1
+
+
+def test_concurrent_misses_load_once():
+    cache = OnlinejudgeCatalogueCache(ttl=60)
+    gate = threading.Event()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        gate.wait(1)
+        return make_entry()
+
+    threads = [threading.Thread(target=cache.get_or_load, args=(KEY, slow_loader))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join(2)
+
+    assert len(calls) == 1
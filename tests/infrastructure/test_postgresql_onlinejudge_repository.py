@@ -8,59 +8,114 @@ print(ojdb.get_exercise_submission_by_contents_name('中央_1132', 'C2', '113409
 
 """
 # uv run -m pytest tests/infrastructure/test_postgresql_onlinejudge_repository.py
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 
 import pytest
 
+from domain.score import UnitProgress
+from infrastructure.onlinejudge_catalogue_cache import OnlinejudgeCatalogueCache
 from infrastructure.postgresql_onlinejudge_repository import PostgreSQLOnlinejudgeRepository
 
 pytestmark = pytest.mark.contract
 
+# (contest.id, problem.id, problem._id, 題號是否符合 submission 的 prefix 規則)
+CATALOGUE_ROWS = [
+    (7, 101, "Chapter1_E1", True),
+    (7, 102, "Chapter1_E2", True),
+    (7, 103, "X_Chapter1_E3", False),
+    (8, None, None, False),
+]
+
+
+@pytest.fixture
+def mock_cursor():
+    cursor = MagicMock()
+    cursor.fetchall.return_value = CATALOGUE_ROWS
+    cursor.fetchone.return_value = (15,)
+    return cursor
+
 
 @pytest.fixture
-def repo():
+def repo(mock_cursor):
     db_config = {'host': 'dummy', 'port': 5432, 'user': 'dummy',
                  'password': 'dummy', 'database': 'dummy'}
     ssh_config = {'ssh_host': 'dummy',
                   'ssh_username': 'dummy', 'ssh_password': 'dummy'}
-    return PostgreSQLOnlinejudgeRepository(db_config, ssh_config)
+    pool = MagicMock()
+    pool.get_cursor.return_value.__enter__.return_value = mock_cursor
+    return PostgreSQLOnlinejudgeRepository(db_config, ssh_config, pool=pool,
+                                           catalogue=OnlinejudgeCatalogueCache(ttl=60))
 
 
-@pytest.fixture
-def mock_postgresql_connection():
-    mock_tunnel = MagicMock()
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_cursor.fetchone.return_value = (15,)
-    mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-    return mock_tunnel, mock_conn, mock_cursor
+def test_get_exercise_number_by_contents_name(mock_cursor, repo):
+    result = repo.get_exercise_number_by_contents_name("MyContest", "Chapter1")
 
+    assert result == 3
+    mock_cursor.execute.assert_called_once()
+    _, params = mock_cursor.execute.call_args[0]
+    assert params["problem_like"] == "%Chapter1_E%"
+    assert params["submission_like"] == "Chapter1_E%"
+    assert params["contest_title_like"] == "%MyContest%Chapter1%Exercise%"
 
-@patch('infrastructure.postgresql_onlinejudge_repository.PostgreSQLOnlinejudgeRepository._get_connection')
-def test_get_exercise_number_by_contents_name(mock_get_connection, mock_postgresql_connection, repo):
-    mock_tunnel, mock_conn, mock_cursor = mock_postgresql_connection
-    mock_get_connection.return_value = (mock_tunnel, mock_conn)
 
-    result = repo.get_exercise_number_by_contents_name("MyContest", "Chapter1")
+def test_catalogue_is_cached_per_contest_unit_and_type(mock_cursor, repo):
+    repo.get_exercise_number_by_contents_name("MyContest", "Chapter1")
+    repo.get_exercise_number_by_contents_name("MyContest", "Chapter1")
+    assert mock_cursor.execute.call_count == 1
+
+    repo.get_advance_number_by_contents_name("MyContest", "Chapter1")
+    assert mock_cursor.execute.call_count == 2
 
-    assert result == 15
-    mock_cursor.execute.assert_called_once()
-    query, params = mock_cursor.execute.call_args[0]
-    assert params == ("%Chapter1_E%", "%MyContest%Chapter1%Exercise%")
 
+def test_refresh_catalogue_forces_reload(mock_cursor, repo):
+    repo.get_exercise_number_by_contents_name("MyContest", "Chapter1")
 
-@patch('infrastructure.postgresql_onlinejudge_repository.PostgreSQLOnlinejudgeRepository._get_connection')
-def test_get_advance_submission_by_contents_name_found(mock_get_connection, mock_postgresql_connection, repo):
-    mock_tunnel, mock_conn, mock_cursor = mock_postgresql_connection
-    mock_get_connection.return_value = (mock_tunnel, mock_conn)
+    assert repo.refresh_catalogue("MyContest") == 1
+    repo.get_exercise_number_by_contents_name("MyContest", "Chapter1")
 
+    assert mock_cursor.execute.call_count == 2
+
+
+def test_get_advance_submission_filters_by_resolved_ids(mock_cursor, repo):
     result = repo.get_advance_submission_by_contents_name(
         "MyContest", "Chapter2", "b12345678", "2025-08-03 23:59:59"
     )
 
     assert result == 15
+    query, params = mock_cursor.execute.call_args[0]
+    assert "ILIKE %(problem_like)s" not in query
+    assert params["problem_ids"] == [101, 102]
+    assert params["contest_ids"] == [7, 8]
+    assert params["deadline"] == "2025-08-03 23:59:59"
+    assert params["username_like"] == "b12345678@%"
+    assert params["stdID"] == "b12345678"
+
+
+def test_submission_count_skips_query_when_no_problems(mock_cursor, repo):
+    mock_cursor.fetchall.return_value = [(8, None, None, False)]
+
+    result = repo.get_exercise_submission_by_contents_name(
+        "MyContest", "Chapter9", "b12345678", "2025-08-03 23:59:59")
+
+    assert result == 0
+    # 只有載入目錄的那一次
+    mock_cursor.execute.assert_called_once()
+
+
+def test_get_unit_progress_uses_catalogue_and_single_query(mock_cursor, repo):
+    mock_cursor.fetchone.return_value = (2, 1)
+
+    result = repo.get_unit_progress(
+        "MyContest", "Chapter1", "b12345678", "2025-08-03 23:59:59")
+
+    assert result == UnitProgress(
+        exercise_total=3, exercise_done=2, advance_total=3, advance_done=1)
+    # 兩次載入目錄（E / A）+ 一次完成數查詢
+    assert mock_cursor.execute.call_count == 3
+
+    repo.get_unit_progress(
+        "MyContest", "Chapter1", "b12345678", "2025-08-03 23:59:59")
+    assert mock_cursor.execute.call_count == 4
     _, params = mock_cursor.execute.call_args[0]
-    assert params[0] == "Chapter2_A%"
-    assert params[1] == "2025-08-03 23:59:59"
-    assert params[2] == "b12345678@%"
-    assert params[3] == "b12345678"
+    assert params["exercise_problem_ids"] == [101, 102]
+    assert params["exercise_contest_ids"] == [7, 8]
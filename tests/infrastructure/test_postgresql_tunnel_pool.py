@@ -0,0 +1,272 @@
+# uv run -m pytest tests/infrastructure/test_postgresql_tunnel_pool.py
+import threading
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+
+from infrastructure.postgresql_tunnel_pool import TunneledPostgreSQLPool
+
+pytestmark = pytest.mark.contract
+
+DUMMY_DB_CONFIG = {"host": "dummy_db_host", "port": "5432", "database": "dummy_db",
+                   "user": "dummy_user", "password": "dummy_password"}
+DUMMY_SSH_CONFIG = {"ssh_host": "dummy_host", "ssh_username": "dummy_user",
+                    "ssh_password": "dummy_password"}
+
+
+@pytest.fixture
+def mock_tunnel_cls():
+    with patch('infrastructure.postgresql_tunnel_pool.SSHTunnelForwarder') as m:
+        m.side_effect = lambda *a, **kw: MagicMock(
+            name="tunnel", is_active=True, local_bind_port=40000)
+        yield m
+
+
+@pytest.fixture
+def mock_connect():
+    with patch('infrastructure.postgresql_tunnel_pool.psycopg2.connect') as m:
+        m.side_effect = lambda **kw: MagicMock(name="conn", closed=0)
+        yield m
+
+
+@pytest.fixture
+def pool(mock_tunnel_cls, mock_connect):
+    p = TunneledPostgreSQLPool(DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG,
+                               pool_size=2, idle_timeout=None, timeout=0.5)
+    yield p
+    p.close()
+
+
+def test_initial_state_is_lazy(pool, mock_tunnel_cls, mock_connect):
+    assert pool._tunnel is None
+    mock_tunnel_cls.assert_not_called()
+    mock_connect.assert_not_called()
+
+
+def test_tunnel_and_connection_are_reused(pool, mock_tunnel_cls, mock_connect):
+    for _ in range(3):
+        with pool.get_cursor():
+            pass
+
+    mock_tunnel_cls.assert_called_once()
+    assert mock_tunnel_cls.call_args.kwargs["remote_bind_address"] == ("dummy_db_host", 5432)
+    mock_connect.assert_called_once()
+    assert mock_connect.call_args.kwargs["port"] == 40000
+    assert pool.stats()["checkouts"] == 3
+    assert pool.stats()["tunnel_starts"] == 1
+
+
+def test_release_rolls_back(pool):
+    with pool.get_cursor():
+        pass
+
+    pool._idle[0].conn.rollback.assert_called_once()
+
+
+def test_concurrent_checkouts_share_one_tunnel(pool, mock_tunnel_cls, mock_connect):
+    with pool.get_cursor():
+        with pool.get_cursor():
+            assert pool.stats()["in_use"] == 2
+
+    mock_tunnel_cls.assert_called_once()
+    assert mock_connect.call_count == 2
+    assert pool.stats()["idle"] == 2
+
+
+def test_checkout_times_out_when_exhausted(pool):
+    with pool.get_cursor(), pool.get_cursor():
+        with pytest.raises(TimeoutError):
+            with pool.get_cursor():
+                pass
+    assert pool.stats()["wait_timeouts"] == 1
+
+
+def test_waiter_gets_connection_when_released(mock_tunnel_cls, mock_connect):
+    pool = TunneledPostgreSQLPool(DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG,
+                                  pool_size=1, idle_timeout=None, timeout=2)
+    done = []
+    entered = threading.Event()
+
+    def worker():
+        entered.set()
+        with pool.get_cursor():
+            done.append(True)
+
+    with pool.get_cursor():
+        t = threading.Thread(target=worker)
+        t.start()
+        entered.wait()
+
+    t.join(timeout=2)
+    assert done == [True]
+    mock_connect.assert_called_once()
+
+
+def test_dead_tunnel_is_rebuilt(pool, mock_tunnel_cls, mock_connect):
+    with pool.get_cursor():
+        pass
+    first_tunnel = pool._tunnel
+    first_tunnel.is_active = False
+    # 池子裡的連線也跟著失效
+    pool._idle[0].conn.closed = 1
+
+    with pool.get_cursor():
+        pass
+
+    first_tunnel.close.assert_called_once()
+    assert mock_tunnel_cls.call_count == 2
+    assert pool.stats()["reconnects"] == 1
+    assert pool.stats()["tunnel_rebuilds"] == 1
+
+
+def test_operational_error_discards_connection(pool):
+    with pytest.raises(psycopg2.OperationalError):
+        with pool.get_cursor():
+            raise psycopg2.OperationalError("server closed the connection")
+
+    assert pool.stats()["size"] == 0
+    assert pool.stats()["in_use"] == 0
+
+
+def test_liveness_check_only_after_idle_threshold(mock_tunnel_cls, mock_connect):
+    pool = TunneledPostgreSQLPool(DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG,
+                                  idle_timeout=None, liveness_check_after=0)
+    with pool.get_cursor():
+        pass
+    conn = pool._idle[0].conn
+    conn.cursor.return_value.__enter__.return_value.execute.side_effect = \
+        psycopg2.OperationalError("dead")
+
+    with pool.get_cursor():
+        pass
+
+    conn.close.assert_called_once()
+    assert mock_connect.call_count == 2
+    assert pool.stats()["liveness_checks"] == 1
+
+
+def test_idle_timeout_closes_connections_and_tunnel(mock_tunnel_cls, mock_connect):
+    with patch('infrastructure.postgresql_tunnel_pool.threading.Timer') as MockTimer:
+        pool = TunneledPostgreSQLPool(
+            DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG, idle_timeout=5)
+        with pool.get_cursor():
+            pass
+
+        tunnel = pool._tunnel
+        conn = pool._idle[0].conn
+        MockTimer.assert_called_once_with(5, pool._close_if_idle)
+
+        # 模擬計時器到期
+        pool._close_if_idle()
+
+    conn.close.assert_called_once()
+    tunnel.close.assert_called_once()
+    assert pool._tunnel is None
+    assert pool.stats()["size"] == 0
+    assert pool.stats()["idle_closes"] == 1
+
+
+def test_ssh_disabled_connects_directly(mock_tunnel_cls, mock_connect):
+    pool = TunneledPostgreSQLPool(DUMMY_DB_CONFIG, {"enabled": False},
+                                  idle_timeout=None)
+    with pool.get_cursor():
+        pass
+
+    mock_tunnel_cls.assert_not_called()
+    assert mock_connect.call_args.kwargs["host"] == "dummy_db_host"
+    assert mock_connect.call_args.kwargs["port"] == 5432
+
+
+def test_acquire_during_idle_close_waits_and_reopens_tunnel(mock_tunnel_cls, mock_connect):
+    with patch('infrastructure.postgresql_tunnel_pool.threading.Timer'):
+        pool = TunneledPostgreSQLPool(
+            DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG, idle_timeout=5, timeout=2)
+        with pool.get_cursor():
+            pass
+        old_tunnel, old_conn = pool._tunnel, pool._idle[0].conn
+        closing, finish = threading.Event(), threading.Event()
+
+        def slow_close():
+            closing.set()
+            assert finish.wait(timeout=2)
+        old_tunnel.close.side_effect = slow_close
+
+        closer = threading.Thread(target=pool._close_if_idle)
+        closer.start()
+        assert closing.wait(timeout=2)
+
+        got = []
+        borrower = threading.Thread(target=lambda: got.append(pool._acquire()))
+        borrower.start()
+        borrower.join(timeout=0.2)
+        # tunnel 還在關，借連線的要等，不能拿到舊連線或用到舊 tunnel
+        assert borrower.is_alive()
+
+        finish.set()
+        closer.join(timeout=2)
+        borrower.join(timeout=2)
+
+    entry = got[0]
+    assert entry.conn is not old_conn
+    old_conn.close.assert_called_once()
+    assert mock_tunnel_cls.call_count == 2
+    assert pool._tunnel is not old_tunnel
+    pool._release(entry)
+    assert pool.stats()["idle"] == 1
+
+
+def test_connection_borrowed_across_close_is_discarded_on_release(pool):
+    entry = pool._acquire()
+
+    pool.close()
+    pool._release(entry)
+
+    entry.conn.close.assert_called_once()
+    assert pool.stats()["idle"] == 0
+    assert pool.stats()["size"] == 0
+
+
+def test_connect_error_on_live_tunnel_keeps_tunnel_and_other_connections(pool, mock_tunnel_cls, mock_connect):
+    busy = pool._acquire()
+    tunnel = pool._tunnel
+    # 例如 max_connections 滿了：tunnel 本身沒問題
+    mock_connect.side_effect = psycopg2.OperationalError("too many clients already")
+
+    with pytest.raises(psycopg2.OperationalError):
+        pool._acquire()
+
+    tunnel.close.assert_not_called()
+    assert mock_tunnel_cls.call_count == 1
+    assert pool.stats()["tunnel_rebuilds"] == 0
+    pool._release(busy)
+    busy.conn.close.assert_not_called()
+    assert pool.stats()["idle"] == 1
+
+
+def test_connections_on_dead_tunnel_are_retired_after_rebuild(pool, mock_tunnel_cls, mock_connect):
+    busy = pool._acquire()
+    pool._tunnel.is_active = False
+
+    fresh = pool._acquire()
+    pool._release(busy)
+    pool._release(fresh)
+
+    assert mock_tunnel_cls.call_count == 2
+    # 舊 tunnel 上借出的連線歸還時淘汰，不會回到閒置池
+    busy.conn.close.assert_called_once()
+    assert [e.conn for e in pool._idle] == [fresh.conn]
+    assert pool.stats()["size"] == 1
+
+
+def test_statement_timeout_is_set_on_each_connection(mock_tunnel_cls, mock_connect):
+    pool = TunneledPostgreSQLPool(DUMMY_DB_CONFIG, DUMMY_SSH_CONFIG,
+                                  idle_timeout=None, statement_timeout=5)
+    with pool.get_cursor():
+        pass
+
+    kwargs = mock_connect.call_args.kwargs
+    assert kwargs["options"] == "-c statement_timeout=5000"
+    assert kwargs["connect_timeout"] == 5
+    pool.close()
+
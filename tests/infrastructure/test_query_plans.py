@@ -0,0 +1,146 @@
+# uv run -m pytest tests/infrastructure/test_query_plans.py
+"""
+熱路徑查詢的執行計畫檢查。
+
+直接呼叫 repository 方法，把實際送出的 SQL（已代入參數）記下來再 EXPLAIN；
+hot table 出現 type=ALL（全表掃描）就失敗，代表 migrations/ 裡的索引沒建好或查詢被改壞了。
+資料表先塞幾百筆其他學生的資料並 ANALYZE，避免優化器因為表太小直接選全表掃描。
+"""
+import pymysql
+import pytest
+
+from infrastructure.mysql_connection_pool import MySQLConnectionPool
+from infrastructure.mysql_feedback_push_repository import \
+    MySQLFeedbackPushRepository
+from infrastructure.mysql_grading_log_repository import \
+    MySQLGradingLogRepository
+from infrastructure.mysql_session_snapshot_repository import \
+    MySQLSessionSnapshotRepository
+from infrastructure.mysql_student_repository import MySQLStudentRepository
+from infrastructure.mysql_suggestion_query_repository import \
+    MySQLSuggestionQueryRepository
+from infrastructure.mysql_summary_repository import MySQLSummaryRepository
+
+pytestmark = pytest.mark.infrastructure
+
+COURSE = "1122_程式設計-Python_黃鈺晴教師"
+FILLER_ROWS = 300
+
+# 課程設定表只有幾列，全表掃描是合理的
+FULL_SCAN_ALLOWED = {"course_info", "ci"}
+
+
+@pytest.fixture(autouse=True)
+def seeded(linebot_clean, verify_clean, infra_seed_student):
+    infra_seed_student(student_id="S001", user_id="U_HOT", context_title=COURSE)
+    with linebot_clean.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO account_info (student_ID, line_userID, student_name, context_title, roleid, `del`) "
+            "VALUES (%s, %s, 'x', %s, 5, 0)",
+            [(f"F{i:05d}", f"U_FILLER_{i:05d}", COURSE) for i in range(FILLER_ROWS)])
+        cur.executemany(
+            "INSERT INTO summary_gradding_log (student_ID, context_title, contents_name, result, penalty, operation_time) "
+            "VALUES (%s, %s, %s, %s, 0, '2025-08-01 10:00:00')",
+            [(f"F{i:05d}", COURSE, f"C{i % 10}", i % 2) for i in range(FILLER_ROWS)]
+            + [("S001", COURSE, "C1", 1)])
+        cur.executemany(
+            "INSERT INTO summary_feedback_push (operation_time, context_title, contents_name, student_ID) "
+            "VALUES ('2025-08-01 10:00:00', %s, %s, %s)",
+            [(COURSE, f"C{i % 10}", f"F{i:05d}") for i in range(FILLER_ROWS)])
+        cur.executemany(
+            "INSERT INTO lime_explain_log (summary_gradding_log_id, excess, loss_concept_kws) VALUES (%s, '[]', '[]')",
+            [(i + 1,) for i in range(FILLER_ROWS)])
+        for table in ("account_info", "summary_gradding_log", "summary_feedback_push", "lime_explain_log"):
+            cur.execute(f"ANALYZE TABLE `{table}`")
+    with verify_clean.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO SummarySubmissions (summary_gradding_log_id, StudentId, verify_status, context_title) "
+            "VALUES (%s, %s, %s, %s)",
+            [(i + 1, f"F{i:05d}", "wait_review" if i % 3 else "pass", COURSE) for i in range(FILLER_ROWS)])
+        cur.executemany(
+            "INSERT INTO TeacherFeedbacks (SubmissionId, SubmissionType, Feedback) VALUES (%s, 'Summary', 'ok')",
+            [(i + 1,) for i in range(FILLER_ROWS)])
+        cur.execute("ANALYZE TABLE `SummarySubmissions`, `TeacherFeedbacks`")
+
+
+@pytest.fixture
+def recorded_sql(monkeypatch):
+    """記下每個 repository 實際送出的 (資料庫, SQL)"""
+    statements = []
+    original = pymysql.cursors.Cursor.execute
+
+    def recording_execute(self, query, args=None):
+        db = self.connection.db
+        statements.append((db.decode() if isinstance(db, bytes) else db, self.mogrify(query, args)))
+        return original(self, query, args)
+
+    monkeypatch.setattr(pymysql.cursors.Cursor, "execute", recording_execute)
+    return statements
+
+
+@pytest.fixture
+def repos(test_config):
+    linebot_pool = MySQLConnectionPool(test_config.LINEBOT_DB_CONFIG)
+    verify_pool = MySQLConnectionPool(test_config.VERIFY_DB_CONFIG)
+    pools = dict(linebot_pool=linebot_pool, verify_pool=verify_pool)
+    linebot, verify = test_config.LINEBOT_DB_CONFIG, test_config.VERIFY_DB_CONFIG
+    yield {
+        "summary": MySQLSummaryRepository(linebot, verify, **pools),
+        "grading_log": MySQLGradingLogRepository(linebot, verify, **pools),
+        "suggestion": MySQLSuggestionQueryRepository(linebot, verify, **pools),
+        "push": MySQLFeedbackPushRepository(linebot, linebot_pool=linebot_pool),
+        "student": MySQLStudentRepository(linebot, pool=linebot_pool),
+        "session": MySQLSessionSnapshotRepository(linebot, pool=linebot_pool),
+    }
+    linebot_pool.close()
+    verify_pool.close()
+
+
+HOT_QUERIES = {
+    "summary.get_latest_log_id": lambda r: r["summary"].get_latest_log_id("S001", COURSE, "C1"),
+    "summary.is_log_under_review": lambda r: r["summary"].is_log_under_review(42),
+    "summary.get_score_result": lambda r: r["summary"].get_score_result(
+        "S001", COURSE, "C1", "2025-08-02 00:00:00"),
+    "summary.get_summary_score_snapshot": lambda r: r["summary"].get_summary_score_snapshot(
+        "S001", COURSE, "C1", "2025-08-02 00:00:00"),
+    "grading_log.get_latest_log_id": lambda r: r["grading_log"].get_latest_log_id("S001", COURSE, "C1"),
+    "grading_log.get_summary_gradding_times": lambda r: r["grading_log"].get_summary_gradding_times(
+        "S001", COURSE, "C1"),
+    "suggestion.is_log_under_review": lambda r: r["suggestion"].is_log_under_review(42),
+    "suggestion.check_summary_in_SummarySubmissions": lambda r: r["suggestion"].check_summary_in_SummarySubmissions(42),
+    "suggestion.get_suggestion_info": lambda r: r["suggestion"].get_suggestion_info("S001", COURSE, "C1"),
+    "suggestion.get_summary_status": lambda r: r["suggestion"].get_summary_status("S001", COURSE, "C1"),
+    "suggestion.get_suggestion_info_many": lambda r: r["suggestion"].get_suggestion_info_many(
+        ["S001", "F00001", "F00011"], COURSE, "C1"),
+    "push.check_summary_feedback_push": lambda r: r["push"].check_summary_feedback_push("S001", COURSE, "C1"),
+    "push.get_pushed_student_ids": lambda r: r["push"].get_pushed_student_ids(
+        ["S001", "F00001", "F00011"], COURSE, "C1"),
+    "student.find_by_line_id": lambda r: r["student"].find_by_line_id("U_HOT"),
+    "session.get_snapshot": lambda r: r["session"].get_snapshot("U_HOT"),
+}
+
+
+def explain(test_config, db: str, sql: str) -> list[dict]:
+    cfg = dict(test_config.LINEBOT_DB_CONFIG, db=db)
+    conn = pymysql.connect(**cfg, cursorclass=pymysql.cursors.DictCursor)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN " + sql)
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_does_not_full_scan(name, repos, recorded_sql, test_config):
+    HOT_QUERIES[name](repos)
+    selects = [(db, sql) for db, sql in recorded_sql
+               if sql.lstrip().upper().startswith(("SELECT", "WITH"))]
+    assert selects, f"{name} did not run any SELECT"
+
+    for db, sql in selects:
+        plan = explain(test_config, db, sql)
+        scans = [row for row in plan
+                 if row["type"] == "ALL" and row["table"] not in FULL_SCAN_ALLOWED
+                 and not row["table"].startswith("<")]
+        assert not scans, f"{name} full-scans {[row['table'] for row in scans]}:\n{sql}\n{plan}"
@@ -0,0 +1,84 @@
+# uv run -m pytest tests/infrastructure/test_summary_latest_log.py
+import pytest
+
+from infrastructure.mysql_grading_log_repository import \
+    MySQLGradingLogRepository
+from infrastructure.mysql_summary_repository import MySQLSummaryRepository
+
+pytestmark = pytest.mark.infrastructure
+
+COURSE = '課程V'
+
+
+@pytest.fixture
+def repos(test_config):
+    return (MySQLSummaryRepository(test_config.LINEBOT_DB_CONFIG, test_config.VERIFY_DB_CONFIG),
+            MySQLGradingLogRepository(test_config.LINEBOT_DB_CONFIG, test_config.VERIFY_DB_CONFIG))
+
+
+@pytest.fixture(autouse=True)
+def clean_dbs(linebot_clean, verify_clean):
+    yield
+
+
+def latest_row(conn, contents_name='C1'):
+    with conn.cursor() as cur:
+        cur.execute("SELECT * FROM summary_latest_log WHERE student_ID = 'S001' "
+                    "AND context_title = %s AND contents_name = %s", (COURSE, contents_name))
+        return cur.fetchone()
+
+
+def test_insert_keeps_pointer_on_latest_operation_time(infra_seed_summary_grading_log, linebot_clean, repos):
+    seed = dict(student_ID='S001', context_title=COURSE, contents_name='C1')
+    infra_seed_summary_grading_log(**seed, result=0, operation_time='2025-08-02 10:00:00')
+    # 晚寫入但時間比較早（例如補登）不會蓋掉指標
+    infra_seed_summary_grading_log(**seed, result=1, operation_time='2025-08-01 10:00:00')
+    infra_seed_summary_grading_log(**dict(seed, contents_name='C2'), operation_time='2025-08-03 10:00:00')
+
+    row = latest_row(linebot_clean)
+
+    assert row["log_id"] == 1
+    assert row["result"] == 0
+    assert row["operation_time"] == '2025-08-02 10:00:00'
+    for repo in repos:
+        assert repo.get_latest_log_id('S001', COURSE, 'C1') == 1
+        assert repo.get_latest_log_id('S001', COURSE, 'C2') == 3
+
+
+def test_same_operation_time_prefers_larger_log_id(infra_seed_summary_grading_log, linebot_clean):
+    seed = dict(student_ID='S001', context_title=COURSE, contents_name='C1',
+                operation_time='2025-08-01 10:00:00')
+    infra_seed_summary_grading_log(**seed)
+    infra_seed_summary_grading_log(**seed)
+
+    assert latest_row(linebot_clean)["log_id"] == 2
+
+
+def test_update_and_delete_refresh_pointer(infra_seed_summary_grading_log, linebot_clean):
+    seed = dict(student_ID='S001', context_title=COURSE, contents_name='C1')
+    infra_seed_summary_grading_log(**seed, operation_time='2025-08-01 10:00:00')
+    infra_seed_summary_grading_log(**seed, result=0, operation_time='2025-08-02 10:00:00')
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("UPDATE summary_gradding_log SET result = 1 WHERE log_id = 2")
+    assert latest_row(linebot_clean)["result"] == 1
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("DELETE FROM summary_gradding_log WHERE log_id = 2")
+    assert latest_row(linebot_clean)["log_id"] == 1
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("DELETE FROM summary_gradding_log WHERE log_id = 1")
+    assert latest_row(linebot_clean) is None
+
+
+def test_get_latest_log_id_is_a_primary_key_lookup(infra_seed_summary_grading_log, linebot_clean, repos):
+    infra_seed_summary_grading_log(student_ID='S001', context_title=COURSE, contents_name='C1')
+
+    with linebot_clean.cursor() as cur:
+        cur.execute("EXPLAIN SELECT log_id FROM summary_latest_log "
+                    "WHERE student_ID = 'S001' AND context_title = %s AND contents_name = 'C1'", (COURSE,))
+        plan = cur.fetchone()
+
+    assert plan["type"] == "const"
+    assert plan["key"] == "PRIMARY"
@@ -32,7 +32,7 @@ def test_message_register_flow(client, app, student_repo_stub, service_spies):
 
 
 @pytest.mark.usefixtures("linebot_mysql_truncate")
-def test_message_awaiting_leave_reason_flows_to_leave_service(client, app,
+def test_message_awaiting_leave_reason_flows_to_leave_service(client, app, container,
                                                               it_seed_student, student_repo_stub, chatbot_logger_spy,
                                                               user_state_spy, service_spies):
 
@@ -72,6 +72,8 @@ def test_message_awaiting_leave_reason_flows_to_leave_service(client, app,
         "student": student,
         "reason": reason,
         "reply_token": "test_reply_token_123",
+        # 課程 shell 跟著 session snapshot 傳進來，service 不用再查
+        "course": container.course_repo().get_course_shell(course_title),
     }
 
     assert any(m.get("message") ==
@@ -160,7 +162,8 @@ def test_message_awaiting_contents_name_flows_to_check_score(client, app, contai
         "reply_token": "test_reply_token_123",
         "target_content": text,
         "mistake_review_sheet_url": container.config.MISTAKE_REVIEW_SHEET_URL(),
-        "message_log_id": 1
+        "message_log_id": 1,
+        "course": container.course_repo().get_course_shell(course_title),
     }
 
 